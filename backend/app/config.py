@@ -50,6 +50,44 @@ class Settings(BaseSettings):
   
   max_upload_size: int = 1024 * 1024 * 1024
   
+  # Moteur de simulation
+  SIMULATION_WORKERS: int = int(os.getenv("SIMULATION_WORKERS", os.cpu_count() or 2))
+  SIMULATION_SANDBOX: bool = os.getenv("SIMULATION_SANDBOX", "True").lower() in ("true", "1", "yes")
+  SIMULATION_MAX_MEMORY_MB: int = int(os.getenv("SIMULATION_MAX_MEMORY_MB", 2048))
+  SIMULATION_MAX_CPU_SECONDS: int = int(os.getenv("SIMULATION_MAX_CPU_SECONDS", 120))
+  SIMULATION_WALL_TIMEOUT: float = float(os.getenv("SIMULATION_WALL_TIMEOUT", 180))
+  SIMULATION_QUEUE_WORKERS: int = int(os.getenv("SIMULATION_QUEUE_WORKERS", 2))
+  SIMULATION_TENANT_MAX_CONCURRENT: int = int(os.getenv("SIMULATION_TENANT_MAX_CONCURRENT", 0))
+  SIMULATION_QUEUE_AGING_SECONDS: float = float(os.getenv("SIMULATION_QUEUE_AGING_SECONDS", 30))
+  SIMULATION_LEASE_SECONDS: float = float(os.getenv("SIMULATION_LEASE_SECONDS", 120))
+  SIMULATION_BATCH_MAX_SIZE: int = int(os.getenv("SIMULATION_BATCH_MAX_SIZE", 10000))
+  SIMULATION_SCHEDULER_ENABLED: bool = os.getenv("SIMULATION_SCHEDULER_ENABLED", "True").lower() in ("true", "1", "yes")
+  SIMULATION_SCHEDULER_POLL_SECONDS: float = float(os.getenv("SIMULATION_SCHEDULER_POLL_SECONDS", 60))
+  SIMULATION_SCHEDULER_MAX_CONCURRENT: int = int(os.getenv("SIMULATION_SCHEDULER_MAX_CONCURRENT", 4))
+  SIMULATION_OFFPEAK_START: int = int(os.getenv("SIMULATION_OFFPEAK_START", 22))
+  SIMULATION_OFFPEAK_END: int = int(os.getenv("SIMULATION_OFFPEAK_END", 6))
+  SIMULATION_CHECKPOINT_INTERVAL: float = float(os.getenv("SIMULATION_CHECKPOINT_INTERVAL", 30))
+  SIMULATION_CHECKPOINT_DIR: str = os.getenv(
+    "SIMULATION_CHECKPOINT_DIR",
+    os.path.join(Path(__file__).resolve().parent.parent, "data", "checkpoints")
+  )
+  LOOKUP_TABLE_MAX_ROWS: int = int(os.getenv("LOOKUP_TABLE_MAX_ROWS", 1000000))
+  DISTRIBUTION_FIT_MAX_POINTS: int = int(os.getenv("DISTRIBUTION_FIT_MAX_POINTS", 10000000))
+  WORKFLOW_ANALYTICS_SYNC_MAX_ELEMENTS: int = int(os.getenv("WORKFLOW_ANALYTICS_SYNC_MAX_ELEMENTS", 2000))
+  WORKFLOW_INDEX_DEBOUNCE_SECONDS: float = float(os.getenv("WORKFLOW_INDEX_DEBOUNCE_SECONDS", 2))
+  WORKFLOW_REVISION_SNAPSHOT_INTERVAL: int = int(os.getenv("WORKFLOW_REVISION_SNAPSHOT_INTERVAL", 50))
+  WORKFLOW_STORAGE_COMPRESSION: str = os.getenv("WORKFLOW_STORAGE_COMPRESSION", "zlib")
+  WORKFLOW_STORAGE_MIGRATION_ENABLED: bool = os.getenv("WORKFLOW_STORAGE_MIGRATION_ENABLED", "True").lower() in ("true", "1", "yes")
+  WORKFLOW_STORAGE_MIGRATION_BATCH: int = int(os.getenv("WORKFLOW_STORAGE_MIGRATION_BATCH", 100))
+  LOOKUP_TABLES_DIR: str = os.getenv(
+    "LOOKUP_TABLES_DIR",
+    os.path.join(Path(__file__).resolve().parent.parent, "data", "lookup_tables")
+  )
+  SIMULATION_RESULTS_DIR: str = os.getenv(
+    "SIMULATION_RESULTS_DIR",
+    os.path.join(Path(__file__).resolve().parent.parent, "data", "simulation_results")
+  )
+  
   class Config:
       case_sensitive = True
       env_file = ".env"
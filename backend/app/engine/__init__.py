@@ -0,0 +1,31 @@
+from app.engine.graph import WorkflowGraph, workflow_references
+from app.engine.markov import MarkovChainAnalyzer
+from app.engine.formula import FormulaCompiler, FormulaError
+from app.engine.model import WorkflowModel
+from app.engine.evaluator import WorkflowEvaluator, WorkflowResolver, DictWorkflowResolver
+from app.engine.scenarios import ScenarioRunner
+from app.engine.montecarlo import MonteCarloRun
+from app.engine.optimizer import OptimizationRun
+from app.engine.executor import execute_job, job_deadline, SIMULATION_MODES
+from app.engine.tables import LookupTable, table_references
+
+# Pour faciliter les imports
+__all__ = [
+    'WorkflowGraph',
+    'workflow_references',
+    'MarkovChainAnalyzer',
+    'FormulaCompiler',
+    'FormulaError',
+    'WorkflowModel',
+    'WorkflowEvaluator',
+    'WorkflowResolver',
+    'DictWorkflowResolver',
+    'ScenarioRunner',
+    'MonteCarloRun',
+    'OptimizationRun',
+    'execute_job',
+    'job_deadline',
+    'SIMULATION_MODES',
+    'LookupTable',
+    'table_references'
+]
@@ -0,0 +1,261 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from app.engine.formula import sanitize_name
+from app.engine.graph import strongly_connected_components
+from app.engine.model import WorkflowModel
+
+# Types de nœuds qui composent le flux du processus (les nœuds de formule et
+# de scénario sont des panneaux de calcul, reliés ou non au flux)
+FLOW_NODE_TYPES = ('task', 'decision', 'event')
+
+
+def unreachable_nodes(model: WorkflowModel) -> List[str]:
+    """
+    Nœuds du flux qu'aucun chemin ne relie à un nœud de départ
+
+    Returns:
+        IDs des nœuds (vide si le workflow n'a pas de nœud de départ)
+    """
+    graph = model.graph
+    starts = graph.start_nodes()
+    if not starts:
+        return []
+    reached = set(graph.reachable_from(starts))
+    return [graph.node_ids[i] for i in range(len(graph))
+            if i not in reached and graph.node_type(i) in FLOW_NODE_TYPES]
+
+
+def analyze_model(model: WorkflowModel, outputs: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Analyse statique d'un modèle compilé pour un ensemble de variables demandées
+
+    Args:
+        model: Modèle compilé
+        outputs: Variables demandées (toutes si None)
+
+    Returns:
+        {'statements', 'evaluated', 'pruned_nodes', 'unused_variables',
+         'constant_variables', 'unreachable_nodes'} où 'pruned_nodes' liste les
+        nœuds dont aucune instruction n'est évaluée, 'unused_variables' les
+        variables déclarées qu'aucune formule ne lit et 'constant_variables' les
+        variables calculées repliées à la compilation
+    """
+    plan = model.plan(outputs)
+    evaluated = {k for block in plan.order for k in block}
+
+    node_statements: Dict[str, List[int]] = {}
+    for k, statement in enumerate(model.statements):
+        node_statements.setdefault(statement.node_id, []).append(k)
+    pruned_nodes = [node_id for node_id, indices in node_statements.items()
+                    if not any(k in evaluated for k in indices)]
+
+    read = set().union(*(s.reads for s in model.statements)) if model.statements else set()
+    requested = {sanitize_name(o) for o in outputs} if outputs is not None else set()
+    declared = set(model.defaults) | set(model.tables) | set(model.table_refs)
+    unused = sorted(declared - read - requested - model.outputs)
+
+    return {
+        'statements': len(model.statements),
+        'evaluated': plan.size,
+        'pruned_nodes': pruned_nodes,
+        'unused_variables': unused,
+        'constant_variables': dict(sorted(model.constants.items())),
+        'unreachable_nodes': unreachable_nodes(model)
+    }
+
+
+# Nombre maximal de sources du calcul d'intermédiarité : au-delà, l'intermédiarité
+# est estimée sur un échantillon de sources équiréparties (Brandes par pivots)
+BETWEENNESS_SAMPLES = 64
+
+# Nombre d'éléments retenus dans les classements (points chauds, goulots, boucles)
+ANALYTICS_TOP = 10
+
+
+def _node_summary(graph, i: int, **values) -> Dict[str, Any]:
+    return {'node_id': graph.node_ids[i], 'label': graph.node_data(i).get('label'),
+            'type': graph.node_type(i), **values}
+
+
+def _betweenness(graph, samples: int) -> List[float]:
+    """
+    Intermédiarité orientée non pondérée (algorithme de Brandes)
+
+    Exacte si le graphe a au plus `samples` nœuds, sinon estimée depuis
+    `samples` sources équiréparties puis extrapolée : O(samples * (V + E)).
+    """
+    n = len(graph)
+    sources = list(range(n)) if n <= samples else [k * n // samples for k in range(samples)]
+    scores = [0.0] * n
+    for s in sources:
+        stack = []
+        paths = [0] * n
+        paths[s] = 1
+        distance = [-1] * n
+        distance[s] = 0
+        parents: List[List[int]] = [[] for _ in range(n)]
+        queue = [s]
+        head = 0
+        while head < len(queue):
+            v = queue[head]
+            head += 1
+            stack.append(v)
+            for w, _ in graph.successors[v]:
+                if distance[w] < 0:
+                    distance[w] = distance[v] + 1
+                    queue.append(w)
+                if distance[w] == distance[v] + 1:
+                    paths[w] += paths[v]
+                    parents[w].append(v)
+        dependency = [0.0] * n
+        while stack:
+            w = stack.pop()
+            for v in parents[w]:
+                dependency[v] += paths[v] / paths[w] * (1 + dependency[w])
+            if w != s:
+                scores[w] += dependency[w]
+    scale = n / len(sources) if sources else 0.0
+    norm = (n - 1) * (n - 2) if n > 2 else 1
+    return [score * scale / norm for score in scores]
+
+
+def _longest_path(graph) -> List[int]:
+    """
+    Plus long chemin du graphe des composantes fortement connexes
+
+    Une boucle compte pour une étape (son premier nœud la représente) : le
+    calcul reste linéaire quel que soit le nombre de cycles.
+    """
+    n = len(graph)
+    adjacency = [[target for target, _ in graph.successors[i]] for i in range(n)]
+    components = strongly_connected_components(adjacency)
+    components.reverse()
+    component_of = [0] * n
+    for c, component in enumerate(components):
+        for i in component:
+            component_of[i] = c
+
+    # Ordre topologique : la longueur d'une composante dépend de ses successeurs
+    length = [1] * len(components)
+    following: List[Optional[int]] = [None] * len(components)
+    for c in range(len(components) - 1, -1, -1):
+        for i in components[c]:
+            for target, _ in graph.successors[i]:
+                d = component_of[target]
+                if d != c and length[d] + 1 > length[c]:
+                    length[c] = length[d] + 1
+                    following[c] = d
+    if not components:
+        return []
+    current: Optional[int] = max(range(len(components)), key=lambda c: length[c])
+    path = []
+    while current is not None:
+        path.append(min(components[current]))
+        current = following[current]
+    return path
+
+
+def _dependency_depth(model: WorkflowModel) -> Dict[str, int]:
+    """Profondeur de chaque variable calculée dans la chaîne de dépendances des formules"""
+    depth: Dict[str, int] = {}
+    for block in model.order:
+        level = 1 + max((depth.get(name, 0) for k in block for name in model.statements[k].reads), default=0)
+        for k in block:
+            for name in model.statements[k].writes:
+                depth[name] = max(depth.get(name, 0), level)
+    return depth
+
+
+def graph_analytics(model: WorkflowModel, top: int = ANALYTICS_TOP,
+                    samples: int = BETWEENNESS_SAMPLES) -> Dict[str, Any]:
+    """
+    Indicateurs structurels d'un workflow, calculés une fois par révision
+
+    Args:
+        model: Modèle compilé
+        top: Taille des classements
+        samples: Nombre maximal de sources du calcul d'intermédiarité
+
+    Returns:
+        {'nodes', 'edges', 'cycles', 'longest_path', 'hotspots', 'bottlenecks',
+         'variables'} : décomptes par type, boucles (composantes fortement
+        connexes de plus d'un nœud), plus long chemin, nœuds de plus fort
+        degré entrant/sortant, nœuds de plus forte intermédiarité et
+        profondeur de la chaîne de dépendances des variables
+    """
+    graph = model.graph
+    n = len(graph)
+
+    node_types: Dict[str, int] = {}
+    for i in range(n):
+        kind = graph.node_type(i) or 'default'
+        node_types[kind] = node_types.get(kind, 0) + 1
+    edge_types: Dict[str, int] = {}
+    for edge in graph.edges:
+        kind = edge.get('type') or 'default'
+        edge_types[kind] = edge_types.get(kind, 0) + 1
+
+    adjacency = [[target for target, _ in graph.successors[i]] for i in range(n)]
+    cycles = [sorted(component) for component in strongly_connected_components(adjacency)
+              if len(component) > 1 or component[0] in adjacency[component[0]]]
+    cycles.sort(key=len, reverse=True)
+
+    path = _longest_path(graph)
+
+    fan_in = sorted(range(n), key=lambda i: len(graph.predecessors[i]), reverse=True)[:top]
+    fan_out = sorted(range(n), key=lambda i: len(graph.successors[i]), reverse=True)[:top]
+
+    betweenness = _betweenness(graph, samples)
+    bottlenecks = sorted((i for i in range(n) if betweenness[i] > 0),
+                         key=lambda i: betweenness[i], reverse=True)[:top]
+
+    depth = _dependency_depth(model)
+    max_depth = max(depth.values(), default=0)
+
+    return {
+        'nodes': {'total': n, 'by_type': dict(sorted(node_types.items()))},
+        'edges': {'total': len(graph.edges), 'by_type': dict(sorted(edge_types.items())),
+                  'dangling': len(graph.dangling_edges)},
+        'cycles': {
+            'count': len(cycles),
+            'largest': len(cycles[0]) if cycles else 0,
+            'components': [[graph.node_ids[i] for i in cycle] for cycle in cycles[:top]]
+        },
+        'longest_path': {'length': len(path), 'nodes': [graph.node_ids[i] for i in path]},
+        'hotspots': {
+            'fan_in': [_node_summary(graph, i, degree=len(graph.predecessors[i]))
+                       for i in fan_in if len(graph.predecessors[i]) > 1],
+            'fan_out': [_node_summary(graph, i, degree=len(graph.successors[i]))
+                        for i in fan_out if len(graph.successors[i]) > 1]
+        },
+        'bottlenecks': {
+            'sampled': n > samples,
+            'nodes': [_node_summary(graph, i, score=round(betweenness[i], 6)) for i in bottlenecks]
+        },
+        'variables': {
+            'declared': len(model.declared),
+            'computed': len(model.outputs),
+            'statements': len(model.statements),
+            'dependency_depth': max_depth,
+            'deepest': sorted(name for name, d in depth.items() if d == max_depth)[:top]
+        }
+    }
+
+
+def variable_references(model: WorkflowModel) -> List[Tuple[str, str, str]]:
+    """
+    Références croisées des variables d'un modèle compilé
+
+    Returns:
+        Triplets (variable, node_id, rôle) sans doublon, où le rôle est
+        'defines' (variable déclarée dans le nœud), 'writes' (cible d'une
+        formule) ou 'reads' (lue par une formule ou un sous-workflow)
+    """
+    references: Dict[Tuple[str, str, str], None] = {}
+    for node_id, name in model.declarations:
+        references[(name, node_id, 'defines')] = None
+    for statement in model.statements:
+        for name in sorted(statement.writes if statement.formula is not None else ()):
+            references[(name, statement.node_id, 'writes')] = None
+        for name in sorted(statement.source_reads):
+            references[(name, statement.node_id, 'reads')] = None
+    return list(references)
@@ -0,0 +1,87 @@
+from typing import Any, Dict, Hashable, Optional
+from collections import OrderedDict
+import hashlib
+import threading
+import numpy as np
+
+
+class LRUCache:
+    """Cache LRU borné et thread-safe"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def hash_inputs(values: Dict[str, Any]) -> str:
+    """
+    Calcule l'empreinte d'un vecteur d'entrées (noms, formes et octets des tableaux)
+
+    Deux évaluations avec les mêmes entrées produisent la même empreinte, quel
+    que soit l'ordre d'insertion des variables.
+    """
+    digest = hashlib.sha1()
+    for name in sorted(values):
+        if hasattr(values[name], 'digest'):
+            # Table de correspondance : empreinte de son contenu
+            digest.update(name.encode('utf-8'))
+            digest.update(values[name].digest.encode('ascii'))
+            continue
+        array = np.ascontiguousarray(values[name], dtype=float)
+        digest.update(name.encode('utf-8'))
+        digest.update(str(array.shape).encode('ascii'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    Mémoïsation des modèles compilés et des résultats de sous-workflows
+
+    - modèles : clé (workflow_id, révision)
+    - résultats : clé (workflow_id, révisions, empreinte des entrées)
+    - tables téléversées : clé ID de la table (une table n'est jamais modifiée)
+    """
+
+    def __init__(self, max_models: int = 256, max_results: int = 4096, max_tables: int = 64):
+        self.models = LRUCache(max_models)
+        self.results = LRUCache(max_results)
+        self.tables = LRUCache(max_tables)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'model_hits': self.models.hits,
+            'model_misses': self.models.misses,
+            'result_hits': self.results.hits,
+            'result_misses': self.results.misses
+        }
+
+
+# Cache partagé par processus (chaque worker du pool possède le sien)
+default_cache = ModelCache()
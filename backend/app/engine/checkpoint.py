@@ -0,0 +1,129 @@
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+# Membre de l'archive contenant la partie JSON de l'état
+STATE_MEMBER = "__state__"
+
+
+def parameters_fingerprint(parameters: Dict[str, Any], revisions: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Empreinte d'un job : un point de reprise n'est valable que pour les mêmes
+    paramètres et les mêmes révisions du workflow et de ses sous-workflows
+
+    Args:
+        parameters: Paramètres du job
+        revisions: Révisions des workflows calculés {workflow_id: révision}
+    """
+    payload = json.dumps({'parameters': parameters or {}, 'revisions': revisions or {}},
+                         sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """
+    Écrit un point de reprise (remplacement atomique du précédent)
+
+    Les tableaux numpy de l'état sont stockés tels quels dans une archive .npz,
+    le reste (compteurs, état du générateur) en JSON dans le membre __state__.
+
+    Args:
+        path: Chemin du fichier
+        state: État à sauvegarder
+    """
+    arrays = {k: np.asarray(v) for k, v in state.items() if isinstance(v, np.ndarray)}
+    scalars = {k: v for k, v in state.items() if not isinstance(v, np.ndarray)}
+    scalars['saved_at'] = time.time()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, 'wb') as f:
+        np.savez(f, **arrays, **{STATE_MEMBER: np.array(json.dumps(scalars))})
+    os.replace(staging, path)
+
+
+def load_checkpoint(path: str, arrays: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Relit un point de reprise
+
+    Args:
+        path: Chemin du fichier
+        arrays: Charger aussi les tableaux (False : seulement la partie JSON)
+
+    Returns:
+        L'état, ou None si le fichier est absent ou illisible
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            state = json.loads(str(archive[STATE_MEMBER]))
+            if arrays:
+                state.update({k: archive[k] for k in archive.files if k != STATE_MEMBER})
+        return state
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def discard_checkpoint(path: str) -> None:
+    """Supprime un point de reprise (job terminé)"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Checkpointer:
+    """
+    Sauvegarde périodique de l'état d'un calcul itératif
+
+    Appelé après chaque itération (génération, lot de tirages), il n'écrit que
+    si `interval` secondes se sont écoulées depuis la dernière sauvegarde. Le
+    calcul doit exposer `state()` et `restore(state)`.
+    """
+
+    def __init__(self, path: str, interval: float, parameters: Dict[str, Any],
+                 revisions: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.interval = max(0.0, float(interval))
+        self.fingerprint = parameters_fingerprint(parameters, revisions)
+        self.last_saved = time.monotonic()
+
+    @classmethod
+    def from_job(cls, job: Dict[str, Any]) -> Optional['Checkpointer']:
+        spec = job.get('checkpoint')
+        if not spec:
+            return None
+        # Un workflow (ou sous-workflow) enregistré depuis la sauvegarde invalide le point de reprise
+        workflow = job.get('workflow') or {}
+        revisions = {workflow.get('id'): workflow.get('revision')}
+        for workflow_id, definition in (job.get('definitions') or {}).items():
+            revisions[workflow_id] = (definition or {}).get('revision')
+        return cls(spec['path'], spec.get('interval', 30), job.get('parameters') or {}, revisions)
+
+    def resume(self, run) -> bool:
+        """
+        Restaure l'état du dernier point de reprise compatible
+
+        Returns:
+            True si le calcul a été restauré
+        """
+        state = load_checkpoint(self.path)
+        if not state or state.get('fingerprint') != self.fingerprint:
+            return False
+        try:
+            run.restore(state)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def __call__(self, run) -> None:
+        if time.monotonic() - self.last_saved < self.interval:
+            return
+        state = run.state()
+        state['fingerprint'] = self.fingerprint
+        save_checkpoint(self.path, state)
+        self.last_saved = time.monotonic()
@@ -0,0 +1,63 @@
+from typing import Dict, Any
+import numpy as np
+
+# Lois prises en charge et paramètres attendus
+DISTRIBUTIONS = {
+    'normal': ('mean', 'std'),
+    'uniform': ('min', 'max'),
+    'triangular': ('min', 'mode', 'max'),
+    'lognormal': ('mu', 'sigma'),
+    'exponential': ('scale',),
+    'gamma': ('shape', 'scale'),
+    'weibull': ('shape', 'scale'),
+    'empirical': ('quantiles',),
+}
+
+
+def validate_distribution(spec: Dict[str, Any]) -> None:
+    """
+    Vérifie qu'une spécification de loi est complète
+
+    Raises:
+        ValueError: Si la loi est inconnue ou incomplète
+    """
+    kind = (spec or {}).get('type')
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"Loi de probabilité inconnue: {kind}")
+    missing = [p for p in DISTRIBUTIONS[kind] if spec.get(p) is None]
+    if missing:
+        raise ValueError(f"Paramètres manquants pour la loi {kind}: {', '.join(missing)}")
+
+
+def sample_distribution(spec: Dict[str, Any], rng: np.random.Generator, size: int) -> np.ndarray:
+    """
+    Tire `size` valeurs selon une spécification de loi
+
+    Args:
+        spec: Spécification {'type': ..., paramètres}
+        rng: Générateur NumPy
+        size: Nombre de tirages
+
+    Returns:
+        Tableau de forme (size,)
+    """
+    validate_distribution(spec)
+    kind = spec['type']
+    if kind == 'normal':
+        return rng.normal(float(spec['mean']), float(spec['std']), size)
+    if kind == 'uniform':
+        return rng.uniform(float(spec['min']), float(spec['max']), size)
+    if kind == 'triangular':
+        return rng.triangular(float(spec['min']), float(spec['mode']), float(spec['max']), size)
+    if kind == 'lognormal':
+        return rng.lognormal(float(spec['mu']), float(spec['sigma']), size)
+    if kind == 'exponential':
+        return rng.exponential(float(spec['scale']), size)
+    if kind == 'gamma':
+        return rng.gamma(float(spec['shape']), float(spec['scale']), size)
+    if kind == 'weibull':
+        return float(spec['scale']) * rng.weibull(float(spec['shape']), size)
+    # Loi empirique : interpolation inverse dans une table de quantiles équirépartis
+    quantiles = np.asarray(spec['quantiles'], dtype=float)
+    levels = np.linspace(0.0, 1.0, len(quantiles))
+    return np.interp(rng.random(size), levels, quantiles)
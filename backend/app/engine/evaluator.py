@@ -0,0 +1,268 @@
+from typing import List, Dict, Any, Optional, Set, Iterable, Tuple
+import numpy as np
+from app.engine.cache import ModelCache, default_cache, hash_inputs
+from app.engine.formula import FormulaError, as_series
+from app.engine.graph import workflow_references
+from app.engine.model import WorkflowModel, Statement
+from app.engine.tables import LookupTable
+
+# Profondeur maximale d'imbrication des sous-workflows
+MAX_REFERENCE_DEPTH = 16
+
+
+class WorkflowResolver:
+    """
+    Interface d'accès aux workflows référencés (workflowRef)
+
+    `get_revision` doit être peu coûteux : il est appelé à chaque évaluation
+    pour valider les entrées du cache, alors que `get_definition` (qui charge
+    les nœuds et arêtes) ne l'est qu'en cas d'absence dans le cache.
+    """
+
+    def get_revision(self, workflow_id: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def get_definition(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Retourne {'nodes', 'edges', 'revision'} ou None si le workflow n'existe pas"""
+        raise NotImplementedError
+
+    def get_table(self, table_id: str) -> Optional[LookupTable]:
+        """Retourne une table téléversée (variable.tableId) ou None si elle n'existe pas"""
+        return None
+
+    def allows_table(self, table_id: str) -> bool:
+        """
+        Indique si les workflows résolus peuvent utiliser une table
+
+        Vérifié avant le cache des tables, partagé entre tous les workflows du processus.
+        """
+        return True
+
+
+class DictWorkflowResolver(WorkflowResolver):
+    """Résolveur en mémoire, utilisé par les workers qui n'ont pas accès à la base"""
+
+    def __init__(self, definitions: Dict[str, Dict[str, Any]],
+                 tables: Optional[Dict[str, LookupTable]] = None):
+        self.definitions = definitions or {}
+        self.tables = tables or {}
+
+    def get_revision(self, workflow_id: str) -> Optional[int]:
+        definition = self.definitions.get(workflow_id)
+        return definition.get('revision') if definition else None
+
+    def get_definition(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        return self.definitions.get(workflow_id)
+
+    def get_table(self, table_id: str) -> Optional[LookupTable]:
+        return self.tables.get(table_id)
+
+    def allows_table(self, table_id: str) -> bool:
+        return table_id in self.tables
+
+
+class WorkflowEvaluator:
+    """
+    Évalue la couche de calcul d'un workflow, sous-workflows compris
+
+    Les valeurs sont des tableaux (scénarios, périodes) : une même évaluation
+    calcule tous les scénarios à la fois. Les sous-workflows sont compilés une
+    fois par (workflow, révision) et évalués une fois par vecteur d'entrées
+    distinct, grâce au cache partagé.
+    """
+
+    def __init__(self, resolver: Optional[WorkflowResolver] = None, cache: Optional[ModelCache] = None,
+                 max_iterations: int = 100, tolerance: float = 1e-9):
+        self.resolver = resolver
+        self.cache = cache or default_cache
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    def compile(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                workflow_id: Optional[str] = None, revision: Optional[int] = None,
+                errors: Optional[List[Tuple[Optional[str], FormulaError]]] = None,
+                _visiting: Optional[Set[str]] = None) -> WorkflowModel:
+        """
+        Compile un workflow en résolvant l'interface de ses sous-workflows
+
+        Args:
+            errors: Si fourni, les erreurs de compilation y sont ajoutées
+                    (couples (node_id, erreur)) au lieu d'être levées
+
+        Raises:
+            FormulaError: En cas de formule invalide ou de sous-workflow introuvable/cyclique
+        """
+        visiting = set(_visiting or ())
+        if workflow_id:
+            visiting.add(workflow_id)
+
+        interfaces = {}
+        child_revisions = {}
+        for ref in workflow_references(nodes):
+            try:
+                if ref in visiting:
+                    raise FormulaError(f"Référence circulaire vers le workflow {ref}")
+                child = self.load(ref, visiting)
+            except FormulaError as e:
+                if errors is None:
+                    raise
+                node_id = next(str(node.get('id')) for node in nodes
+                               if str((node.get('data') or {}).get('workflowRef')) == ref)
+                errors.append((node_id, e))
+                continue
+            interfaces[ref] = (child.inputs, child.outputs)
+            child_revisions[ref] = child.revision
+
+        model = WorkflowModel(nodes, edges, workflow_id, revision, interfaces, errors)
+        model.child_revisions = child_revisions
+        return model
+
+    def load(self, workflow_id: str, _visiting: Optional[Set[str]] = None) -> WorkflowModel:
+        """
+        Retourne le modèle compilé d'un workflow référencé (depuis le cache si à jour)
+
+        Raises:
+            FormulaError: Si le workflow est introuvable
+        """
+        if self.resolver is None:
+            raise FormulaError(f"Impossible de résoudre le workflow référencé {workflow_id}")
+
+        revision = self.resolver.get_revision(workflow_id)
+        model = self.cache.models.get((workflow_id, revision))
+        if model is not None and self._children_up_to_date(model):
+            return model
+
+        definition = self.resolver.get_definition(workflow_id)
+        if definition is None:
+            raise FormulaError(f"Workflow référencé introuvable: {workflow_id}")
+
+        model = self.compile(definition.get('nodes') or [], definition.get('edges') or [],
+                             workflow_id, definition.get('revision'), _visiting=_visiting)
+        self.cache.models.put((workflow_id, model.revision), model)
+        return model
+
+    def load_definition(self, definition: Dict[str, Any]) -> WorkflowModel:
+        """
+        Retourne le modèle compilé d'une définition déjà chargée {'id', 'nodes', 'edges', 'revision'}
+
+        Évite une requête au résolveur pour le workflow principal lorsque
+        l'appelant dispose déjà de ses nœuds et arêtes.
+        """
+        workflow_id = definition['id']
+        model = self.cache.models.get((workflow_id, definition.get('revision')))
+        if model is not None and self._children_up_to_date(model):
+            return model
+
+        model = self.compile(definition.get('nodes') or [], definition.get('edges') or [],
+                             workflow_id, definition.get('revision'))
+        self.cache.models.put((workflow_id, model.revision), model)
+        return model
+
+    def evaluate(self, model: WorkflowModel, overrides: Optional[Dict[str, Any]] = None,
+                 outputs: Optional[Iterable[str]] = None, _depth: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Évalue un modèle compilé
+
+        Args:
+            model: Modèle compilé
+            overrides: Valeurs imposées (scalaires, listes ou tableaux (scénarios, périodes))
+            outputs: Variables demandées : seul leur cône de dépendances est
+                     évalué (tout le modèle si None)
+
+        Returns:
+            Scope final {variable: tableau}, limité au cône si `outputs` est fourni
+
+        Raises:
+            FormulaError: Si une formule échoue ou si une boucle ne converge pas
+        """
+        if _depth > MAX_REFERENCE_DEPTH:
+            raise FormulaError("Profondeur maximale de sous-workflows dépassée")
+
+        plan = model.plan(outputs)
+        if outputs is None:
+            scope: Dict[str, np.ndarray] = dict(model.defaults)
+            scope.update(model.tables)
+        else:
+            scope = {name: value for name, value in model.defaults.items() if name in plan.names}
+            scope.update({name: table for name, table in model.tables.items() if name in plan.names})
+        # Les tables téléversées hors du cône ne sont pas chargées
+        for name, table_id in model.table_refs.items():
+            if outputs is None or name in plan.names:
+                scope[name] = self.table(table_id)
+        for name, value in (overrides or {}).items():
+            # Une table transmise à un sous-workflow est conservée telle quelle
+            scope[name] = value if isinstance(value, LookupTable) else as_series(value)
+
+        for block in plan.order:
+            if not model.is_cyclic(block):
+                self._execute(model.statements[block[0]], scope, _depth)
+                continue
+            self._solve_fixed_point(model, block, scope, _depth)
+
+        return scope
+
+    def table(self, table_id: str) -> LookupTable:
+        """
+        Retourne une table téléversée (depuis le cache si déjà chargée)
+
+        Raises:
+            FormulaError: Si la table est introuvable ou inaccessible
+        """
+        if self.resolver is not None and not self.resolver.allows_table(table_id):
+            raise FormulaError(f"Table introuvable: {table_id}")
+        table = self.cache.tables.get(table_id)
+        if table is not None:
+            return table
+        table = self.resolver.get_table(table_id) if self.resolver is not None else None
+        if table is None:
+            raise FormulaError(f"Table introuvable: {table_id}")
+        self.cache.tables.put(table_id, table)
+        return table
+
+    def _execute(self, statement: Statement, scope: Dict[str, np.ndarray], depth: int) -> None:
+        if statement.formula is not None:
+            value = statement.formula.evaluate(scope)
+            if statement.formula.target:
+                scope[statement.formula.target] = as_series(value)
+            return
+
+        child = self.load(statement.workflow_ref)
+        inputs = {name: scope[name] for name in child.inputs if name in scope}
+        key = (child.workflow_id, child.fingerprint, hash_inputs(inputs))
+        outputs = self.cache.results.get(key)
+        if outputs is None:
+            child_scope = self.evaluate(child, inputs, _depth=depth + 1)
+            outputs = {name: child_scope[name] for name in child.outputs if name in child_scope}
+            for array in outputs.values():
+                array.setflags(write=False)
+            self.cache.results.put(key, outputs)
+        scope.update(outputs)
+
+    def _solve_fixed_point(self, model: WorkflowModel, block: List[int],
+                           scope: Dict[str, np.ndarray], depth: int) -> None:
+        """Itère un bloc de formules mutuellement dépendantes jusqu'à convergence"""
+        written = set().union(*(model.statements[k].writes for k in block))
+        # Les variables du cycle sans valeur par défaut partent de 0
+        for name in written:
+            if name not in scope:
+                scope[name] = as_series(0.0)
+        for _ in range(self.max_iterations):
+            previous = {name: scope.get(name) for name in written}
+            for k in block:
+                self._execute(model.statements[k], scope, depth)
+            if all(self._converged(previous[name], scope.get(name)) for name in written):
+                return
+        raise FormulaError(
+            f"Boucle de formules non convergente après {self.max_iterations} itérations "
+            f"(variables: {', '.join(sorted(written))})"
+        )
+
+    def _converged(self, before: Optional[np.ndarray], after: Optional[np.ndarray]) -> bool:
+        if before is None or after is None or before.shape != after.shape:
+            return before is after
+        return bool(np.all(np.abs(after - before) <= self.tolerance * (1 + np.abs(before))))
+
+    def _children_up_to_date(self, model: WorkflowModel) -> bool:
+        return all(self.resolver.get_revision(ref) == revision
+                   for ref, revision in model.child_revisions.items())
+
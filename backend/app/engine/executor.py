@@ -0,0 +1,241 @@
+from typing import List, Dict, Any, Optional
+import time
+from app.engine.analysis import analyze_model
+from app.engine.cache import ModelCache
+from app.engine.checkpoint import Checkpointer
+from app.engine.evaluator import WorkflowEvaluator, WorkflowResolver, DictWorkflowResolver
+from app.engine.formula import FormulaError, sanitize_name
+from app.engine.graph import WorkflowGraph
+from app.engine.markov import MarkovChainAnalyzer
+from app.engine.model import WorkflowModel, VARIABLE_NODE_TYPES
+from app.engine.montecarlo import MonteCarloRun, DEFAULT_PERCENTILES
+from app.engine.optimizer import OptimizationRun
+from app.engine.scenarios import ScenarioRunner
+from app.engine.sketch import quantile_sketch
+
+# Modes de simulation pris en charge par le moteur serveur
+SIMULATION_MODES = ('scenarios', 'markov', 'monte_carlo')
+
+
+def job_deadline(parameters: Dict[str, Any], started: Optional[float] = None) -> Optional[float]:
+    """
+    Convertit le paramètre 'deadline_ms' en échéance absolue (horodatage time.time())
+
+    Un horodatage absolu reste valable d'un processus à l'autre, contrairement
+    à une horloge monotone.
+    """
+    deadline_ms = (parameters or {}).get('deadline_ms')
+    if deadline_ms is None:
+        return None
+    return (started if started is not None else time.time()) + max(0.0, float(deadline_ms)) / 1000
+
+
+def execute_job(job: Dict[str, Any], resolver: Optional[WorkflowResolver] = None,
+                cache: Optional[ModelCache] = None) -> Dict[str, Any]:
+    """
+    Exécute une simulation ou une optimisation sans accès à la base
+
+    Fonction pure : le job porte la définition du workflow et, à défaut de
+    résolveur, celles de ses sous-workflows. Elle peut donc s'exécuter dans le
+    processus du serveur comme dans un processus isolé.
+
+    Args:
+        job: {'kind': 'simulation'|'optimization', 'workflow': {'id', 'nodes', 'edges', 'revision'},
+              'definitions': {id: définition}, 'tables': {id: LookupTable} (tables téléversées),
+              'parameters': {...}, 'deadline': horodatage ou None,
+              'checkpoint': {'path', 'interval'} facultatif (Monte Carlo et optimisation :
+              reprise depuis le dernier point de reprise, puis sauvegarde périodique)}
+        resolver: Résolveur des sous-workflows (par défaut sur job['definitions'])
+        cache: Cache de modèles (par défaut le cache du processus)
+
+    Returns:
+        {'status': 'completed'|'failed', 'partial', 'metrics', 'details', 'arrays'} pour une
+        simulation ('arrays' : tableaux volumineux {nom: ndarray}, tirages ou séries par période),
+        {'status', 'partial', 'suggestions'} pour une optimisation, ou
+        {'status': 'failed', 'error_message'} en cas d'erreur
+    """
+    parameters = job.get('parameters') or {}
+    deadline = job.get('deadline')
+    if resolver is None:
+        resolver = DictWorkflowResolver(job.get('definitions') or {}, job.get('tables'))
+    evaluator = WorkflowEvaluator(resolver, cache)
+
+    try:
+        if job.get('kind') == 'optimization':
+            return _run_optimization(evaluator, job['workflow'], parameters, deadline, Checkpointer.from_job(job))
+
+        mode = parameters.get('mode', 'scenarios')
+        if mode == 'markov':
+            return _run_markov(job['workflow'], parameters)
+        if mode == 'monte_carlo':
+            return _run_monte_carlo(evaluator, job['workflow'], parameters, deadline, Checkpointer.from_job(job))
+        return _run_scenarios(evaluator, job['workflow'], parameters, deadline)
+    except (FormulaError, ValueError) as e:
+        return {'status': 'failed', 'error_message': str(e)}
+
+
+def _run_scenarios(evaluator: WorkflowEvaluator, workflow: Dict[str, Any],
+                   parameters: Dict[str, Any], deadline: Optional[float]) -> Dict[str, Any]:
+    """Scénarios de stress : cas de base puis scénarios dans l'ordre, jusqu'à l'échéance"""
+    model = evaluator.load_definition(workflow)
+    outcome = ScenarioRunner.run(
+        evaluator,
+        model,
+        scenarios=parameters.get('scenarios'),
+        reference_variable=parameters.get('reference_variable'),
+        threshold=parameters.get('threshold'),
+        tracked_variables=parameters.get('tracked_variables'),
+        deadline=deadline
+    )
+
+    results = outcome['results']
+    margins = [r['margin'] for r in results]
+    partial = outcome['completed'] < outcome['total']
+    metrics = {
+        'mode': 'scenarios',
+        'partial': partial,
+        'reference_variable': outcome['reference_variable'],
+        'threshold': outcome['threshold'],
+        'scenario_count': len(results),
+        'scenarios_total': outcome['total'] + 1,
+        'resilient_count': sum(1 for r in results if r['isResilient']),
+        'base_value': margins[0],
+        'worst_value': min(margins)
+    }
+    # Cône de dépendances évalué (variable de référence et variables suivies)
+    metrics['analysis'] = analyze_model(
+        model, [outcome['reference_variable']] + list(parameters.get('tracked_variables') or [])
+    )
+
+    # Distributions sur l'ensemble des scénarios, pour comparer des simulations
+    sketches = {name: quantile_sketch([r['variables'][name] for r in results]) for name in outcome['series']}
+    sketches[sanitize_name(outcome['reference_variable'])] = quantile_sketch(margins)
+    metrics['sketches'] = sketches
+
+    arrays = {f"series.{name}": values for name, values in outcome['series'].items()}
+    return {'status': 'completed', 'partial': partial, 'metrics': metrics, 'details': results, 'arrays': arrays}
+
+
+def _run_markov(workflow: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyse de chaîne de Markov absorbante (résolution exacte, jamais partielle)"""
+    graph = WorkflowGraph(workflow.get('nodes') or [], workflow.get('edges') or [])
+    analysis = MarkovChainAnalyzer.analyze(graph, parameters.get('start_nodes'))
+
+    metrics = {
+        'mode': 'markov',
+        'partial': False,
+        'expected_cost': analysis['expected_cost'],
+        'expected_duration': analysis['expected_duration'],
+        'expected_steps': analysis['expected_steps'],
+        'end_probabilities': analysis['end_probabilities'],
+        'transient_states': analysis['transient_states'],
+        'absorbing_states': analysis['absorbing_states']
+    }
+
+    # Détail par nœud visité, utile pour repérer les tâches reprises en boucle
+    details = []
+    for node_id, visits in analysis['expected_visits'].items():
+        i = graph.index[node_id]
+        details.append({
+            'node_id': node_id,
+            'type': graph.node_type(i),
+            'label': graph.node_data(i).get('label'),
+            'expected_visits': visits,
+            'expected_cost': visits * graph.numeric_attribute(i, 'cost'),
+            'expected_duration': visits * graph.numeric_attribute(i, 'duration')
+        })
+    return {'status': 'completed', 'partial': False, 'metrics': metrics, 'details': details}
+
+
+def _run_monte_carlo(evaluator: WorkflowEvaluator, workflow: Dict[str, Any],
+                     parameters: Dict[str, Any], deadline: Optional[float],
+                     checkpointer: Optional[Checkpointer] = None) -> Dict[str, Any]:
+    """Monte Carlo : centiles (avec intervalles de confiance) des tirages obtenus avant l'échéance"""
+    model = evaluator.load_definition(workflow)
+    run = MonteCarloRun(
+        evaluator,
+        model,
+        distributions=parameters.get('distributions'),
+        outputs=parameters.get('outputs'),
+        samples=parameters.get('samples', 10000),
+        batch_size=parameters.get('batch_size', 1000),
+        seed=parameters.get('seed')
+    )
+    resumed = run.completed if checkpointer and checkpointer.resume(run) else 0
+    run.run(deadline, checkpointer)
+
+    summary = run.summary(parameters.get('percentiles') or DEFAULT_PERCENTILES)
+    metrics = {
+        'mode': 'monte_carlo',
+        'partial': not run.done,
+        'samples': run.completed,
+        'samples_target': run.target,
+        'resumed_samples': resumed,
+        'uncertain_variables': sorted(run.inputs),
+        'outputs': {row['variable']: {'mean': row['mean'], 'std': row['std'], 'mean_ci': row['mean_ci']}
+                    for row in summary},
+        'sketches': {name: quantile_sketch(run.values(name)) for name in run.outputs},
+        'analysis': analyze_model(model, run.outputs)
+    }
+    arrays = {f"samples.{name}": run.values(name) for name in run.outputs}
+    return {'status': 'completed', 'partial': not run.done, 'metrics': metrics, 'details': summary, 'arrays': arrays}
+
+
+def _run_optimization(evaluator: WorkflowEvaluator, workflow: Dict[str, Any],
+                      parameters: Dict[str, Any], deadline: Optional[float],
+                      checkpointer: Optional[Checkpointer] = None) -> Dict[str, Any]:
+    """Optimisation : meilleur point trouvé avant l'échéance, converti en suggestions"""
+    if not parameters.get('objective'):
+        raise ValueError("Paramètre 'objective' requis pour l'optimisation")
+
+    model = evaluator.load_definition(workflow)
+    run = OptimizationRun(
+        evaluator,
+        model,
+        variables=parameters.get('variables') or [],
+        objective=parameters['objective'],
+        maximize=parameters.get('maximize', True),
+        constraints=parameters.get('constraints'),
+        generations=parameters.get('generations', 50),
+        population=parameters.get('population', 32),
+        seed=parameters.get('seed')
+    )
+    resumed = run.generation if checkpointer and checkpointer.resume(run) else 0
+    run.run(deadline, checkpointer)
+
+    result = run.result()
+    result['partial'] = not run.done
+    result['resumed_from_generation'] = resumed
+    return {
+        'status': 'completed',
+        'partial': not run.done,
+        'suggestions': build_suggestions(model, result)
+    }
+
+
+def build_suggestions(model: WorkflowModel, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Une suggestion par variable dont la valeur optimale diffère de la valeur actuelle"""
+    owners = {}
+    graph = model.graph
+    for i in range(len(graph)):
+        if graph.node_type(i) not in VARIABLE_NODE_TYPES:
+            continue
+        for variable in graph.node_data(i).get('variables') or []:
+            if variable.get('name'):
+                owners.setdefault(sanitize_name(variable['name']), graph.node_ids[i])
+
+    impact = {result['objective']: result['improvement'] or 0.0}
+    suggestions = []
+    for name, best in result['best_point'].items():
+        current = result['baseline_point'][name]
+        if abs(best - current) <= 1e-9 * (1 + abs(current)):
+            continue
+        suggestions.append({
+            'id': f"opt-{name}",
+            'type': 'parameter_tuning',
+            'node_id': owners.get(name),
+            'description': f"Ajuster {name} de {current:g} à {best:g}",
+            'impact': impact,
+            'details': result
+        })
+    return suggestions
@@ -0,0 +1,150 @@
+from typing import Any
+import numpy as np
+
+# Résolution de l'IRR par la méthode de Newton
+IRR_MAX_ITERATIONS = 100
+IRR_TOLERANCE = 1e-10
+
+
+def _float(value: Any) -> np.ndarray:
+    return np.asarray(value, dtype=float)
+
+
+def _series(value: Any) -> np.ndarray:
+    """Tableau 2D (scénarios, périodes), même convention que formula.as_series (qui importe ce module)"""
+    return np.atleast_2d(_float(value))
+
+
+def _growth(rate: np.ndarray, nper: np.ndarray) -> np.ndarray:
+    """(1 + rate) ** nper"""
+    return np.exp(nper * np.log1p(rate))
+
+
+def _annuity_factor(rate: np.ndarray, nper: np.ndarray) -> np.ndarray:
+    """((1 + rate) ** nper - 1) / rate, précis pour les petits taux et égal à nper pour un taux nul"""
+    safe = np.where(rate == 0, 1.0, rate)
+    return np.where(rate == 0, nper, np.expm1(nper * np.log1p(rate)) / safe)
+
+
+def _discount_factors(rate: Any, periods: int) -> np.ndarray:
+    """Facteurs d'actualisation 1 / (1 + rate) ** t pour t = 0 .. periods - 1"""
+    return np.power(1 + _float(rate), -np.arange(periods, dtype=float))
+
+
+def npv(rate, cashflows):
+    """
+    Valeur actuelle nette d'une série de flux (un flux par période, le premier en t = 0)
+
+    Args:
+        rate: Taux d'actualisation par période (scalaire ou un taux par scénario)
+        cashflows: Flux (scénarios, périodes)
+
+    Returns:
+        Tableau (scénarios, 1)
+    """
+    cashflows = _series(cashflows)
+    return np.sum(cashflows * _discount_factors(rate, cashflows.shape[-1]), axis=-1, keepdims=True)
+
+
+def irr(cashflows, guess=0.1):
+    """
+    Taux de rendement interne d'une série de flux, pour tous les scénarios à la fois
+
+    Méthode de Newton vectorisée : chaque itération évalue la VAN et sa dérivée
+    pour toutes les lignes en une passe ; les lignes convergées sont figées.
+    Le résultat est NaN pour les séries sans changement de signe ou lorsque la
+    méthode ne converge pas.
+
+    Args:
+        cashflows: Flux (scénarios, périodes), le premier en t = 0
+        guess: Taux initial
+
+    Returns:
+        Tableau (scénarios, 1)
+    """
+    cashflows = _series(cashflows)
+    periods = np.arange(cashflows.shape[-1], dtype=float)
+    rate = np.full((cashflows.shape[0], 1), float(guess))
+    active = np.ones(rate.shape, dtype=bool)
+
+    for _ in range(IRR_MAX_ITERATIONS):
+        factors = np.power(1 + rate, -periods)
+        value = np.sum(cashflows * factors, axis=-1, keepdims=True)
+        derivative = np.sum(-periods * cashflows * factors / (1 + rate), axis=-1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(active & (derivative != 0), value / derivative, 0.0)
+        # Le taux reste strictement supérieur à -100 %
+        rate = np.where(active, np.maximum(rate - step, -1 + 1e-9), rate)
+        active &= np.abs(step) > IRR_TOLERANCE * (1 + np.abs(rate))
+        if not active.any():
+            break
+
+    has_root = (cashflows.min(axis=-1, keepdims=True) < 0) & (cashflows.max(axis=-1, keepdims=True) > 0)
+    return np.where(has_root & ~active & np.isfinite(rate), rate, np.nan)
+
+
+def pmt(rate, nper, pv, fv=0):
+    """
+    Versement périodique d'un emprunt ou d'une épargne (conventions de signe des tableurs)
+
+    Un emprunt reçu (pv > 0) donne un versement négatif. Versements en fin de période.
+    """
+    rate, nper = _float(rate), _float(nper)
+    return -(_float(pv) * _growth(rate, nper) + _float(fv)) / _annuity_factor(rate, nper)
+
+
+def fv(rate, nper, pmt, pv=0):
+    """Valeur future d'une série de versements et d'un capital initial (conventions des tableurs)"""
+    rate, nper = _float(rate), _float(nper)
+    return -(_float(pv) * _growth(rate, nper) + _float(pmt) * _annuity_factor(rate, nper))
+
+
+def pv(rate, nper, pmt, fv=0):
+    """Valeur actuelle d'une série de versements et d'une valeur future (conventions des tableurs)"""
+    rate, nper = _float(rate), _float(nper)
+    return -(_float(fv) + _float(pmt) * _annuity_factor(rate, nper)) / _growth(rate, nper)
+
+
+def ipmt(rate, per, nper, pv):
+    """Part d'intérêts du versement de la période `per` (1 à nper) d'un emprunt à annuités constantes"""
+    rate = _float(rate)
+    payment = pmt(rate, nper, pv)
+    return fv(rate, _float(per) - 1, payment, pv) * rate
+
+
+def ppmt(rate, per, nper, pv):
+    """Part de capital du versement de la période `per` (1 à nper) d'un emprunt à annuités constantes"""
+    return pmt(rate, nper, pv) - ipmt(rate, per, nper, pv)
+
+
+def amortization(rate, nper, principal):
+    """
+    Tableau d'amortissement : capital restant dû après chaque versement
+
+    Args:
+        rate: Taux par période (scalaire ou un taux par scénario)
+        nper: Nombre de versements (entier, commun à tous les scénarios)
+        principal: Capital emprunté (scalaire ou un montant par scénario)
+
+    Returns:
+        Tableau (scénarios, nper)
+    """
+    count = int(np.max(nper))
+    if count <= 0:
+        raise ValueError("amortization : le nombre de versements doit être positif")
+    rate = _series(rate)[:, :1]
+    principal = _series(principal)[:, :1]
+    periods = np.arange(1, count + 1, dtype=float)
+    payment = pmt(rate, count, principal)
+    return -fv(rate, periods, payment, principal)
+
+
+def discount(rate, values):
+    """Valeurs actualisées période par période : values[t] / (1 + rate) ** t"""
+    values = _series(values)
+    return values * _discount_factors(rate, values.shape[-1])
+
+
+def cumsum(values):
+    """Cumul des valeurs le long des périodes"""
+    return np.cumsum(_series(values), axis=-1)
@@ -0,0 +1,257 @@
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import hashlib
+import numpy as np
+from scipy import special
+from app.engine.distributions import DISTRIBUTIONS
+
+# Lois ajustées par défaut (toutes celles dont le maximum de vraisemblance est calculable)
+FIT_CANDIDATES = ('normal', 'lognormal', 'exponential', 'gamma', 'weibull', 'uniform')
+
+# Nombre de quantiles équirépartis de la loi empirique (pas de 0,1 %)
+EMPIRICAL_QUANTILES = 1001
+
+# Écart de Kolmogorov-Smirnov toléré pour retenir une loi paramétrique : au-delà
+# de la valeur critique à 5 % (1,358 / √n), qui devient très stricte sur de gros
+# historiques, un écart absolu de 2 % entre fonctions de répartition reste accepté
+KS_CRITICAL = 1.358
+KS_TOLERANCE = 0.02
+
+# En deçà, le test de Kolmogorov-Smirnov n'écarte presque aucune loi : la méthode
+# 'auto' retient alors la loi empirique plutôt qu'une loi paramétrique
+FIT_MIN_PARAMETRIC_SAMPLES = 30
+
+# Version des règles de sélection, incluse dans la clé du cache des ajustements
+FIT_VERSION = 2
+
+# Résolution des paramètres de forme (gamma, Weibull) par la méthode de Newton
+SHAPE_MAX_ITERATIONS = 50
+SHAPE_TOLERANCE = 1e-10
+
+
+def dataset_digest(data: Any) -> str:
+    """Empreinte d'une série de données (clé du cache des ajustements)"""
+    values = np.ascontiguousarray(np.asarray(data, dtype=float).reshape(-1))
+    return hashlib.sha256(values.tobytes()).hexdigest()
+
+
+class _Statistics:
+    """Statistiques suffisantes calculées une fois, partagées par toutes les lois candidates"""
+
+    def __init__(self, data: np.ndarray):
+        self.sorted = np.sort(data)
+        self.n = data.size
+        self.mean = float(np.mean(data))
+        self.std = float(np.std(data))
+        self.min = float(self.sorted[0])
+        self.max = float(self.sorted[-1])
+        self.positive = self.min > 0
+        if self.positive:
+            self.log = np.log(data)
+            self.log_sum = float(np.sum(self.log))
+            self.log_mean = self.log_sum / self.n
+            self.log_std = float(np.std(self.log))
+
+
+def _fit_normal(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if s.std <= 0:
+        return None
+    loglik = -0.5 * s.n * (np.log(2 * np.pi * s.std ** 2) + 1)
+    return {'mean': s.mean, 'std': s.std}, loglik
+
+
+def _fit_lognormal(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if not s.positive or s.log_std <= 0:
+        return None
+    loglik = -0.5 * s.n * (np.log(2 * np.pi * s.log_std ** 2) + 1) - s.log_sum
+    return {'mu': s.log_mean, 'sigma': s.log_std}, loglik
+
+
+def _fit_exponential(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if s.min < 0 or s.mean <= 0:
+        return None
+    return {'scale': s.mean}, -s.n * (np.log(s.mean) + 1)
+
+
+def _fit_uniform(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if s.max <= s.min:
+        return None
+    return {'min': s.min, 'max': s.max}, -s.n * np.log(s.max - s.min)
+
+
+def _fit_gamma(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if not s.positive or s.std <= 0:
+        return None
+    # log(k) - ψ(k) = log(moyenne) - moyenne(log x), initialisé par l'approximation de Minka
+    target = np.log(s.mean) - s.log_mean
+    if target <= 0:
+        return None
+    shape = (3 - target + np.sqrt((target - 3) ** 2 + 24 * target)) / (12 * target)
+    for _ in range(SHAPE_MAX_ITERATIONS):
+        step = (np.log(shape) - special.digamma(shape) - target) / (1 / shape - special.polygamma(1, shape))
+        shape = max(shape - step, shape / 10)
+        if abs(step) < SHAPE_TOLERANCE * shape:
+            break
+    scale = s.mean / shape
+    loglik = ((shape - 1) * s.log_sum - s.n * s.mean / scale
+              - s.n * shape * np.log(scale) - s.n * special.gammaln(shape))
+    return {'shape': float(shape), 'scale': float(scale)}, float(loglik)
+
+
+def _fit_weibull(s: _Statistics) -> Optional[Tuple[Dict[str, float], float]]:
+    if not s.positive or s.log_std <= 0:
+        return None
+    # Équation du maximum de vraisemblance en k, sur log(x / max) pour éviter les débordements
+    log_scaled = s.log - np.log(s.max)
+    shape = 1.2 / s.log_std
+    for _ in range(SHAPE_MAX_ITERATIONS):
+        powered = np.exp(shape * log_scaled)
+        a = np.sum(powered)
+        b = np.sum(powered * log_scaled)
+        c = np.sum(powered * log_scaled ** 2)
+        value = 1 / shape + s.log_mean - np.log(s.max) - b / a
+        derivative = -1 / shape ** 2 - (c * a - b * b) / a ** 2
+        step = value / derivative
+        shape = max(shape - step, shape / 10)
+        if abs(step) < SHAPE_TOLERANCE * shape:
+            break
+    powered = np.exp(shape * log_scaled)
+    scale = s.max * float(np.mean(powered)) ** (1 / shape)
+    loglik = (s.n * np.log(shape) - s.n * shape * np.log(scale)
+              + (shape - 1) * s.log_sum - s.n)
+    return {'shape': float(shape), 'scale': float(scale)}, float(loglik)
+
+
+def _cdf(kind: str, params: Dict[str, float], x: np.ndarray) -> np.ndarray:
+    if kind == 'normal':
+        return special.ndtr((x - params['mean']) / params['std'])
+    if kind == 'lognormal':
+        return special.ndtr((np.log(x) - params['mu']) / params['sigma'])
+    if kind == 'exponential':
+        return -np.expm1(-x / params['scale'])
+    if kind == 'uniform':
+        return np.clip((x - params['min']) / (params['max'] - params['min']), 0.0, 1.0)
+    if kind == 'gamma':
+        return special.gammainc(params['shape'], x / params['scale'])
+    return -np.expm1(-np.power(x / params['scale'], params['shape']))
+
+
+_FITTERS: Dict[str, Callable[[_Statistics], Optional[Tuple[Dict[str, float], float]]]] = {
+    'normal': _fit_normal,
+    'lognormal': _fit_lognormal,
+    'exponential': _fit_exponential,
+    'gamma': _fit_gamma,
+    'weibull': _fit_weibull,
+    'uniform': _fit_uniform,
+}
+
+
+def ks_statistic(sorted_data: np.ndarray, cdf: np.ndarray) -> float:
+    """Statistique de Kolmogorov-Smirnov entre la fonction de répartition empirique et une loi"""
+    n = sorted_data.size
+    upper = np.arange(1, n + 1, dtype=float) / n
+    return float(max(np.max(upper - cdf), np.max(cdf - (upper - 1 / n))))
+
+
+def empirical_quantiles(sorted_data: np.ndarray, count: int = EMPIRICAL_QUANTILES) -> List[float]:
+    """Table de `count` quantiles équirépartis (interpolation linéaire entre observations triées)"""
+    position = np.linspace(0.0, sorted_data.size - 1, count)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, sorted_data.size - 1)
+    fraction = position - low
+    return (sorted_data[low] + fraction * (sorted_data[high] - sorted_data[low])).tolist()
+
+
+def fit_distribution(data: Any, candidates: Optional[List[str]] = None, method: str = 'auto') -> Dict[str, Any]:
+    """
+    Ajuste des lois de probabilité à une série historique
+
+    Chaque loi candidate est ajustée par maximum de vraisemblance, en forme
+    close ou par une méthode de Newton sur des sommes vectorisées (O(n) par
+    itération) ; la série n'est triée qu'une fois, pour les tests de
+    Kolmogorov-Smirnov et la table de quantiles.
+
+    La loi retenue est celle de plus faible AIC parmi celles que le test de
+    Kolmogorov-Smirnov n'écarte pas ; si toutes sont écartées, ou si la série
+    compte moins de FIT_MIN_PARAMETRIC_SAMPLES observations, la loi
+    empirique (rééchantillonnage de la table de quantiles) est retenue. Une
+    série constante reçoit une loi dégénérée (loi empirique d'une seule
+    valeur), quelle que soit la méthode : aucune loi paramétrique ne s'y
+    ajuste.
+
+    Args:
+        data: Observations
+        candidates: Lois à essayer (par défaut FIT_CANDIDATES)
+        method: 'auto', 'parametric' (meilleure AIC, sans repli empirique ni taille minimale) ou 'empirical'
+
+    Returns:
+        {'distribution': spécification au format de `sample_distribution`,
+         'selected', 'count', 'degenerate', 'ks_threshold',
+         'candidates': [{'type', 'parameters', 'log_likelihood', 'aic', 'ks'}]}
+
+    Raises:
+        ValueError: Si la série est trop courte, contient des valeurs non finies,
+                    ou si une loi candidate est inconnue
+    """
+    if method not in ('auto', 'parametric', 'empirical'):
+        raise ValueError(f"Méthode d'ajustement inconnue: {method}")
+    values = np.asarray(data, dtype=float).reshape(-1)
+    if values.size < 2:
+        raise ValueError("Au moins deux observations sont nécessaires pour ajuster une loi")
+    if not np.all(np.isfinite(values)):
+        raise ValueError("La série contient des valeurs non numériques ou infinies")
+    candidates = list(candidates or FIT_CANDIDATES)
+    unknown = [c for c in candidates if c not in _FITTERS]
+    if unknown:
+        raise ValueError(f"Lois non ajustables: {', '.join(unknown)} (disponibles: {', '.join(FIT_CANDIDATES)})")
+
+    stats = _Statistics(values)
+    threshold = max(KS_CRITICAL / np.sqrt(stats.n), KS_TOLERANCE)
+    if stats.max == stats.min:
+        return {
+            'distribution': {'type': 'empirical', 'quantiles': [stats.min]},
+            'selected': 'empirical',
+            'count': int(stats.n),
+            'degenerate': True,
+            'ks_threshold': float(threshold),
+            'candidates': []
+        }
+
+    empirical = {'type': 'empirical', 'quantiles': empirical_quantiles(stats.sorted)}
+    fits = []
+    if method != 'empirical':
+        for kind in candidates:
+            fitted = _FITTERS[kind](stats)
+            if fitted is None:
+                continue
+            params, loglik = fitted
+            if not (np.isfinite(loglik) and all(np.isfinite(v) for v in params.values())):
+                continue
+            fits.append({
+                'type': kind,
+                'parameters': {k: float(v) for k, v in params.items()},
+                'log_likelihood': float(loglik),
+                'aic': float(2 * len(DISTRIBUTIONS[kind]) - 2 * loglik),
+                'ks': ks_statistic(stats.sorted, _cdf(kind, params, stats.sorted))
+            })
+    fits.sort(key=lambda f: f['aic'])
+
+    if method == 'parametric':
+        accepted = fits
+    elif stats.n < FIT_MIN_PARAMETRIC_SAMPLES:
+        accepted = []
+    else:
+        accepted = [f for f in fits if f['ks'] <= threshold]
+    if accepted:
+        best = accepted[0]
+        distribution = {'type': best['type'], **best['parameters']}
+    else:
+        distribution = empirical
+
+    return {
+        'distribution': distribution,
+        'selected': distribution['type'],
+        'count': int(stats.n),
+        'degenerate': False,
+        'ks_threshold': float(threshold),
+        'candidates': fits
+    }
@@ -0,0 +1,315 @@
+from typing import List, Dict, Any, Optional, Set, Iterable
+import ast
+import copy
+import re
+import numpy as np
+from app.engine import finance, tables
+
+
+class FormulaError(ValueError):
+    """Erreur de syntaxe ou d'évaluation d'une formule"""
+
+
+# Nœuds AST autorisés dans le langage de formules (tout le reste est refusé)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple, ast.Subscript,
+    ast.Slice, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or, ast.Eq, ast.NotEq, ast.Lt,
+    ast.LtE, ast.Gt, ast.GtE
+)
+
+_ASSIGNMENT_RE = re.compile(r'^([^=<>!]+?)\s*=(?!=)\s*(.+)$')
+
+
+def sanitize_name(name: str) -> str:
+    """Remplace les espaces d'un nom de variable par des underscores (comme le client)"""
+    return re.sub(r'\s+', '_', str(name).strip())
+
+
+def as_series(value: Any) -> np.ndarray:
+    """
+    Convertit une valeur en tableau 2D (scénarios, périodes)
+
+    Convention du moteur : l'axe 0 porte les scénarios, l'axe 1 les périodes.
+    Un scalaire devient (1, 1), une liste (1, P).
+    """
+    array = np.asarray(value, dtype=float)
+    if array.ndim == 0:
+        return array.reshape(1, 1)
+    if array.ndim == 1:
+        return array.reshape(1, -1)
+    return array
+
+
+def _reduce_last(func):
+    def reducer(values):
+        return func(as_series(values), axis=-1, keepdims=True)
+    return reducer
+
+
+def _elementwise_or_reduce(binary, reduce):
+    def apply(*args):
+        if len(args) == 1:
+            return reduce(as_series(args[0]), axis=-1, keepdims=True)
+        result = args[0]
+        for arg in args[1:]:
+            result = binary(result, arg)
+        return result
+    return apply
+
+
+def _round(value, decimals=0):
+    return np.round(value, int(decimals))
+
+
+# Fonctions disponibles dans les formules (alignées sur le calculateur client)
+FUNCTIONS: Dict[str, Any] = {
+    'sum': _reduce_last(np.sum),
+    'avg': _reduce_last(np.mean),
+    'mean': _reduce_last(np.mean),
+    'min': _elementwise_or_reduce(np.minimum, np.min),
+    'max': _elementwise_or_reduce(np.maximum, np.max),
+    'round': _round,
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'pow': np.power,
+    'where': np.where,
+    'roi': lambda profit, investment: profit / investment * 100,
+    'cagr': lambda end, start, years: (np.power(end / start, 1 / years) - 1) * 100,
+    'npv': finance.npv,
+    # Fonctions financières du moteur serveur (scalaires, vecteurs de scénarios ou matrices de périodes)
+    'irr': finance.irr,
+    'pmt': finance.pmt,
+    'fv': finance.fv,
+    'pv': finance.pv,
+    'ipmt': finance.ipmt,
+    'ppmt': finance.ppmt,
+    'amortization': finance.amortization,
+    'discount': finance.discount,
+    'cumsum': finance.cumsum,
+    # Tables de correspondance (variables de type 'table')
+    'lookup': tables.lookup,
+    'interp': tables.interp,
+}
+
+
+class _VectorizeTransformer(ast.NodeTransformer):
+    """Réécrit les constructions scalaires de Python en équivalents vectoriels"""
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return ast.copy_location(ast.Call(
+            func=ast.Name(id='__where', ctx=ast.Load()),
+            args=[node.test, node.body, node.orelse], keywords=[]
+        ), node)
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        name = '__and' if isinstance(node.op, ast.And) else '__or'
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[result, value], keywords=[])
+        return ast.copy_location(result, node)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(ast.Call(
+                func=ast.Name(id='__not', ctx=ast.Load()), args=[node.operand], keywords=[]
+            ), node)
+        return node
+
+
+_INTERNALS = {
+    '__where': np.where,
+    '__and': np.logical_and,
+    '__or': np.logical_or,
+    '__not': np.logical_not,
+}
+
+
+def _evaluate_tree(tree: ast.Expression, scope: Dict[str, Any]) -> Any:
+    """Compile et évalue un arbre de formule déjà validé"""
+    vectorized = ast.fix_missing_locations(_VectorizeTransformer().visit(copy.deepcopy(tree)))
+    namespace = dict(FUNCTIONS)
+    namespace.update(_INTERNALS)
+    namespace.update(scope)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return eval(compile(vectorized, '<formula>', 'eval'), {'__builtins__': {}}, namespace)
+
+
+class _ConstantFolder(ast.NodeTransformer):
+    """
+    Remplace les sous-expressions constantes par leur valeur ('12 * 4' -> 48)
+
+    Seuls les résultats scalaires et finis sont repliés : une expression qui
+    produit un vecteur, une erreur ou une valeur infinie est laissée telle
+    quelle et se comportera à l'exécution exactement comme avant.
+    """
+
+    _FOLDABLE = (ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call)
+
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        if not isinstance(node, self._FOLDABLE):
+            return node
+        operands = [child for child in ast.iter_child_nodes(node)
+                    if not isinstance(child, (ast.operator, ast.unaryop, ast.boolop, ast.cmpop, ast.expr_context))]
+        if isinstance(node, ast.Call):
+            operands = operands[1:]
+        if not all(isinstance(o, ast.Constant) for o in operands):
+            return node
+        try:
+            value = np.asarray(_evaluate_tree(ast.Expression(body=node), {}), dtype=float)
+        except Exception:
+            return node
+        if value.size != 1 or not np.isfinite(value).all():
+            return node
+        return ast.copy_location(ast.Constant(value=float(value.reshape(-1)[0])), node)
+
+
+def fold_constants(tree: ast.Expression) -> ast.Expression:
+    """Replie les sous-expressions constantes d'un arbre de formule (sur une copie)"""
+    return ast.fix_missing_locations(_ConstantFolder().visit(copy.deepcopy(tree)))
+
+
+class _Substitution(ast.NodeTransformer):
+    def __init__(self, values: Dict[str, float]):
+        self.values = values
+
+    def visit_Name(self, node):
+        if node.id in self.values and node.id not in FUNCTIONS:
+            return ast.copy_location(ast.Constant(value=self.values[node.id]), node)
+        return node
+
+
+class CompiledFormula:
+    """Une ligne de formule compilée ('cible = expression' ou expression seule)"""
+
+    def __init__(self, source: str, target: Optional[str], tree: ast.Expression):
+        self.source = source
+        self.target = target
+        self.tree = tree
+        self.reads: Set[str] = {
+            node.id for node in ast.walk(tree)
+            if isinstance(node, ast.Name) and node.id not in FUNCTIONS
+        }
+        vectorized = ast.fix_missing_locations(_VectorizeTransformer().visit(copy.deepcopy(tree)))
+        self.code = compile(vectorized, '<formula>', 'eval')
+
+    @property
+    def constant(self) -> Optional[float]:
+        """Valeur de la formule si elle est constante après repliement (None sinon)"""
+        body = self.tree.body
+        if isinstance(body, ast.Constant) and isinstance(body.value, (int, float)):
+            return float(body.value)
+        return None
+
+    def substitute(self, values: Dict[str, float]) -> 'CompiledFormula':
+        """
+        Remplace des variables constantes par leur valeur, puis replie l'expression
+
+        Args:
+            values: Valeurs {variable: scalaire}
+
+        Returns:
+            Nouvelle formule compilée (self si aucune variable substituée n'est lue)
+        """
+        if not self.reads & values.keys():
+            return self
+        tree = _Substitution(values).visit(copy.deepcopy(self.tree))
+        return CompiledFormula(self.source, self.target, fold_constants(tree))
+
+    def evaluate(self, scope: Dict[str, Any]) -> Any:
+        """
+        Évalue la formule dans un scope de valeurs numériques
+
+        Raises:
+            FormulaError: Si une variable est indéfinie ou si le calcul échoue
+        """
+        missing = [name for name in self.reads if name not in scope]
+        if missing:
+            raise FormulaError(f"Variable non définie: {', '.join(sorted(missing))} (formule \"{self.source}\")")
+        namespace = dict(FUNCTIONS)
+        namespace.update(_INTERNALS)
+        namespace.update(scope)
+        try:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return eval(self.code, {'__builtins__': {}}, namespace)
+        except Exception as e:
+            raise FormulaError(f"Erreur sur la formule \"{self.source}\": {e}")
+
+
+class FormulaCompiler:
+    """Compile le texte des nœuds de formule en expressions sûres et vectorisées"""
+
+    @staticmethod
+    def compile_text(text: str, composed_terms: Iterable[str] = (),
+                     errors: Optional[List[FormulaError]] = None) -> List[CompiledFormula]:
+        """
+        Compile un texte contenant une formule par ligne
+
+        Args:
+            text: Texte de la formule (lignes 'variable = expression')
+            composed_terms: Noms de variables contenant des espaces à reconnaître
+            errors: Si fourni, les lignes invalides y sont ajoutées et ignorées
+                    au lieu d'interrompre la compilation
+
+        Returns:
+            Liste des formules compilées, dans l'ordre du texte
+
+        Raises:
+            FormulaError: Si une ligne est syntaxiquement invalide (sans `errors`)
+        """
+        terms = sorted({t for t in composed_terms if ' ' in t.strip()}, key=len, reverse=True)
+        compiled = []
+        for line in (text or '').split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                compiled.append(FormulaCompiler.compile_line(line, terms))
+            except FormulaError as e:
+                if errors is None:
+                    raise
+                errors.append(e)
+        return compiled
+
+    @staticmethod
+    def compile_line(line: str, composed_terms: List[str] = ()) -> CompiledFormula:
+        """Compile une ligne de formule unique"""
+        target = None
+        expression = line
+        match = _ASSIGNMENT_RE.match(line)
+        if match:
+            target = sanitize_name(match.group(1))
+            expression = match.group(2)
+            if not target.isidentifier():
+                raise FormulaError(f"Nom de variable invalide \"{match.group(1).strip()}\" (formule \"{line}\")")
+
+        for term in composed_terms:
+            expression = re.sub(rf'(?<!\w){re.escape(term)}(?!\w)', sanitize_name(term), expression)
+
+        # Syntaxe mathjs -> Python
+        expression = expression.replace('^', '**')
+
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as e:
+            raise FormulaError(f"Erreur de syntaxe dans la formule \"{line}\": {e.msg}")
+
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise FormulaError(f"Construction non autorisée ({type(node).__name__}) dans la formule \"{line}\"")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                    raise FormulaError(f"Fonction inconnue dans la formule \"{line}\"")
+            if isinstance(node, ast.Name) and node.id.startswith('__'):
+                raise FormulaError(f"Nom réservé dans la formule \"{line}\"")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, bool)):
+                raise FormulaError(f"Seules les constantes numériques sont autorisées (formule \"{line}\")")
+
+        return CompiledFormula(line, target, fold_constants(tree))
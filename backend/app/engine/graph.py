@@ -0,0 +1,226 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+# Écart toléré entre la somme des probabilités de branche et 1 (arrondis des pourcentages saisis)
+PROBABILITY_TOLERANCE = 1e-6
+
+
+class WorkflowGraph:
+    """
+    Représentation indexée d'un workflow (nœuds et arêtes au format React Flow)
+
+    Les nœuds sont numérotés de 0 à n-1 dans l'ordre du JSON afin que les
+    moteurs de calcul puissent travailler sur des tableaux plutôt que sur
+    des dictionnaires.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+        self.nodes = nodes or []
+        self.edges = edges or []
+        self.node_ids: List[str] = []
+        self.indexed_nodes: List[Dict[str, Any]] = []
+        self.index: Dict[str, int] = {}
+        self.successors: List[List[Tuple[int, Dict[str, Any]]]] = []
+        self.predecessors: List[List[int]] = []
+        self.dangling_edges: List[Dict[str, Any]] = []
+
+        for node in self.nodes:
+            node_id = str(node.get('id'))
+            if node_id in self.index:
+                # Les doublons sont ignorés ici, la validation les signale
+                continue
+            self.index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.indexed_nodes.append(node)
+            self.successors.append([])
+            self.predecessors.append([])
+
+        for edge in self.edges:
+            source = self.index.get(str(edge.get('source')))
+            target = self.index.get(str(edge.get('target')))
+            if source is None or target is None:
+                self.dangling_edges.append(edge)
+                continue
+            self.successors[source].append((target, edge))
+            self.predecessors[target].append(source)
+
+    @classmethod
+    def from_workflow(cls, workflow) -> 'WorkflowGraph':
+        """Construit le graphe à partir d'une instance du modèle Workflow"""
+        return cls(workflow.nodes or [], workflow.edges or [])
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def node(self, i: int) -> Dict[str, Any]:
+        """Retourne le nœud JSON d'indice i"""
+        return self.indexed_nodes[i]
+
+    def node_type(self, i: int) -> str:
+        return self.node(i).get('type') or ''
+
+    def node_data(self, i: int) -> Dict[str, Any]:
+        return self.node(i).get('data') or {}
+
+    def is_start(self, i: int) -> bool:
+        """Un nœud de départ est un événement 'start'"""
+        return self.node_type(i) == 'event' and self.node_data(i).get('eventType') == 'start'
+
+    def is_end(self, i: int) -> bool:
+        """Un nœud terminal est un événement 'end' ou un nœud sans successeur"""
+        if self.node_type(i) == 'event' and self.node_data(i).get('eventType') == 'end':
+            return True
+        return not self.successors[i]
+
+    def start_nodes(self) -> List[int]:
+        """
+        Retourne les nœuds de départ du flux
+
+        À défaut d'événement 'start', les nœuds sans prédécesseur connectés au
+        flux sont utilisés.
+        """
+        starts = [i for i in range(len(self)) if self.is_start(i)]
+        if not starts:
+            starts = [i for i in range(len(self))
+                      if not self.predecessors[i] and self.successors[i]]
+        return starts
+
+    def numeric_attribute(self, i: int, name: str) -> float:
+        """Lit un attribut numérique des données d'un nœud (0 si absent ou invalide)"""
+        value = self.node_data(i).get(name)
+        try:
+            return float(value) if value not in (None, '') else 0.0
+        except (TypeError, ValueError):
+            return 0.0
+
+    def branch_probabilities(self, i: int) -> List[Tuple[int, float]]:
+        """
+        Calcule les probabilités de transition sortantes d'un nœud
+
+        Une arête peut porter `data.probability` (entre 0 et 1, ou en pourcentage
+        si supérieur à 1). Les arêtes sans probabilité se partagent la masse
+        restante à parts égales ; si les probabilités explicites dépassent 1,
+        elles sont renormalisées. Si toutes les arêtes ont une probabilité
+        explicite et que leur somme est inférieure à 1 (toutes nulles
+        comprises), la masse manquante n'est attribuée à aucune branche :
+        c'est une erreur.
+
+        Args:
+            i: Indice du nœud source
+
+        Returns:
+            Liste de tuples (indice cible, probabilité)
+
+        Raises:
+            ValueError: Si les probabilités explicites des arêtes sortantes totalisent moins de 1
+        """
+        outgoing = self.successors[i]
+        if not outgoing:
+            return []
+
+        explicit: List[Optional[float]] = []
+        for _, edge in outgoing:
+            value = (edge.get('data') or {}).get('probability')
+            try:
+                value = float(value) if value not in (None, '') else None
+            except (TypeError, ValueError):
+                value = None
+            if value is not None:
+                if value > 1:
+                    value = value / 100.0
+                value = max(value, 0.0)
+            explicit.append(value)
+
+        assigned = sum(p for p in explicit if p is not None)
+        unassigned = [k for k, p in enumerate(explicit) if p is None]
+
+        if not unassigned and assigned < 1 - PROBABILITY_TOLERANCE:
+            raise ValueError(
+                f"Probabilités de branche incomplètes au nœud {self.node_ids[i]}: "
+                f"les arêtes sortantes totalisent {assigned * 100:g} %"
+            )
+        if assigned > 1 or not unassigned:
+            probabilities = [(p or 0.0) / assigned for p in explicit]
+        else:
+            share = (1.0 - assigned) / len(unassigned)
+            probabilities = [p if p is not None else share for p in explicit]
+
+        return [(target, probabilities[k]) for k, (target, _) in enumerate(outgoing)]
+
+    def reachable_from(self, sources: List[int]) -> List[int]:
+        """Retourne les nœuds atteignables depuis les sources (parcours en profondeur)"""
+        seen = [False] * len(self)
+        queue = list(sources)
+        for s in sources:
+            seen[s] = True
+        order = []
+        while queue:
+            current = queue.pop()
+            order.append(current)
+            for target, _ in self.successors[current]:
+                if not seen[target]:
+                    seen[target] = True
+                    queue.append(target)
+        return order
+
+
+def workflow_references(nodes: List[Dict[str, Any]]) -> List[str]:
+    """Retourne les IDs des workflows référencés (data.workflowRef), sans doublon"""
+    refs = []
+    for node in nodes or []:
+        ref = (node.get('data') or {}).get('workflowRef')
+        if ref and str(ref) not in refs:
+            refs.append(str(ref))
+    return refs
+
+
+def strongly_connected_components(adjacency: List[List[int]]) -> List[List[int]]:
+    """
+    Calcule les composantes fortement connexes d'un graphe (Tarjan itératif)
+
+    Args:
+        adjacency: Liste des successeurs de chaque sommet
+
+    Returns:
+        Composantes en ordre topologique inverse (puits d'abord)
+    """
+    n = len(adjacency)
+    index_of = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if index_of[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, child = work[-1]
+            if child == 0:
+                index_of[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            if child < len(adjacency[v]):
+                work[-1] = (v, child + 1)
+                w = adjacency[v][child]
+                if index_of[w] == -1:
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    lowlink[v] = min(lowlink[v], index_of[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[v])
+            if lowlink[v] == index_of[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
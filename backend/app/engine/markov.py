@@ -0,0 +1,154 @@
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+from app.engine.graph import WorkflowGraph
+
+
+class MarkovChainAnalyzer:
+    """
+    Analyse analytique d'un workflow vu comme une chaîne de Markov absorbante
+
+    Les nœuds sont les états, les probabilités de branche des arêtes forment
+    la matrice de transition et les événements de fin (ou nœuds sans
+    successeur) sont les états absorbants. Avec Q la sous-matrice transitoire
+    et R la sous-matrice transitoire -> absorbant, le nombre moyen de visites
+    depuis la distribution de départ s est v = s (I - Q)^-1, obtenu par une
+    seule résolution creuse de (I - Q)^T v = s. Les boucles de reprise sont
+    ainsi traitées exactement, sans marches aléatoires.
+    """
+
+    @staticmethod
+    def analyze(graph: WorkflowGraph, start_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Calcule visites attendues, coût/durée attendus et probabilités de fin
+
+        Args:
+            graph: Graphe compilé du workflow
+            start_ids: IDs des nœuds de départ (par défaut les événements 'start')
+
+        Returns:
+            Dictionnaire avec 'expected_visits', 'expected_cost',
+            'expected_duration', 'end_probabilities' et des métadonnées
+
+        Raises:
+            ValueError: Si le workflow n'a pas de départ, contient une boucle sans sortie
+                ou des probabilités de branche incomplètes
+        """
+        if start_ids:
+            unknown = [s for s in start_ids if s not in graph.index]
+            if unknown:
+                raise ValueError(f"Nœuds de départ inconnus: {', '.join(unknown)}")
+            starts = [graph.index[s] for s in start_ids]
+        else:
+            starts = graph.start_nodes()
+        if not starts:
+            raise ValueError("Aucun nœud de départ trouvé dans le workflow")
+
+        reachable = graph.reachable_from(starts)
+        transient = [i for i in reachable if not graph.is_end(i)]
+        absorbing = [i for i in reachable if graph.is_end(i)]
+        if not absorbing:
+            raise ValueError("Le workflow ne contient aucun état final atteignable")
+
+        transient_pos = {node: k for k, node in enumerate(transient)}
+        absorbing_pos = {node: k for k, node in enumerate(absorbing)}
+
+        # Transitions effectives : une arête de probabilité nulle n'est jamais empruntée
+        transitions = {
+            node: [(target, p) for target, p in graph.branch_probabilities(node) if p > 0]
+            for node in transient
+        }
+        MarkovChainAnalyzer._check_exits(graph, transitions, absorbing)
+
+        q_rows, q_cols, q_vals = [], [], []
+        r_rows, r_cols, r_vals = [], [], []
+        for node in transient:
+            row = transient_pos[node]
+            for target, probability in transitions[node]:
+                if target in transient_pos:
+                    q_rows.append(row)
+                    q_cols.append(transient_pos[target])
+                    q_vals.append(probability)
+                else:
+                    r_rows.append(row)
+                    r_cols.append(absorbing_pos[target])
+                    r_vals.append(probability)
+
+        n_t, n_a = len(transient), len(absorbing)
+        # Les doublons (arêtes parallèles) sont additionnés par le format COO
+        q = sparse.coo_matrix((q_vals, (q_rows, q_cols)), shape=(n_t, n_t)).tocsc()
+        r = sparse.coo_matrix((r_vals, (r_rows, r_cols)), shape=(n_t, n_a)).tocsr()
+
+        start_t = np.zeros(n_t)
+        start_a = np.zeros(n_a)
+        weight = 1.0 / len(starts)
+        for s in starts:
+            if s in transient_pos:
+                start_t[transient_pos[s]] += weight
+            else:
+                start_a[absorbing_pos[s]] += weight
+
+        if n_t:
+            system = (sparse.identity(n_t, format='csc') - q).T.tocsc()
+            visits_t = np.atleast_1d(spsolve(system, start_t))
+            if not np.all(np.isfinite(visits_t)):
+                raise ValueError("La matrice de transition est singulière (boucle sans sortie)")
+            end_probabilities = r.T @ visits_t + start_a
+        else:
+            visits_t = np.zeros(0)
+            end_probabilities = start_a
+
+        visits = np.zeros(len(graph))
+        visits[transient] = visits_t
+        visits[absorbing] = end_probabilities
+
+        costs = np.array([graph.numeric_attribute(i, 'cost') for i in range(len(graph))])
+        durations = np.array([graph.numeric_attribute(i, 'duration') for i in range(len(graph))])
+
+        return {
+            'expected_visits': {graph.node_ids[i]: float(visits[i]) for i in reachable},
+            'expected_cost': float(visits @ costs),
+            'expected_duration': float(visits @ durations),
+            'end_probabilities': {graph.node_ids[node]: float(end_probabilities[k])
+                                  for k, node in enumerate(absorbing)},
+            'expected_steps': float(visits_t.sum()),
+            'transient_states': n_t,
+            'absorbing_states': n_a
+        }
+
+    @staticmethod
+    def _check_exits(graph: WorkflowGraph, transitions: Dict[int, List[Tuple[int, float]]],
+                     absorbing: List[int]) -> None:
+        """
+        Vérifie que chaque état transitoire peut atteindre un état absorbant
+
+        Sinon I - Q est singulière : on le détecte par un parcours inverse
+        depuis les états finaux plutôt que par l'échec de la résolution. Seules
+        les transitions de probabilité non nulle sont suivies : une sortie
+        jamais empruntée ne fait pas sortir d'une boucle.
+
+        Args:
+            graph: Graphe compilé du workflow
+            transitions: Transitions de probabilité non nulle de chaque état transitoire
+            absorbing: États absorbants
+        """
+        predecessors: Dict[int, List[int]] = {}
+        for source, targets in transitions.items():
+            for target, _ in targets:
+                predecessors.setdefault(target, []).append(source)
+
+        can_exit = set(absorbing)
+        stack = list(absorbing)
+        while stack:
+            current = stack.pop()
+            for source in predecessors.get(current, []):
+                if source not in can_exit:
+                    can_exit.add(source)
+                    stack.append(source)
+
+        trapped = [graph.node_ids[i] for i in transitions if i not in can_exit]
+        if trapped:
+            raise ValueError(
+                f"Boucle sans sortie détectée (nœuds: {', '.join(trapped[:10])})"
+            )
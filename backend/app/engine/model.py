@@ -0,0 +1,303 @@
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, FrozenSet
+import re
+import numpy as np
+from app.engine.graph import WorkflowGraph, strongly_connected_components
+from app.engine.formula import FormulaCompiler, CompiledFormula, FormulaError, sanitize_name, as_series
+from app.engine.tables import LookupTable, TABLE_VARIABLE_TYPE
+
+# Types de nœuds qui portent des variables d'entrée
+VARIABLE_NODE_TYPES = ('formula', 'task')
+
+
+class Statement:
+    """
+    Unité de calcul d'un modèle : une ligne de formule ou un sous-workflow
+
+    Args:
+        node_id: Nœud d'origine
+        reads: Variables lues
+        writes: Variables produites
+        formula: Formule compilée (pour une ligne de formule)
+        workflow_ref: ID du workflow référencé (pour un sous-workflow)
+    """
+
+    def __init__(self, node_id: str, reads: Set[str], writes: Set[str],
+                 formula: Optional[CompiledFormula] = None, workflow_ref: Optional[str] = None):
+        self.node_id = node_id
+        self.reads = reads
+        # Variables lues telles qu'écrites, avant propagation des constantes
+        self.source_reads = frozenset(reads)
+        self.writes = writes
+        self.formula = formula
+        self.workflow_ref = workflow_ref
+
+
+class ExecutionPlan:
+    """
+    Instructions nécessaires au calcul d'un ensemble de variables
+
+    Args:
+        order: Blocs d'instructions à évaluer (sous-ensemble de `WorkflowModel.order`)
+        names: Variables lues par ces instructions ou demandées
+    """
+
+    def __init__(self, order: List[List[int]], names: Set[str]):
+        self.order = order
+        self.names = names
+
+    @property
+    def size(self) -> int:
+        return sum(len(block) for block in self.order)
+
+
+class WorkflowModel:
+    """
+    Couche de calcul compilée d'un workflow
+
+    Regroupe les valeurs par défaut des variables, les tables de
+    correspondance (en ligne ou téléversées), les formules compilées et les
+    références de sous-workflows, ordonnées par dépendances de données :
+    chaque bloc de `order` est une composante fortement connexe ; un bloc de
+    plusieurs instructions est résolu par point fixe.
+
+    À la compilation, les sous-expressions constantes sont repliées et les
+    variables calculées constantes ('jours = 5 * 52') propagées dans les
+    formules qui les lisent. `plan(outputs)` restreint ensuite l'évaluation
+    au cône de dépendances des variables demandées.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                 workflow_id: Optional[str] = None, revision: Optional[int] = None,
+                 child_interfaces: Optional[Dict[str, Tuple[Set[str], Set[str]]]] = None,
+                 errors: Optional[List[Tuple[str, FormulaError]]] = None):
+        """
+        Args:
+            nodes: Nœuds du workflow
+            edges: Arêtes du workflow
+            workflow_id: ID du workflow (pour la mémoïsation)
+            revision: Révision du workflow (pour la mémoïsation)
+            child_interfaces: Entrées/sorties des sous-workflows référencés {id: (inputs, outputs)}
+            errors: Si fourni, les formules et tables invalides y sont ajoutées
+                    (couples (node_id, erreur)) et ignorées au lieu de lever FormulaError
+        """
+        self.workflow_id = workflow_id
+        self.revision = revision
+        self.graph = WorkflowGraph(nodes, edges)
+        self.defaults: Dict[str, np.ndarray] = {}
+        self.tables: Dict[str, LookupTable] = {}
+        self.table_refs: Dict[str, str] = {}
+        # Noms de toutes les variables déclarées dans les nœuds, avec ou sans valeur numérique
+        self.declared: Set[str] = set()
+        self.declarations: List[Tuple[str, str]] = []
+        self.statements: List[Statement] = []
+        self.child_revisions: Dict[str, Optional[int]] = {}
+        child_interfaces = child_interfaces or {}
+
+        composed_terms = self._collect_composed_terms()
+
+        for i in range(len(self.graph)):
+            node_type = self.graph.node_type(i)
+            data = self.graph.node_data(i)
+            node_id = self.graph.node_ids[i]
+
+            if node_type in VARIABLE_NODE_TYPES:
+                for variable in data.get('variables') or []:
+                    if not variable.get('name'):
+                        continue
+                    name = sanitize_name(variable['name'])
+                    self.declared.add(name)
+                    self.declarations.append((node_id, name))
+                    if variable.get('type') == TABLE_VARIABLE_TYPE:
+                        try:
+                            self._add_table(name, variable)
+                        except FormulaError as e:
+                            if errors is None:
+                                raise
+                            errors.append((node_id, e))
+                        continue
+                    value = self.parse_value(variable.get('value'))
+                    if value is not None:
+                        self.defaults[name] = value
+
+            if node_type == 'formula' and data.get('formula'):
+                line_errors = [] if errors is not None else None
+                compiled = FormulaCompiler.compile_text(data['formula'], composed_terms, line_errors)
+                if line_errors:
+                    errors.extend((node_id, e) for e in line_errors)
+                for formula in compiled:
+                    writes = {formula.target} if formula.target else set()
+                    self.statements.append(Statement(node_id, set(formula.reads), writes, formula=formula))
+
+            if data.get('workflowRef'):
+                ref = str(data['workflowRef'])
+                inputs, outputs = child_interfaces.get(ref, (set(), set()))
+                self.statements.append(Statement(node_id, set(inputs), set(outputs), workflow_ref=ref))
+
+        self.outputs: Set[str] = set().union(*(s.writes for s in self.statements)) if self.statements else set()
+        reads: Set[str] = set().union(*(s.reads for s in self.statements)) if self.statements else set()
+        self.inputs: Set[str] = reads - self.outputs
+        self.order: List[List[int]] = self._order_statements()
+        self.constants: Dict[str, float] = self._propagate_constants()
+        self._plans: Dict[FrozenSet[str], ExecutionPlan] = {}
+
+    @property
+    def fingerprint(self) -> Tuple:
+        """Identifie le contenu calculé : révision du workflow et de ses sous-workflows"""
+        return (self.revision, tuple(sorted(self.child_revisions.items())))
+
+    @property
+    def references(self) -> List[str]:
+        """IDs des workflows référencés par ce modèle"""
+        return sorted({s.workflow_ref for s in self.statements if s.workflow_ref})
+
+    @staticmethod
+    def parse_value(value: Any) -> Optional[np.ndarray]:
+        """Convertit une valeur de variable en tableau (None si non numérique)"""
+        if isinstance(value, bool):
+            return as_series(float(value))
+        if isinstance(value, (int, float)):
+            return as_series(value)
+        if isinstance(value, (list, tuple)):
+            try:
+                return as_series([float(v) for v in value])
+            except (TypeError, ValueError):
+                return None
+        if isinstance(value, str):
+            try:
+                return as_series(float(value.strip()))
+            except ValueError:
+                return None
+        return None
+
+    def _add_table(self, name: str, variable: Dict[str, Any]) -> None:
+        """Enregistre une variable table : référence à une table téléversée ('tableId') ou données en ligne"""
+        if variable.get('tableId'):
+            self.table_refs[name] = str(variable['tableId'])
+            return
+        try:
+            self.tables[name] = LookupTable.from_value(variable.get('value'))
+        except ValueError as e:
+            raise FormulaError(f"Variable table \"{name}\": {e}")
+
+    def _collect_composed_terms(self) -> Set[str]:
+        """Noms de variables contenant des espaces, à reconnaître dans les formules"""
+        terms = set()
+        for i in range(len(self.graph)):
+            data = self.graph.node_data(i)
+            for variable in data.get('variables') or []:
+                name = str(variable.get('name') or '')
+                if ' ' in name.strip():
+                    terms.add(name.strip())
+            for line in str(data.get('formula') or '').split('\n'):
+                match = re.match(r'^([^=<>!]+?)\s*=(?!=)', line.strip())
+                if match and ' ' in match.group(1).strip():
+                    terms.add(match.group(1).strip())
+        return terms
+
+    def _order_statements(self) -> List[List[int]]:
+        """Ordonne les instructions par dépendances (composantes en ordre topologique)"""
+        writers: Dict[str, List[int]] = {}
+        for k, statement in enumerate(self.statements):
+            for name in statement.writes:
+                writers.setdefault(name, []).append(k)
+
+        # Arête producteur -> consommateur
+        adjacency: List[List[int]] = [[] for _ in self.statements]
+        for k, statement in enumerate(self.statements):
+            for name in statement.reads:
+                for writer in writers.get(name, []):
+                    adjacency[writer].append(k)
+
+        components = strongly_connected_components(adjacency)
+        components.reverse()
+        for component in components:
+            component.sort()
+        return components
+
+    def _propagate_constants(self) -> Dict[str, float]:
+        """
+        Propage les variables calculées constantes dans les formules qui les lisent
+
+        Une variable est constante si elle est produite par une seule ligne de
+        formule dont l'expression, une fois repliée, ne lit plus aucune
+        variable. Les instructions sont parcourues dans l'ordre des
+        dépendances : une substitution peut rendre constante la ligne suivante.
+
+        Returns:
+            Variables constantes {nom: valeur}
+        """
+        writer_count: Dict[str, int] = {}
+        for statement in self.statements:
+            for name in statement.writes:
+                writer_count[name] = writer_count.get(name, 0) + 1
+
+        constants: Dict[str, float] = {}
+        for block in self.order:
+            for k in block:
+                statement = self.statements[k]
+                if statement.formula is None:
+                    continue
+                if constants:
+                    statement.formula = statement.formula.substitute(constants)
+                    statement.reads = set(statement.formula.reads)
+                target = statement.formula.target
+                value = statement.formula.constant
+                if value is not None and target and writer_count.get(target) == 1 and not self.is_cyclic(block):
+                    constants[target] = value
+        return constants
+
+    def plan(self, outputs: Optional[Iterable[str]] = None) -> ExecutionPlan:
+        """
+        Retourne les instructions à évaluer pour obtenir des variables
+
+        Le cône de dépendances est parcouru à rebours depuis les variables
+        demandées (producteurs de chaque variable lue, transitivement) ; les
+        instructions dont aucune sortie n'y contribue sont écartées. Le plan
+        est mémorisé par ensemble de variables, comme le modèle l'est par
+        révision.
+
+        Args:
+            outputs: Variables demandées (toutes les instructions si None)
+
+        Returns:
+            Le plan d'exécution
+        """
+        key = frozenset(sanitize_name(o) for o in outputs) if outputs is not None else None
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        if key is None:
+            needed = set(range(len(self.statements)))
+        else:
+            writers: Dict[str, List[int]] = {}
+            for k, statement in enumerate(self.statements):
+                for name in statement.writes:
+                    writers.setdefault(name, []).append(k)
+            needed: Set[int] = set()
+            pending = list(key)
+            visited = set(key)
+            while pending:
+                for k in writers.get(pending.pop(), []):
+                    if k in needed:
+                        continue
+                    needed.add(k)
+                    for name in self.statements[k].reads - visited:
+                        visited.add(name)
+                        pending.append(name)
+
+        # Une composante fortement connexe est entièrement dans le cône ou entièrement dehors
+        order = [block for block in self.order if block[0] in needed]
+        names = set(key or ()).union(*(self.statements[k].reads for k in needed))
+        plan = ExecutionPlan(order, names)
+        self._plans[key] = plan
+        return plan
+
+    def is_cyclic(self, block: List[int]) -> bool:
+        """
+        Indique si un bloc d'instructions nécessite une résolution par point fixe
+
+        Une instruction seule qui se lit elle-même ('x = x * 1.1') est évaluée
+        une fois à partir de la valeur par défaut, comme côté client.
+        """
+        return len(block) > 1
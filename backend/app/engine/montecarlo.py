@@ -0,0 +1,229 @@
+from typing import List, Dict, Any, Optional, Sequence, Callable
+import math
+import time
+import numpy as np
+from app.engine.distributions import sample_distribution, validate_distribution
+from app.engine.evaluator import WorkflowEvaluator
+from app.engine.formula import sanitize_name
+from app.engine.model import WorkflowModel, VARIABLE_NODE_TYPES
+from app.engine.scenarios import ScenarioRunner
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+Z_95 = 1.959963984540054
+
+
+def summarize_samples(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """
+    Résume un échantillon : moyenne, écart-type et centiles avec intervalles de confiance
+
+    L'intervalle d'un centile est obtenu par les statistiques d'ordre
+    (approximation normale de la loi binomiale du rang) : il reste valable
+    quelle que soit la loi de la sortie et se resserre à mesure que
+    l'échantillon grossit.
+
+    Args:
+        values: Échantillon (1D)
+        percentiles: Centiles à calculer (0-100)
+
+    Returns:
+        Dictionnaire {'count', 'mean', 'std', 'mean_ci', 'percentiles'}
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    n = values.size
+    if n == 0:
+        return {'count': 0, 'mean': None, 'std': None, 'mean_ci': None, 'percentiles': []}
+
+    ordered = np.sort(values)
+    mean = float(ordered.mean())
+    std = float(ordered.std(ddof=1)) if n > 1 else 0.0
+    half_width = Z_95 * std / math.sqrt(n)
+
+    rows = []
+    for p in percentiles:
+        q = float(p) / 100
+        spread = Z_95 * math.sqrt(n * q * (1 - q))
+        low = int(min(n - 1, max(0, math.floor(n * q - spread))))
+        high = int(min(n - 1, max(0, math.ceil(n * q + spread))))
+        rows.append({
+            'percentile': p,
+            'value': float(np.quantile(ordered, q)),
+            'ci_low': float(ordered[low]),
+            'ci_high': float(ordered[high])
+        })
+
+    return {
+        'count': n,
+        'mean': mean,
+        'std': std,
+        'mean_ci': [mean - half_width, mean + half_width],
+        'percentiles': rows
+    }
+
+
+class MonteCarloRun:
+    """
+    Simulation de Monte Carlo interruptible d'un workflow
+
+    Les tirages sont évalués par lots vectorisés (un tirage par ligne des
+    tableaux de variables). L'état (générateur, échantillons accumulés) est
+    conservé entre les lots : la simulation peut être arrêtée à une échéance
+    puis reprise, et le résumé courant est disponible à tout moment.
+    """
+
+    def __init__(self, evaluator: WorkflowEvaluator, model: WorkflowModel,
+                 distributions: Optional[Dict[str, Dict[str, Any]]] = None,
+                 outputs: Optional[List[str]] = None, samples: int = 10000,
+                 batch_size: int = 1000, seed: Optional[int] = None):
+        """
+        Args:
+            evaluator: Évaluateur du workflow
+            model: Modèle compilé
+            distributions: Lois imposées {variable: spécification}, prioritaires
+                           sur celles déclarées dans les nœuds
+            outputs: Variables à échantillonner (par défaut toutes les variables calculées)
+            samples: Nombre total de tirages visé
+            batch_size: Taille maximale d'un lot
+            seed: Graine du générateur (reproductibilité)
+
+        Raises:
+            ValueError: Si aucune variable n'est incertaine ou si une loi est invalide
+        """
+        self.evaluator = evaluator
+        self.model = model
+        self.inputs = self.collect_distributions(model, distributions)
+        if not self.inputs:
+            raise ValueError("Aucune variable incertaine : définissez au moins une loi de probabilité")
+
+        self.outputs = [sanitize_name(o) for o in outputs] if outputs else sorted(model.outputs)
+        self.target = max(1, int(samples))
+        self.batch_size = max(1, int(batch_size))
+        self.rng = np.random.default_rng(seed)
+        self.chunks: Dict[str, List[np.ndarray]] = {name: [] for name in self.outputs}
+        self.completed = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    def collect_distributions(model: WorkflowModel,
+                              overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Récupère les lois de probabilité des variables (champ 'distribution' des variables de nœuds)
+
+        Raises:
+            ValueError: Si une loi est inconnue ou incomplète
+        """
+        distributions: Dict[str, Dict[str, Any]] = {}
+        graph = model.graph
+        for i in range(len(graph)):
+            if graph.node_type(i) not in VARIABLE_NODE_TYPES:
+                continue
+            for variable in graph.node_data(i).get('variables') or []:
+                if variable.get('name') and variable.get('distribution'):
+                    distributions[sanitize_name(variable['name'])] = variable['distribution']
+        for name, spec in (overrides or {}).items():
+            distributions[sanitize_name(name)] = spec
+        for spec in distributions.values():
+            validate_distribution(spec)
+        return distributions
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.target
+
+    def step(self, size: Optional[int] = None) -> None:
+        """Évalue un lot de tirages et accumule les sorties"""
+        size = min(size or self.batch_size, self.target - self.completed)
+        if size <= 0:
+            return
+        started = time.monotonic()
+
+        overrides = {}
+        for name, spec in self.inputs.items():
+            draws = sample_distribution(spec, self.rng, size)
+            base = self.model.defaults.get(name)
+            periods = base.shape[1] if base is not None else 1
+            # Un même tirage s'applique à toutes les périodes d'une variable
+            overrides[name] = np.repeat(draws[:, None], periods, axis=1)
+
+        scope = self.evaluator.evaluate(self.model, overrides, outputs=self.outputs)
+        for name in self.outputs:
+            self.chunks[name].append(ScenarioRunner.column(scope.get(name), size))
+
+        self.completed += size
+        self.elapsed += time.monotonic() - started
+
+    def run(self, deadline: Optional[float] = None,
+            checkpoint: Optional[Callable[['MonteCarloRun'], None]] = None) -> 'MonteCarloRun':
+        """
+        Enchaîne les lots jusqu'au nombre de tirages visé ou jusqu'à l'échéance
+
+        La taille des lots est ajustée au temps restant : au moins un lot est
+        toujours évalué, puis un lot n'est lancé que s'il peut se terminer avant
+        l'échéance d'après le débit mesuré.
+
+        Args:
+            deadline: Échéance (horodatage time.time()) ou None
+            checkpoint: Appelé après chaque lot (voir Checkpointer)
+        """
+        started = self.completed
+        while not self.done:
+            size = self.batch_size
+            if deadline is not None and self.completed > started:
+                remaining = deadline - time.time()
+                per_sample = self.elapsed / self.completed
+                size = min(size, int(remaining / per_sample * 0.9)) if per_sample > 0 else size
+                if size <= 0:
+                    break
+            self.step(size)
+            if checkpoint is not None:
+                checkpoint(self)
+        return self
+
+    @property
+    def progress(self) -> float:
+        return min(1.0, self.completed / self.target)
+
+    def state(self) -> Dict[str, Any]:
+        """État nécessaire à la reprise (générateur et tirages accumulés)"""
+        state = {
+            'kind': 'monte_carlo',
+            'progress': self.progress,
+            'completed': self.completed,
+            'elapsed': self.elapsed,
+            'rng': self.rng.bit_generator.state,
+            'outputs': self.outputs
+        }
+        for name in self.outputs:
+            state[f"values.{name}"] = self.values(name)
+        return state
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Reprend la simulation à partir d'un état sauvegardé
+
+        Raises:
+            ValueError: Si l'état ne correspond pas à cette simulation
+        """
+        if state.get('kind') != 'monte_carlo' or state.get('outputs') != self.outputs:
+            raise ValueError("Point de reprise incompatible avec cette simulation")
+        completed = int(state['completed'])
+        chunks = {name: np.asarray(state[f"values.{name}"], dtype=float) for name in self.outputs}
+        if any(values.shape[0] != completed for values in chunks.values()):
+            raise ValueError("Point de reprise incomplet")
+        self.rng.bit_generator.state = state['rng']
+        self.chunks = {name: [values] for name, values in chunks.items()}
+        self.completed = completed
+        self.elapsed = float(state['elapsed'])
+
+    def values(self, name: str) -> np.ndarray:
+        """Échantillon accumulé d'une sortie"""
+        chunks = self.chunks.get(sanitize_name(name)) or []
+        return np.concatenate(chunks) if chunks else np.zeros(0)
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> List[Dict[str, Any]]:
+        """Résumé courant de chaque sortie"""
+        return [
+            dict(variable=name, **summarize_samples(self.values(name), percentiles))
+            for name in self.outputs
+        ]
@@ -0,0 +1,189 @@
+from typing import List, Dict, Any, Optional, Callable
+import time
+import numpy as np
+from app.engine.evaluator import WorkflowEvaluator
+from app.engine.formula import sanitize_name
+from app.engine.model import WorkflowModel
+from app.engine.scenarios import ScenarioRunner
+
+
+class OptimizationRun:
+    """
+    Recherche des valeurs de variables qui optimisent un objectif du workflow
+
+    Stratégie évolutionnaire simple : à chaque génération, une population de
+    candidats est tirée autour du meilleur point connu (la première génération
+    explore uniformément les bornes) et évaluée en une seule passe vectorisée.
+    Le pas de mutation s'élargit après une amélioration et se resserre sinon.
+    Le meilleur point est disponible à tout moment, ce qui permet d'arrêter la
+    recherche à une échéance.
+    """
+
+    def __init__(self, evaluator: WorkflowEvaluator, model: WorkflowModel,
+                 variables: List[Dict[str, Any]], objective: str, maximize: bool = True,
+                 constraints: Optional[List[Dict[str, Any]]] = None,
+                 generations: int = 50, population: int = 32, seed: Optional[int] = None):
+        """
+        Args:
+            evaluator: Évaluateur du workflow
+            model: Modèle compilé
+            variables: Espace de recherche [{'name', 'min', 'max'}]
+            objective: Variable à optimiser
+            maximize: Maximiser (True) ou minimiser (False) l'objectif
+            constraints: Contraintes [{'variable', 'min', 'max'}] sur des variables calculées
+            generations: Nombre maximal de générations
+            population: Nombre de candidats par génération
+            seed: Graine du générateur (reproductibilité)
+
+        Raises:
+            ValueError: Si l'espace de recherche est vide ou mal borné
+        """
+        if not variables:
+            raise ValueError("Aucune variable à optimiser")
+
+        self.evaluator = evaluator
+        self.model = model
+        self.names = [sanitize_name(v.get('name') or '') for v in variables]
+        self.lower = np.array([float(v['min']) for v in variables])
+        self.upper = np.array([float(v['max']) for v in variables])
+        if np.any(self.upper < self.lower):
+            raise ValueError("Bornes de recherche invalides (min > max)")
+
+        self.objective = sanitize_name(objective)
+        self.sign = 1.0 if maximize else -1.0
+        self.constraints = [
+            (sanitize_name(c['variable']), c.get('min'), c.get('max')) for c in (constraints or [])
+        ]
+        # Seuls l'objectif et les variables contraintes sont calculés à chaque évaluation
+        self.outputs = [self.objective] + [name for name, _, _ in self.constraints]
+        self.generations = max(1, int(generations))
+        self.population = max(2, int(population))
+        self.rng = np.random.default_rng(seed)
+        self.sigma = 0.3
+        self.generation = 0
+        self.evaluations = 0
+
+        baseline = []
+        for k, name in enumerate(self.names):
+            default = model.defaults.get(name)
+            value = float(default[0, 0]) if default is not None else (self.lower[k] + self.upper[k]) / 2
+            baseline.append(value)
+        self.baseline_point = np.clip(np.array(baseline), self.lower, self.upper)
+        scores, values = self._score(self.baseline_point[None, :])
+        self.baseline_value = float(values[0])
+        self.best_point = self.baseline_point.copy()
+        self.best_score = scores[0]
+
+    @property
+    def done(self) -> bool:
+        return self.generation >= self.generations
+
+    def _score(self, candidates: np.ndarray):
+        """Évalue des candidats (une ligne chacun) : retourne (scores signés, valeurs de l'objectif)"""
+        count = candidates.shape[0]
+        overrides = {}
+        for k, name in enumerate(self.names):
+            default = self.model.defaults.get(name)
+            periods = default.shape[1] if default is not None else 1
+            overrides[name] = np.repeat(candidates[:, k:k + 1], periods, axis=1)
+
+        scope = self.evaluator.evaluate(self.model, overrides, outputs=self.outputs)
+        self.evaluations += count
+        values = ScenarioRunner.column(scope.get(self.objective), count)
+        scores = self.sign * values
+
+        feasible = np.ones(count, dtype=bool)
+        for name, low, high in self.constraints:
+            column = ScenarioRunner.column(scope.get(name), count)
+            if low is not None:
+                feasible &= column >= float(low)
+            if high is not None:
+                feasible &= column <= float(high)
+        scores = np.where(feasible & np.isfinite(scores), scores, -np.inf)
+        return scores, values
+
+    def step(self) -> None:
+        """Évalue une génération de candidats"""
+        span = self.upper - self.lower
+        shape = (self.population, len(self.names))
+        if self.generation == 0:
+            candidates = self.lower + self.rng.random(shape) * span
+        else:
+            candidates = self.best_point + self.rng.normal(0.0, self.sigma, shape) * span
+        candidates = np.clip(candidates, self.lower, self.upper)
+
+        scores, _ = self._score(candidates)
+        best = int(np.argmax(scores))
+        if scores[best] > self.best_score:
+            self.best_score = scores[best]
+            self.best_point = candidates[best]
+            self.sigma = min(0.5, self.sigma * 1.2)
+        else:
+            self.sigma = max(1e-4, self.sigma * 0.8)
+        self.generation += 1
+
+    def run(self, deadline: Optional[float] = None,
+            checkpoint: Optional[Callable[['OptimizationRun'], None]] = None) -> 'OptimizationRun':
+        """
+        Enchaîne les générations jusqu'au nombre visé ou jusqu'à l'échéance
+
+        Args:
+            deadline: Échéance (horodatage time.time()) ou None
+            checkpoint: Appelé après chaque génération (voir Checkpointer)
+        """
+        started = self.generation
+        while not self.done:
+            if deadline is not None and self.generation > started and time.time() >= deadline:
+                break
+            self.step()
+            if checkpoint is not None:
+                checkpoint(self)
+        return self
+
+    @property
+    def progress(self) -> float:
+        return min(1.0, self.generation / self.generations)
+
+    def state(self) -> Dict[str, Any]:
+        """État nécessaire à la reprise (générateur, pas de mutation, meilleur point)"""
+        return {
+            'kind': 'optimization',
+            'progress': self.progress,
+            'generation': self.generation,
+            'evaluations': self.evaluations,
+            'sigma': self.sigma,
+            'rng': self.rng.bit_generator.state,
+            'best_point': self.best_point,
+            'best_score': np.array(self.best_score)
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Reprend la recherche à partir d'un état sauvegardé
+
+        Raises:
+            ValueError: Si l'état ne correspond pas à cet espace de recherche
+        """
+        best_point = np.asarray(state['best_point'], dtype=float)
+        if state.get('kind') != 'optimization' or best_point.shape != self.best_point.shape:
+            raise ValueError("Point de reprise incompatible avec cette optimisation")
+        self.rng.bit_generator.state = state['rng']
+        self.sigma = float(state['sigma'])
+        self.generation = int(state['generation'])
+        self.evaluations = int(state['evaluations'])
+        self.best_point = best_point
+        self.best_score = float(state['best_score'])
+
+    def result(self) -> Dict[str, Any]:
+        """Meilleur point courant et gain par rapport aux valeurs actuelles"""
+        best_value = self.sign * float(self.best_score) if np.isfinite(self.best_score) else None
+        return {
+            'objective': self.objective,
+            'best_point': {name: float(v) for name, v in zip(self.names, self.best_point)},
+            'baseline_point': {name: float(v) for name, v in zip(self.names, self.baseline_point)},
+            'best_value': best_value,
+            'baseline_value': self.baseline_value,
+            'improvement': best_value - self.baseline_value if best_value is not None else None,
+            'generations': self.generation,
+            'evaluations': self.evaluations
+        }
@@ -0,0 +1,302 @@
+from typing import List, Dict, Any, Optional, Tuple
+import copy
+
+# Opérations acceptées (sous-ensemble de JSON Patch, RFC 6902)
+PATCH_OPERATIONS = ('add', 'remove', 'replace', 'test')
+
+_COLLECTIONS = ('nodes', 'edges')
+
+# Attributs de disposition de l'éditeur, sans effet sur le calcul ni sur les index dérivés
+LAYOUT_KEYS = frozenset(('position', 'positionAbsolute', 'width', 'height', 'selected', 'dragging', 'zIndex'))
+
+
+class WorkflowPatchError(ValueError):
+    """Opération de modification partielle invalide"""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Opération {index}: {message}")
+        self.index = index
+
+
+class WorkflowConflictError(ValueError):
+    """Modification fondée sur une révision qui n'est plus la révision courante"""
+
+    def __init__(self, base_revision: int, current_revision: int):
+        super().__init__(
+            f"Le workflow a été modifié entre-temps (révision {current_revision}, modification fondée sur la révision {base_revision})"
+        )
+        self.base_revision = base_revision
+        self.current_revision = current_revision
+
+
+class PatchResult:
+    """
+    Résultat de l'application d'opérations à un workflow
+
+    Args:
+        nodes: Nouveaux nœuds
+        edges: Nouvelles arêtes
+        previous: Éléments touchés avant les opérations {(collection, id): élément, None s'il a été ajouté}
+        current: Éléments touchés après les opérations {(collection, id): élément, None s'il a été supprimé}
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                 previous: Dict[Tuple[str, str], Optional[Dict[str, Any]]],
+                 current: Dict[Tuple[str, str], Optional[Dict[str, Any]]]):
+        self.nodes = nodes
+        self.edges = edges
+        self.previous = previous
+        self.current = current
+
+    @property
+    def changed(self) -> bool:
+        return any(self.previous[key] != self.current[key] for key in self.previous)
+
+    @property
+    def layout_only(self) -> bool:
+        """Vrai si les opérations n'ont modifié que la disposition d'éléments existants (voir LAYOUT_KEYS)"""
+        for key, before in self.previous.items():
+            after = self.current[key]
+            if before is None or after is None:
+                return False
+            if {k: v for k, v in before.items() if k not in LAYOUT_KEYS} != \
+                    {k: v for k, v in after.items() if k not in LAYOUT_KEYS}:
+                return False
+        return True
+
+    def touched_nodes(self) -> List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """Couples (ancien, nouveau) des nœuds touchés (None pour un nœud ajouté ou supprimé)"""
+        return [(self.previous[key], self.current[key]) for key in self.previous if key[0] == 'nodes']
+
+
+def _parse_path(index: int, path: Any) -> List[str]:
+    """Découpe un pointeur JSON ('/nodes/n1/data/label') en jetons"""
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise WorkflowPatchError(index, f"chemin invalide: {path!r}")
+    tokens = [t.replace('~1', '/').replace('~0', '~') for t in path[1:].split('/')]
+    if tokens[0] not in _COLLECTIONS or len(tokens) < 2 or tokens[1] == '':
+        raise WorkflowPatchError(index, f"le chemin doit désigner un nœud ou une arête (/nodes/<id> ou /edges/<id>): {path}")
+    return tokens
+
+
+def _child(index: int, container: Any, token: str, path: str) -> Any:
+    """Valeur désignée par un jeton dans un objet ou une liste"""
+    if isinstance(container, dict):
+        if token not in container:
+            raise WorkflowPatchError(index, f"chemin inexistant: {path}")
+        return container[token]
+    if isinstance(container, list):
+        if not token.isdigit() or int(token) >= len(container):
+            raise WorkflowPatchError(index, f"indice invalide dans {path}")
+        return container[int(token)]
+    raise WorkflowPatchError(index, f"chemin inexistant: {path}")
+
+
+def _apply_inner(index: int, operation: str, target: Any, tokens: List[str], value: Any, path: str) -> None:
+    """Applique une opération à l'intérieur d'un nœud ou d'une arête"""
+    parent = target
+    for token in tokens[:-1]:
+        parent = _child(index, parent, token, path)
+    last = tokens[-1]
+
+    if operation == 'test':
+        if _child(index, parent, last, path) != value:
+            raise WorkflowPatchError(index, f"valeur différente de celle attendue pour {path}")
+        return
+
+    if isinstance(parent, dict):
+        if operation in ('remove', 'replace') and last not in parent:
+            raise WorkflowPatchError(index, f"chemin inexistant: {path}")
+        if operation == 'remove':
+            del parent[last]
+        else:
+            parent[last] = value
+        return
+
+    if isinstance(parent, list):
+        if operation == 'add' and last == '-':
+            parent.append(value)
+            return
+        limit = len(parent) + 1 if operation == 'add' else len(parent)
+        if not last.isdigit() or int(last) >= limit:
+            raise WorkflowPatchError(index, f"indice invalide dans {path}")
+        position = int(last)
+        if operation == 'add':
+            parent.insert(position, value)
+        elif operation == 'remove':
+            del parent[position]
+        else:
+            parent[position] = value
+        return
+
+    raise WorkflowPatchError(index, f"chemin inexistant: {path}")
+
+
+def apply_patch(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                operations: List[Dict[str, Any]]) -> PatchResult:
+    """
+    Applique des opérations de type JSON Patch aux nœuds et arêtes d'un workflow
+
+    Les éléments sont désignés par leur identifiant et non par leur position,
+    pour que deux éditions concurrentes d'éléments différents ne se gênent
+    pas : '/nodes/<id>' (nœud entier), '/nodes/<id>/position',
+    '/edges/<id>/data/label', '/nodes/<id>/data/variables/0/value'... Un
+    '/' ou un '~' dans un identifiant s'écrit '~1' ou '~0'. Pour ajouter un
+    élément, '/nodes/-' ou '/nodes/<id>' avec l'élément en valeur.
+
+    Seuls les éléments touchés sont copiés ; les listes d'origine ne sont
+    pas modifiées.
+
+    Args:
+        nodes: Nœuds actuels
+        edges: Arêtes actuelles
+        operations: Opérations [{'op': 'add'|'remove'|'replace'|'test', 'path', 'value'}]
+
+    Returns:
+        Le résultat (nouveaux nœuds et arêtes, éléments touchés)
+
+    Raises:
+        WorkflowPatchError: Si une opération est invalide (aucune n'est alors appliquée)
+    """
+    items = {'nodes': list(nodes or []), 'edges': list(edges or [])}
+    positions: Dict[str, Dict[str, int]] = {name: {} for name in _COLLECTIONS}
+    for name in _COLLECTIONS:
+        for i, element in enumerate(items[name]):
+            positions[name].setdefault(str(element.get('id')), i)
+
+    previous: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+    removed = {name: 0 for name in _COLLECTIONS}
+
+    def touch(name: str, element_id: str) -> None:
+        """Copie un élément avant sa première modification"""
+        key = (name, element_id)
+        if key in previous:
+            return
+        position = positions[name].get(element_id)
+        if position is None:
+            previous[key] = None
+            return
+        previous[key] = items[name][position]
+        items[name][position] = copy.deepcopy(items[name][position])
+
+    for index, op in enumerate(operations or []):
+        if not isinstance(op, dict) or op.get('op') not in PATCH_OPERATIONS:
+            raise WorkflowPatchError(index, f"opération non supportée (attendu: {', '.join(PATCH_OPERATIONS)})")
+        operation = op['op']
+        path = op.get('path')
+        tokens = _parse_path(index, path)
+        name, element_id = tokens[0], tokens[1]
+        if operation in ('add', 'replace', 'test') and 'value' not in op:
+            raise WorkflowPatchError(index, "valeur manquante")
+        value = copy.deepcopy(op.get('value'))
+
+        if len(tokens) == 2:
+            if operation == 'test':
+                position = positions[name].get(element_id)
+                if position is None or items[name][position] != value:
+                    raise WorkflowPatchError(index, f"valeur différente de celle attendue pour {path}")
+                continue
+            if operation in ('add', 'replace'):
+                if not isinstance(value, dict):
+                    raise WorkflowPatchError(index, "un nœud ou une arête doit être un objet")
+                if element_id == '-':
+                    element_id = str(value.get('id') or '')
+                    if not element_id:
+                        raise WorkflowPatchError(index, "l'élément ajouté doit avoir un identifiant")
+                value.setdefault('id', element_id)
+                if str(value['id']) != element_id:
+                    raise WorkflowPatchError(index, f"l'identifiant de l'élément ne correspond pas au chemin {path}")
+            exists = element_id in positions[name]
+            if operation == 'add' and exists:
+                raise WorkflowPatchError(index, f"l'élément {element_id} existe déjà")
+            if operation in ('remove', 'replace') and not exists:
+                raise WorkflowPatchError(index, f"élément introuvable: {element_id}")
+
+            touch(name, element_id)
+            if operation == 'add':
+                positions[name][element_id] = len(items[name])
+                items[name].append(value)
+            elif operation == 'replace':
+                items[name][positions[name][element_id]] = value
+            else:
+                items[name][positions[name].pop(element_id)] = None
+                removed[name] += 1
+            continue
+
+        position = positions[name].get(element_id)
+        if position is None:
+            raise WorkflowPatchError(index, f"élément introuvable: {element_id}")
+        if operation != 'test':
+            touch(name, element_id)
+        _apply_inner(index, operation, items[name][positions[name][element_id]], tokens[2:], value, path)
+
+    current: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+    for name, element_id in previous:
+        position = positions[name].get(element_id)
+        current[(name, element_id)] = items[name][position] if position is not None else None
+
+    for name in _COLLECTIONS:
+        if removed[name]:
+            items[name] = [element for element in items[name] if element is not None]
+
+    return PatchResult(items['nodes'], items['edges'], previous, current)
+
+
+def diff_elements(name: str, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Opérations qui transforment une collection de nœuds ou d'arêtes en une autre
+
+    Les éléments sont comparés par identifiant ; un élément modifié est
+    remplacé entièrement. Appliquées par `apply_patch`, les opérations
+    redonnent exactement la nouvelle liste, ordre compris.
+
+    Args:
+        name: 'nodes' ou 'edges'
+        old: Éléments avant modification
+        new: Éléments après modification
+
+    Returns:
+        Les opérations, ou None si elles ne peuvent pas reproduire la nouvelle
+        liste (identifiants dupliqués, éléments réordonnés)
+    """
+    before: Dict[str, Dict[str, Any]] = {}
+    for element in old or []:
+        before.setdefault(str(element.get('id')), element)
+    after: Dict[str, Dict[str, Any]] = {}
+    for element in new or []:
+        after.setdefault(str(element.get('id')), element)
+    if len(before) != len(old or []) or len(after) != len(new or []):
+        return None
+
+    def pointer(element_id: str) -> str:
+        return f"/{name}/{element_id.replace('~', '~0').replace('/', '~1')}"
+
+    operations = []
+    kept = []
+    for element_id, element in before.items():
+        if element_id not in after:
+            operations.append({'op': 'remove', 'path': pointer(element_id)})
+            continue
+        kept.append(element_id)
+        if after[element_id] != element:
+            operations.append({'op': 'replace', 'path': pointer(element_id), 'value': after[element_id]})
+    added = [element_id for element_id in after if element_id not in before]
+    if kept + added != list(after):
+        return None
+    operations.extend({'op': 'add', 'path': pointer(element_id), 'value': after[element_id]} for element_id in added)
+    return operations
+
+
+def diff_workflow(old_nodes: List[Dict[str, Any]], old_edges: List[Dict[str, Any]],
+                  new_nodes: List[Dict[str, Any]], new_edges: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Opérations qui transforment le contenu d'un workflow en un autre (voir `diff_elements`)
+
+    Returns:
+        Les opérations sur les nœuds puis les arêtes, ou None si le contenu ne peut pas être reproduit ainsi
+    """
+    nodes = diff_elements('nodes', old_nodes, new_nodes)
+    edges = diff_elements('edges', old_edges, new_edges)
+    if nodes is None or edges is None:
+        return None
+    return nodes + edges
@@ -0,0 +1,37 @@
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Retourne le pool de processus partagé du moteur (créé au premier appel)
+
+    Les workers sont démarrés en mode 'spawn' : ils n'héritent ni des
+    connexions à la base ni des threads du serveur, et n'importent que le
+    moteur de calcul.
+
+    Args:
+        max_workers: Nombre de processus (utilisé uniquement à la création)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """Arrête le pool de processus (à l'arrêt de l'application)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Optional
+from app.engine.evaluator import WorkflowEvaluator, DictWorkflowResolver
+from app.engine.tables import LookupTable
+from app.engine.formula import FormulaError, sanitize_name
+from app.engine.scenarios import ScenarioRunner
+from app.engine.sandbox import SandboxLimits, CpuLimitExceeded, limit_memory, cpu_budget
+
+
+class PortfolioAggregate:
+    """
+    Agrégat incrémental des résultats de scénarios sur un ensemble de workflows
+
+    Les agrégats partiels (un par lot de workflows) sont fusionnés au fil de
+    l'eau : le coût mémoire ne dépend que du nombre de scénarios, pas du
+    nombre de workflows.
+    """
+
+    def __init__(self, scenario_names: List[str]):
+        self.scenario_names = scenario_names
+        self.revenue = [0.0] * len(scenario_names)
+        self.cost = [0.0] * len(scenario_names)
+        self.resilient = [0] * len(scenario_names)
+        self.evaluated = 0
+        self.failures: List[Dict[str, str]] = []
+
+    def add(self, results: List[Dict[str, Any]], revenue_variable: str, cost_variable: str) -> None:
+        """Ajoute les résultats d'un workflow (un résultat par scénario, cas de base en premier)"""
+        for k, result in enumerate(results):
+            self.revenue[k] += result['variables'].get(revenue_variable, 0.0)
+            self.cost[k] += result['variables'].get(cost_variable, 0.0)
+            self.resilient[k] += 1 if result['isResilient'] else 0
+        self.evaluated += 1
+
+    def merge(self, other: 'PortfolioAggregate') -> None:
+        """Fusionne un agrégat partiel dans celui-ci"""
+        for k in range(len(self.scenario_names)):
+            self.revenue[k] += other.revenue[k]
+            self.cost[k] += other.cost[k]
+            self.resilient[k] += other.resilient[k]
+        self.evaluated += other.evaluated
+        self.failures.extend(other.failures)
+
+    def to_dict(self) -> Dict[str, Any]:
+        scenarios = []
+        for k, name in enumerate(self.scenario_names):
+            revenue, cost = self.revenue[k], self.cost[k]
+            scenarios.append({
+                'scenario': name,
+                'revenue': revenue,
+                'cost': cost,
+                'margin': revenue - cost,
+                'margin_rate': (revenue - cost) / revenue * 100 if revenue else None,
+                'resilient_count': self.resilient[k],
+                'workflow_count': self.evaluated
+            })
+        return {
+            'scenarios': scenarios,
+            'evaluated_count': self.evaluated,
+            'failures': self.failures
+        }
+
+
+def run_portfolio_shard(workflows: List[Dict[str, Any]], children: Dict[str, Dict[str, Any]],
+                        tables: Dict[str, LookupTable], scenarios: List[Dict[str, Any]], reference_variable: Optional[str],
+                        threshold: Optional[float], revenue_variable: str,
+                        cost_variable: str, limits: Optional[SandboxLimits] = None) -> PortfolioAggregate:
+    """
+    Évalue un lot de workflows dans un worker du pool et retourne l'agrégat partiel
+
+    Avec des limites, le worker est plafonné en mémoire comme un job isolé
+    et chaque workflow dispose du même budget de temps CPU. Un workflow en
+    échec (formule, erreur numérique, limite atteinte) est compté dans
+    'failures' sans interrompre le lot.
+
+    Args:
+        workflows: Définitions {'id', 'nodes', 'edges', 'revision'} du lot
+        children: Définitions des sous-workflows référencés (et des workflows du lot)
+        tables: Tables de correspondance référencées, accessibles au propriétaire du lot
+        scenarios: Jeu de scénarios commun appliqué à chaque workflow
+        reference_variable: Variable de résilience
+        threshold: Seuil de résilience
+        revenue_variable: Variable de chiffre d'affaires
+        cost_variable: Variable de coût total
+        limits: Limites de ressources (voir `run_sandboxed`), aucune si None
+
+    Returns:
+        Agrégat partiel du lot
+    """
+    revenue_variable = sanitize_name(revenue_variable)
+    cost_variable = sanitize_name(cost_variable)
+    active = [s for s in scenarios if s.get('active') is not False]
+    names = ['Cas de base'] + [s.get('name') or f"Scénario {k + 1}" for k, s in enumerate(active)]
+    aggregate = PortfolioAggregate(names)
+    evaluator = WorkflowEvaluator(DictWorkflowResolver(children, tables))
+    limits = limits or SandboxLimits()
+    limit_memory(limits.max_memory_mb)
+
+    for workflow in workflows:
+        try:
+            with cpu_budget(limits.max_cpu_seconds):
+                model = evaluator.load(workflow['id'])
+                outcome = ScenarioRunner.run(
+                    evaluator, model, scenarios=active,
+                    reference_variable=reference_variable, threshold=threshold,
+                    tracked_variables=[revenue_variable, cost_variable]
+                )
+            aggregate.add(outcome['results'], revenue_variable, cost_variable)
+        except FormulaError as e:
+            aggregate.failures.append({'workflow_id': workflow['id'], 'error': str(e)})
+        except MemoryError:
+            aggregate.failures.append({
+                'workflow_id': workflow['id'], 'error': f"Limite mémoire dépassée ({limits.max_memory_mb} Mo)"
+            })
+        except CpuLimitExceeded:
+            aggregate.failures.append({
+                'workflow_id': workflow['id'], 'error': f"Limite de temps CPU dépassée ({limits.max_cpu_seconds} s)"
+            })
+        except Exception as e:
+            aggregate.failures.append({'workflow_id': workflow['id'], 'error': f"Erreur du moteur de simulation: {str(e)}"})
+    return aggregate
@@ -0,0 +1,206 @@
+from typing import Dict, Any, Optional, Iterator
+from contextlib import contextmanager
+import multiprocessing
+import signal
+import time
+from app.engine.executor import execute_job
+from app.engine.shm import SharedArrays, export_arrays, discard_segments
+
+try:
+    import resource
+except ImportError:  # Windows : pas de rlimits, seul le chien de garde s'applique
+    resource = None
+
+
+class SandboxLimits:
+    """
+    Limites de ressources d'un job isolé
+
+    Args:
+        max_memory_mb: Espace d'adressage maximal du processus (RLIMIT_AS)
+        max_cpu_seconds: Temps CPU maximal (RLIMIT_CPU)
+        wall_timeout: Durée réelle maximale avant arrêt forcé par le chien de garde
+    """
+
+    def __init__(self, max_memory_mb: Optional[int] = None, max_cpu_seconds: Optional[int] = None,
+                 wall_timeout: Optional[float] = None):
+        self.max_memory_mb = max_memory_mb
+        self.max_cpu_seconds = max_cpu_seconds
+        self.wall_timeout = wall_timeout
+
+
+class CpuLimitExceeded(Exception):
+    """Levée dans le processus isolé à la réception de SIGXCPU"""
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def limit_memory(max_memory_mb: Optional[int]) -> None:
+    """Plafonne l'espace d'adressage du processus courant (RLIMIT_AS) ; au-delà, les allocations lèvent MemoryError"""
+    if resource is not None and max_memory_mb:
+        size = int(max_memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+
+@contextmanager
+def cpu_budget(max_cpu_seconds: Optional[int]) -> Iterator[None]:
+    """
+    Limite le temps CPU d'un calcul dans un processus réutilisé (worker de pool)
+
+    RLIMIT_CPU étant cumulatif, la limite douce est fixée à la consommation
+    courante augmentée du budget, puis levée en sortie ; la limite dure
+    n'est pas modifiée. Au-delà du budget, SIGXCPU lève CpuLimitExceeded.
+    """
+    if resource is None or not max_cpu_seconds:
+        yield
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + int(max_cpu_seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    previous = signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        signal.signal(signal.SIGXCPU, previous)
+
+
+def _usage() -> Dict[str, Any]:
+    """Ressources consommées par le processus courant (RSS crête, temps CPU)"""
+    if resource is None:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        # ru_maxrss est en Ko sous Linux
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3)
+    }
+
+
+def _sandbox_entry(job: Dict[str, Any], limits: SandboxLimits, connection) -> None:
+    """Point d'entrée du processus isolé : applique les limites, exécute le job et renvoie le résultat"""
+    limit_memory(limits.max_memory_mb)
+    if resource is not None:
+        if limits.max_cpu_seconds:
+            # Limite douce : SIGXCPU (intercepté) ; limite dure une seconde plus tard : SIGKILL
+            seconds = int(limits.max_cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+            signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    try:
+        outcome = execute_job(job)
+    except MemoryError:
+        outcome = {'status': 'failed', 'error_message': f"Limite mémoire dépassée ({limits.max_memory_mb} Mo)"}
+    except CpuLimitExceeded:
+        outcome = {'status': 'failed', 'error_message': f"Limite de temps CPU dépassée ({limits.max_cpu_seconds} s)"}
+    except Exception as e:
+        outcome = {'status': 'failed', 'error_message': f"Erreur du moteur de simulation: {str(e)}"}
+
+    # Les tableaux volumineux passent par la mémoire partagée plutôt que par le pipe
+    arrays = outcome.pop('arrays', None)
+    if arrays:
+        try:
+            outcome['shared_arrays'] = export_arrays(arrays)
+        except (OSError, MemoryError):
+            outcome['shared_arrays'] = None
+        del arrays
+
+    outcome['resources'] = _usage()
+    try:
+        connection.send(outcome)
+    except MemoryError:
+        discard_segments(outcome.get('shared_arrays') or {})
+        connection.send({'status': 'failed', 'resources': _usage(),
+                         'error_message': f"Limite mémoire dépassée ({limits.max_memory_mb} Mo)"})
+    finally:
+        connection.close()
+
+
+def _context():
+    """
+    Contexte multiprocessing des processus isolés
+
+    'forkserver' crée chaque processus à partir d'un serveur vierge (sans
+    connexions à la base ni threads du serveur web) qui a déjà importé le
+    moteur : le démarrage d'un job ne coûte qu'un fork. 'spawn' est utilisé
+    là où forkserver n'existe pas.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['app.engine.executor'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def run_sandboxed(job: Dict[str, Any], limits: SandboxLimits) -> Dict[str, Any]:
+    """
+    Exécute un job dans un processus dédié, sous limites de mémoire, de CPU et de durée
+
+    Un processus par job : les limites CPU étant cumulatives, un processus
+    réutilisé hériterait de la consommation des jobs précédents. Le job doit
+    donc être autonome (définitions des sous-workflows incluses).
+
+    Args:
+        job: Job au format de `execute_job`
+        limits: Limites à appliquer
+
+    Returns:
+        Résultat de `execute_job`, complété par 'resources' ({'peak_rss_mb',
+        'cpu_seconds', 'wall_seconds'}) ; statut 'failed' avec un message
+        explicite si une limite est atteinte. 'arrays' est alors un
+        `SharedArrays` à libérer par l'appelant.
+    """
+    started = time.monotonic()
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = _context().Process(target=_sandbox_entry, args=(job, limits, sender), daemon=True)
+    process.start()
+    sender.close()
+
+    outcome = None
+    timed_out = False
+    try:
+        if receiver.poll(limits.wall_timeout):
+            outcome = receiver.recv()
+        else:
+            timed_out = True
+    except EOFError:
+        # Processus terminé sans résultat (SIGKILL de la limite CPU dure, OOM killer...)
+        outcome = None
+    finally:
+        receiver.close()
+
+    if timed_out:
+        process.kill()
+        process.join()
+        outcome = {'status': 'failed', 'resources': {},
+                   'error_message': f"Durée maximale d'exécution dépassée ({limits.wall_timeout} s)"}
+    else:
+        process.join(5)
+        if outcome is None:
+            outcome = {'status': 'failed', 'resources': {},
+                       'error_message': _exit_message(process.exitcode, limits)}
+
+    descriptors = outcome.pop('shared_arrays', None)
+    if descriptors:
+        try:
+            outcome['arrays'] = SharedArrays(descriptors)
+        except FileNotFoundError:
+            pass
+
+    outcome.setdefault('resources', {})['wall_seconds'] = round(time.monotonic() - started, 3)
+    return outcome
+
+
+def _exit_message(exitcode: Optional[int], limits: SandboxLimits) -> str:
+    """Message d'erreur pour un processus terminé sans renvoyer de résultat"""
+    if exitcode == -signal.SIGKILL:
+        return (f"Processus de simulation arrêté (limite de temps CPU de {limits.max_cpu_seconds} s "
+                f"ou mémoire de {limits.max_memory_mb} Mo atteinte)")
+    if exitcode is not None and exitcode < 0:
+        return f"Processus de simulation arrêté par le signal {-exitcode}"
+    return f"Processus de simulation terminé sans résultat (code {exitcode})"
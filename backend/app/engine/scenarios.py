@@ -0,0 +1,168 @@
+from typing import List, Dict, Any, Optional, Tuple
+import time
+import numpy as np
+from app.engine.evaluator import WorkflowEvaluator
+from app.engine.formula import sanitize_name
+from app.engine.model import WorkflowModel
+
+DEFAULT_REFERENCE_VARIABLE = 'tauxMarge'
+DEFAULT_THRESHOLD = 15
+# Nombre de scénarios évalués par passe lorsqu'une échéance est fixée
+DEADLINE_CHUNK_SIZE = 8
+
+
+class ScenarioRunner:
+    """
+    Exécute les scénarios de stress d'un workflow côté serveur
+
+    Équivalent du ScenarioSimulator client, mais vectorisé : le cas de base et
+    tous les scénarios actifs sont évalués en une seule passe, chaque scénario
+    occupant une ligne des tableaux de variables.
+    """
+
+    @staticmethod
+    def collect_scenarios(model: WorkflowModel) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Récupère les scénarios et réglages définis dans les nœuds 'scenario'
+
+        Returns:
+            Tuple (scénarios, réglages {'threshold', 'referenceVariable'})
+        """
+        scenarios, settings = [], {}
+        graph = model.graph
+        for i in range(len(graph)):
+            if graph.node_type(i) != 'scenario':
+                continue
+            data = graph.node_data(i)
+            scenarios.extend(data.get('scenarios') or [])
+            for key in ('threshold', 'referenceVariable'):
+                if data.get(key) is not None and key not in settings:
+                    settings[key] = data[key]
+        return scenarios, settings
+
+    @staticmethod
+    def run(evaluator: WorkflowEvaluator, model: WorkflowModel,
+            scenarios: Optional[List[Dict[str, Any]]] = None,
+            reference_variable: Optional[str] = None, threshold: Optional[float] = None,
+            tracked_variables: Optional[List[str]] = None,
+            deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Évalue le cas de base et les scénarios actifs
+
+        Sans échéance, tout est évalué en une passe. Avec une échéance, les
+        scénarios sont évalués par paquets et l'évaluation s'arrête au premier
+        paquet qui commence après l'échéance (le cas de base est toujours évalué).
+
+        Args:
+            evaluator: Évaluateur (porte le résolveur de sous-workflows et le cache)
+            model: Modèle compilé du workflow
+            scenarios: Scénarios à appliquer (par défaut ceux des nœuds 'scenario')
+            reference_variable: Variable évaluée pour la résilience
+            threshold: Seuil de résilience sur la variable de référence
+            tracked_variables: Variables supplémentaires à reporter par scénario
+            deadline: Échéance (horodatage time.time()) ou None
+
+        Returns:
+            Dictionnaire {'reference_variable', 'threshold', 'results', 'series', 'completed', 'total'}
+            où 'results' liste {'scenario', 'margin', 'isResilient', 'variables'},
+            cas de base en premier, et 'series' donne les valeurs par période des
+            variables suivies (une ligne par résultat)
+        """
+        defined, settings = ScenarioRunner.collect_scenarios(model)
+        if scenarios is None:
+            scenarios = defined
+        reference_variable = reference_variable or settings.get('referenceVariable') or DEFAULT_REFERENCE_VARIABLE
+        threshold = float(threshold if threshold is not None else settings.get('threshold', DEFAULT_THRESHOLD))
+
+        active = [s for s in scenarios if s.get('active') is not False]
+        names = ['Cas de base'] + [s.get('name') or f"Scénario {k + 1}" for k, s in enumerate(active)]
+        tracked = [sanitize_name(v) for v in (tracked_variables or [])]
+
+        if deadline is None:
+            chunks = [active]
+        else:
+            chunks = [active[k:k + DEADLINE_CHUNK_SIZE] for k in range(0, len(active), DEADLINE_CHUNK_SIZE)] or [[]]
+
+        results = []
+        series: Dict[str, List[np.ndarray]] = {name: [] for name in tracked}
+        completed = 0
+        for index, chunk in enumerate(chunks):
+            if index and time.time() >= deadline:
+                break
+            overrides = ScenarioRunner.build_overrides(model, chunk)
+            scope = evaluator.evaluate(model, overrides, outputs=[sanitize_name(reference_variable)] + tracked)
+            count = len(chunk) + 1
+
+            reference = ScenarioRunner.column(scope.get(sanitize_name(reference_variable)), count)
+            columns = {name: ScenarioRunner.column(scope.get(name), count) for name in tracked}
+
+            # Ligne 0 = cas de base, recalculé à chaque paquet mais reporté une seule fois
+            first = 0 if index == 0 else 1
+            for name in tracked:
+                series[name].append(ScenarioRunner.rows(scope.get(name), count)[first:])
+            for k in range(first, count):
+                results.append({
+                    'scenario': names[completed + k],
+                    'margin': float(reference[k]),
+                    'isResilient': bool(reference[k] >= threshold),
+                    'variables': {v: float(columns[v][k]) for v in tracked}
+                })
+            completed += len(chunk)
+
+        return {
+            'reference_variable': reference_variable,
+            'threshold': threshold,
+            'results': results,
+            'series': {name: np.concatenate(parts) for name, parts in series.items()},
+            'completed': completed,
+            'total': len(active)
+        }
+
+    @staticmethod
+    def build_overrides(model: WorkflowModel, scenarios: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Construit les tableaux d'entrées : ligne 0 = cas de base, ligne k = scénario k
+
+        Comme côté client, un scénario ne modifie que les variables définies
+        dans les nœuds du workflow.
+        """
+        count = len(scenarios) + 1
+        overrides: Dict[str, np.ndarray] = {}
+        for k, scenario in enumerate(scenarios, start=1):
+            for variable in scenario.get('variables') or []:
+                name = sanitize_name(variable.get('name') or '')
+                base = model.defaults.get(name)
+                value = WorkflowModel.parse_value(variable.get('value'))
+                if base is None or value is None:
+                    continue
+                if name not in overrides:
+                    overrides[name] = np.repeat(base[:1], count, axis=0).astype(float)
+                overrides[name][k] = np.broadcast_to(value[0], overrides[name][k].shape)
+        return overrides
+
+    @staticmethod
+    def column(value: Optional[np.ndarray], count: int) -> np.ndarray:
+        """
+        Extrait une valeur scalaire par scénario (0 si la variable est absente)
+
+        Une variable périodique est agrégée par somme sur ses périodes.
+        """
+        if value is None:
+            return np.zeros(count)
+        array = np.asarray(value, dtype=float)
+        if array.ndim == 2:
+            array = array[:, 0] if array.shape[1] == 1 else array.sum(axis=1)
+        array = array.reshape(-1)
+        if array.size == 1:
+            array = np.repeat(array, count)
+        return np.nan_to_num(array[:count])
+
+    @staticmethod
+    def rows(value: Optional[np.ndarray], count: int) -> np.ndarray:
+        """Valeurs par période d'une variable, une ligne par scénario (0 si la variable est absente)"""
+        if value is None:
+            return np.zeros((count, 1))
+        array = np.nan_to_num(np.asarray(value, dtype=float))
+        if array.ndim < 2:
+            array = array.reshape(1, -1)
+        return np.broadcast_to(array, (count, array.shape[1]))[:count].copy()
@@ -0,0 +1,108 @@
+from typing import Dict, Any, Iterator, Tuple
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def export_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """
+    Copie des tableaux dans des segments de mémoire partagée (côté worker)
+
+    Chaque tableau est écrit une seule fois ; seul un descripteur léger
+    {'segment', 'shape', 'dtype'} transite ensuite entre les processus au lieu
+    du contenu sérialisé. Les segments sont fermés mais pas supprimés : le
+    processus parent en devient propriétaire (voir `SharedArrays.release`).
+
+    Args:
+        arrays: Tableaux à exporter {nom: tableau}
+
+    Returns:
+        Descripteurs {nom: {'segment', 'shape', 'dtype'}}
+    """
+    descriptors: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            try:
+                target = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+                target[...] = array
+                del target
+            finally:
+                segment.close()
+            descriptors[name] = {'segment': segment.name, 'shape': list(array.shape), 'dtype': array.dtype.str}
+    except Exception:
+        discard_segments(descriptors)
+        raise
+    return descriptors
+
+
+def discard_segments(descriptors: Dict[str, Dict[str, Any]]) -> None:
+    """Supprime des segments exportés qui ne seront pas lus"""
+    for descriptor in descriptors.values():
+        try:
+            segment = shared_memory.SharedMemory(name=descriptor['segment'])
+        except FileNotFoundError:
+            continue
+        segment.close()
+        segment.unlink()
+
+
+class SharedArrays:
+    """
+    Tableaux reçus d'un worker, lus directement dans la mémoire partagée (côté parent)
+
+    Les tableaux sont des vues en lecture seule sur les segments : aucune copie
+    n'est faite tant que l'appelant ne les persiste pas. `release` (ou la
+    sortie du bloc `with`) ferme et supprime les segments ; les vues ne doivent
+    plus être utilisées ensuite.
+    """
+
+    def __init__(self, descriptors: Dict[str, Dict[str, Any]]):
+        self.descriptors = descriptors
+        self._segments = []
+        self.arrays: Dict[str, np.ndarray] = {}
+        try:
+            for name, descriptor in descriptors.items():
+                segment = shared_memory.SharedMemory(name=descriptor['segment'])
+                self._segments.append(segment)
+                array = np.ndarray(tuple(descriptor['shape']), dtype=np.dtype(descriptor['dtype']),
+                                   buffer=segment.buf)
+                array.setflags(write=False)
+                self.arrays[name] = array
+        except Exception:
+            self.release()
+            discard_segments(descriptors)
+            raise
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        return iter(self.arrays.items())
+
+    def release(self) -> None:
+        """Ferme et supprime les segments de mémoire partagée"""
+        self.arrays = {}
+        for segment in self._segments:
+            try:
+                segment.close()
+            except BufferError:
+                # Une vue est encore référencée : le segment reste mappé jusqu'à sa libération
+                pass
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.release()
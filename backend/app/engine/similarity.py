@@ -0,0 +1,130 @@
+from typing import List, Dict, Any, Set
+import hashlib
+import re
+import unicodedata
+import numpy as np
+from app.engine.formula import sanitize_name
+
+# Signature MinHash : nombre de fonctions de hachage, réparties en bandes LSH
+# (16 bandes de 4 valeurs : deux workflows similaires à 50 % partagent au moins
+# une bande avec une probabilité de 64 %, à 80 % avec une probabilité de 99,9 %)
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+# Graines des fonctions de hachage : fixes, pour que les signatures enregistrées restent comparables
+_SEEDS = np.random.default_rng(20261019).integers(0, 2 ** 63, size=SIGNATURE_SIZE, dtype=np.uint64)
+
+_EMPTY = np.uint32(0xFFFFFFFF)
+
+
+def _normalize_label(value: Any) -> str:
+    """Libellé sans casse, accents ni espaces superflus"""
+    text = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def workflow_shingles(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Set[str]:
+    """
+    Éléments structurels d'un workflow comparés par la recherche de similarité
+
+    Types de nœuds et transitions entre types (avec leur multiplicité : trois
+    tâches ne ressemblent pas à trente), libellés de nœuds, noms de variables
+    et transitions entre libellés.
+
+    Args:
+        nodes: Nœuds du workflow
+        edges: Arêtes du workflow
+
+    Returns:
+        Ensemble de jetons
+    """
+    shingles: Set[str] = set()
+    counts: Dict[str, int] = {}
+
+    def counted(token: str) -> str:
+        counts[token] = counts.get(token, 0) + 1
+        return f"{token}#{counts[token]}"
+
+    types: Dict[str, str] = {}
+    labels: Dict[str, str] = {}
+    for node in nodes or []:
+        node_id = str(node.get('id'))
+        data = node.get('data') or {}
+        types[node_id] = node.get('type') or ''
+        labels[node_id] = _normalize_label(data.get('label'))
+        shingles.add(counted(f"t:{types[node_id]}"))
+        if labels[node_id]:
+            shingles.add(f"l:{labels[node_id]}")
+        for variable in data.get('variables') or []:
+            if variable.get('name'):
+                shingles.add(f"v:{sanitize_name(variable['name']).lower()}")
+
+    for edge in edges or []:
+        source, target = str(edge.get('source')), str(edge.get('target'))
+        if source not in types or target not in types:
+            continue
+        shingles.add(counted(f"e:{types[source]}>{types[target]}"))
+        if labels[source] and labels[target]:
+            shingles.add(f"el:{labels[source]}>{labels[target]}")
+    return shingles
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Finaliseur splitmix64 (les multiplications débordent modulo 2^64 par construction)"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def minhash_signature(shingles: Set[str]) -> np.ndarray:
+    """
+    Signature MinHash d'un ensemble de jetons
+
+    La proportion de valeurs égales entre deux signatures estime l'indice de
+    Jaccard des deux ensembles.
+
+    Returns:
+        Tableau uint32 de SIGNATURE_SIZE valeurs (toutes maximales si l'ensemble est vide)
+    """
+    if not shingles:
+        return np.full(SIGNATURE_SIZE, _EMPTY, dtype=np.uint32)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    with np.errstate(over='ignore'):
+        mixed = _mix(hashes[None, :] ^ _SEEDS[:, None])
+    return (mixed.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+
+def lsh_buckets(signature: np.ndarray) -> List[int]:
+    """
+    Clés LSH d'une signature : une empreinte signée sur 64 bits par bande
+
+    Returns:
+        LSH_BANDS clés (vide pour la signature d'un workflow vide)
+    """
+    if np.all(signature == _EMPTY):
+        return []
+    return [
+        int.from_bytes(hashlib.blake2b(signature[b * LSH_ROWS:(b + 1) * LSH_ROWS].tobytes(),
+                                       digest_size=8).digest(), 'little', signed=True)
+        for b in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(signature: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Indice de Jaccard estimé entre une signature et des signatures candidates
+
+    Args:
+        signature: Signature de référence (SIGNATURE_SIZE,)
+        candidates: Signatures candidates (n, SIGNATURE_SIZE)
+
+    Returns:
+        Similarités entre 0 et 1 (n,)
+    """
+    return np.mean(candidates == signature[None, :], axis=1)
@@ -0,0 +1,81 @@
+from typing import Dict, Any, Sequence
+import numpy as np
+
+# Nombre de quantiles conservés (tous les centiles, bornes comprises)
+SKETCH_SIZE = 101
+
+
+def quantile_sketch(values: np.ndarray, size: int = SKETCH_SIZE) -> Dict[str, Any]:
+    """
+    Résume une distribution par ses quantiles équirépartis
+
+    Le résumé a une taille fixe quel que soit le nombre de tirages : il est
+    conservé dans les métriques et suffit pour comparer des simulations
+    (centiles, distance de Kolmogorov-Smirnov à 1/(size-1) près) sans relire
+    les échantillons.
+
+    Args:
+        values: Échantillon
+        size: Nombre de quantiles
+
+    Returns:
+        Dictionnaire {'count', 'mean', 'std', 'quantiles'}
+    """
+    values = np.asarray(values, dtype=float).reshape(-1)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {'count': 0, 'mean': None, 'std': None, 'quantiles': []}
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()),
+        'std': float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        'quantiles': np.quantile(values, np.linspace(0.0, 1.0, size)).tolist()
+    }
+
+
+def sketch_percentile(sketch: Dict[str, Any], percentile: float) -> float:
+    """Centile (0-100) estimé par interpolation dans le résumé"""
+    quantiles = np.asarray(sketch['quantiles'], dtype=float)
+    levels = np.linspace(0.0, 100.0, quantiles.size)
+    return float(np.interp(percentile, levels, quantiles))
+
+
+def _cdf(quantiles: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Fonction de répartition en escalier (continue à droite) déduite des quantiles"""
+    levels = np.linspace(0.0, 1.0, quantiles.size)
+    counts = np.searchsorted(quantiles, x, side='right')
+    return np.where(counts > 0, levels[np.maximum(counts - 1, 0)], 0.0)
+
+
+def ks_distance(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    Distance de Kolmogorov-Smirnov entre deux distributions résumées
+
+    Écart maximal entre les deux fonctions de répartition, évalué en chaque
+    quantile des deux résumés.
+    """
+    qa = np.asarray(a['quantiles'], dtype=float)
+    qb = np.asarray(b['quantiles'], dtype=float)
+    if qa.size == 0 or qb.size == 0:
+        return None
+    grid = np.union1d(qa, qb)
+    return float(np.max(np.abs(_cdf(qa, grid) - _cdf(qb, grid))))
+
+
+def compare_sketches(base: Dict[str, Any], other: Dict[str, Any],
+                     percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict[str, Any]:
+    """
+    Compare une distribution à une distribution de référence
+
+    Returns:
+        Dictionnaire {'mean_delta', 'ks_distance', 'percentile_deltas': {centile: écart}}
+    """
+    if not base.get('quantiles') or not other.get('quantiles'):
+        return {'mean_delta': None, 'ks_distance': None, 'percentile_deltas': {}}
+    return {
+        'mean_delta': other['mean'] - base['mean'],
+        'ks_distance': ks_distance(base, other),
+        'percentile_deltas': {
+            str(p): sketch_percentile(other, p) - sketch_percentile(base, p) for p in percentiles
+        }
+    }
@@ -0,0 +1,111 @@
+from typing import List, Dict, Any, Optional
+import hashlib
+import numpy as np
+
+# Type de variable portant une table de correspondance
+TABLE_VARIABLE_TYPE = 'table'
+
+
+class LookupTable:
+    """
+    Table de correspondance clé -> valeur (grille tarifaire, barème, courbe)
+
+    Les clés sont triées une fois pour toutes à la construction : une
+    recherche est ensuite une recherche dichotomique vectorisée
+    (`np.searchsorted`), en O(log n) par valeur cherchée, pour autant de
+    valeurs qu'en contient le tableau (scénarios, périodes) passé.
+    """
+
+    def __init__(self, keys: Any, values: Any):
+        """
+        Args:
+            keys: Clés (dans un ordre quelconque)
+            values: Valeur associée à chaque clé
+
+        Raises:
+            ValueError: Si la table est vide, de tailles incohérentes ou contient des valeurs non finies
+        """
+        keys = np.asarray(keys, dtype=float).reshape(-1)
+        values = np.asarray(values, dtype=float).reshape(-1)
+        if keys.size == 0:
+            raise ValueError("Table vide")
+        if keys.size != values.size:
+            raise ValueError("La table doit avoir autant de valeurs que de clés")
+        if not (np.all(np.isfinite(keys)) and np.all(np.isfinite(values))):
+            raise ValueError("La table contient des valeurs non numériques ou infinies")
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.values = values[order]
+        self.keys.setflags(write=False)
+        self.values.setflags(write=False)
+        self._digest: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self.keys.size
+
+    @property
+    def digest(self) -> str:
+        """Empreinte du contenu (clé de cache des sous-workflows)"""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.keys.tobytes() + self.values.tobytes()).hexdigest()
+        return self._digest
+
+    def lookup(self, x: Any) -> np.ndarray:
+        """
+        Valeur de la plus grande clé inférieure ou égale à x (barème par tranches)
+
+        En dessous de la première clé, la première valeur est retournée.
+        """
+        x = np.asarray(x, dtype=float)
+        index = np.searchsorted(self.keys, x, side='right') - 1
+        return self.values[np.clip(index, 0, self.keys.size - 1)]
+
+    def interp(self, x: Any) -> np.ndarray:
+        """Interpolation linéaire entre les clés encadrant x (valeurs extrêmes au-delà des bornes)"""
+        x = np.asarray(x, dtype=float)
+        return np.interp(x.reshape(-1), self.keys, self.values).reshape(x.shape)
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'LookupTable':
+        """
+        Construit une table depuis sa forme JSON
+
+        Formes acceptées : {'keys': [...], 'values': [...]} ou liste de couples [[clé, valeur], ...]
+
+        Raises:
+            ValueError: Si la forme n'est pas reconnue
+        """
+        if isinstance(value, dict) and 'keys' in value and 'values' in value:
+            return cls(value['keys'], value['values'])
+        if isinstance(value, (list, tuple)) and value and all(isinstance(r, (list, tuple)) and len(r) == 2 for r in value):
+            rows = np.asarray(value, dtype=float)
+            return cls(rows[:, 0], rows[:, 1])
+        raise ValueError("Table invalide : attendu {'keys': [...], 'values': [...]} ou [[clé, valeur], ...]")
+
+
+def _table(table: Any, function: str) -> LookupTable:
+    if not isinstance(table, LookupTable):
+        raise ValueError(f"{function} : le premier argument doit être une variable de type table")
+    return table
+
+
+def lookup(table, x):
+    """Fonction de formule : lookup(table, x)"""
+    return _table(table, 'lookup').lookup(x)
+
+
+def interp(table, x):
+    """Fonction de formule : interp(table, x)"""
+    return _table(table, 'interp').interp(x)
+
+
+def table_references(nodes: List[Dict[str, Any]]) -> List[str]:
+    """Retourne les IDs des tables téléversées référencées par les variables (variable.tableId), sans doublon"""
+    refs = []
+    for node in nodes or []:
+        for variable in (node.get('data') or {}).get('variables') or []:
+            ref = variable.get('tableId') if variable.get('type') == TABLE_VARIABLE_TYPE else None
+            if ref and str(ref) not in refs:
+                refs.append(str(ref))
+    return refs
@@ -0,0 +1,179 @@
+from typing import List, Dict, Any, Optional
+from collections import Counter
+from app.engine.analysis import FLOW_NODE_TYPES, unreachable_nodes
+from app.engine.evaluator import WorkflowEvaluator
+from app.engine.model import WorkflowModel
+
+
+class WorkflowValidationError(ValueError):
+    """Workflow refusé à l'enregistrement : porte les diagnostics de validation"""
+
+    def __init__(self, diagnostics: List[Dict[str, Any]]):
+        errors = [d for d in diagnostics if d['severity'] == 'error']
+        message = f"Workflow invalide ({len(errors)} erreur(s))"
+        if errors:
+            message += f": {errors[0]['message']}"
+        super().__init__(message)
+        self.diagnostics = diagnostics
+
+
+class ValidationResult:
+    """
+    Résultat de la validation d'un workflow
+
+    Args:
+        model: Modèle compilé pendant la validation (réutilisable pour les simulations)
+        diagnostics: Diagnostics [{'severity', 'code', 'message', 'node_id', 'edge_id'}]
+    """
+
+    def __init__(self, model: WorkflowModel, diagnostics: List[Dict[str, Any]]):
+        self.model = model
+        self.diagnostics = diagnostics
+
+    @property
+    def errors(self) -> List[Dict[str, Any]]:
+        return [d for d in self.diagnostics if d['severity'] == 'error']
+
+    @property
+    def warnings(self) -> List[Dict[str, Any]]:
+        return [d for d in self.diagnostics if d['severity'] == 'warning']
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'valid': self.valid,
+            'errors': len(self.errors),
+            'warnings': len(self.warnings),
+            'diagnostics': self.diagnostics
+        }
+
+
+def _diagnostic(severity: str, code: str, message: str, node_id: Optional[str] = None,
+                edge_id: Optional[str] = None) -> Dict[str, Any]:
+    return {'severity': severity, 'code': code, 'message': message, 'node_id': node_id, 'edge_id': edge_id}
+
+
+def closed_loops(model: WorkflowModel) -> List[str]:
+    """
+    Nœuds du flux atteignables depuis un départ mais d'où aucun nœud terminal n'est atteignable
+
+    Un tel nœud appartient (ou mène) à une boucle sans sortie : le processus
+    ne s'y termine jamais et l'analyse de Markov n'a pas d'état absorbant.
+    Deux parcours linéaires : en avant depuis les départs, à rebours depuis
+    les nœuds terminaux.
+
+    Returns:
+        IDs des nœuds concernés
+    """
+    graph = model.graph
+    starts = graph.start_nodes()
+    if not starts:
+        return []
+    reached = graph.reachable_from(starts)
+
+    ends = [i for i in range(len(graph)) if graph.is_end(i)]
+    can_finish = [False] * len(graph)
+    for i in ends:
+        can_finish[i] = True
+    pending = list(ends)
+    while pending:
+        for source in graph.predecessors[pending.pop()]:
+            if not can_finish[source]:
+                can_finish[source] = True
+                pending.append(source)
+
+    return [graph.node_ids[i] for i in sorted(reached)
+            if not can_finish[i] and graph.node_type(i) in FLOW_NODE_TYPES]
+
+
+def validate_workflow(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                      evaluator: Optional[WorkflowEvaluator] = None, workflow_id: Optional[str] = None,
+                      revision: Optional[int] = None) -> ValidationResult:
+    """
+    Valide la structure et la couche de calcul d'un workflow
+
+    Toutes les vérifications sont linéaires en nombre de nœuds, d'arêtes et
+    d'instructions ; le modèle compilé au passage est retourné pour être mis
+    en cache et réutilisé par les simulations.
+
+    Erreurs (le workflow ne peut pas être simulé) : identifiants de nœuds ou
+    d'arêtes dupliqués ou manquants, arêtes pendantes, boucles sans sortie,
+    formules ou tables invalides, sous-workflows introuvables ou circulaires.
+    Avertissements : nœuds du flux inatteignables, probabilités de branche
+    explicites totalisant moins de 1 (l'analyse de Markov les refuse) et
+    variables lues sans être déclarées ni calculées (ce sont les entrées
+    attendues d'un sous-workflow).
+
+    Args:
+        nodes: Nœuds du workflow
+        edges: Arêtes du workflow
+        evaluator: Évaluateur résolvant les sous-workflows (sans résolveur si None)
+        workflow_id: ID du workflow (détection des références circulaires)
+        revision: Révision sous laquelle le modèle sera mis en cache
+
+    Returns:
+        Le résultat de la validation
+    """
+    nodes = nodes or []
+    edges = edges or []
+    diagnostics: List[Dict[str, Any]] = []
+
+    node_ids = Counter(str(node.get('id')) for node in nodes if node.get('id') not in (None, ''))
+    if sum(node_ids.values()) < len(nodes):
+        diagnostics.append(_diagnostic('error', 'missing_node_id', "Un ou plusieurs nœuds n'ont pas d'identifiant"))
+    for node_id, count in node_ids.items():
+        if count > 1:
+            diagnostics.append(_diagnostic('error', 'duplicate_node_id',
+                                           f"Identifiant de nœud dupliqué: {node_id}", node_id=node_id))
+
+    edge_ids = Counter(str(edge.get('id')) for edge in edges if edge.get('id') not in (None, ''))
+    for edge_id, count in edge_ids.items():
+        if count > 1:
+            diagnostics.append(_diagnostic('error', 'duplicate_edge_id',
+                                           f"Identifiant d'arête dupliqué: {edge_id}", edge_id=edge_id))
+
+    errors = []
+    evaluator = evaluator or WorkflowEvaluator()
+    model = evaluator.compile(nodes, edges, workflow_id, revision, errors=errors)
+    graph = model.graph
+
+    for edge in graph.dangling_edges:
+        missing = [str(edge.get(end)) for end in ('source', 'target') if str(edge.get(end)) not in graph.index]
+        diagnostics.append(_diagnostic(
+            'error', 'dangling_edge', f"Arête reliée à un nœud inexistant: {', '.join(missing)}",
+            edge_id=str(edge.get('id')) if edge.get('id') is not None else None
+        ))
+
+    for node_id in closed_loops(model):
+        diagnostics.append(_diagnostic('error', 'closed_loop',
+                                       f"Boucle sans sortie: le nœud {node_id} n'atteint aucune fin",
+                                       node_id=node_id))
+
+    for node_id, error in errors:
+        diagnostics.append(_diagnostic('error', 'compilation', str(error), node_id=node_id))
+
+    for i in range(len(graph)):
+        if graph.is_end(i):
+            continue
+        try:
+            graph.branch_probabilities(i)
+        except ValueError as e:
+            diagnostics.append(_diagnostic('warning', 'incomplete_branch_probabilities', str(e),
+                                           node_id=graph.node_ids[i]))
+
+    for node_id in unreachable_nodes(model):
+        diagnostics.append(_diagnostic('warning', 'unreachable_node',
+                                       f"Nœud inatteignable depuis le départ: {node_id}", node_id=node_id))
+
+    known = model.declared | model.outputs
+    reported = set()
+    for statement in model.statements:
+        for name in sorted(statement.reads - known - reported):
+            reported.add(name)
+            diagnostics.append(_diagnostic('warning', 'undefined_variable',
+                                           f"Variable non définie: {name}", node_id=statement.node_id))
+
+    return ValidationResult(model, diagnostics)
@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.routers import workflows, simulations, optimizations, flow_ia, users, companies, subscriptions, auth, updates, updates_upload
+from app.routers import workflows, simulations, optimizations, flow_ia, users, companies, subscriptions, auth, updates, updates_upload, tables
 from app.logger import setup_logger
+from app.engine.pool import shutdown_process_pool
+from app.services.job_queue_service import JobQueueService
+from app.services.scheduler_service import SchedulerService
+from app.services.storage_migration_service import StorageMigrationService
+from app.services.index_refresh_service import IndexRefreshService
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -32,6 +37,7 @@ app.include_router(workflows.router, prefix="/api/v1/workflows", tags=["workflow
 app.include_router(simulations.router, prefix="/api/v1/simulations", tags=["simulations"])
 app.include_router(optimizations.router, prefix="/api/v1/optimizations", tags=["optimizations"])
 app.include_router(flow_ia.router, prefix="/api/v1/flow-ia", tags=["flow-ia"])
+app.include_router(tables.router, prefix="/api/v1/tables", tags=["tables"])
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
@@ -48,6 +54,26 @@ os.makedirs(settings.static_files_dir, exist_ok=True)
 # Monter le répertoire statique pour servir les fichiers de mise à jour
 app.mount("/static", StaticFiles(directory=settings.static_files_dir), name="static")
 
+@app.on_event("startup")
+def start_simulation_queue():
+    JobQueueService.start()
+    logger.info("File de simulations démarrée")
+    if settings.SIMULATION_SCHEDULER_ENABLED:
+        SchedulerService.start()
+        logger.info("Planificateur de simulations démarré")
+    if settings.WORKFLOW_STORAGE_MIGRATION_ENABLED:
+        StorageMigrationService.start()
+    IndexRefreshService.start()
+
+@app.on_event("shutdown")
+def stop_simulation_pool():
+    SchedulerService.stop()
+    StorageMigrationService.stop()
+    IndexRefreshService.stop()
+    JobQueueService.stop()
+    shutdown_process_pool()
+    logger.info("Pool de simulation arrêté")
+
 @app.get("/")
 async def root():
     logger.info("Accès à la route racine '/'")
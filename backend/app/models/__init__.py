@@ -7,6 +7,14 @@ from app.models.company import Company
 from app.models.workflow import Workflow
 from app.models.subscription import Subscription, SubscriptionType, SubscriptionTier, SubscriptionStatus
 from app.models.license import License, LicenseStatus
+from app.models.recurring_simulation import RecurringSimulation
+from app.models.data_table import DataTable
+from app.models.distribution_fit import DistributionFit
+from app.models.workflow_analytics import WorkflowAnalytics
+from app.models.workflow_similarity import WorkflowSignature, WorkflowLshBucket
+from app.models.workflow_search import WorkflowSearchDocument
+from app.models.workflow_variable import WorkflowVariableRef
+from app.models.workflow_revision import WorkflowRevision
 
 # Pour faciliter les imports
 __all__ = [
@@ -26,5 +34,14 @@ __all__ = [
     'SubscriptionTier',
     'SubscriptionStatus',
     'License',
-    'LicenseStatus'
+    'LicenseStatus',
+    'RecurringSimulation',
+    'DataTable',
+    'DistributionFit',
+    'WorkflowAnalytics',
+    'WorkflowSignature',
+    'WorkflowLshBucket',
+    'WorkflowSearchDocument',
+    'WorkflowVariableRef',
+    'WorkflowRevision'
 ]
\ No newline at end of file
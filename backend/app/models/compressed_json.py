@@ -0,0 +1,122 @@
+from typing import Any, Optional
+from functools import lru_cache
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.types import TypeDecorator
+import json
+import zlib
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # Dépendance facultative : zlib est utilisé à défaut
+    zstandard = None
+
+# Octet de format en tête de chaque valeur encodée. Une valeur sans cet octet
+# est du JSON brut (colonnes JSON d'avant la compression) : un texte JSON ne
+# commence jamais par un octet inférieur à 0x09.
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+FORMAT_ZSTD = 0x02
+
+_CODECS = {'none': FORMAT_RAW, 'zlib': FORMAT_ZLIB, 'zstd': FORMAT_ZSTD}
+
+
+def storage_format() -> int:
+    """Format d'écriture configuré (WORKFLOW_STORAGE_COMPRESSION), zlib si zstandard n'est pas installé"""
+    codec = _CODECS.get(str(settings.WORKFLOW_STORAGE_COMPRESSION).lower(), FORMAT_ZLIB)
+    if codec == FORMAT_ZSTD and zstandard is None:
+        return FORMAT_ZLIB
+    return codec
+
+
+@lru_cache(maxsize=8)
+def _encode_text(text: str, codec: int) -> bytes:
+    """
+    Encode un texte JSON (mémorisé : le calcul de la taille stockée et
+    l'écriture en base ne compressent qu'une fois le même contenu)
+    """
+    data = text.encode('utf-8')
+    if codec == FORMAT_ZSTD:
+        compressed = zstandard.ZstdCompressor(level=3).compress(data)
+    elif codec == FORMAT_ZLIB:
+        compressed = zlib.compress(data, 6)
+    else:
+        compressed = None
+    # Petites valeurs : la compression ne fait rien gagner
+    if compressed is None or len(compressed) >= len(data):
+        return bytes([FORMAT_RAW]) + data
+    return bytes([codec]) + compressed
+
+
+def encode_json(value: Any) -> bytes:
+    """
+    Encode une valeur JSON dans le format de stockage configuré
+
+    Args:
+        value: Valeur sérialisable en JSON
+
+    Returns:
+        Octet de format suivi du JSON (compressé ou non)
+    """
+    return _encode_text(json.dumps(value, separators=(',', ':'), ensure_ascii=False), storage_format())
+
+
+def decode_json(data: Optional[bytes]) -> Any:
+    """
+    Décode une valeur stockée, quel que soit son format (y compris JSON brut sans octet de format)
+
+    Raises:
+        ValueError: Si le format est inconnu ou si zstandard n'est pas installé pour une valeur zstd
+    """
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if not data:
+        return None
+    marker = data[0]
+    if marker == FORMAT_RAW:
+        return json.loads(data[1:].decode('utf-8'))
+    if marker == FORMAT_ZLIB:
+        return json.loads(zlib.decompress(data[1:]).decode('utf-8'))
+    if marker == FORMAT_ZSTD:
+        if zstandard is None:
+            raise ValueError("Valeur compressée en zstd : le paquet zstandard doit être installé")
+        return json.loads(zstandard.ZstdDecompressor().decompress(data[1:]).decode('utf-8'))
+    if marker <= 0x08:
+        raise ValueError(f"Format de stockage inconnu: {marker}")
+    return json.loads(data.decode('utf-8'))
+
+
+def is_encoded(data: Optional[bytes]) -> bool:
+    """Indique si une valeur stockée porte un octet de format (False pour le JSON brut)"""
+    return bool(data) and not isinstance(data, str) and data[0] <= 0x08
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    Colonne JSON stockée en binaire compressé (LONGBLOB sous MySQL)
+
+    Les valeurs sont lues et écrites comme des objets JSON : la compression
+    est transparente pour le reste du code. Les valeurs héritées de
+    l'ancienne colonne JSON sont décodées telles quelles et recompressées à
+    leur prochaine écriture.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return encode_json(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        return decode_json(value)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, ForeignKey, Integer
+from app.models.base import Base, TimeStampMixin
+
+class DataTable(Base, TimeStampMixin):
+    __tablename__ = "data_tables"
+    
+    id = Column(String(50), primary_key=True)
+    name = Column(String(255), nullable=False)
+    owner_id = Column(String(50), ForeignKey("users.id"), nullable=False)
+    company_id = Column(String(50), ForeignKey("companies.id"), nullable=True)
+    
+    # Colonnes du fichier d'origine utilisées comme clés et valeurs
+    key_column = Column(String(255), nullable=False)
+    value_column = Column(String(255), nullable=False)
+    
+    # Les données sont stockées hors base (tableaux numpy), jamais modifiées après import
+    rows = Column(Integer, nullable=False)
+    storage_size = Column(Integer, default=0, nullable=False)  # En KB
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Integer
+from sqlalchemy.dialects.mysql import JSON as MySQLJSON
+from app.models.base import Base, TimeStampMixin
+
+class DistributionFit(Base, TimeStampMixin):
+    __tablename__ = "distribution_fits"
+    
+    # Empreinte SHA-256 de la série et des options d'ajustement : un même historique n'est ajusté qu'une fois
+    id = Column(String(64), primary_key=True)
+    dataset_hash = Column(String(64), nullable=False, index=True)
+    count = Column(Integer, nullable=False)
+    
+    # Résultat de l'ajustement (loi retenue et lois candidates)
+    result = Column(MySQLJSON, nullable=False)
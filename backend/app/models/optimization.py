@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, ForeignKey, Enum, Float, DateTime
 from sqlalchemy.dialects.mysql import JSON as MySQLJSON
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimeStampMixin
@@ -21,6 +21,15 @@ class Optimization(Base, TimeStampMixin):
     suggestions = Column(MySQLJSON, nullable=True)
     error_message = Column(Text, nullable=True)
     
+    # Avancement (0 à 1) et date du dernier point de reprise des recherches longues
+    progress = Column(Float, default=0.0, nullable=False)
+    checkpoint_at = Column(DateTime, nullable=True)
+    
+    # Bail d'exécution : processus qui exécute la recherche et échéance au-delà de laquelle
+    # elle est réputée interrompue (voir JobQueueService)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    
     # Relations
     workflow = relationship("Workflow", back_populates="optimizations")
     simulation = relationship("Simulation")
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, DateTime
+from sqlalchemy.dialects.mysql import JSON as MySQLJSON
+from app.models.base import Base, TimeStampMixin
+
+class RecurringSimulation(Base, TimeStampMixin):
+    __tablename__ = "recurring_simulations"
+    
+    id = Column(String(50), primary_key=True)
+    name = Column(String(255), nullable=False)
+    owner_id = Column(String(50), ForeignKey("users.id"), nullable=False)
+    
+    # Cible : un workflow précis, ou tous les workflows partagés de l'entreprise si workflow_id est vide
+    company_id = Column(String(50), ForeignKey("companies.id"), nullable=True)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=True)
+    
+    parameters = Column(MySQLJSON, nullable=True)
+    interval_hours = Column(Integer, default=168, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    
+    # Planification
+    next_run_at = Column(DateTime, nullable=False, index=True)
+    last_run_at = Column(DateTime, nullable=True)
+    
+    # Dernière soumission de chaque workflow : empreinte (contenu + paramètres) et simulation créée
+    # {workflow_id: {'hash', 'simulation_id'}}
+    last_hashes = Column(MySQLJSON, nullable=True)
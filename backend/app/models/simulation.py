@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, ForeignKey, Enum, Integer, DateTime, Boolean
 from sqlalchemy.dialects.mysql import JSON as MySQLJSON
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimeStampMixin
@@ -15,11 +15,20 @@ class Simulation(Base, TimeStampMixin):
     
     id = Column(String(50), primary_key=True)
     workflow_id = Column(String(50), ForeignKey("workflows.id"), nullable=False)
+    # Révision du workflow sur laquelle la simulation a été exécutée (voir l'historique des révisions)
+    workflow_revision = Column(Integer, nullable=True)
     status = Column(Enum(SimulationStatus), default=SimulationStatus.PENDING, nullable=False)
     parameters = Column(MySQLJSON, nullable=True)
     metrics = Column(MySQLJSON, nullable=True)
     details = Column(MySQLJSON, nullable=True)
     error_message = Column(Text, nullable=True)
+    batch_id = Column(String(50), nullable=True, index=True)
+    # Bail d'exécution des simulations différées : processus qui l'exécute et échéance
+    # au-delà de laquelle elle est réputée interrompue (voir JobQueueService)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    # Résultat partiel dont l'affinage (calcul sans échéance) reste à faire par la file des jobs
+    refining = Column(Boolean, default=False, nullable=False, index=True)
     
     # Relations
     workflow = relationship("Workflow", back_populates="simulations")
\ No newline at end of file
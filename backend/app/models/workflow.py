@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Integer, DateTime
-from sqlalchemy.dialects.mysql import JSON as MySQLJSON
+from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Integer, BigInteger, DateTime
 from sqlalchemy.orm import relationship
 from app.models.base import Base, TimeStampMixin
+from app.models.compressed_json import CompressedJSON
 
 class Workflow(Base, TimeStampMixin):
     __tablename__ = "workflows"
@@ -12,9 +12,9 @@ class Workflow(Base, TimeStampMixin):
     owner_id = Column(String(50), ForeignKey("users.id"), nullable=False)
     company_id = Column(String(50), ForeignKey("companies.id"), nullable=True)
     
-    # Contenu direct du workflow (nodes et edges)
-    nodes = Column(MySQLJSON, nullable=False)
-    edges = Column(MySQLJSON, nullable=False)
+    # Contenu direct du workflow (nodes et edges), compressé en base (voir CompressedJSON)
+    nodes = Column(CompressedJSON, nullable=False)
+    edges = Column(CompressedJSON, nullable=False)
     
     # Date de création du workflow client (différent de created_at qui est la date d'insertion en DB)
     client_created_at = Column(DateTime, nullable=True)
@@ -25,6 +25,14 @@ class Workflow(Base, TimeStampMixin):
     
     # Statistiques
     storage_size = Column(Integer, default=0, nullable=False)  # En KB
+    # Taille exacte des nœuds et arêtes tels que stockés (octets compressés)
+    storage_bytes = Column(BigInteger, nullable=True)
+    
+    # Révision du contenu (incrémentée à chaque modification des nœuds ou arêtes)
+    revision = Column(Integer, default=1, nullable=False)
+    
+    # Empreinte du contenu (nœuds et arêtes), pour ignorer les recalculs inutiles
+    content_hash = Column(String(64), nullable=True)
     
     # Relations
     owner = relationship("User", back_populates="workflows")
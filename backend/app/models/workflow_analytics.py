@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Text
+from sqlalchemy.dialects.mysql import JSON as MySQLJSON
+from app.models.base import Base, TimeStampMixin
+
+class WorkflowAnalytics(Base, TimeStampMixin):
+    __tablename__ = "workflow_analytics"
+    
+    id = Column(String(50), primary_key=True)
+    
+    # Un enregistrement par workflow, pour sa dernière révision analysée
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, unique=True)
+    revision = Column(Integer, nullable=False)
+    
+    # 'pending' (calcul en arrière-plan), 'ready' ou 'failed'
+    status = Column(String(20), nullable=False, default='pending')
+    
+    # Décomptes, exposés dans les listes sans lire les indicateurs détaillés
+    node_count = Column(Integer, nullable=False, default=0)
+    edge_count = Column(Integer, nullable=False, default=0)
+    
+    # Indicateurs détaillés (voir `graph_analytics`)
+    metrics = Column(MySQLJSON, nullable=True)
+    error_message = Column(Text, nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, LargeBinary, Index
+from sqlalchemy.dialects.mysql import LONGBLOB
+from app.models.base import Base, TimeStampMixin
+
+class WorkflowRevision(Base, TimeStampMixin):
+    __tablename__ = "workflow_revisions"
+    
+    id = Column(String(50), primary_key=True)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)
+    
+    # 'snapshot' (nœuds et arêtes complets) ou 'delta' (opérations depuis la révision précédente)
+    kind = Column(String(10), nullable=False)
+    
+    # JSON compressé (zlib)
+    payload = Column(LargeBinary().with_variant(LONGBLOB(), 'mysql'), nullable=False)
+    
+    # Taille compressée (octets)
+    size = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('ix_workflow_revisions_workflow_revision', 'workflow_id', 'revision', unique=True),
+    )
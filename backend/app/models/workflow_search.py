@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Boolean, ForeignKey, Text, Index
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from app.models.base import Base, TimeStampMixin
+
+class WorkflowSearchDocument(Base, TimeStampMixin):
+    __tablename__ = "workflow_search_documents"
+    
+    id = Column(String(50), primary_key=True)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, unique=True)
+    
+    # Portée de la recherche, recopiée du workflow pour filtrer sans jointure
+    owner_id = Column(String(50), nullable=False, index=True)
+    company_id = Column(String(50), nullable=True, index=True)
+    is_shared = Column(Boolean, default=False, nullable=False)
+    is_template = Column(Boolean, default=False, nullable=False)
+    
+    # Texte indexé : nom, description et contenu des nœuds (libellés, descriptions, formules, variables)
+    name = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    body = Column(Text().with_variant(MEDIUMTEXT(), 'mysql'), nullable=True)
+    
+    __table_args__ = (
+        Index('ix_workflow_search_documents_fulltext', 'name', 'description', 'body', mysql_prefix='FULLTEXT'),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Integer, BigInteger, LargeBinary, ForeignKey, Index
+from app.models.base import Base, TimeStampMixin
+
+class WorkflowSignature(Base, TimeStampMixin):
+    __tablename__ = "workflow_signatures"
+    
+    id = Column(String(50), primary_key=True)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, unique=True)
+    revision = Column(Integer, nullable=False)
+    
+    # Signature MinHash (SIGNATURE_SIZE entiers non signés sur 32 bits) et nombre de jetons
+    signature = Column(LargeBinary, nullable=False)
+    shingle_count = Column(Integer, nullable=False, default=0)
+
+
+class WorkflowLshBucket(Base):
+    __tablename__ = "workflow_lsh_buckets"
+    
+    # Une ligne par bande LSH : deux workflows candidats partagent au moins un couple (band, bucket)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        Index('ix_workflow_lsh_buckets_band_bucket', 'band', 'bucket'),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
+from app.models.base import Base
+
+class WorkflowVariableRef(Base):
+    __tablename__ = "workflow_variable_refs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    workflow_id = Column(String(50), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Révision du workflow indexée (les références sont reconstruites à chaque nouvelle révision)
+    revision = Column(Integer, nullable=False)
+    
+    # Variable (nom normalisé comme dans les formules), nœud et rôle : 'defines', 'writes' ou 'reads'
+    variable = Column(String(255), nullable=False)
+    node_id = Column(String(100), nullable=False)
+    role = Column(String(10), nullable=False)
+    
+    __table_args__ = (
+        Index('ix_workflow_variable_refs_variable', 'variable', 'role'),
+    )
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from typing import List
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.services.company_service import CompanyService
 from app.services.user_service import UserService
+from app.services.portfolio_service import PortfolioService
 from app.routers.users import get_current_user
 from pydantic import BaseModel
 
@@ -64,6 +64,39 @@ class UserResponseModel(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+class PortfolioSimulationRequestModel(BaseModel):
+    scenarios: List[Dict[str, Any]] = []
+    reference_variable: Optional[str] = None
+    threshold: Optional[float] = None
+    revenue_variable: str = "chiffreAffaires"
+    cost_variable: str = "coutTotal"
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class PortfolioScenarioResultModel(BaseModel):
+    scenario: str
+    revenue: float
+    cost: float
+    margin: float
+    margin_rate: Optional[float] = None
+    resilient_count: int
+    workflow_count: int
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class PortfolioSimulationResponseModel(BaseModel):
+    company_id: str
+    workflow_count: int
+    evaluated_count: int
+    scenarios: List[PortfolioScenarioResultModel]
+    failures: List[Dict[str, Any]] = []
+    duration_ms: int
+    
+    class Config:
+        arbitrary_types_allowed = True
+
 # Dépendance pour vérifier si l'utilisateur est admin d'entreprise
 async def verify_company_admin(
     current_user: User = Depends(get_current_user)
@@ -232,4 +265,30 @@ async def get_company_users(
     
     users = CompanyService.get_company_users(db, company_id, skip, limit)
     
-    return [UserService.user_to_dict(user) for user in users]
\ No newline at end of file
+    return [UserService.user_to_dict(user) for user in users]
+
+@router.post("/{company_id}/portfolio-simulation", response_model=PortfolioSimulationResponseModel)
+def run_portfolio_simulation(
+    company_id: str,
+    request: PortfolioSimulationRequestModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Exécute un jeu de scénarios sur tous les workflows partagés de l'entreprise et agrège les totaux"""
+    # Vérifier que l'utilisateur appartient à l'entreprise
+    if current_user.company_id != company_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'avez pas accès à cette entreprise"
+        )
+    
+    # Route synchrone : FastAPI l'exécute dans un thread, les calculs ont lieu dans le pool de processus
+    return PortfolioService.run_portfolio_simulation(
+        db,
+        company_id,
+        request.scenarios,
+        reference_variable=request.reference_variable,
+        threshold=request.threshold,
+        revenue_variable=request.revenue_variable,
+        cost_variable=request.cost_variable
+    )
\ No newline at end of file
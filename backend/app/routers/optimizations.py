@@ -6,6 +6,7 @@ from app.models.optimization import Optimization, OptimizationStatus
 from app.services.optimization_service import OptimizationService
 from app.services.workflow_service import WorkflowService
 from app.services.simulation_service import SimulationService
+from app.services.job_queue_service import JobQueueService
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -38,6 +39,9 @@ class OptimizationResponseModel(BaseModel):
     parameters: Dict[str, Any] = None
     suggestions: List[Dict[str, Any]] = None
     error_message: str = None
+    progress: float = None
+    checkpoint_at: str = None
+    checkpoint_age_seconds: float = None
     created_at: str
     updated_at: str
     
@@ -84,10 +88,19 @@ async def generate_optimizations(request: OptimizationRequestModel, db: Session
     
     db_optimization = OptimizationService.create_optimization(db, optimization_data)
     
-    # Dans un système de production, l'optimisation serait lancée de manière asynchrone ici
-    # Pour l'exemple, nous allons juste changer son statut en "PROCESSING"
     OptimizationService.update_optimization_status(db, db_optimization.id, OptimizationStatus.PROCESSING)
     
+    # Avec un objectif, la recherche est exécutée par le moteur serveur via la file des jobs
+    # (partage équitable, reprise sur point de reprise) : l'optimisation est retournée PROCESSING
+    # et son avancement se lit sur GET /{optimization_id}.
+    # Sans objectif, l'optimisation reste en attente d'un traitement externe
+    if request.parameters.get('objective'):
+        JobQueueService.enqueue([{
+            'kind': 'optimization',
+            'id': db_optimization.id,
+            'tenant': workflow.company_id or workflow.owner_id
+        }])
+    
     # Récupérer l'optimisation mise à jour
     db_optimization = OptimizationService.get_optimization(db, db_optimization.id)
     
@@ -100,6 +113,9 @@ async def get_optimization_results(optimization_id: str, db: Session = Depends(g
     if not optimization:
         raise HTTPException(status_code=404, detail="Optimisation non trouvée")
     
+    # Avancement d'une recherche en cours, d'après son dernier point de reprise
+    optimization = OptimizationService.refresh_progress(db, optimization)
+    
     return OptimizationService.optimization_to_dict(optimization)
 
 @router.get("/by-process/{workflow_id}", response_model=OptimizationListResponseModel)
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.config import settings
 from app.models.simulation import Simulation, SimulationStatus
 from app.models.user import User
-from app.services.simulation_service import SimulationService
+from app.services.simulation_service import SimulationService, SIMULATION_MODES
 from app.services.workflow_service import WorkflowService
+from app.services.result_store_service import ResultStoreService
+from app.services.job_queue_service import JobQueueService
+from app.services.scheduler_service import SchedulerService
 from app.routers.users import get_current_user
 from pydantic import BaseModel
 
@@ -26,6 +31,9 @@ class SimulationResponseModel(BaseModel):
     parameters: Dict[str, Any] = None
     metrics: Dict[str, Any] = None
     details: List[Dict[str, Any]] = None
+    details_offset: int = None
+    details_total: int = None
+    series: Dict[str, Any] = None
     error_message: str = None
     created_at: str
     updated_at: str
@@ -33,6 +41,55 @@ class SimulationResponseModel(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+class SimulationBatchRequestModel(BaseModel):
+    simulations: List[SimulationRequestModel]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class SimulationBatchResponseModel(BaseModel):
+    batch_id: str
+    count: int
+    simulation_ids: List[str]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class SimulationBatchStatusModel(BaseModel):
+    batch_id: str
+    total: int
+    counts: Dict[str, int]
+    done: bool
+    progress: float
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class RecurringSimulationRequestModel(BaseModel):
+    name: str
+    workflow_id: Optional[str] = None
+    parameters: Dict[str, Any] = {}
+    interval_hours: int = 168
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class RecurringSimulationResponseModel(BaseModel):
+    id: str
+    name: str
+    owner_id: str
+    company_id: Optional[str] = None
+    workflow_id: Optional[str] = None
+    parameters: Dict[str, Any] = None
+    interval_hours: int
+    is_active: bool
+    next_run_at: Optional[str] = None
+    last_run_at: Optional[str] = None
+    created_at: Optional[str] = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
 class SimulationListResponseModel(BaseModel):
     simulations: List[SimulationResponseModel]
     total: int
@@ -68,6 +125,17 @@ async def run_simulation(
             detail="Vous n'êtes pas autorisé à accéder à ce workflow"
         )
     
+    mode = simulation.parameters.get("mode", "scenarios")
+    if mode not in SIMULATION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Mode de simulation invalide (modes disponibles: {', '.join(SIMULATION_MODES)})"
+        )
+    
+    deadline_ms = simulation.parameters.get("deadline_ms")
+    if deadline_ms is not None and (not isinstance(deadline_ms, (int, float)) or deadline_ms <= 0):
+        raise HTTPException(status_code=400, detail="deadline_ms doit être un nombre positif")
+    
     # Créer la simulation
     simulation_data = {
         "workflow_id": simulation.workflow_id,
@@ -77,23 +145,233 @@ async def run_simulation(
     
     db_simulation = SimulationService.create_simulation(db, simulation_data)
     
-    # Dans un système de production, la simulation serait lancée de manière asynchrone ici
-    # Pour l'exemple, nous allons juste changer son statut en "RUNNING"
-    SimulationService.update_simulation_status(db, db_simulation.id, SimulationStatus.RUNNING)
+    # Exécuter la simulation (bornée par deadline_ms si fourni) hors de la boucle d'événements :
+    # le job isolé peut durer jusqu'à SIMULATION_WALL_TIMEOUT
+    db_simulation = await run_in_threadpool(SimulationService.execute_simulation, db, db_simulation, workflow)
+    if db_simulation is not None and db_simulation.refining:
+        # Affinage du résultat partiel par la file des jobs (partage équitable, reprise après arrêt)
+        JobQueueService.enqueue([
+            {"kind": "refine", "id": db_simulation.id, "tenant": current_user.company_id or current_user.id}
+        ])
     
     # Récupérer la simulation mise à jour
     db_simulation = SimulationService.get_simulation(db, db_simulation.id)
     
     return SimulationService.simulation_to_dict(db_simulation)
 
+@router.post("/batch", response_model=SimulationBatchResponseModel)
+async def create_simulation_batch(
+    batch: SimulationBatchRequestModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Soumet un lot de simulations, exécutées en différé
+    
+    L'accès aux workflows est vérifié en une requête et les simulations sont
+    créées en une seule insertion ; leur avancement se suit via
+    GET /simulations/batch/{batch_id}.
+    """
+    items = batch.simulations
+    if not items:
+        raise HTTPException(status_code=400, detail="Le lot ne contient aucune simulation")
+    if len(items) > settings.SIMULATION_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Un lot est limité à {settings.SIMULATION_BATCH_MAX_SIZE} simulations"
+        )
+    
+    invalid = [k for k, item in enumerate(items) if item.parameters.get("mode", "scenarios") not in SIMULATION_MODES]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Mode de simulation invalide aux positions {', '.join(map(str, invalid[:20]))} "
+                   f"(modes disponibles: {', '.join(SIMULATION_MODES)})"
+        )
+    
+    workflow_ids = {item.workflow_id for item in items}
+    accessible = WorkflowService.get_accessible_workflow_ids(db, list(workflow_ids), current_user.id)
+    denied = workflow_ids - accessible
+    if denied:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Workflows introuvables ou non autorisés: {', '.join(sorted(denied)[:20])}"
+        )
+    
+    created = SimulationService.create_batch(
+        db, [{"workflow_id": item.workflow_id, "parameters": item.parameters} for item in items]
+    )
+    tenant = current_user.company_id or current_user.id
+    JobQueueService.enqueue([
+        {"kind": "simulation", "id": simulation_id, "tenant": tenant}
+        for simulation_id in created["simulation_ids"]
+    ])
+    
+    return {
+        "batch_id": created["batch_id"],
+        "count": len(created["simulation_ids"]),
+        "simulation_ids": created["simulation_ids"]
+    }
+
+@router.get("/batch/{batch_id}", response_model=SimulationBatchStatusModel)
+async def get_simulation_batch_status(
+    batch_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Récupère le statut agrégé d'un lot de simulations"""
+    workflow_ids = SimulationService.get_batch_workflow_ids(db, batch_id)
+    if not workflow_ids:
+        raise HTTPException(status_code=404, detail="Lot de simulations non trouvé")
+    
+    if WorkflowService.get_accessible_workflow_ids(db, workflow_ids, current_user.id) != set(workflow_ids):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à accéder à ce lot de simulations"
+        )
+    
+    return SimulationService.get_batch_status(db, batch_id)
+
+@router.post("/recurring", response_model=RecurringSimulationResponseModel)
+async def create_recurring_simulation(
+    recurring: RecurringSimulationRequestModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Crée une simulation récurrente
+    
+    Sans workflow_id, la définition couvre tous les workflows partagés de
+    l'entreprise de l'utilisateur. Les simulations sont soumises par le
+    planificateur pendant la plage creuse, uniquement pour les workflows
+    modifiés depuis la dernière exécution.
+    """
+    if recurring.interval_hours < 1:
+        raise HTTPException(status_code=400, detail="interval_hours doit être au moins égal à 1")
+    
+    mode = recurring.parameters.get("mode", "scenarios")
+    if mode not in SIMULATION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Mode de simulation invalide (modes disponibles: {', '.join(SIMULATION_MODES)})"
+        )
+    
+    company_id = None
+    if recurring.workflow_id:
+        if not WorkflowService.get_workflow(db, recurring.workflow_id):
+            raise HTTPException(status_code=404, detail="Workflow non trouvé")
+        if not WorkflowService.check_user_access(db, recurring.workflow_id, current_user.id):
+            raise HTTPException(
+                status_code=403,
+                detail="Vous n'êtes pas autorisé à accéder à ce workflow"
+            )
+    else:
+        if not current_user.company_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Indiquez un workflow : l'utilisateur n'appartient à aucune entreprise"
+            )
+        company_id = current_user.company_id
+    
+    db_recurring = SchedulerService.create_recurring(db, {
+        "name": recurring.name,
+        "workflow_id": recurring.workflow_id,
+        "company_id": company_id,
+        "parameters": recurring.parameters,
+        "interval_hours": recurring.interval_hours
+    }, current_user.id)
+    
+    return SchedulerService.recurring_to_dict(db_recurring)
+
+@router.get("/recurring", response_model=List[RecurringSimulationResponseModel])
+async def list_recurring_simulations(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Récupère les simulations récurrentes de l'utilisateur"""
+    return [
+        SchedulerService.recurring_to_dict(recurring)
+        for recurring in SchedulerService.get_user_recurring(db, current_user.id)
+    ]
+
+@router.delete("/recurring/{recurring_id}")
+async def delete_recurring_simulation(
+    recurring_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Supprime une simulation récurrente"""
+    recurring = SchedulerService.get_recurring(db, recurring_id)
+    if not recurring:
+        raise HTTPException(status_code=404, detail="Simulation récurrente non trouvée")
+    
+    if recurring.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à supprimer cette simulation récurrente"
+        )
+    
+    if SchedulerService.delete_recurring(db, recurring_id):
+        return {"status": "success", "message": "Simulation récurrente supprimée avec succès"}
+    else:
+        raise HTTPException(status_code=500, detail="Erreur lors de la suppression de la simulation récurrente")
+
+@router.get("/compare")
+async def compare_simulations(
+    ids: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Compare plusieurs simulations (la première sert de référence)
+    
+    Retourne les métriques alignées avec leurs écarts, et pour chaque variable
+    les écarts de moyenne et de centiles ainsi que la distance de
+    Kolmogorov-Smirnov, calculés à partir des résumés stockés.
+    """
+    simulation_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if len(simulation_ids) < 2 or len(simulation_ids) > 20:
+        raise HTTPException(status_code=400, detail="Indiquez entre 2 et 20 simulations à comparer")
+    
+    simulations = SimulationService.get_simulations_summaries(db, simulation_ids)
+    missing = set(simulation_ids) - {s.id for s in simulations}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Simulations non trouvées: {', '.join(sorted(missing))}")
+    
+    # Vérifier l'accès une fois par workflow concerné
+    for workflow_id in {s.workflow_id for s in simulations}:
+        if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+            raise HTTPException(
+                status_code=403,
+                detail="Vous n'êtes pas autorisé à accéder à ces simulations"
+            )
+    
+    return SimulationService.compare_simulations(simulations)
+
 @router.get("/{simulation_id}", response_model=SimulationResponseModel)
 async def get_simulation_results(
     simulation_id: str,
+    view: str = "full",
+    offset: int = 0,
+    limit: Optional[int] = None,
+    variables: Optional[str] = None,
+    downsample: Optional[int] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Récupère les résultats d'une simulation"""
-    simulation = SimulationService.get_simulation(db, simulation_id)
+    """
+    Récupère les résultats d'une simulation
+    
+    Options : view=metrics (sans détail), offset/limit (plage de lignes de
+    détail), variables=a,b (variables conservées), downsample=N (séries par
+    période incluses, réduites à N points).
+    """
+    if view not in ("full", "metrics"):
+        raise HTTPException(status_code=400, detail="Vue invalide (valeurs possibles: full, metrics)")
+    if offset < 0 or (limit is not None and limit <= 0) or (downsample is not None and downsample <= 0):
+        raise HTTPException(status_code=400, detail="offset, limit et downsample doivent être positifs")
+    
+    simulation = SimulationService.get_simulation_summary(db, simulation_id)
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation non trouvée")
     
@@ -104,7 +382,71 @@ async def get_simulation_results(
             detail="Vous n'êtes pas autorisé à accéder à cette simulation"
         )
     
-    return SimulationService.simulation_to_dict(simulation)
+    if view == "full" and not offset and limit is None and not variables and not downsample:
+        return SimulationService.simulation_to_dict(simulation)
+    
+    return SimulationService.get_simulation_view(
+        db,
+        simulation,
+        view=view,
+        offset=offset,
+        limit=limit,
+        variables=[v.strip() for v in variables.split(",") if v.strip()] if variables else None,
+        downsample=downsample
+    )
+
+@router.get("/{simulation_id}/arrays/{name}")
+async def get_simulation_array(
+    simulation_id: str,
+    name: str,
+    offset: int = 0,
+    limit: int = 10000,
+    format: str = "json",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Lit une plage d'une colonne de résultats (tirages, séries, détail complet)
+    
+    La colonne est lue en mémoire mappée : seule la plage demandée est chargée.
+    Avec format=binary, les valeurs brutes sont renvoyées (forme et type dans
+    les en-têtes X-Shape et X-Dtype) ; en JSON, les valeurs absentes (NaN)
+    sont renvoyées à null.
+    """
+    simulation = SimulationService.get_simulation_summary(db, simulation_id)
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation non trouvée")
+    
+    if not WorkflowService.check_user_access(db, simulation.workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à accéder à cette simulation"
+        )
+    
+    if offset < 0 or limit <= 0 or limit > 1000000:
+        raise HTTPException(status_code=400, detail="Plage invalide (offset >= 0, 0 < limit <= 1000000)")
+    
+    manifest = ResultStoreService.get_manifest(simulation_id)
+    column = ResultStoreService.open_column(simulation_id, name)
+    if column is None or not manifest:
+        raise HTTPException(status_code=404, detail="Colonne de résultats non trouvée")
+    
+    values = column[offset:offset + limit]
+    if format == "binary":
+        return Response(
+            content=values.tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Shape": ",".join(str(d) for d in values.shape), "X-Dtype": values.dtype.str}
+        )
+    
+    return {
+        "name": name,
+        "shape": list(column.shape),
+        "dtype": column.dtype.str,
+        "kind": manifest['columns'][name].get('kind'),
+        "offset": offset,
+        "values": ResultStoreService.to_json(values, manifest['columns'][name].get('kind'))
+    }
 
 @router.get("/by-workflow/{workflow_id}", response_model=SimulationListResponseModel)
 async def get_simulations_by_workflow(
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app.models.user import User
+from app.services.table_service import TableService
+from app.routers.users import get_current_user
+from pydantic import BaseModel
+
+router = APIRouter()
+
+# Modèles de données Pydantic pour la validation
+class TableResponseModel(BaseModel):
+    id: str
+    name: str
+    owner_id: str
+    company_id: Optional[str] = None
+    key_column: str
+    value_column: str
+    rows: int
+    storage_size: int
+    created_at: str = None
+    updated_at: str = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+class TableDetailResponseModel(TableResponseModel):
+    preview: List[Dict[str, float]] = []
+
+    class Config:
+        arbitrary_types_allowed = True
+
+# Endpoints
+@router.post("/upload", response_model=TableResponseModel)
+async def upload_table(
+    file: UploadFile = File(...),
+    name: str = Form(...),
+    key_column: Optional[str] = Form(None),
+    value_column: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Importe une table de correspondance depuis un fichier CSV
+
+    - **file**: Fichier CSV (séparateur ',' ou ';', avec ligne d'en-tête)
+    - **name**: Nom de la table
+    - **key_column**: Colonne des clés (par défaut la première)
+    - **value_column**: Colonne des valeurs (par défaut la deuxième)
+    """
+    content = await file.read(settings.max_upload_size + 1)
+    if len(content) > settings.max_upload_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Le fichier est trop volumineux. Taille maximale: {settings.max_upload_size / (1024 * 1024)} MB"
+        )
+
+    try:
+        table = TableService.create_table(db, name, content, current_user, key_column, value_column)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return TableService.table_to_dict(table)
+
+@router.get("/", response_model=List[TableResponseModel])
+async def get_tables(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Récupère les tables accessibles à l'utilisateur (les siennes et celles de son entreprise)"""
+    tables = TableService.get_user_tables(db, current_user)
+    return [TableService.table_to_dict(table) for table in tables]
+
+@router.get("/{table_id}", response_model=TableDetailResponseModel)
+async def get_table(table_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Récupère une table et ses premières lignes"""
+    table = TableService.get_table(db, table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table non trouvée")
+
+    if not TableService.check_user_access(table, current_user):
+        raise HTTPException(status_code=403, detail="Vous n'avez pas accès à cette table")
+
+    result = TableService.table_to_dict(table)
+    result['preview'] = TableService.preview(table_id)
+    return result
+
+@router.delete("/{table_id}")
+async def delete_table(table_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Supprime une table (réservé à son propriétaire)"""
+    table = TableService.get_table(db, table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table non trouvée")
+
+    if table.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Seul le propriétaire peut supprimer cette table")
+
+    success = TableService.delete_table(db, table_id)
+    if not success:
+        raise HTTPException(status_code=500, detail="Erreur lors de la suppression de la table")
+
+    return {"message": "Table supprimée avec succès"}
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.workflow import Workflow
 from app.models.user import User
 from app.services.workflow_service import WorkflowService
+from app.engine.validation import WorkflowValidationError
+from app.engine.patch import WorkflowConflictError
+from app.services.fit_service import FitService
+from app.services.analytics_service import AnalyticsService
+from app.services.similarity_service import SimilarityService
+from app.services.search_service import SearchService
+from app.services.variable_index_service import VariableIndexService
+from app.services.index_refresh_service import IndexRefreshService
+from app.services.revision_service import RevisionService
 from app.services.subscription_service import SubscriptionService
 from app.routers.users import get_current_user
+from app.config import settings
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -56,6 +66,23 @@ class WorkflowUpdateModel(BaseModel):
     edges: List[Dict[str, Any]] = None
     is_shared: bool = None
     is_template: bool = None
+    base_revision: int = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowPatchModel(BaseModel):
+    base_revision: int
+    operations: List[Dict[str, Any]]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowPatchResponseModel(BaseModel):
+    id: str
+    revision: int
+    storage_size: int
+    updated_at: str = None
     
     class Config:
         arbitrary_types_allowed = True
@@ -72,12 +99,139 @@ class WorkflowResponseModel(BaseModel):
     is_shared: bool
     is_template: bool
     storage_size: int
+    revision: int = None
     created_at: str
     updated_at: str
+    analytics: Dict[str, Any] = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowAnalyticsResponseModel(BaseModel):
+    workflow_id: str
+    revision: int
+    status: str
+    node_count: int
+    edge_count: int
+    metrics: Dict[str, Any] = None
+    error_message: str = None
+    updated_at: str
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowValidateModel(BaseModel):
+    nodes: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    workflow_id: str = None
     
     class Config:
         arbitrary_types_allowed = True
 
+class WorkflowValidationResponseModel(BaseModel):
+    valid: bool
+    errors: int
+    warnings: int
+    diagnostics: List[Dict[str, Any]]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowRevisionSummaryModel(BaseModel):
+    revision: int
+    kind: str
+    size: int
+    created_at: str = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowRevisionModel(BaseModel):
+    workflow_id: str
+    revision: int
+    nodes: List[Dict[str, Any]]
+    edges: List[Dict[str, Any]]
+    created_at: str = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class SimilarWorkflowModel(BaseModel):
+    workflow_id: str
+    name: str
+    is_template: bool
+    is_shared: bool
+    owner_id: str
+    revision: int = None
+    similarity: float
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class WorkflowSearchResultModel(BaseModel):
+    workflow_id: str
+    name: str
+    description: str = None
+    is_shared: bool
+    is_template: bool
+    owner_id: str
+    updated_at: str = None
+    score: float
+    snippet: str = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class VariableUsageModel(BaseModel):
+    workflow_id: str
+    name: str
+    is_shared: bool
+    owner_id: str
+    roles: List[str]
+    nodes: List[Dict[str, Any]]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class VariableBulkUpdateModel(BaseModel):
+    value: Any
+    workflow_ids: List[str] = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class VariableBulkUpdateResponseModel(BaseModel):
+    updated: List[Dict[str, Any]]
+    skipped: List[Dict[str, Any]]
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+class DistributionFitResponseModel(BaseModel):
+    distribution: Dict[str, Any]
+    selected: str
+    count: int
+    dataset_hash: str
+    degenerate: bool = False
+    ks_threshold: float
+    candidates: List[Dict[str, Any]]
+    cached: bool
+    workflow: WorkflowResponseModel = None
+    
+    class Config:
+        arbitrary_types_allowed = True
+
+def _workflows_to_dicts(db: Session, workflows: List[Workflow], with_analytics: bool) -> List[Dict[str, Any]]:
+    """Convertit une liste de workflows, avec le résumé de leurs indicateurs si demandé"""
+    summaries = AnalyticsService.get_summaries(db, workflows) if with_analytics else {}
+    result = []
+    for workflow in workflows:
+        workflow_dict = WorkflowService.workflow_to_dict(workflow)
+        if with_analytics:
+            workflow_dict['analytics'] = summaries.get(workflow.id)
+        result.append(workflow_dict)
+    return result
+
 # Endpoints
 @router.post("/create", response_model=WorkflowResponseModel)
 async def create_workflow(
@@ -88,7 +242,10 @@ async def create_workflow(
     """Crée un nouveau workflow"""
     # Créer le workflow
     workflow_data = workflow.dict()
-    db_workflow = WorkflowService.create_workflow(db, workflow_data, current_user)
+    try:
+        db_workflow = WorkflowService.create_workflow(db, workflow_data, current_user)
+    except WorkflowValidationError as e:
+        raise HTTPException(status_code=400, detail={'message': str(e), 'diagnostics': e.diagnostics})
     
     if not db_workflow:
         # Récupérer l'abonnement pour vérifier les quotas
@@ -120,17 +277,86 @@ async def create_workflow(
             detail="Erreur lors de la création du workflow"
         )
     
+    IndexRefreshService.refresh(db, db_workflow)
     return WorkflowService.workflow_to_dict(db_workflow)
 
+@router.post("/validate", response_model=WorkflowValidationResponseModel)
+async def validate_workflow(
+    workflow: WorkflowValidateModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Valide un graphe de workflow sans l'enregistrer (diagnostics structurés)"""
+    if workflow.workflow_id and not WorkflowService.check_user_access(db, workflow.workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à accéder à ce workflow"
+        )
+    
+    owner_id = current_user.id
+    if workflow.workflow_id:
+        existing = WorkflowService.get_workflow(db, workflow.workflow_id)
+        owner_id = existing.owner_id if existing else owner_id
+    validation = WorkflowService.validate_workflow(
+        db, workflow.nodes, workflow.edges, workflow.workflow_id, owner_id=owner_id
+    )
+    return validation.to_dict()
+
+@router.get("/search", response_model=List[WorkflowSearchResultModel])
+async def search_workflows(
+    q: str,
+    skip: int = 0,
+    limit: int = 20,
+    templates_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recherche plein texte dans les workflows accessibles (noms, libellés, formules, variables)"""
+    if not SearchService.terms(q):
+        raise HTTPException(status_code=400, detail="La recherche doit contenir au moins un mot")
+    
+    return SearchService.search(db, current_user, q, skip, max(1, min(limit, 100)), templates_only)
+
+@router.get("/variables/{variable_name}/usages", response_model=List[VariableUsageModel])
+async def get_variable_usages(
+    variable_name: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Liste les workflows accessibles qui définissent, calculent ou lisent une variable"""
+    return VariableIndexService.usages(db, current_user, variable_name)
+
+@router.post("/variables/{variable_name}/bulk-update", response_model=VariableBulkUpdateResponseModel)
+async def bulk_update_variable(
+    variable_name: str,
+    update: VariableBulkUpdateModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Modifie la valeur d'une variable dans tous les workflows accessibles qui la définissent"""
+    try:
+        result = VariableIndexService.bulk_update(db, current_user, variable_name, update.value, update.workflow_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for workflow in result['updated']:
+        IndexRefreshService.refresh(db, workflow)
+    
+    return {
+        'updated': [{'workflow_id': w.id, 'name': w.name, 'revision': w.revision} for w in result['updated']],
+        'skipped': result['skipped']
+    }
+
 @router.get("/{user_id}", response_model=List[WorkflowResponseModel])
 async def get_user_workflows(
     user_id: str,
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    with_analytics: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Récupère tous les workflows d'un utilisateur"""
+    """Récupère tous les workflows d'un utilisateur (avec le résumé de leurs indicateurs si demandé)"""
     # Vérifier que l'utilisateur demande ses propres workflows ou est de la même entreprise
     if (current_user.id != user_id and
         (not current_user.company_id or current_user.company_id != db.query(User).filter(User.id == user_id).first().company_id)):
@@ -141,7 +367,7 @@ async def get_user_workflows(
     
     workflows = WorkflowService.get_user_workflows(db, user_id, skip, limit)
     
-    return [WorkflowService.workflow_to_dict(workflow) for workflow in workflows]
+    return _workflows_to_dicts(db, workflows, with_analytics)
 
 @router.get("/company/{company_id}", response_model=List[WorkflowResponseModel])
 async def get_company_workflows(
@@ -149,9 +375,10 @@ async def get_company_workflows(
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    with_analytics: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Récupère tous les workflows partagés d'une entreprise"""
+    """Récupère tous les workflows partagés d'une entreprise (avec le résumé de leurs indicateurs si demandé)"""
     # Vérifier que l'utilisateur appartient à l'entreprise
     if current_user.company_id != company_id:
         raise HTTPException(
@@ -165,7 +392,7 @@ async def get_company_workflows(
         ((Workflow.is_shared == True) | (Workflow.owner_id == current_user.id))
     ).offset(skip).limit(limit).all()
     
-    return [WorkflowService.workflow_to_dict(workflow) for workflow in workflows]
+    return _workflows_to_dicts(db, workflows, with_analytics)
 
 @router.get("/detail/{workflow_id}", response_model=WorkflowResponseModel)
 async def get_workflow_detail(
@@ -188,6 +415,198 @@ async def get_workflow_detail(
     
     return WorkflowService.workflow_to_dict(workflow)
 
+@router.get("/detail/{workflow_id}/analytics", response_model=WorkflowAnalyticsResponseModel)
+async def get_workflow_analytics(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Récupère les indicateurs structurels de la révision courante d'un workflow"""
+    workflow = WorkflowService.get_workflow(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à consulter ce workflow"
+        )
+    
+    return AnalyticsService.analytics_to_dict(AnalyticsService.get_analytics(db, workflow))
+
+@router.get("/detail/{workflow_id}/similar", response_model=List[SimilarWorkflowModel])
+async def get_similar_workflows(
+    workflow_id: str,
+    limit: int = 10,
+    min_similarity: float = 0.3,
+    templates_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recherche les workflows et modèles accessibles les plus similaires à un workflow"""
+    # Vérifications sans charger les nœuds ni les arêtes
+    if not db.query(Workflow.id).filter(Workflow.id == workflow_id).first():
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if workflow_id not in WorkflowService.get_accessible_workflow_ids(db, [workflow_id], current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à consulter ce workflow"
+        )
+    
+    if not 0 <= min_similarity <= 1:
+        raise HTTPException(status_code=400, detail="La similarité minimale doit être comprise entre 0 et 1")
+    
+    return SimilarityService.find_similar(
+        db, workflow_id, current_user.id, max(1, min(limit, 100)), min_similarity, templates_only
+    ) or []
+
+@router.get("/detail/{workflow_id}/revisions", response_model=List[WorkflowRevisionSummaryModel])
+async def get_workflow_revisions(
+    workflow_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Liste l'historique des révisions d'un workflow, de la plus récente à la plus ancienne"""
+    if not db.query(Workflow.id).filter(Workflow.id == workflow_id).first():
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if workflow_id not in WorkflowService.get_accessible_workflow_ids(db, [workflow_id], current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à consulter ce workflow"
+        )
+    
+    return RevisionService.list_revisions(db, workflow_id, skip, max(1, min(limit, 500)))
+
+@router.get("/detail/{workflow_id}/revisions/{revision}", response_model=WorkflowRevisionModel)
+async def get_workflow_revision(
+    workflow_id: str,
+    revision: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Récupère les nœuds et arêtes d'une révision d'un workflow"""
+    workflow = WorkflowService.get_workflow(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à consulter ce workflow"
+        )
+    
+    content = RevisionService.get_revision(db, workflow, revision)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Révision {revision} non trouvée dans l'historique")
+    
+    if content['created_at']:
+        content['created_at'] = content['created_at'].isoformat()
+    return content
+
+@router.post("/detail/{workflow_id}/revisions/{revision}/restore", response_model=WorkflowResponseModel)
+async def restore_workflow_revision(
+    workflow_id: str,
+    revision: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Restaure le contenu d'une révision antérieure (enregistré comme une nouvelle révision)"""
+    workflow = WorkflowService.get_workflow(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à modifier ce workflow"
+        )
+    
+    content = RevisionService.get_revision(db, workflow, revision)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Révision {revision} non trouvée dans l'historique")
+    
+    if revision == workflow.revision:
+        return WorkflowService.workflow_to_dict(workflow)
+    
+    try:
+        updated_workflow = WorkflowService.update_workflow(
+            db, workflow_id, {'nodes': content['nodes'], 'edges': content['edges']}, base_revision=workflow.revision
+        )
+    except WorkflowConflictError as e:
+        raise HTTPException(status_code=409, detail={'message': str(e), 'current_revision': e.current_revision})
+    except WorkflowValidationError as e:
+        raise HTTPException(status_code=400, detail={'message': str(e), 'diagnostics': e.diagnostics})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    IndexRefreshService.refresh(db, updated_workflow)
+    return WorkflowService.workflow_to_dict(updated_workflow)
+
+@router.post("/detail/{workflow_id}/variables/{variable_name}/fit", response_model=DistributionFitResponseModel)
+async def fit_variable_distribution(
+    workflow_id: str,
+    variable_name: str,
+    file: UploadFile = File(...),
+    column: Optional[str] = Form(None),
+    node_id: Optional[str] = Form(None),
+    candidates: Optional[str] = Form(None),
+    method: str = Form("auto"),
+    apply: bool = Form(True),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ajuste la loi de probabilité d'une variable sur une série historique (CSV)
+    
+    - **file**: Fichier CSV contenant la série
+    - **column**: Colonne de la série (par défaut la première)
+    - **node_id**: Nœud portant la variable, si son nom n'est pas unique
+    - **candidates**: Lois à essayer, séparées par des virgules (par défaut toutes)
+    - **method**: 'auto', 'parametric' ou 'empirical'
+    - **apply**: Enregistrer la loi retenue sur la variable
+    """
+    workflow = WorkflowService.get_workflow(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à modifier ce workflow"
+        )
+    
+    content = await file.read(settings.max_upload_size + 1)
+    if len(content) > settings.max_upload_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Le fichier est trop volumineux. Taille maximale: {settings.max_upload_size / (1024 * 1024)} MB"
+        )
+    
+    candidate_list = [c.strip() for c in candidates.split(',') if c.strip()] if candidates else None
+    try:
+        values = FitService.parse_series(content, column)
+        result, cached = FitService.fit(db, values, candidate_list, method)
+        updated_workflow = None
+        if apply:
+            updated_workflow = FitService.attach_to_variable(db, workflow, variable_name, result, node_id)
+    except WorkflowConflictError as e:
+        raise HTTPException(status_code=409, detail={'message': str(e), 'current_revision': e.current_revision})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if updated_workflow:
+        IndexRefreshService.refresh(db, updated_workflow)
+    
+    return {
+        **result,
+        'cached': cached,
+        'workflow': WorkflowService.workflow_to_dict(updated_workflow) if updated_workflow else None
+    }
+
 @router.put("/update/{workflow_id}", response_model=WorkflowResponseModel)
 async def update_workflow(
     workflow_id: str,
@@ -217,8 +636,15 @@ async def update_workflow(
                 )
     
     # Mettre à jour le workflow
-    workflow_data = {k: v for k, v in workflow.dict().items() if v is not None}
-    updated_workflow = WorkflowService.update_workflow(db, workflow_id, workflow_data)
+    workflow_data = {k: v for k, v in workflow.dict().items() if v is not None and k != 'base_revision'}
+    try:
+        updated_workflow = WorkflowService.update_workflow(db, workflow_id, workflow_data, workflow.base_revision)
+    except WorkflowConflictError as e:
+        raise HTTPException(status_code=409, detail={'message': str(e), 'current_revision': e.current_revision})
+    except WorkflowValidationError as e:
+        raise HTTPException(status_code=400, detail={'message': str(e), 'diagnostics': e.diagnostics})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     if not updated_workflow:
         raise HTTPException(
@@ -226,8 +652,55 @@ async def update_workflow(
             detail="Erreur lors de la mise à jour du workflow"
         )
     
+    IndexRefreshService.refresh(db, updated_workflow)
     return WorkflowService.workflow_to_dict(updated_workflow)
 
+@router.patch("/update/{workflow_id}", response_model=WorkflowPatchResponseModel)
+async def patch_workflow(
+    workflow_id: str,
+    patch: WorkflowPatchModel,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Modifie les nœuds et arêtes d'un workflow par opérations (sans renvoyer le graphe entier)
+    
+    - **base_revision**: Révision sur laquelle les opérations ont été préparées (409 si elle n'est plus courante)
+    - **operations**: Opérations JSON Patch sur '/nodes/<id>' et '/edges/<id>' (add, remove, replace, test)
+    """
+    if not db.query(Workflow.id).filter(Workflow.id == workflow_id).first():
+        raise HTTPException(status_code=404, detail="Workflow non trouvé")
+    
+    if not WorkflowService.check_user_access(db, workflow_id, current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Vous n'êtes pas autorisé à modifier ce workflow"
+        )
+    
+    try:
+        updated_workflow = WorkflowService.patch_workflow(db, workflow_id, patch.base_revision, patch.operations)
+    except WorkflowConflictError as e:
+        raise HTTPException(status_code=409, detail={'message': str(e), 'current_revision': e.current_revision})
+    except WorkflowValidationError as e:
+        raise HTTPException(status_code=400, detail={'message': str(e), 'diagnostics': e.diagnostics})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not updated_workflow:
+        raise HTTPException(
+            status_code=500,
+            detail="Erreur lors de la mise à jour du workflow"
+        )
+    
+    # Modifications en rafale depuis l'éditeur : index mis à jour une fois la rafale terminée
+    IndexRefreshService.schedule(db, updated_workflow)
+    return {
+        'id': updated_workflow.id,
+        'revision': updated_workflow.revision,
+        'storage_size': updated_workflow.storage_size,
+        'updated_at': updated_workflow.updated_at.isoformat() if updated_workflow.updated_at else None
+    }
+
 @router.delete("/delete/{workflow_id}")
 async def delete_workflow(
     workflow_id: str,
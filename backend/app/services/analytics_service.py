@@ -0,0 +1,193 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+import threading
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.workflow import Workflow
+from app.models.workflow_analytics import WorkflowAnalytics
+from app.services.database import DatabaseService
+from app.services.workflow_service import WorkflowService, DatabaseWorkflowResolver
+from app.engine import WorkflowEvaluator, FormulaError
+from app.engine.analysis import graph_analytics
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    """
+    Indicateurs structurels des workflows, précalculés à chaque révision
+
+    Le calcul est fait à l'enregistrement, de façon synchrone pour les petits
+    graphes et dans un thread au-delà de WORKFLOW_ANALYTICS_SYNC_MAX_ELEMENTS
+    nœuds et arêtes. Le modèle compilé est repris du cache des modèles, où la
+    validation à l'enregistrement l'a déposé.
+    """
+
+    @staticmethod
+    def refresh(db: Session, workflow: Workflow, background: bool = True) -> WorkflowAnalytics:
+        """
+        Met à jour les indicateurs d'un workflow pour sa révision courante
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow enregistré
+            background: Différer le calcul des grands workflows dans un thread
+                (False quand l'appelant est déjà en arrière-plan)
+
+        Returns:
+            L'enregistrement des indicateurs ('pending' si le calcul est différé)
+        """
+        record = DatabaseService.get_by(db, WorkflowAnalytics, {'workflow_id': workflow.id})
+        if record and record.revision == workflow.revision and record.status != 'failed':
+            return record
+
+        size = len(workflow.nodes or []) + len(workflow.edges or [])
+        if not background or size <= settings.WORKFLOW_ANALYTICS_SYNC_MAX_ELEMENTS:
+            return AnalyticsService.compute(db, workflow)
+
+        record = AnalyticsService._store(db, workflow, 'pending')
+        threading.Thread(
+            target=AnalyticsService._compute_in_background,
+            args=(workflow.id, workflow.revision),
+            daemon=True
+        ).start()
+        return record
+
+    @staticmethod
+    def compute(db: Session, workflow: Workflow) -> WorkflowAnalytics:
+        """
+        Calcule et enregistre les indicateurs d'un workflow
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow à analyser
+
+        Returns:
+            L'enregistrement des indicateurs ('failed' si le workflow ne compile pas)
+        """
+        evaluator = WorkflowEvaluator(DatabaseWorkflowResolver(db, workflow.owner_id))
+        try:
+            model = evaluator.load_definition({
+                'id': workflow.id, 'nodes': workflow.nodes or [], 'edges': workflow.edges or [],
+                'revision': workflow.revision
+            })
+        except FormulaError as e:
+            return AnalyticsService._store(db, workflow, 'failed', error_message=str(e))
+        return AnalyticsService._store(db, workflow, 'ready', graph_analytics(model))
+
+    @staticmethod
+    def get_analytics(db: Session, workflow: Workflow) -> WorkflowAnalytics:
+        """
+        Retourne les indicateurs de la révision courante d'un workflow
+
+        Les workflows enregistrés avant l'introduction des indicateurs (ou
+        dont le calcul a été interrompu) sont analysés à la première demande.
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow concerné
+
+        Returns:
+            L'enregistrement des indicateurs
+        """
+        record = DatabaseService.get_by(db, WorkflowAnalytics, {'workflow_id': workflow.id})
+        if record and record.revision == workflow.revision:
+            return record
+        return AnalyticsService.refresh(db, workflow)
+
+    @staticmethod
+    def get_summaries(db: Session, workflows: List[Workflow]) -> Dict[str, Dict[str, Any]]:
+        """
+        Résumés des indicateurs d'une liste de workflows (une seule requête)
+
+        Seuls les décomptes et les indicateurs principaux sont retournés ; les
+        workflows sans indicateurs à jour sont absents du résultat.
+
+        Args:
+            db: Session SQLAlchemy
+            workflows: Workflows listés
+
+        Returns:
+            {workflow_id: résumé}
+        """
+        revisions = {w.id: w.revision for w in workflows}
+        if not revisions:
+            return {}
+        records = db.query(WorkflowAnalytics).filter(WorkflowAnalytics.workflow_id.in_(revisions)).all()
+        return {
+            record.workflow_id: AnalyticsService.summary(record)
+            for record in records
+            if record.revision == revisions[record.workflow_id]
+        }
+
+    @staticmethod
+    def summary(record: WorkflowAnalytics) -> Dict[str, Any]:
+        """Résumé d'un enregistrement d'indicateurs, pour les vues en liste"""
+        metrics = record.metrics or {}
+        return {
+            'revision': record.revision,
+            'status': record.status,
+            'node_count': record.node_count,
+            'edge_count': record.edge_count,
+            'cycles': (metrics.get('cycles') or {}).get('count'),
+            'longest_path': (metrics.get('longest_path') or {}).get('length'),
+            'dependency_depth': (metrics.get('variables') or {}).get('dependency_depth')
+        }
+
+    @staticmethod
+    def analytics_to_dict(record: WorkflowAnalytics) -> Dict[str, Any]:
+        """
+        Convertit un enregistrement d'indicateurs en dictionnaire
+
+        Args:
+            record: Enregistrement à convertir
+
+        Returns:
+            Dictionnaire représentant les indicateurs
+        """
+        return DatabaseService.to_dict(record)
+
+    @staticmethod
+    def _store(db: Session, workflow: Workflow, status: str, metrics: Optional[Dict[str, Any]] = None,
+               error_message: Optional[str] = None) -> WorkflowAnalytics:
+        values = {
+            'revision': workflow.revision,
+            'status': status,
+            'node_count': len(workflow.nodes or []),
+            'edge_count': len(workflow.edges or []),
+            'metrics': metrics,
+            'error_message': error_message
+        }
+        record = DatabaseService.get_by(db, WorkflowAnalytics, {'workflow_id': workflow.id})
+        if record is None:
+            try:
+                return DatabaseService.create(db, WorkflowAnalytics, {'workflow_id': workflow.id, **values})
+            except IntegrityError:
+                # Enregistrement créé en parallèle : mis à jour ci-dessous
+                db.rollback()
+                record = DatabaseService.get_by(db, WorkflowAnalytics, {'workflow_id': workflow.id})
+        if record.revision > workflow.revision:
+            # Une révision plus récente a déjà été analysée
+            return record
+        return DatabaseService.update(db, record, values)
+
+    @staticmethod
+    def _compute_in_background(workflow_id: str, revision: int) -> None:
+        """
+        Calcule les indicateurs d'un grand workflow
+
+        Exécuté dans un thread : utilise sa propre session de base de données.
+        Le calcul est abandonné si le workflow a changé de révision entre-temps.
+        """
+        db = SessionLocal()
+        try:
+            workflow = WorkflowService.get_workflow(db, workflow_id)
+            if workflow is None or workflow.revision != revision:
+                return
+            AnalyticsService.compute(db, workflow)
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des indicateurs du workflow {workflow_id}: {str(e)}")
+        finally:
+            db.close()
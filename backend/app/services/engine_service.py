@@ -0,0 +1,142 @@
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+import logging
+import os
+from app.config import settings
+from app.services.workflow_service import WorkflowService, DatabaseWorkflowResolver
+from app.services.table_service import TableService
+from app.engine import execute_job
+from app.engine.checkpoint import load_checkpoint, discard_checkpoint
+from app.engine.sandbox import SandboxLimits, run_sandboxed
+from app.engine.shm import SharedArrays
+
+logger = logging.getLogger(__name__)
+
+
+class EngineService:
+    """Service d'exécution des jobs du moteur de simulation (isolés ou dans le processus)"""
+
+    @staticmethod
+    def sandbox_limits() -> SandboxLimits:
+        """
+        Limites appliquées à chaque job isolé, d'après la configuration
+
+        Returns:
+            Les limites de mémoire, de CPU et de durée
+        """
+        return SandboxLimits(
+            max_memory_mb=settings.SIMULATION_MAX_MEMORY_MB,
+            max_cpu_seconds=settings.SIMULATION_MAX_CPU_SECONDS,
+            wall_timeout=settings.SIMULATION_WALL_TIMEOUT
+        )
+
+    @staticmethod
+    def run_job(db: Session, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Exécute un job de simulation ou d'optimisation
+
+        Avec SIMULATION_SANDBOX, le job s'exécute dans un processus dédié soumis
+        à des limites de mémoire, de CPU et de durée : un modèle pathologique
+        échoue proprement sans pénaliser les autres utilisateurs. Les définitions
+        des sous-workflows et les tables de correspondance sont alors chargées
+        au préalable, le processus isolé n'ayant pas accès à la base.
+
+        Args:
+            db: Session SQLAlchemy
+            job: Job au format de `execute_job` (sans 'definitions'), avec 'owner_id' : propriétaire
+                du workflow, seul à déterminer les tables de correspondance accessibles
+
+        Returns:
+            Le résultat du job, avec 'resources' si le job a été isolé. Les
+            tableaux de 'arrays' peuvent être des vues en mémoire partagée :
+            appeler `release` une fois le résultat persisté.
+        """
+        if not settings.SIMULATION_SANDBOX:
+            return execute_job(job, resolver=DatabaseWorkflowResolver(db, job.get('owner_id')))
+
+        workflow = job['workflow']
+        job['definitions'] = WorkflowService.load_referenced_definitions(
+            db, {workflow['id']: workflow}, job.get('owner_id')
+        )
+        job['tables'] = TableService.load_referenced(db, job['definitions'], job.get('owner_id'))
+        outcome = run_sandboxed(job, EngineService.sandbox_limits())
+
+        if outcome['status'] == 'failed':
+            logger.warning(
+                f"Job {job.get('kind')} du workflow {workflow['id']} en échec: {outcome.get('error_message')} "
+                f"(ressources: {outcome.get('resources')})"
+            )
+        return outcome
+
+    @staticmethod
+    def describe_arrays(outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Décrit les tableaux volumineux d'un résultat (forme et type), sans les copier
+
+        Args:
+            outcome: Résultat d'un job
+
+        Returns:
+            Dictionnaire {nom: {'shape', 'dtype'}}
+        """
+        return {
+            name: {'shape': list(array.shape), 'dtype': array.dtype.str}
+            for name, array in (outcome.get('arrays') or {}).items()
+        }
+
+    @staticmethod
+    def release(outcome: Dict[str, Any]) -> None:
+        """
+        Libère la mémoire partagée associée au résultat d'un job
+
+        Args:
+            outcome: Résultat d'un job
+        """
+        arrays = outcome.pop('arrays', None)
+        if isinstance(arrays, SharedArrays):
+            arrays.release()
+
+    @staticmethod
+    def checkpoint_path(kind: str, job_id: str) -> str:
+        """Chemin du point de reprise d'un job ('optimization', 'simulation' ou 'refine')"""
+        # Les IDs sont générés par le serveur, mais on ne laisse passer aucun séparateur de chemin
+        if not job_id or os.sep in job_id or job_id in ('.', '..'):
+            raise ValueError(f"ID de job invalide: {job_id}")
+        return os.path.join(settings.SIMULATION_CHECKPOINT_DIR, f"{kind}-{job_id}.npz")
+
+    @staticmethod
+    def checkpoint_spec(kind: str, job_id: str) -> Dict[str, Any]:
+        """
+        Paramètre 'checkpoint' d'un job : le moteur reprend depuis ce fichier
+        s'il existe, puis le met à jour toutes les SIMULATION_CHECKPOINT_INTERVAL secondes
+
+        Args:
+            kind: Type de job ('optimization', 'simulation' ou 'refine')
+            job_id: ID de l'optimisation ou de la simulation
+        """
+        return {
+            'path': EngineService.checkpoint_path(kind, job_id),
+            'interval': settings.SIMULATION_CHECKPOINT_INTERVAL
+        }
+
+    @staticmethod
+    def checkpoint_info(kind: str, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Avancement enregistré dans le dernier point de reprise (sans charger les tableaux)
+
+        Returns:
+            Dictionnaire {'checkpoint_at', 'progress'} ou None s'il n'y a pas de point de reprise
+        """
+        state = load_checkpoint(EngineService.checkpoint_path(kind, job_id), arrays=False)
+        if not state:
+            return None
+        return {
+            'checkpoint_at': datetime.fromtimestamp(state['saved_at'], timezone.utc),
+            'progress': float(state.get('progress') or 0.0)
+        }
+
+    @staticmethod
+    def discard_checkpoint(kind: str, job_id: str) -> None:
+        """Supprime le point de reprise d'un job terminé"""
+        discard_checkpoint(EngineService.checkpoint_path(kind, job_id))
@@ -0,0 +1,135 @@
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timezone
+import copy
+import hashlib
+import json
+import numpy as np
+from app.config import settings
+from app.models.distribution_fit import DistributionFit
+from app.models.workflow import Workflow
+from app.services.database import DatabaseService
+from app.services.table_service import TableService
+from app.services.workflow_service import WorkflowService
+from app.engine.fitting import fit_distribution, dataset_digest, FIT_VERSION
+from app.engine.formula import sanitize_name
+from app.engine.model import VARIABLE_NODE_TYPES
+
+
+class FitService:
+    """
+    Ajustement des lois de probabilité des variables sur des séries historiques
+
+    Le résultat d'un ajustement est mis en cache en base par empreinte de la
+    série (et des options) : importer de nouveau le même historique, pour la
+    même variable ou une autre, ne refait pas le calcul.
+    """
+
+    @staticmethod
+    def parse_series(content: bytes, column: Optional[str] = None) -> np.ndarray:
+        """
+        Lit une série historique dans un fichier CSV (cellules vides ignorées)
+
+        Args:
+            content: Contenu du fichier
+            column: Colonne à lire (par défaut la première)
+
+        Raises:
+            ValueError: Si le fichier est invalide ou dépasse DISTRIBUTION_FIT_MAX_POINTS
+        """
+        frame = TableService.read_csv(content)
+        frame.columns = [str(c) for c in frame.columns]
+        values = TableService.numeric_column(frame, column or frame.columns[0], skip_empty=True)
+        if values.size > settings.DISTRIBUTION_FIT_MAX_POINTS:
+            raise ValueError(f"Une série est limitée à {settings.DISTRIBUTION_FIT_MAX_POINTS} observations")
+        return values
+
+    @staticmethod
+    def fit(db: Session, values: np.ndarray, candidates: Optional[List[str]] = None,
+            method: str = 'auto') -> Tuple[Dict[str, Any], bool]:
+        """
+        Ajuste les lois candidates à une série, depuis le cache si elle a déjà été ajustée
+
+        Args:
+            db: Session SQLAlchemy
+            values: Observations
+            candidates: Lois à essayer (par défaut toutes les lois ajustables)
+            method: 'auto', 'parametric' ou 'empirical' (voir `fit_distribution`)
+
+        Returns:
+            Couple (résultat de l'ajustement avec 'dataset_hash', trouvé en cache)
+
+        Raises:
+            ValueError: Si la série ou les options sont invalides
+        """
+        dataset_hash = dataset_digest(values)
+        options = json.dumps({'candidates': sorted(candidates) if candidates else None, 'method': method,
+                              'version': FIT_VERSION}, sort_keys=True)
+        fit_id = hashlib.sha256(f"{dataset_hash}:{options}".encode('utf-8')).hexdigest()
+
+        cached = DatabaseService.get_by_id(db, DistributionFit, fit_id)
+        if cached:
+            return cached.result, True
+
+        result = fit_distribution(values, candidates, method)
+        result['dataset_hash'] = dataset_hash
+        try:
+            DatabaseService.create(db, DistributionFit, {
+                'id': fit_id, 'dataset_hash': dataset_hash, 'count': result['count'], 'result': result
+            })
+        except IntegrityError:
+            # Même série ajustée en parallèle : le résultat est identique
+            db.rollback()
+        return result, False
+
+    @staticmethod
+    def attach_to_variable(db: Session, workflow: Workflow, variable_name: str, result: Dict[str, Any],
+                           node_id: Optional[str] = None) -> Workflow:
+        """
+        Enregistre la loi ajustée sur une variable du workflow
+
+        La loi retenue remplace le champ 'distribution' de la variable (utilisé
+        par les simulations de Monte Carlo) ; le champ 'fit' garde la trace de
+        l'ajustement (série, critères de la loi retenue).
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow à modifier
+            variable_name: Nom de la variable
+            result: Résultat de `fit`
+            node_id: Nœud portant la variable, si le nom n'est pas unique
+
+        Returns:
+            Le workflow mis à jour (nouvelle révision)
+
+        Raises:
+            ValueError: Si la variable est introuvable ou ambiguë
+            WorkflowConflictError: Si le workflow a été modifié entre-temps
+        """
+        nodes = copy.deepcopy(workflow.nodes or [])
+        target = sanitize_name(variable_name)
+        matches = [
+            variable
+            for node in nodes
+            if node.get('type') in VARIABLE_NODE_TYPES and (node_id is None or node.get('id') == node_id)
+            for variable in (node.get('data') or {}).get('variables') or []
+            if variable.get('name') and sanitize_name(variable['name']) == target
+        ]
+        if not matches:
+            raise ValueError(f"Variable introuvable: {variable_name}")
+        if len(matches) > 1:
+            raise ValueError(f"Variable présente dans plusieurs nœuds, précisez le nœud: {variable_name}")
+
+        selected = next((c for c in result['candidates'] if c['type'] == result['selected']), None)
+        variable = matches[0]
+        variable['distribution'] = result['distribution']
+        variable['fit'] = {
+            'dataset_hash': result['dataset_hash'],
+            'count': result['count'],
+            'selected': result['selected'],
+            'aic': selected['aic'] if selected else None,
+            'ks': selected['ks'] if selected else None,
+            'fitted_at': datetime.now(timezone.utc).isoformat()
+        }
+        return WorkflowService.update_workflow(db, workflow.id, {'nodes': nodes}, base_revision=workflow.revision)
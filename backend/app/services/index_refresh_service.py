@@ -0,0 +1,123 @@
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+import threading
+import time
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.workflow import Workflow
+from app.services.analytics_service import AnalyticsService
+from app.services.similarity_service import SimilarityService
+from app.services.search_service import SearchService
+from app.services.variable_index_service import VariableIndexService
+from app.services.workflow_service import WorkflowService
+
+logger = logging.getLogger(__name__)
+
+
+class IndexRefreshService:
+    """
+    Mise à jour des index dérivés des workflows (indicateurs, similarité, recherche, variables)
+
+    Après un enregistrement complet, les index sont mis à jour pendant la
+    requête. Les modifications partielles, envoyées en rafale par l'éditeur,
+    sont regroupées : un thread d'arrière-plan réindexe chaque workflow une
+    seule fois, WORKFLOW_INDEX_DEBOUNCE_SECONDS après sa dernière
+    modification, dans sa révision du moment.
+    """
+
+    _pending: Dict[str, float] = {}
+    _condition = threading.Condition()
+    _stop_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def refresh(db: Session, workflow: Workflow, background: bool = True) -> None:
+        """
+        Met à jour les index dérivés d'un workflow pour sa révision courante
+
+        Chaque index constate d'abord s'il est déjà à jour (révision reportée
+        après un simple déplacement d'éléments, document inchangé).
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow enregistré
+            background: Différer les indicateurs des grands workflows dans un thread
+        """
+        AnalyticsService.refresh(db, workflow, background=background)
+        SimilarityService.index_workflow(db, workflow)
+        SearchService.index_workflow(db, workflow)
+        VariableIndexService.index_workflow(db, workflow)
+
+    @staticmethod
+    def schedule(db: Session, workflow: Workflow) -> None:
+        """
+        Programme la mise à jour des index d'un workflow modifié (regroupée avec les modifications suivantes)
+
+        Sans thread d'arrière-plan démarré, les index sont mis à jour immédiatement.
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow modifié
+        """
+        with IndexRefreshService._condition:
+            if IndexRefreshService._thread is not None:
+                IndexRefreshService._pending[workflow.id] = time.monotonic() + settings.WORKFLOW_INDEX_DEBOUNCE_SECONDS
+                IndexRefreshService._condition.notify()
+                return
+        IndexRefreshService.refresh(db, workflow)
+
+    @staticmethod
+    def start() -> None:
+        """Démarre le thread de mise à jour différée des index"""
+        with IndexRefreshService._condition:
+            if IndexRefreshService._thread is not None:
+                return
+            IndexRefreshService._stop_event.clear()
+            IndexRefreshService._thread = threading.Thread(
+                target=IndexRefreshService._loop, name="workflow-index-refresh", daemon=True
+            )
+            IndexRefreshService._thread.start()
+
+    @staticmethod
+    def stop() -> None:
+        """Arrête le thread après avoir mis à jour sans délai les index encore en attente"""
+        with IndexRefreshService._condition:
+            IndexRefreshService._stop_event.set()
+            IndexRefreshService._thread = None
+            IndexRefreshService._condition.notify_all()
+
+    @staticmethod
+    def _next_due() -> Optional[str]:
+        """Attend le prochain workflow à réindexer (None une fois arrêté et la file vidée)"""
+        with IndexRefreshService._condition:
+            while True:
+                pending = IndexRefreshService._pending
+                if IndexRefreshService._stop_event.is_set():
+                    return pending.popitem()[0] if pending else None
+                if not pending:
+                    IndexRefreshService._condition.wait()
+                    continue
+                workflow_id, due = min(pending.items(), key=lambda item: item[1])
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    del pending[workflow_id]
+                    return workflow_id
+                IndexRefreshService._condition.wait(delay)
+
+    @staticmethod
+    def _loop() -> None:
+        while True:
+            workflow_id = IndexRefreshService._next_due()
+            if workflow_id is None:
+                return
+            db = SessionLocal()
+            try:
+                workflow = WorkflowService.get_workflow(db, workflow_id)
+                if workflow is not None:
+                    IndexRefreshService.refresh(db, workflow, background=False)
+            except Exception as e:
+                logger.error(f"Erreur lors de la mise à jour des index du workflow {workflow_id}: {str(e)}")
+                db.rollback()
+            finally:
+                db.close()
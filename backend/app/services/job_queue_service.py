@@ -0,0 +1,490 @@
+from typing import List, Dict, Any, Optional, Callable
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.optimization import Optimization, OptimizationStatus
+from app.models.simulation import Simulation, SimulationStatus
+from app.models.subscription import SubscriptionTier
+from app.models.workflow import Workflow
+from app.services.optimization_service import OptimizationService
+from app.services.simulation_service import SimulationService
+from app.services.subscription_service import SubscriptionService
+from app.services.workflow_service import WorkflowService
+
+logger = logging.getLogger(__name__)
+
+# Identifiant de ce processus dans les baux d'exécution des jobs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Poids de partage du calcul par niveau d'abonnement (sans abonnement actif : poids 1)
+TIER_WEIGHTS = {
+    SubscriptionTier.SOLO: 1,
+    SubscriptionTier.BUSINESS: 2,
+    SubscriptionTier.ENTERPRISE: 4
+}
+
+
+class FairShareQueue:
+    """
+    File d'attente à partage équitable pondéré entre locataires (entreprise ou utilisateur)
+
+    Chaque locataire a sa propre file et un compteur de passage qui augmente de
+    1/poids à chaque job distribué : on sert le locataire au compteur le plus
+    bas, si bien qu'un locataire de poids 4 obtient quatre fois plus de
+    créneaux qu'un locataire de poids 1 lorsque les deux attendent. Un
+    locataire qui (re)devient actif reprend au temps virtuel courant : il passe
+    devant un locataire qui a déjà soumis des milliers de jobs, mais ne peut pas
+    accumuler de crédit en restant inactif.
+
+    Le nombre de jobs en cours par locataire est plafonné. Le vieillissement
+    abaisse le compteur effectif d'un locataire de 1 par `aging_seconds`
+    écoulées depuis qu'il a été servi pour la dernière fois (ou depuis
+    l'arrivée de son job, si elle est plus récente), sans dépasser un pas
+    (1/poids) : il départage un locataire délaissé, par exemple bloqué par
+    son plafond, mais un lot de milliers de jobs n'accumule aucune priorité
+    en attendant.
+    """
+
+    def __init__(self, tenant_cap: int, aging_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._condition = threading.Condition()
+        self._tenants: Dict[str, Dict[str, Any]] = {}
+        self._virtual_time = 0.0
+        self._stopping = 0
+        self._clock = clock
+        self.tenant_cap = tenant_cap
+        self.aging_seconds = aging_seconds
+
+    def put(self, tenant: Optional[str], item: Dict[str, Any], weight: float = 1) -> None:
+        """Ajoute un job à la file de son locataire"""
+        with self._condition:
+            now = self._clock()
+            state = self._tenants.get(tenant)
+            if state is None:
+                state = {'items': deque(), 'running': 0, 'pass': self._virtual_time, 'weight': weight, 'served_at': now}
+                self._tenants[tenant] = state
+            state['weight'] = weight
+            state['items'].append((now, item))
+            self._condition.notify()
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Attend et retire le prochain job à exécuter
+
+        Returns:
+            Le job, ou None si la file est arrêtée
+        """
+        with self._condition:
+            while True:
+                if self._stopping:
+                    self._stopping -= 1
+                    return None
+                tenant = self._select()
+                if tenant is not None:
+                    state = self._tenants[tenant]
+                    _, item = state['items'].popleft()
+                    state['running'] += 1
+                    state['served_at'] = self._clock()
+                    self._virtual_time = max(self._virtual_time, state['pass'])
+                    state['pass'] += 1.0 / state['weight']
+                    return item
+                self._condition.wait()
+
+    def done(self, tenant: Optional[str]) -> None:
+        """Signale la fin d'un job (libère un créneau du locataire)"""
+        with self._condition:
+            state = self._tenants.get(tenant)
+            if state is not None:
+                state['running'] -= 1
+                if not state['items'] and not state['running']:
+                    del self._tenants[tenant]
+            self._condition.notify_all()
+
+    def stop(self, consumers: int) -> None:
+        """Réveille `consumers` consommateurs avec None"""
+        with self._condition:
+            self._stopping += consumers
+            self._condition.notify_all()
+
+    def qsize(self) -> int:
+        """Nombre de jobs en attente, tous locataires confondus"""
+        with self._condition:
+            return sum(len(state['items']) for state in self._tenants.values())
+
+    def _select(self) -> Optional[str]:
+        # Parcours linéaire des locataires actifs (quelques dizaines au plus)
+        now = self._clock()
+        best, best_score = None, None
+        for tenant, state in self._tenants.items():
+            if not state['items'] or state['running'] >= self.tenant_cap:
+                continue
+            waited = now - max(state['served_at'], state['items'][0][0])
+            bonus = min(waited / self.aging_seconds, 1.0 / state['weight']) if self.aging_seconds > 0 else 0.0
+            score = state['pass'] - bonus
+            if best_score is None or score < best_score:
+                best, best_score = tenant, score
+        return best
+
+
+class JobQueueService:
+    """
+    File d'attente des simulations soumises en différé (lots, planifications),
+    des affinages de résultats partiels et des optimisations interrompues à reprendre
+
+    Des threads de dispatch consomment la file et exécutent chaque simulation
+    avec leur propre session de base de données ; le calcul lui-même a lieu
+    dans un processus isolé (voir EngineService), les threads ne font
+    qu'attendre son résultat. Les créneaux sont répartis entre locataires
+    selon leur niveau d'abonnement (voir FairShareQueue) ; les simulations
+    interactives (POST /simulations) ne passent pas par cette file.
+
+    Plusieurs processus serveur peuvent partager la base : un job n'est
+    exécuté qu'après avoir été réclamé par une requête UPDATE conditionnelle
+    qui lui attribue un bail (SIMULATION_LEASE_SECONDS), renouvelé tant que
+    le job tourne. Seuls les jobs dont le bail a expiré (processus arrêté ou
+    planté) sont repris par les autres processus.
+    """
+
+    _queue = FairShareQueue(
+        tenant_cap=settings.SIMULATION_TENANT_MAX_CONCURRENT or max(1, settings.SIMULATION_QUEUE_WORKERS - 1),
+        aging_seconds=settings.SIMULATION_QUEUE_AGING_SECONDS
+    )
+    _threads: List[threading.Thread] = []
+    _lock = threading.Lock()
+    _active: set = set()
+    _lease_stop = threading.Event()
+
+    @staticmethod
+    def start(workers: Optional[int] = None) -> None:
+        """
+        Démarre les threads de dispatch et remet en file les jobs interrompus
+
+        Args:
+            workers: Nombre de threads (par défaut SIMULATION_QUEUE_WORKERS)
+        """
+        with JobQueueService._lock:
+            if JobQueueService._threads:
+                return
+            for k in range(workers or settings.SIMULATION_QUEUE_WORKERS):
+                thread = threading.Thread(target=JobQueueService._worker_loop, name=f"simulation-dispatch-{k}",
+                                          daemon=True)
+                thread.start()
+                JobQueueService._threads.append(thread)
+            JobQueueService._lease_stop.clear()
+            threading.Thread(target=JobQueueService._lease_loop, name="simulation-leases", daemon=True).start()
+        JobQueueService.recover_pending()
+
+    @staticmethod
+    def stop() -> None:
+        """Arrête les threads de dispatch (les simulations en attente restent PENDING en base)"""
+        with JobQueueService._lock:
+            JobQueueService._queue.stop(len(JobQueueService._threads))
+            JobQueueService._threads = []
+            JobQueueService._lease_stop.set()
+
+    @staticmethod
+    def enqueue(items: List[Dict[str, Any]]) -> None:
+        """
+        Ajoute des simulations à la file, pondérées par le niveau d'abonnement de leur locataire
+
+        Args:
+            items: Éléments {'kind': 'simulation'|'refine'|'optimization', 'id', 'tenant'}
+        """
+        if not items:
+            return
+        weights = JobQueueService.tenant_weights({item.get('tenant') for item in items})
+        for item in items:
+            tenant = item.get('tenant')
+            JobQueueService._queue.put(tenant, item, weights.get(tenant, 1))
+
+    @staticmethod
+    def tenant_weights(tenants: set) -> Dict[str, int]:
+        """
+        Poids de partage de plusieurs locataires (une requête)
+
+        Args:
+            tenants: IDs d'entreprises ou d'utilisateurs
+
+        Returns:
+            Dictionnaire {tenant: poids} ; poids 1 si le niveau ne peut être déterminé
+        """
+        db = SessionLocal()
+        try:
+            tiers = SubscriptionService.get_tenant_tiers(db, tenants)
+            return {tenant: TIER_WEIGHTS.get(tier, 1) for tenant, tier in tiers.items()}
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture des niveaux d'abonnement: {str(e)}")
+            return {}
+        finally:
+            db.close()
+
+    @staticmethod
+    def pending_count() -> int:
+        """Nombre d'éléments en attente dans la file"""
+        return JobQueueService._queue.qsize()
+
+    @staticmethod
+    def recover_pending(startup: bool = True) -> int:
+        """
+        Remet en file les jobs interrompus
+
+        Simulations différées restées RUNNING, affinages de résultats partiels
+        et optimisations exécutées par le moteur restées PROCESSING dont le
+        bail a expiré : celles-ci reprennent à leur dernier point de reprise.
+        Au démarrage, s'y ajoutent les simulations différées PENDING et les
+        jobs sans bail (en file dans un processus arrêté, ou antérieurs aux baux). Un job remis en file par
+        plusieurs processus n'est exécuté que par celui qui le réclame.
+
+        Args:
+            startup: Reprise au démarrage du processus (sinon, seuls les baux expirés sont repris)
+
+        Returns:
+            Nombre de jobs remis en file
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            tenant = func.coalesce(Workflow.company_id, Workflow.owner_id).label('tenant')
+
+            def expired(model):
+                condition = model.lease_expires_at < now
+                return or_(model.lease_expires_at.is_(None), condition) if startup else condition
+
+            statuses = [SimulationStatus.RUNNING] + ([SimulationStatus.PENDING] if startup else [])
+            rows = db.query(Simulation.id, Simulation.status, tenant).join(
+                Workflow, Workflow.id == Simulation.workflow_id
+            ).filter(
+                Simulation.batch_id.isnot(None),
+                Simulation.status.in_(statuses),
+                or_(Simulation.status == SimulationStatus.PENDING, expired(Simulation))
+            ).all()
+            interrupted = [row.id for row in rows if row.status == SimulationStatus.RUNNING]
+            if interrupted:
+                # Conditionnel : un bail renouvelé entre-temps par son processus n'est pas repris
+                db.query(Simulation).filter(
+                    Simulation.id.in_(interrupted),
+                    Simulation.status == SimulationStatus.RUNNING,
+                    expired(Simulation)
+                ).update({
+                    Simulation.status: SimulationStatus.PENDING,
+                    Simulation.lease_owner: None,
+                    Simulation.lease_expires_at: None
+                }, synchronize_session=False)
+                db.commit()
+            items = [{'kind': 'simulation', 'id': row.id, 'tenant': row.tenant} for row in rows]
+
+            refinements = db.query(Simulation.id, tenant).join(
+                Workflow, Workflow.id == Simulation.workflow_id
+            ).filter(
+                Simulation.refining == True,
+                Simulation.status == SimulationStatus.COMPLETED,
+                expired(Simulation)
+            ).all()
+            items += [{'kind': 'refine', 'id': row.id, 'tenant': row.tenant} for row in refinements]
+
+            # Sans objectif, une optimisation PROCESSING attend un traitement externe : on n'y touche pas
+            optimizations = db.query(Optimization.id, Optimization.parameters, tenant).join(
+                Workflow, Workflow.id == Optimization.workflow_id
+            ).filter(
+                Optimization.status == OptimizationStatus.PROCESSING,
+                expired(Optimization)
+            ).all()
+            items += [
+                {'kind': 'optimization', 'id': row.id, 'tenant': row.tenant}
+                for row in optimizations if (row.parameters or {}).get('objective')
+            ]
+
+            JobQueueService.enqueue(items)
+            if items:
+                logger.info(f"{len(items)} jobs interrompus remis en file")
+            return len(items)
+        except Exception as e:
+            logger.error(f"Erreur lors de la reprise des jobs en attente: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    @staticmethod
+    def claim(db: Session, kind: str, job_id: str) -> bool:
+        """
+        Réclame un job pour ce processus (requête UPDATE conditionnelle)
+
+        Une simulation passe de PENDING à RUNNING ; un affinage (simulation
+        COMPLETED marquée 'refining') et une optimisation PROCESSING ne sont
+        réclamés que s'ils n'ont pas de bail en cours.
+
+        Args:
+            db: Session SQLAlchemy
+            kind: 'simulation', 'refine' ou 'optimization'
+            job_id: ID du job
+
+        Returns:
+            True si le job a été réclamé (il doit alors être exécuté par ce processus)
+        """
+        now = datetime.now(timezone.utc)
+        lease = {'lease_owner': WORKER_ID, 'lease_expires_at': now + timedelta(seconds=settings.SIMULATION_LEASE_SECONDS)}
+        if kind == 'optimization':
+            claimed = db.query(Optimization).filter(
+                Optimization.id == job_id,
+                Optimization.status == OptimizationStatus.PROCESSING,
+                or_(Optimization.lease_expires_at.is_(None), Optimization.lease_expires_at < now)
+            ).update(lease, synchronize_session=False)
+        elif kind == 'refine':
+            claimed = db.query(Simulation).filter(
+                Simulation.id == job_id,
+                Simulation.status == SimulationStatus.COMPLETED,
+                Simulation.refining == True,
+                or_(Simulation.lease_expires_at.is_(None), Simulation.lease_expires_at < now)
+            ).update(lease, synchronize_session=False)
+        else:
+            claimed = db.query(Simulation).filter(
+                Simulation.id == job_id,
+                Simulation.status == SimulationStatus.PENDING
+            ).update({**lease, 'status': SimulationStatus.RUNNING}, synchronize_session=False)
+        db.commit()
+        if claimed:
+            with JobQueueService._lock:
+                JobQueueService._active.add((kind, job_id))
+        return bool(claimed)
+
+    @staticmethod
+    def renew_leases() -> None:
+        """Prolonge les baux des jobs en cours d'exécution dans ce processus"""
+        with JobQueueService._lock:
+            active = list(JobQueueService._active)
+        if not active:
+            return
+        db = SessionLocal()
+        try:
+            expires = datetime.now(timezone.utc) + timedelta(seconds=settings.SIMULATION_LEASE_SECONDS)
+            for kinds, model in ((('simulation', 'refine'), Simulation), (('optimization',), Optimization)):
+                ids = [job_id for job_kind, job_id in active if job_kind in kinds]
+                if ids:
+                    db.query(model).filter(model.id.in_(ids), model.lease_owner == WORKER_ID).update(
+                        {'lease_expires_at': expires}, synchronize_session=False
+                    )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Erreur lors du renouvellement des baux des jobs: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _lease_loop() -> None:
+        # Renouvellement bien avant l'échéance ; reprise des jobs des processus disparus
+        interval = max(1.0, settings.SIMULATION_LEASE_SECONDS / 3)
+        while not JobQueueService._lease_stop.wait(interval):
+            JobQueueService.renew_leases()
+            JobQueueService.recover_pending(startup=False)
+
+    @staticmethod
+    def _worker_loop() -> None:
+        while True:
+            item = JobQueueService._queue.get()
+            if item is None:
+                return
+            try:
+                JobQueueService._process(item)
+            finally:
+                JobQueueService._queue.done(item.get('tenant'))
+
+    @staticmethod
+    def _process(item: Dict[str, Any]) -> None:
+        """Exécute une simulation de la file (ignorée si elle n'est plus en attente)"""
+        if item.get('kind') == 'optimization':
+            JobQueueService._process_optimization(item)
+            return
+        if item.get('kind') == 'refine':
+            JobQueueService._process_refinement(item)
+            return
+        db = SessionLocal()
+        try:
+            # PENDING -> RUNNING en une requête : un seul processus exécute la simulation
+            if not JobQueueService.claim(db, 'simulation', item['id']):
+                return
+            simulation = SimulationService.get_simulation(db, item['id'])
+
+            workflow = WorkflowService.get_workflow(db, simulation.workflow_id)
+            if not workflow:
+                SimulationService.update_simulation_status(
+                    db, simulation.id, SimulationStatus.FAILED, error_message="Workflow non trouvé"
+                )
+                return
+
+            simulation = SimulationService.execute_simulation(db, simulation, workflow)
+            if simulation is not None and simulation.refining:
+                JobQueueService.enqueue([{'kind': 'refine', 'id': simulation.id, 'tenant': item.get('tenant')}])
+        except Exception as e:
+            logger.error(f"Erreur lors de l'exécution de la simulation {item.get('id')}: {str(e)}")
+            db.rollback()
+            SimulationService.update_simulation_status(
+                db, item['id'], SimulationStatus.FAILED, error_message=f"Erreur interne: {str(e)}"
+            )
+        finally:
+            JobQueueService._release('simulation', item['id'])
+            db.close()
+
+    @staticmethod
+    def _process_refinement(item: Dict[str, Any]) -> None:
+        """Affine une simulation partielle (ignorée si elle n'est plus à affiner)"""
+        db = SessionLocal()
+        try:
+            if not JobQueueService.claim(db, 'refine', item['id']):
+                return
+            simulation = SimulationService.get_simulation(db, item['id'])
+
+            workflow = WorkflowService.get_workflow(db, simulation.workflow_id)
+            if not workflow:
+                SimulationService.abandon_refinement(db, simulation.id, "Workflow non trouvé")
+                return
+
+            SimulationService.refine_simulation(db, simulation, workflow)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'affinage de la simulation {item.get('id')}: {str(e)}")
+            db.rollback()
+            SimulationService.abandon_refinement(db, item['id'], f"Erreur interne: {str(e)}")
+        finally:
+            JobQueueService._release('refine', item['id'])
+            db.close()
+
+    @staticmethod
+    def _process_optimization(item: Dict[str, Any]) -> None:
+        """Exécute ou reprend une optimisation en file (ignorée si elle n'est plus en cours)"""
+        db = SessionLocal()
+        try:
+            if not JobQueueService.claim(db, 'optimization', item['id']):
+                return
+            optimization = OptimizationService.get_optimization(db, item['id'])
+
+            workflow = WorkflowService.get_workflow(db, optimization.workflow_id)
+            if not workflow:
+                OptimizationService.update_optimization_status(
+                    db, optimization.id, OptimizationStatus.FAILED, error_message="Workflow non trouvé"
+                )
+                return
+
+            OptimizationService.execute_optimization(db, optimization, workflow)
+        except Exception as e:
+            logger.error(f"Erreur lors de la reprise de l'optimisation {item.get('id')}: {str(e)}")
+            db.rollback()
+            OptimizationService.update_optimization_status(
+                db, item['id'], OptimizationStatus.FAILED, error_message=f"Erreur interne: {str(e)}"
+            )
+        finally:
+            JobQueueService._release('optimization', item['id'])
+            db.close()
+
+    @staticmethod
+    def _release(kind: str, job_id: str) -> None:
+        """Cesse de renouveler le bail d'un job terminé"""
+        with JobQueueService._lock:
+            JobQueueService._active.discard((kind, job_id))
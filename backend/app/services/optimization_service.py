@@ -1,7 +1,12 @@
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+import time
 from app.models.optimization import Optimization, OptimizationStatus
+from app.models.workflow import Workflow
 from app.services.database import DatabaseService
+from app.services.engine_service import EngineService
+from app.engine import job_deadline
 
 class OptimizationService:
     """Service pour gérer les opérations spécifiques aux optimisations"""
@@ -100,6 +105,82 @@ class OptimizationService:
             
         return DatabaseService.update(db, optimization, data)
     
+    @staticmethod
+    def execute_optimization(db: Session, optimization: Optimization, workflow: Workflow) -> Optional[Optimization]:
+        """
+        Recherche les valeurs de variables qui optimisent l'objectif demandé
+        
+        Paramètres attendus : 'objective', 'variables' ([{'name', 'min', 'max'}]),
+        et optionnellement 'maximize', 'constraints', 'generations', 'population',
+        'seed' et 'deadline_ms'. À l'échéance, le meilleur point trouvé est
+        retourné (marqué 'partial' dans le détail des suggestions).
+        
+        L'état de la recherche est sauvegardé périodiquement sur disque : une
+        optimisation interrompue (redémarrage, crash) reprend au dernier point
+        de reprise au lieu de repartir de zéro.
+        
+        Args:
+            db: Session SQLAlchemy
+            optimization: Optimisation à exécuter
+            workflow: Workflow optimisé
+        
+        Returns:
+            L'optimisation mise à jour (COMPLETED ou FAILED)
+        """
+        parameters = optimization.parameters or {}
+        job = {
+            'kind': 'optimization',
+            'optimization_id': optimization.id,
+            'workflow': {
+                'id': workflow.id,
+                'nodes': workflow.nodes or [],
+                'edges': workflow.edges or [],
+                'revision': workflow.revision
+            },
+            'owner_id': workflow.owner_id,
+            'parameters': parameters,
+            'deadline': job_deadline(parameters, time.time()),
+            'checkpoint': EngineService.checkpoint_spec('optimization', optimization.id)
+        }
+        
+        outcome = EngineService.run_job(db, job)
+        EngineService.release(outcome)
+        EngineService.discard_checkpoint('optimization', optimization.id)
+        if outcome['status'] == 'failed':
+            return OptimizationService.update_optimization_status(
+                db, optimization.id, OptimizationStatus.FAILED, error_message=outcome['error_message']
+            )
+        
+        DatabaseService.update(db, optimization, {'progress': 1.0})
+        return OptimizationService.update_optimization_status(
+            db, optimization.id, OptimizationStatus.COMPLETED, suggestions=outcome['suggestions']
+        )
+    
+    @staticmethod
+    def refresh_progress(db: Session, optimization: Optimization) -> Optimization:
+        """
+        Reporte sur la ligne l'avancement du dernier point de reprise d'une optimisation en cours
+        
+        Args:
+            db: Session SQLAlchemy
+            optimization: Optimisation concernée
+        
+        Returns:
+            L'optimisation, mise à jour si un point de reprise plus récent existe
+        """
+        if optimization.status != OptimizationStatus.PROCESSING:
+            return optimization
+        info = EngineService.checkpoint_info('optimization', optimization.id)
+        if not info or (optimization.checkpoint_at and
+                        OptimizationService._as_utc(optimization.checkpoint_at) >= info['checkpoint_at']):
+            return optimization
+        return DatabaseService.update(db, optimization, info)
+    
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        # MySQL restitue des dates naïves, enregistrées en UTC
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    
     @staticmethod
     def delete_optimization(db: Session, optimization_id: str) -> bool:
         """
@@ -114,6 +195,7 @@ class OptimizationService:
         """
         optimization = OptimizationService.get_optimization(db, optimization_id)
         if optimization:
+            EngineService.discard_checkpoint('optimization', optimization_id)
             return DatabaseService.delete(db, optimization)
         return False
     
@@ -133,5 +215,11 @@ class OptimizationService:
         # Convertir l'enum en string
         if 'status' in result and isinstance(result['status'], OptimizationStatus):
             result['status'] = result['status'].value
+        
+        # Âge du dernier point de reprise, en secondes
+        result['checkpoint_age_seconds'] = (
+            (datetime.now(timezone.utc) - OptimizationService._as_utc(optimization.checkpoint_at)).total_seconds()
+            if optimization.checkpoint_at else None
+        )
             
         return result
\ No newline at end of file
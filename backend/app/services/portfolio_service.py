@@ -0,0 +1,152 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+import time
+import logging
+from app.config import settings
+from app.models.workflow import Workflow
+from app.services.workflow_service import WorkflowService
+from app.services.table_service import TableService
+from app.services.engine_service import EngineService
+from app.engine import workflow_references, table_references
+from app.engine.pool import get_process_pool, shutdown_process_pool
+from app.engine.portfolio import PortfolioAggregate, run_portfolio_shard
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioService:
+    """Service pour simuler un jeu de scénarios sur l'ensemble des workflows d'une entreprise"""
+
+    @staticmethod
+    def run_portfolio_simulation(db: Session, company_id: str, scenarios: List[Dict[str, Any]],
+                                 reference_variable: Optional[str] = None, threshold: Optional[float] = None,
+                                 revenue_variable: str = 'chiffreAffaires',
+                                 cost_variable: str = 'coutTotal') -> Dict[str, Any]:
+        """
+        Exécute un jeu de scénarios sur tous les workflows partagés d'une entreprise
+
+        Les workflows sont répartis en lots sur le pool de processus et les
+        agrégats partiels sont fusionnés dès qu'un lot se termine. Un lot ne
+        regroupe que des workflows d'un même propriétaire : leurs
+        sous-workflows sont résolus avec les droits de celui-ci. Avec
+        SIMULATION_SANDBOX, les workers sont soumis aux limites de mémoire et
+        de temps CPU (par workflow) des jobs isolés ; un workflow en échec est
+        compté dans 'failures' sans interrompre la simulation.
+
+        Args:
+            db: Session SQLAlchemy
+            company_id: ID de l'entreprise
+            scenarios: Scénarios à appliquer à chaque workflow
+            reference_variable: Variable de résilience (sinon celle de chaque workflow)
+            threshold: Seuil de résilience (sinon celui de chaque workflow)
+            revenue_variable: Variable de chiffre d'affaires à agréger
+            cost_variable: Variable de coût total à agréger
+
+        Returns:
+            Totaux par scénario, nombre de workflows évalués et échecs
+        """
+        started = time.monotonic()
+
+        rows = db.query(Workflow.id, Workflow.owner_id, Workflow.nodes, Workflow.edges, Workflow.revision).filter(
+            Workflow.company_id == company_id,
+            Workflow.is_shared == True
+        ).all()
+        roots = {
+            row.id: {'id': row.id, 'nodes': row.nodes or [], 'edges': row.edges or [], 'revision': row.revision}
+            for row in rows
+        }
+        owners: Dict[str, List[str]] = {}
+        for row in rows:
+            owners.setdefault(row.owner_id, []).append(row.id)
+        # Définitions par propriétaire : ses workflows et les sous-workflows qui lui sont accessibles
+        definitions = {
+            owner_id: WorkflowService.load_referenced_definitions(
+                db, {workflow_id: roots[workflow_id] for workflow_id in owned}, owner_id
+            )
+            for owner_id, owned in owners.items()
+        }
+        # Tables de correspondance chargées une fois par propriétaire, avec ses droits
+        tables = {
+            owner_id: TableService.load_referenced(db, owner_definitions, owner_id)
+            for owner_id, owner_definitions in definitions.items()
+        }
+
+        active = [s for s in scenarios if s.get('active') is not False]
+        names = ['Cas de base'] + [s.get('name') or f"Scénario {k + 1}" for k, s in enumerate(active)]
+        aggregate = PortfolioAggregate(names)
+
+        workflow_ids = [row.id for row in rows]
+        if workflow_ids:
+            # Plusieurs lots par worker pour équilibrer la charge entre gros et petits workflows
+            shard_size = -(-len(workflow_ids) // min(len(workflow_ids), settings.SIMULATION_WORKERS * 4))
+            shards = []
+            for owner_id, owned in owners.items():
+                count = -(-len(owned) // shard_size)
+                shards.extend((owner_id, owned[k::count]) for k in range(count))
+
+            limits = EngineService.sandbox_limits() if settings.SIMULATION_SANDBOX else None
+            pool = get_process_pool(settings.SIMULATION_WORKERS)
+            futures = {}
+            for owner_id, shard in shards:
+                owner_definitions = definitions[owner_id]
+                shard_definitions = PortfolioService._closure(shard, owner_definitions)
+                shard_tables = {
+                    table_id: tables[owner_id][table_id]
+                    for definition in shard_definitions.values()
+                    for table_id in table_references(definition['nodes'])
+                    if table_id in tables[owner_id]
+                }
+                futures[pool.submit(
+                    run_portfolio_shard,
+                    [owner_definitions[workflow_id] for workflow_id in shard],
+                    shard_definitions,
+                    shard_tables,
+                    active,
+                    reference_variable,
+                    threshold,
+                    revenue_variable,
+                    cost_variable,
+                    limits
+                )] = shard
+
+            broken = False
+            for future in as_completed(futures):
+                try:
+                    aggregate.merge(future.result())
+                except Exception as e:
+                    # Worker arrêté (OOM killer...) ou lot non transmissible : ses workflows sont en échec
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    logger.error(f"Lot de la simulation de portefeuille {company_id} en échec: {str(e)}")
+                    aggregate.failures.extend(
+                        {'workflow_id': workflow_id, 'error': f"Erreur du moteur de simulation: {str(e) or type(e).__name__}"}
+                        for workflow_id in futures[future]
+                    )
+            if broken:
+                # Un pool dont un worker a disparu refuse tout nouveau lot : il est recréé au prochain appel
+                shutdown_process_pool()
+
+        result = aggregate.to_dict()
+        result['company_id'] = company_id
+        result['workflow_count'] = len(workflow_ids)
+        result['duration_ms'] = int((time.monotonic() - started) * 1000)
+
+        logger.info(
+            f"Simulation de portefeuille {company_id}: {len(workflow_ids)} workflows, "
+            f"{len(result['failures'])} échecs en {result['duration_ms']} ms"
+        )
+        return result
+
+    @staticmethod
+    def _closure(workflow_ids: List[str], definitions: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Restreint les définitions à un lot et à ses sous-workflows (transitivement)"""
+        closure = {}
+        stack = list(workflow_ids)
+        while stack:
+            workflow_id = stack.pop()
+            if workflow_id in closure or workflow_id not in definitions:
+                continue
+            closure[workflow_id] = definitions[workflow_id]
+            stack.extend(workflow_references(definitions[workflow_id]['nodes']))
+        return closure
@@ -0,0 +1,164 @@
+from typing import Dict, Any, Optional, Iterable, Tuple
+from datetime import datetime, timezone
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from app.config import settings
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ResultStoreService:
+    """
+    Stockage en colonnes des résultats volumineux des simulations
+
+    Chaque tableau (tirages, séries par période, colonnes de détail) est écrit
+    dans son propre fichier .npy sous `SIMULATION_RESULTS_DIR/<simulation_id>/`,
+    décrit par un manifeste JSON. Seuls les résumés restent dans la ligne
+    `simulations` ; les colonnes sont relues en mémoire mappée, ce qui permet de
+    servir une plage de lignes sans charger tout le fichier.
+    """
+
+    @staticmethod
+    def _directory(simulation_id: str) -> str:
+        # Les IDs sont générés par le serveur, mais on ne laisse passer aucun séparateur de chemin
+        if not simulation_id or os.sep in simulation_id or simulation_id in ('.', '..'):
+            raise ValueError(f"ID de simulation invalide: {simulation_id}")
+        return os.path.join(settings.SIMULATION_RESULTS_DIR, simulation_id)
+
+    @staticmethod
+    def save(simulation_id: str, arrays: Iterable[Tuple[str, np.ndarray]],
+             descriptions: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Écrit les colonnes d'une simulation (remplace les colonnes existantes)
+
+        L'écriture se fait dans un répertoire temporaire renommé à la fin : un
+        lecteur voit soit l'ancien jeu de colonnes, soit le nouveau.
+
+        Args:
+            simulation_id: ID de la simulation
+            arrays: Couples (nom, tableau) ; accepte des vues en mémoire partagée
+            descriptions: Informations ajoutées au manifeste par colonne (ex. {'kind': 'int'}, voir `to_json`)
+
+        Returns:
+            Le manifeste {'columns': {nom: {'file', 'shape', 'dtype', 'bytes', ...}}, 'created_at'}
+        """
+        target = ResultStoreService._directory(simulation_id)
+        os.makedirs(settings.SIMULATION_RESULTS_DIR, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{simulation_id}-", dir=settings.SIMULATION_RESULTS_DIR)
+
+        try:
+            columns = {}
+            for k, (name, array) in enumerate(arrays):
+                # Nom de fichier indépendant du nom de colonne (fourni par l'utilisateur)
+                filename = f"col_{k:04d}.npy"
+                np.save(os.path.join(staging, filename), np.asarray(array), allow_pickle=False)
+                columns[name] = {
+                    'file': filename,
+                    'shape': list(np.shape(array)),
+                    'dtype': np.asarray(array).dtype.str,
+                    'bytes': int(np.asarray(array).nbytes),
+                    **((descriptions or {}).get(name) or {})
+                }
+
+            manifest = {'columns': columns, 'created_at': datetime.now(timezone.utc).isoformat()}
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f)
+
+            previous = None
+            if os.path.isdir(target):
+                previous = target + '.old'
+                os.replace(target, previous)
+            os.replace(staging, target)
+            if previous:
+                shutil.rmtree(previous, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return manifest
+
+    @staticmethod
+    def get_manifest(simulation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Récupère le manifeste des colonnes d'une simulation
+
+        Returns:
+            Le manifeste ou None si la simulation n'a pas de colonnes stockées
+        """
+        path = os.path.join(ResultStoreService._directory(simulation_id), MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def open_column(simulation_id: str, name: str) -> Optional[np.ndarray]:
+        """
+        Ouvre une colonne en mémoire mappée (lecture seule, aucune donnée chargée)
+
+        Returns:
+            Le tableau mappé ou None si la colonne n'existe pas
+        """
+        manifest = ResultStoreService.get_manifest(simulation_id)
+        if not manifest or name not in manifest['columns']:
+            return None
+        path = os.path.join(ResultStoreService._directory(simulation_id), manifest['columns'][name]['file'])
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+
+    @staticmethod
+    def read_column(simulation_id: str, name: str, offset: int = 0, limit: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Lit une plage de lignes d'une colonne
+
+        Seules les pages du fichier couvrant la plage demandée sont lues.
+
+        Args:
+            simulation_id: ID de la simulation
+            name: Nom de la colonne
+            offset: Première ligne
+            limit: Nombre maximal de lignes (toutes si None)
+
+        Returns:
+            Copie de la plage lue, ou None si la colonne n'existe pas
+        """
+        column = ResultStoreService.open_column(simulation_id, name)
+        if column is None:
+            return None
+        end = None if limit is None else offset + limit
+        return np.array(column[offset:end])
+
+    @staticmethod
+    def to_json(values: np.ndarray, kind: Optional[str] = None) -> list:
+        """
+        Convertit une plage lue en valeurs sérialisables en JSON
+
+        Les NaN et infinis (valeurs absentes) deviennent None ; une colonne
+        d'entiers stockée en réels pour admettre des valeurs absentes
+        (kind='int') redonne des entiers.
+
+        Args:
+            values: Valeurs lues (voir read_column)
+            kind: Type d'origine des valeurs décrit dans le manifeste
+
+        Returns:
+            Liste (imbriquée pour un tableau à plusieurs dimensions)
+        """
+        values = np.asarray(values)
+        if values.dtype.kind != 'f':
+            return values.tolist()
+        finite = np.isfinite(values)
+        if kind != 'int' and finite.all():
+            return values.tolist()
+        result = values.astype(object)
+        if kind == 'int':
+            result[finite] = values[finite].astype(np.int64).tolist()
+        result[~finite] = None
+        return result.tolist()
+
+    @staticmethod
+    def delete(simulation_id: str) -> None:
+        """Supprime les colonnes d'une simulation"""
+        shutil.rmtree(ResultStoreService._directory(simulation_id), ignore_errors=True)
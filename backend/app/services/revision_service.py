@@ -0,0 +1,171 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+import json
+import logging
+import zlib
+from app.config import settings
+from app.models.workflow import Workflow
+from app.models.workflow_revision import WorkflowRevision
+from app.services.database import DatabaseService
+from app.engine.patch import apply_patch, diff_workflow
+
+logger = logging.getLogger(__name__)
+
+
+class RevisionService:
+    """
+    Historique des révisions des workflows
+
+    Chaque enregistrement du contenu ajoute une ligne : un instantané complet
+    toutes les WORKFLOW_REVISION_SNAPSHOT_INTERVAL révisions, et entre deux
+    les seules opérations depuis la révision précédente (format de
+    `app.engine.patch`), le tout en JSON compressé. Une révision est
+    reconstruite depuis l'instantané le plus proche en appliquant au plus
+    un intervalle de deltas.
+    """
+
+    @staticmethod
+    def record(db: Session, workflow: Workflow, previous_nodes: Optional[List[Dict[str, Any]]] = None,
+               previous_edges: Optional[List[Dict[str, Any]]] = None) -> Optional[WorkflowRevision]:
+        """
+        Enregistre la révision courante d'un workflow dans son historique
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow qui vient d'être enregistré
+            previous_nodes: Nœuds de la révision précédente (None pour une création)
+            previous_edges: Arêtes de la révision précédente
+
+        Returns:
+            La ligne d'historique, ou None si la révision y figure déjà
+        """
+        revision = workflow.revision or 1
+        rows = db.query(WorkflowRevision.revision, WorkflowRevision.kind).filter(
+            WorkflowRevision.workflow_id == workflow.id,
+            WorkflowRevision.revision < revision
+        ).order_by(WorkflowRevision.revision.desc()).limit(settings.WORKFLOW_REVISION_SNAPSHOT_INTERVAL).all()
+
+        has_previous = previous_nodes is not None or previous_edges is not None
+        if not rows and has_previous and revision > 1:
+            # Workflow antérieur à l'historique : sa révision précédente sert de point de départ
+            RevisionService._store(db, workflow.id, revision - 1, 'snapshot',
+                                   {'nodes': previous_nodes or [], 'edges': previous_edges or []})
+            rows = [(revision - 1, 'snapshot')]
+
+        operations = None
+        if has_previous and rows and rows[0][0] == revision - 1:
+            snapshot_distance = next((k for k, row in enumerate(rows) if row[1] == 'snapshot'), None)
+            if snapshot_distance is not None and snapshot_distance + 1 < settings.WORKFLOW_REVISION_SNAPSHOT_INTERVAL:
+                operations = diff_workflow(previous_nodes or [], previous_edges or [],
+                                           workflow.nodes or [], workflow.edges or [])
+        # Contenu en grande partie réécrit : un instantané n'est pas plus coûteux
+        if operations is not None and 2 * len(operations) > len(workflow.nodes or []) + len(workflow.edges or []):
+            operations = None
+
+        if operations is None:
+            return RevisionService._store(db, workflow.id, revision, 'snapshot',
+                                          {'nodes': workflow.nodes or [], 'edges': workflow.edges or []})
+        return RevisionService._store(db, workflow.id, revision, 'delta', operations)
+
+    @staticmethod
+    def get_revision(db: Session, workflow: Workflow, revision: int) -> Optional[Dict[str, Any]]:
+        """
+        Reconstruit le contenu d'une révision d'un workflow
+
+        Deux requêtes : l'instantané le plus proche, puis les deltas jusqu'à la révision.
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow concerné
+            revision: Révision demandée
+
+        Returns:
+            {'workflow_id', 'revision', 'nodes', 'edges', 'created_at'} ou None si la révision n'est pas dans l'historique
+        """
+        if revision == workflow.revision:
+            # Révision courante : lue directement (elle peut précéder l'historique)
+            return {
+                'workflow_id': workflow.id, 'revision': revision, 'nodes': workflow.nodes or [],
+                'edges': workflow.edges or [], 'created_at': workflow.updated_at
+            }
+
+        snapshot = db.query(WorkflowRevision).filter(
+            WorkflowRevision.workflow_id == workflow.id,
+            WorkflowRevision.kind == 'snapshot',
+            WorkflowRevision.revision <= revision
+        ).order_by(WorkflowRevision.revision.desc()).first()
+        if snapshot is None:
+            return None
+
+        deltas = db.query(WorkflowRevision).filter(
+            WorkflowRevision.workflow_id == workflow.id,
+            WorkflowRevision.revision > snapshot.revision,
+            WorkflowRevision.revision <= revision
+        ).order_by(WorkflowRevision.revision).all()
+        if [row.revision for row in deltas] != list(range(snapshot.revision + 1, revision + 1)):
+            # Révision absente de l'historique ou chaîne interrompue
+            return None
+
+        content = RevisionService._decode(snapshot.payload)
+        nodes, edges = content['nodes'], content['edges']
+        for row in deltas:
+            if row.kind == 'snapshot':
+                content = RevisionService._decode(row.payload)
+                nodes, edges = content['nodes'], content['edges']
+                continue
+            result = apply_patch(nodes, edges, RevisionService._decode(row.payload))
+            nodes, edges = result.nodes, result.edges
+
+        last = deltas[-1] if deltas else snapshot
+        return {
+            'workflow_id': workflow.id, 'revision': revision, 'nodes': nodes, 'edges': edges,
+            'created_at': last.created_at
+        }
+
+    @staticmethod
+    def list_revisions(db: Session, workflow_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Liste l'historique d'un workflow, de la plus récente à la plus ancienne révision (sans les contenus)
+
+        Args:
+            db: Session SQLAlchemy
+            workflow_id: ID du workflow
+            skip: Nombre de révisions à ignorer
+            limit: Nombre maximal de révisions
+
+        Returns:
+            Liste de {'revision', 'kind', 'size', 'created_at'}
+        """
+        rows = db.query(
+            WorkflowRevision.revision, WorkflowRevision.kind, WorkflowRevision.size, WorkflowRevision.created_at
+        ).filter(WorkflowRevision.workflow_id == workflow_id).order_by(
+            WorkflowRevision.revision.desc()
+        ).offset(skip).limit(limit).all()
+        return [
+            {
+                'revision': row.revision,
+                'kind': row.kind,
+                'size': row.size,
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _store(db: Session, workflow_id: str, revision: int, kind: str, content: Any) -> Optional[WorkflowRevision]:
+        """Compresse et insère une ligne d'historique (ignorée si la révision est déjà enregistrée)"""
+        payload = zlib.compress(json.dumps(content, separators=(',', ':')).encode('utf-8'))
+        try:
+            return DatabaseService.create(db, WorkflowRevision, {
+                'workflow_id': workflow_id, 'revision': revision, 'kind': kind,
+                'payload': payload, 'size': len(payload)
+            })
+        except IntegrityError:
+            db.rollback()
+            logger.warning(f"Révision {revision} du workflow {workflow_id} déjà présente dans l'historique")
+            return None
+
+    @staticmethod
+    def _decode(payload: bytes) -> Any:
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
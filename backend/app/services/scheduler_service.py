@@ -0,0 +1,313 @@
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import threading
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.recurring_simulation import RecurringSimulation
+from app.models.simulation import Simulation, SimulationStatus
+from app.models.workflow import Workflow
+from app.services.database import DatabaseService
+from app.services.simulation_service import SimulationService
+from app.services.workflow_service import WorkflowService
+from app.services.job_queue_service import JobQueueService
+
+logger = logging.getLogger(__name__)
+
+# Réservation d'une définition pendant sa soumission : si le processus disparaît, elle redevient due
+SUBMIT_CLAIM_SECONDS = 300
+
+
+class SchedulerService:
+    """
+    Simulations récurrentes et planificateur intégré
+
+    Une définition récurrente relance périodiquement une simulation, sur un
+    workflow précis ou sur tous les workflows partagés d'une entreprise. Le
+    planificateur ne soumet des simulations que pendant la plage creuse
+    (SIMULATION_OFFPEAK_START à SIMULATION_OFFPEAK_END, heure du serveur), en
+    limitant le nombre de simulations différées en cours, et ignore les
+    workflows dont le contenu n'a pas changé depuis la dernière exécution
+    réussie (ou encore en cours).
+    """
+
+    _stop_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def create_recurring(db: Session, data: Dict[str, Any], user_id: str) -> RecurringSimulation:
+        """
+        Crée une définition de simulation récurrente
+
+        Args:
+            db: Session SQLAlchemy
+            data: {'name', 'workflow_id', 'company_id', 'parameters', 'interval_hours'}
+            user_id: ID du propriétaire
+
+        Returns:
+            La définition créée (première exécution à la prochaine plage creuse)
+        """
+        recurring_data = {
+            'id': DatabaseService.generate_id('rec-'),
+            'name': data['name'],
+            'owner_id': user_id,
+            'company_id': data.get('company_id'),
+            'workflow_id': data.get('workflow_id'),
+            'parameters': data.get('parameters') or {},
+            'interval_hours': data.get('interval_hours') or 168,
+            'is_active': True,
+            'next_run_at': datetime.now(timezone.utc),
+            'last_hashes': {}
+        }
+        return DatabaseService.create(db, RecurringSimulation, recurring_data)
+
+    @staticmethod
+    def get_recurring(db: Session, recurring_id: str) -> Optional[RecurringSimulation]:
+        """Récupère une définition de simulation récurrente par son ID"""
+        return DatabaseService.get_by_id(db, RecurringSimulation, recurring_id)
+
+    @staticmethod
+    def get_user_recurring(db: Session, user_id: str) -> List[RecurringSimulation]:
+        """Récupère les définitions récurrentes créées par un utilisateur"""
+        return db.query(RecurringSimulation).filter(
+            RecurringSimulation.owner_id == user_id
+        ).order_by(RecurringSimulation.created_at).all()
+
+    @staticmethod
+    def delete_recurring(db: Session, recurring_id: str) -> bool:
+        """Supprime une définition de simulation récurrente"""
+        recurring = SchedulerService.get_recurring(db, recurring_id)
+        if not recurring:
+            return False
+        return DatabaseService.delete(db, recurring)
+
+    @staticmethod
+    def recurring_to_dict(recurring: RecurringSimulation) -> Dict[str, Any]:
+        """Convertit une définition récurrente en dictionnaire"""
+        return {
+            'id': recurring.id,
+            'name': recurring.name,
+            'owner_id': recurring.owner_id,
+            'company_id': recurring.company_id,
+            'workflow_id': recurring.workflow_id,
+            'parameters': recurring.parameters or {},
+            'interval_hours': recurring.interval_hours,
+            'is_active': recurring.is_active,
+            'next_run_at': recurring.next_run_at.isoformat() if recurring.next_run_at else None,
+            'last_run_at': recurring.last_run_at.isoformat() if recurring.last_run_at else None,
+            'created_at': recurring.created_at.isoformat() if recurring.created_at else None
+        }
+
+    @staticmethod
+    def in_offpeak_window(hour: int) -> bool:
+        """
+        Indique si une heure tombe dans la plage creuse configurée
+
+        La plage peut chevaucher minuit (22h-6h par défaut) ; des bornes égales
+        désactivent la restriction.
+        """
+        start, end = settings.SIMULATION_OFFPEAK_START, settings.SIMULATION_OFFPEAK_END
+        if start == end:
+            return True
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    @staticmethod
+    def start() -> None:
+        """Démarre le thread du planificateur"""
+        with SchedulerService._lock:
+            if SchedulerService._thread is not None:
+                return
+            SchedulerService._stop_event.clear()
+            SchedulerService._thread = threading.Thread(
+                target=SchedulerService._loop, name="simulation-scheduler", daemon=True
+            )
+            SchedulerService._thread.start()
+
+    @staticmethod
+    def stop() -> None:
+        """Arrête le thread du planificateur"""
+        with SchedulerService._lock:
+            SchedulerService._stop_event.set()
+            SchedulerService._thread = None
+
+    @staticmethod
+    def _loop() -> None:
+        while not SchedulerService._stop_event.is_set():
+            if SchedulerService.in_offpeak_window(datetime.now().hour):
+                try:
+                    SchedulerService.run_due()
+                except Exception as e:
+                    logger.error(f"Erreur du planificateur de simulations: {str(e)}")
+            SchedulerService._stop_event.wait(settings.SIMULATION_SCHEDULER_POLL_SECONDS)
+
+    @staticmethod
+    def run_due() -> int:
+        """
+        Soumet les simulations des définitions arrivées à échéance
+
+        Le nombre de simulations différées PENDING ou RUNNING est plafonné à
+        SIMULATION_SCHEDULER_MAX_CONCURRENT : une définition dont tous les
+        workflows n'ont pas pu être soumis reste due et sera complétée au
+        passage suivant. Sa prochaine échéance n'est fixée qu'une fois tous ses
+        workflows soumis (ou ignorés car inchangés).
+
+        Plusieurs processus peuvent exécuter le planificateur : chaque
+        définition est réservée par une requête UPDATE conditionnée par
+        l'échéance lue, si bien qu'un seul processus la soumet.
+
+        Returns:
+            Nombre de simulations soumises
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            in_flight = db.query(func.count(Simulation.id)).filter(
+                Simulation.batch_id.isnot(None),
+                Simulation.status.in_([SimulationStatus.PENDING, SimulationStatus.RUNNING])
+            ).scalar()
+            slots = settings.SIMULATION_SCHEDULER_MAX_CONCURRENT - in_flight
+
+            due = db.query(RecurringSimulation).filter(
+                RecurringSimulation.is_active == True,
+                RecurringSimulation.next_run_at <= now
+            ).order_by(RecurringSimulation.next_run_at).all()
+            # Échéances lues, avant que les commits suivants ne rechargent les définitions
+            due = [(recurring, recurring.next_run_at) for recurring in due]
+
+            submitted = 0
+            for recurring, next_run_at in due:
+                if slots <= 0:
+                    break
+                claimed = db.query(RecurringSimulation).filter(
+                    RecurringSimulation.id == recurring.id,
+                    RecurringSimulation.next_run_at == next_run_at
+                ).update({'next_run_at': now + timedelta(seconds=SUBMIT_CLAIM_SECONDS)}, synchronize_session=False)
+                db.commit()
+                if not claimed:
+                    # Soumise par un autre processus
+                    continue
+                try:
+                    count, complete = SchedulerService._submit(db, recurring, slots)
+                except Exception:
+                    db.rollback()
+                    recurring.next_run_at = next_run_at
+                    db.commit()
+                    raise
+                submitted += count
+                slots -= count
+                if complete:
+                    recurring.last_run_at = now
+                    recurring.next_run_at = now + timedelta(hours=recurring.interval_hours)
+                else:
+                    # Reste due : complétée au passage suivant
+                    recurring.next_run_at = next_run_at
+                db.commit()
+
+            if submitted:
+                logger.info(f"{submitted} simulations planifiées soumises")
+            return submitted
+        finally:
+            db.close()
+
+    @staticmethod
+    def _target_workflows(db: Session, recurring: RecurringSimulation) -> List[Workflow]:
+        query = db.query(Workflow)
+        if recurring.workflow_id:
+            return query.filter(Workflow.id == recurring.workflow_id).all()
+        if recurring.company_id:
+            return query.filter(
+                Workflow.company_id == recurring.company_id,
+                Workflow.is_shared == True
+            ).order_by(Workflow.id).all()
+        return query.filter(Workflow.owner_id == recurring.owner_id).order_by(Workflow.id).all()
+
+    @staticmethod
+    def _children_revisions(db: Session, workflow: Workflow) -> Dict[str, int]:
+        """
+        Révisions des sous-workflows référencés (transitivement) par un workflow
+
+        Mêmes sous-workflows que ceux chargés pour le job, donc restreints à ceux
+        accessibles au propriétaire, comme pour les points de reprise.
+
+        Returns:
+            Révisions {id: révision}, vide si le workflow n'en référence aucun
+        """
+        definitions = WorkflowService.load_referenced_definitions(db, {
+            workflow.id: {'id': workflow.id, 'nodes': workflow.nodes or [], 'edges': [], 'revision': workflow.revision}
+        }, workflow.owner_id)
+        return {
+            workflow_id: definition['revision']
+            for workflow_id, definition in definitions.items() if workflow_id != workflow.id
+        }
+
+    @staticmethod
+    def _submit(db: Session, recurring: RecurringSimulation, slots: int) -> Tuple[int, bool]:
+        """
+        Soumet les simulations d'une définition, dans la limite des places disponibles
+
+        Un workflow n'est ignoré que si sa dernière simulation porte sur le même
+        contenu, les mêmes révisions de sous-workflows et les mêmes paramètres et
+        qu'elle a abouti ou est encore en cours : une simulation échouée est
+        soumise à nouveau.
+
+        Returns:
+            Couple (nombre de simulations soumises, tous les workflows traités)
+        """
+        parameters = recurring.parameters or {}
+        last_hashes = dict(recurring.last_hashes or {})
+        parameters_key = json.dumps(parameters, sort_keys=True, separators=(',', ':'))
+
+        run_hashes = []
+        for workflow in SchedulerService._target_workflows(db, recurring):
+            if not workflow.content_hash:
+                # Workflow antérieur au calcul des empreintes : calculée une fois pour toutes
+                workflow.content_hash = WorkflowService.content_hash(workflow.nodes, workflow.edges)
+            key = f"{workflow.content_hash}:{parameters_key}"
+            children = SchedulerService._children_revisions(db, workflow)
+            if children:
+                # Un sous-workflow enregistré depuis la dernière simulation change le résultat
+                key += ':' + json.dumps(children, sort_keys=True, separators=(',', ':'))
+            run_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()
+            run_hashes.append((workflow.id, run_hash))
+        db.commit()
+
+        # Dernières simulations des workflows inchangés (une requête)
+        previous = {}
+        for workflow_id, run_hash in run_hashes:
+            entry = last_hashes.get(workflow_id)
+            if isinstance(entry, dict) and entry.get('hash') == run_hash and entry.get('simulation_id'):
+                previous[workflow_id] = entry['simulation_id']
+        statuses = dict(
+            db.query(Simulation.id, Simulation.status).filter(Simulation.id.in_(list(previous.values()))).all()
+        ) if previous else {}
+        settled = (SimulationStatus.COMPLETED, SimulationStatus.PENDING, SimulationStatus.RUNNING)
+        pending = [
+            (workflow_id, run_hash) for workflow_id, run_hash in run_hashes
+            if statuses.get(previous.get(workflow_id)) not in settled
+        ]
+
+        selected = pending[:slots]
+        if not selected:
+            return 0, not pending
+
+        created = SimulationService.create_batch(
+            db, [{'workflow_id': workflow_id, 'parameters': parameters} for workflow_id, _ in selected]
+        )
+        for (workflow_id, run_hash), simulation_id in zip(selected, created['simulation_ids']):
+            last_hashes[workflow_id] = {'hash': run_hash, 'simulation_id': simulation_id}
+        recurring.last_hashes = last_hashes
+        db.commit()
+
+        tenant = recurring.company_id or recurring.owner_id
+        JobQueueService.enqueue([
+            {'kind': 'simulation', 'id': simulation_id, 'tenant': tenant}
+            for simulation_id in created['simulation_ids']
+        ])
+        return len(selected), len(selected) == len(pending)
@@ -0,0 +1,181 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import IntegrityError
+import re
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.models.workflow_search import WorkflowSearchDocument
+from app.services.database import DatabaseService
+
+# Nombre de workflows non encore indexés traités par recherche (workflows antérieurs à l'index)
+INDEX_BACKFILL_BATCH = 200
+
+
+class SearchService:
+    """
+    Recherche plein texte sur les workflows (index FULLTEXT MySQL)
+
+    Chaque workflow a un document de recherche tenu à jour à l'enregistrement
+    (nom, description, libellés et descriptions des nœuds, formules, noms de
+    variables) et supprimé avec lui. Les résultats sont limités aux
+    workflows accessibles : ceux de l'utilisateur et les workflows partagés
+    de son entreprise.
+    """
+
+    @staticmethod
+    def document_body(nodes: List[Dict[str, Any]]) -> str:
+        """
+        Texte indexé du contenu d'un workflow, une ligne par élément distinct
+
+        Args:
+            nodes: Nœuds du workflow
+
+        Returns:
+            Texte des libellés, descriptions, formules et variables
+        """
+        lines: Dict[str, None] = {}
+        for node in nodes or []:
+            data = node.get('data') or {}
+            for key in ('label', 'description'):
+                if isinstance(data.get(key), str) and data[key].strip():
+                    lines[data[key].strip()] = None
+            if isinstance(data.get('formula'), str):
+                for line in data['formula'].split('\n'):
+                    if line.strip():
+                        lines[line.strip()] = None
+            for variable in data.get('variables') or []:
+                if variable.get('name'):
+                    lines[str(variable['name']).strip()] = None
+        return '\n'.join(lines)
+
+    @staticmethod
+    def index_workflow(db: Session, workflow: Workflow) -> WorkflowSearchDocument:
+        """
+        Crée ou met à jour le document de recherche d'un workflow
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow enregistré
+
+        Returns:
+            Le document de recherche
+        """
+        values = {
+            'owner_id': workflow.owner_id,
+            'company_id': workflow.company_id,
+            'is_shared': bool(workflow.is_shared),
+            'is_template': bool(workflow.is_template),
+            'name': workflow.name,
+            'description': workflow.description,
+            'body': SearchService.document_body(workflow.nodes)
+        }
+        document = DatabaseService.get_by(db, WorkflowSearchDocument, {'workflow_id': workflow.id})
+        if document is not None and all(getattr(document, key) == value for key, value in values.items()):
+            return document
+        if document is None:
+            try:
+                return DatabaseService.create(db, WorkflowSearchDocument, {'workflow_id': workflow.id, **values})
+            except IntegrityError:
+                # Document créé en parallèle : mis à jour ci-dessous
+                db.rollback()
+                document = DatabaseService.get_by(db, WorkflowSearchDocument, {'workflow_id': workflow.id})
+        return DatabaseService.update(db, document, values)
+
+    @staticmethod
+    def index_missing(db: Session, user: User, limit: int = INDEX_BACKFILL_BATCH) -> int:
+        """
+        Indexe les workflows accessibles à un utilisateur qui n'ont pas encore de document
+
+        Concerne les workflows enregistrés avant l'introduction de la
+        recherche : chacun n'est lu qu'une fois.
+
+        Returns:
+            Nombre de workflows indexés
+        """
+        workflows = db.query(Workflow).outerjoin(
+            WorkflowSearchDocument, WorkflowSearchDocument.workflow_id == Workflow.id
+        ).filter(
+            WorkflowSearchDocument.id.is_(None),
+            SearchService._scope(Workflow, user)
+        ).limit(limit).all()
+        for workflow in workflows:
+            SearchService.index_workflow(db, workflow)
+        return len(workflows)
+
+    @staticmethod
+    def search(db: Session, user: User, query: str, skip: int = 0, limit: int = 20,
+               templates_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Recherche des workflows accessibles par mots-clés
+
+        Tous les mots sont requis ; chacun est cherché comme préfixe ('tjm'
+        trouve 'tjmJunior'). Les résultats sont classés par pertinence.
+
+        Args:
+            db: Session SQLAlchemy
+            user: Utilisateur effectuant la recherche
+            query: Texte recherché
+            skip: Nombre de résultats à ignorer
+            limit: Nombre maximal de résultats
+            templates_only: Ne retourner que les modèles (is_template)
+
+        Returns:
+            Liste de {'workflow_id', 'name', 'description', 'is_shared', 'is_template',
+            'owner_id', 'updated_at', 'score', 'snippet'}
+        """
+        terms = SearchService.terms(query)
+        if not terms:
+            return []
+        SearchService.index_missing(db, user)
+
+        relevance = match(
+            WorkflowSearchDocument.name, WorkflowSearchDocument.description, WorkflowSearchDocument.body,
+            against=' '.join(f"+{term}*" for term in terms)
+        ).in_boolean_mode()
+        filters = [relevance > 0, SearchService._scope(WorkflowSearchDocument, user)]
+        if templates_only:
+            filters.append(WorkflowSearchDocument.is_template == True)
+        rows = db.query(WorkflowSearchDocument, relevance.label('score')).filter(*filters).order_by(
+            relevance.desc(), WorkflowSearchDocument.updated_at.desc()
+        ).offset(skip).limit(limit).all()
+
+        return [
+            {
+                'workflow_id': document.workflow_id,
+                'name': document.name,
+                'description': document.description,
+                'is_shared': document.is_shared,
+                'is_template': document.is_template,
+                'owner_id': document.owner_id,
+                'updated_at': document.updated_at.isoformat() if document.updated_at else None,
+                'score': float(score),
+                'snippet': SearchService.snippet(document.body, terms)
+            }
+            for document, score in rows
+        ]
+
+    @staticmethod
+    def terms(query: str) -> List[str]:
+        """Mots d'une requête, sans les opérateurs de la syntaxe booléenne MySQL"""
+        return [term for term in re.findall(r'\w+', query or '') if term][:16]
+
+    @staticmethod
+    def snippet(body: Optional[str], terms: List[str]) -> Optional[str]:
+        """Première ligne du contenu indexé contenant un des mots recherchés"""
+        lowered = [term.lower() for term in terms]
+        for line in (body or '').split('\n'):
+            if any(term in line.lower() for term in lowered):
+                return line[:200]
+        return None
+
+    @staticmethod
+    def _scope(entity, user: User):
+        """Workflows de l'utilisateur et workflows partagés de son entreprise"""
+        if not user.company_id:
+            return entity.owner_id == user.id
+        return or_(
+            entity.owner_id == user.id,
+            and_(entity.company_id == user.company_id, entity.is_shared == True)
+        )
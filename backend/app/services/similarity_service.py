@@ -0,0 +1,130 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+import numpy as np
+from app.models.workflow import Workflow
+from app.models.workflow_similarity import WorkflowSignature, WorkflowLshBucket
+from app.services.database import DatabaseService
+from app.services.workflow_service import WorkflowService
+from app.engine.similarity import workflow_shingles, minhash_signature, lsh_buckets, estimate_similarity
+
+
+class SimilarityService:
+    """
+    Recherche de workflows structurellement similaires (MinHash et LSH)
+
+    La signature d'un workflow est calculée à l'enregistrement et indexée par
+    bandes : la recherche ne lit que l'index et les signatures candidates,
+    jamais les nœuds ni les arêtes.
+    """
+
+    @staticmethod
+    def index_workflow(db: Session, workflow: Workflow) -> WorkflowSignature:
+        """
+        Calcule et enregistre la signature d'un workflow pour sa révision courante
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow enregistré
+
+        Returns:
+            La signature enregistrée
+        """
+        record = DatabaseService.get_by(db, WorkflowSignature, {'workflow_id': workflow.id})
+        if record and record.revision == workflow.revision:
+            return record
+
+        shingles = workflow_shingles(workflow.nodes or [], workflow.edges or [])
+        signature = minhash_signature(shingles)
+        values = {'revision': workflow.revision, 'signature': signature.tobytes(), 'shingle_count': len(shingles)}
+
+        try:
+            db.query(WorkflowLshBucket).filter(WorkflowLshBucket.workflow_id == workflow.id).delete(
+                synchronize_session=False
+            )
+            db.add_all([
+                WorkflowLshBucket(workflow_id=workflow.id, band=band, bucket=bucket)
+                for band, bucket in enumerate(lsh_buckets(signature))
+            ])
+            if record is None:
+                return DatabaseService.create(db, WorkflowSignature, {'workflow_id': workflow.id, **values})
+            return DatabaseService.update(db, record, values)
+        except IntegrityError:
+            # Workflow indexé en parallèle : l'autre indexation fait foi
+            db.rollback()
+            return DatabaseService.get_by(db, WorkflowSignature, {'workflow_id': workflow.id})
+
+    @staticmethod
+    def find_similar(db: Session, workflow_id: str, user_id: str, limit: int = 10,
+                     min_similarity: float = 0.3, templates_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recherche les workflows accessibles les plus similaires à un workflow
+
+        Les candidats partagent au moins une bande LSH avec le workflow de
+        référence ; leur similarité (indice de Jaccard des éléments
+        structurels) est estimée sur les signatures.
+
+        Args:
+            db: Session SQLAlchemy
+            workflow_id: ID du workflow de référence
+            user_id: ID de l'utilisateur (seuls ses workflows accessibles sont retournés)
+            limit: Nombre maximal de résultats
+            min_similarity: Similarité estimée minimale (entre 0 et 1)
+            templates_only: Ne retourner que les modèles (is_template)
+
+        Returns:
+            Workflows similaires, du plus au moins similaire, ou None si le workflow n'existe pas
+        """
+        record = DatabaseService.get_by(db, WorkflowSignature, {'workflow_id': workflow_id})
+        if record is None:
+            # Workflow enregistré avant l'index : indexé à la première recherche
+            workflow = WorkflowService.get_workflow(db, workflow_id)
+            if workflow is None:
+                return None
+            record = SimilarityService.index_workflow(db, workflow)
+        signature = np.frombuffer(record.signature, dtype=np.uint32)
+
+        buckets = lsh_buckets(signature)
+        if not buckets:
+            return []
+        rows = db.query(WorkflowLshBucket.workflow_id).filter(
+            WorkflowLshBucket.workflow_id != workflow_id,
+            or_(*[and_(WorkflowLshBucket.band == band, WorkflowLshBucket.bucket == bucket)
+                  for band, bucket in enumerate(buckets)])
+        ).distinct().all()
+        accessible = WorkflowService.get_accessible_workflow_ids(db, [row.workflow_id for row in rows], user_id)
+        if not accessible:
+            return []
+
+        query = db.query(
+            WorkflowSignature.workflow_id, WorkflowSignature.signature,
+            Workflow.name, Workflow.is_template, Workflow.is_shared, Workflow.owner_id, Workflow.revision
+        ).join(Workflow, Workflow.id == WorkflowSignature.workflow_id).filter(
+            WorkflowSignature.workflow_id.in_(accessible)
+        )
+        if templates_only:
+            query = query.filter(Workflow.is_template == True)
+        candidates = query.all()
+        if not candidates:
+            return []
+
+        similarities = estimate_similarity(
+            signature, np.stack([np.frombuffer(c.signature, dtype=np.uint32) for c in candidates])
+        )
+        ranked = sorted(
+            (k for k in range(len(candidates)) if similarities[k] >= min_similarity),
+            key=lambda k: similarities[k], reverse=True
+        )[:limit]
+        return [
+            {
+                'workflow_id': candidates[k].workflow_id,
+                'name': candidates[k].name,
+                'is_template': candidates[k].is_template,
+                'is_shared': candidates[k].is_shared,
+                'owner_id': candidates[k].owner_id,
+                'revision': candidates[k].revision,
+                'similarity': round(float(similarities[k]), 4)
+            }
+            for k in ranked
+        ]
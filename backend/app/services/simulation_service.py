@@ -1,8 +1,29 @@
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import func, insert
+from datetime import datetime, timezone
+import time
+import logging
+import json
+import numpy as np
 from app.models.simulation import Simulation, SimulationStatus
 from app.models.workflow import Workflow
 from app.services.database import DatabaseService
+from app.services.engine_service import EngineService
+from app.services.result_store_service import ResultStoreService
+from app.engine import job_deadline, SIMULATION_MODES
+from app.engine.sketch import compare_sketches
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, le détail complet est stocké en colonnes et seul le début reste dans la ligne
+INLINE_DETAILS_LIMIT = 200
+
+# Chaînes plus longues : le champ reste en JSON (une colonne de chaînes a une largeur fixe)
+DETAIL_COLUMN_MAX_STRING = 256
+
+# Entiers exactement représentables en réels (colonnes d'entiers avec valeurs absentes)
+_MAX_EXACT_FLOAT_INT = 2 ** 53
 
 class SimulationService:
     """Service pour gérer les opérations spécifiques aux simulations"""
@@ -24,6 +45,71 @@ class SimulationService:
             
         return DatabaseService.create(db, Simulation, data)
     
+    @staticmethod
+    def create_batch(db: Session, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Crée un lot de simulations en une seule instruction INSERT
+        
+        Args:
+            db: Session SQLAlchemy
+            items: Simulations à créer [{'workflow_id', 'parameters'}]
+        
+        Returns:
+            Dictionnaire {'batch_id', 'simulation_ids'}
+        """
+        batch_id = DatabaseService.generate_id('bat-')
+        now = datetime.now(timezone.utc)
+        rows = [{
+            'id': DatabaseService.generate_id('sim-'),
+            'workflow_id': item['workflow_id'],
+            'parameters': item.get('parameters') or {},
+            'status': SimulationStatus.PENDING,
+            'batch_id': batch_id,
+            'created_at': now,
+            'updated_at': now
+        } for item in items]
+        
+        db.execute(insert(Simulation), rows)
+        db.commit()
+        return {'batch_id': batch_id, 'simulation_ids': [row['id'] for row in rows]}
+    
+    @staticmethod
+    def get_batch_status(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Statut agrégé d'un lot (un seul GROUP BY)
+        
+        Args:
+            db: Session SQLAlchemy
+            batch_id: ID du lot
+        
+        Returns:
+            Dictionnaire {'batch_id', 'total', 'counts', 'done', 'progress'} ou None si le lot n'existe pas
+        """
+        rows = db.query(Simulation.status, func.count(Simulation.id)).filter(
+            Simulation.batch_id == batch_id
+        ).group_by(Simulation.status).all()
+        if not rows:
+            return None
+        
+        counts = {status.value: 0 for status in SimulationStatus}
+        for status, count in rows:
+            counts[status.value if isinstance(status, SimulationStatus) else status] = count
+        total = sum(counts.values())
+        finished = counts[SimulationStatus.COMPLETED.value] + counts[SimulationStatus.FAILED.value]
+        return {
+            'batch_id': batch_id,
+            'total': total,
+            'counts': counts,
+            'done': finished == total,
+            'progress': finished / total
+        }
+    
+    @staticmethod
+    def get_batch_workflow_ids(db: Session, batch_id: str) -> List[str]:
+        """IDs des workflows simulés dans un lot"""
+        return [row.workflow_id for row in
+                db.query(Simulation.workflow_id).filter(Simulation.batch_id == batch_id).distinct().all()]
+    
     @staticmethod
     def get_simulation(db: Session, simulation_id: str) -> Optional[Simulation]:
         """
@@ -38,6 +124,261 @@ class SimulationService:
         """
         return DatabaseService.get_by_id(db, Simulation, simulation_id)
     
+    @staticmethod
+    def get_simulation_summary(db: Session, simulation_id: str) -> Optional[Simulation]:
+        """
+        Récupère une simulation sans charger sa colonne 'details'
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation_id: ID de la simulation
+        
+        Returns:
+            La simulation trouvée ou None ('details' n'est chargé qu'à l'accès)
+        """
+        return db.query(Simulation).options(defer(Simulation.details)).filter(
+            Simulation.id == simulation_id
+        ).first()
+    
+    @staticmethod
+    def get_simulation_view(db: Session, simulation: Simulation, view: str = 'full', offset: int = 0,
+                            limit: Optional[int] = None, variables: Optional[List[str]] = None,
+                            downsample: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Construit une vue partielle d'une simulation
+        
+        Les options s'appliquent à la représentation stockée : la plage de
+        détail est extraite par MySQL (JSON_EXTRACT) ou lue dans les colonnes
+        mappées du stockage de résultats, sans charger le détail complet.
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation: Simulation chargée sans son détail (voir get_simulation_summary)
+            view: 'metrics' (sans détail) ou 'full'
+            offset: Première ligne de détail
+            limit: Nombre maximal de lignes de détail (toutes si None)
+            variables: Variables à conserver (détail et séries)
+            downsample: Nombre maximal de périodes par série (séries incluses si fourni)
+        
+        Returns:
+            Dictionnaire de la simulation avec 'details_offset', 'details_total' et 'series'
+        """
+        result = {}
+        for column in Simulation.__table__.columns:
+            if column.name != 'details':
+                result[column.name] = getattr(simulation, column.name)
+        for key in ('created_at', 'updated_at'):
+            if result.get(key) is not None:
+                result[key] = result[key].isoformat()
+        if isinstance(result.get('status'), SimulationStatus):
+            result['status'] = result['status'].value
+        
+        metrics = simulation.metrics or {}
+        wanted = set(variables) if variables else None
+        if wanted and metrics.get('outputs'):
+            metrics = dict(metrics, outputs={k: v for k, v in metrics['outputs'].items() if k in wanted})
+        result['metrics'] = metrics
+        
+        if view == 'metrics':
+            result['details'] = None
+            return result
+        
+        total = metrics.get('details_total')
+        if total is None:
+            total = db.query(func.json_length(Simulation.details)).filter(Simulation.id == simulation.id).scalar() or 0
+        end = total if limit is None else min(total, offset + limit)
+        
+        rows = []
+        if offset < end:
+            if end <= INLINE_DETAILS_LIMIT or metrics.get('details_total') is None:
+                rows = SimulationService._extract_detail_rows(db, simulation.id, offset, end)
+            else:
+                rows = SimulationService._read_detail_columns(simulation.id, offset, end)
+                if metrics.get('details_residual'):
+                    # Champs restés en JSON (listes, types mêlés, champs absents de certaines lignes)
+                    residual = SimulationService._extract_detail_rows(db, simulation.id, offset, end)
+                    for row, rest in zip(rows, residual):
+                        SimulationService._merge_detail_row(row, rest)
+        
+        if wanted:
+            rows = [SimulationService._filter_row(row, wanted) for row in rows]
+            rows = [row for row in rows if row is not None]
+        
+        result['details'] = rows
+        result['details_offset'] = offset
+        result['details_total'] = total
+        
+        if downsample:
+            result['series'] = SimulationService._read_series(simulation.id, metrics, offset, end, wanted, downsample)
+        return result
+    
+    @staticmethod
+    def _extract_detail_rows(db: Session, simulation_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Extrait une plage du détail JSON côté MySQL"""
+        path = f"$[{int(start)} to {int(end) - 1}]"
+        value = db.query(func.json_extract(Simulation.details, path)).filter(Simulation.id == simulation_id).scalar()
+        if value is None:
+            return []
+        rows = json.loads(value) if isinstance(value, (str, bytes)) else value
+        # JSON_EXTRACT renvoie l'élément seul (sans tableau) quand la plage n'en contient qu'un
+        return rows if isinstance(rows, list) else [rows]
+    
+    @staticmethod
+    def _read_detail_columns(simulation_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Reconstruit une plage du détail à partir des colonnes 'details.<champ>' stockées"""
+        manifest = ResultStoreService.get_manifest(simulation_id) or {'columns': {}}
+        rows = [{} for _ in range(start, end)]
+        for name, column in manifest['columns'].items():
+            if not name.startswith('details.'):
+                continue
+            values = ResultStoreService.to_json(
+                ResultStoreService.read_column(simulation_id, name, start, end - start), column.get('kind')
+            )
+            path = column.get('path') or name[len('details.'):].split('.')
+            for row, value in zip(rows, values):
+                target = row
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = value
+        return rows
+    
+    @staticmethod
+    def _merge_detail_row(row: Dict[str, Any], rest: Dict[str, Any]) -> None:
+        """Complète une ligne reconstruite depuis les colonnes avec ses champs restés en JSON"""
+        for key, value in (rest or {}).items():
+            if isinstance(value, dict) and isinstance(row.get(key), dict):
+                row[key].update(value)
+            else:
+                row[key] = value
+    
+    @staticmethod
+    def _filter_row(row: Dict[str, Any], wanted: set) -> Optional[Dict[str, Any]]:
+        """Restreint une ligne de détail aux variables demandées (None si la ligne porte sur une autre variable)"""
+        if 'variable' in row:
+            return row if row['variable'] in wanted else None
+        if isinstance(row.get('variables'), dict):
+            return dict(row, variables={k: v for k, v in row['variables'].items() if k in wanted})
+        return row
+    
+    @staticmethod
+    def _read_series(simulation_id: str, metrics: Dict[str, Any], start: int, end: int,
+                     wanted: Optional[set], points: int) -> Dict[str, Any]:
+        """
+        Lit les séries par période des lignes demandées, sous-échantillonnées à `points` périodes
+        
+        Les périodes sont regroupées en `points` paquets contigus dont on garde
+        la moyenne, ce qui préserve la tendance et le niveau des séries.
+        """
+        series = {}
+        for name, column in (metrics.get('arrays') or {}).items():
+            variable = name[len('series.'):] if name.startswith('series.') else None
+            if variable is None or (wanted and variable not in wanted):
+                continue
+            values = ResultStoreService.read_column(simulation_id, name, start, end - start)
+            if values is None:
+                continue
+            periods = values.shape[1]
+            if points < periods:
+                edges = np.linspace(0, periods, points + 1).astype(int)[:-1]
+                counts = np.diff(np.append(edges, periods))
+                values = np.add.reduceat(values, edges, axis=1) / counts
+            series[variable] = ResultStoreService.to_json(values)
+        return series
+    
+    @staticmethod
+    def get_simulations_summaries(db: Session, simulation_ids: List[str]) -> List[Simulation]:
+        """
+        Récupère plusieurs simulations en une requête, sans leur colonne 'details'
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation_ids: IDs des simulations
+        
+        Returns:
+            Les simulations trouvées, dans l'ordre des IDs demandés
+        """
+        rows = db.query(Simulation).options(defer(Simulation.details)).filter(
+            Simulation.id.in_(simulation_ids)
+        ).all()
+        by_id = {row.id: row for row in rows}
+        return [by_id[simulation_id] for simulation_id in simulation_ids if simulation_id in by_id]
+    
+    @staticmethod
+    def compare_simulations(simulations: List[Simulation]) -> Dict[str, Any]:
+        """
+        Aligne les métriques et les distributions de plusieurs simulations
+        
+        La première simulation sert de référence. Les comparaisons de
+        distributions (écart de moyenne, écarts de centiles, distance de
+        Kolmogorov-Smirnov) sont calculées à partir des résumés de quantiles
+        conservés dans 'metrics.sketches' : les échantillons ne sont pas relus.
+        
+        Args:
+            simulations: Simulations à comparer (au moins deux)
+        
+        Returns:
+            Dictionnaire {'baseline_id', 'simulations', 'metrics', 'variables'}
+        """
+        base = simulations[0]
+        all_metrics = [s.metrics or {} for s in simulations]
+        
+        header = []
+        for simulation, metrics in zip(simulations, all_metrics):
+            header.append({
+                'id': simulation.id,
+                'workflow_id': simulation.workflow_id,
+                'workflow_revision': metrics.get('workflow_revision'),
+                'mode': metrics.get('mode'),
+                'status': simulation.status.value if isinstance(simulation.status, SimulationStatus) else simulation.status,
+                'partial': metrics.get('partial', False),
+                'created_at': simulation.created_at.isoformat() if simulation.created_at else None
+            })
+        
+        # Métriques scalaires présentes dans au moins une simulation, alignées sur la référence
+        names = []
+        for metrics in all_metrics:
+            for name, value in metrics.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and name not in names:
+                    names.append(name)
+        rows = []
+        for name in names:
+            values = [m.get(name) if isinstance(m.get(name), (int, float)) else None for m in all_metrics]
+            reference = values[0]
+            rows.append({
+                'metric': name,
+                'values': values,
+                'deltas': [v - reference if v is not None and reference is not None else None for v in values],
+                'relative_deltas': [
+                    (v - reference) / abs(reference) if v is not None and reference else None for v in values
+                ]
+            })
+        
+        # Distributions par variable, comparées à la référence
+        variables = []
+        base_sketches = all_metrics[0].get('sketches') or {}
+        names = list(base_sketches)
+        for metrics in all_metrics[1:]:
+            names.extend(n for n in (metrics.get('sketches') or {}) if n not in names)
+        for name in names:
+            sketches = [(m.get('sketches') or {}).get(name) for m in all_metrics]
+            reference = sketches[0]
+            variables.append({
+                'variable': name,
+                'summaries': [
+                    {'count': s['count'], 'mean': s['mean'], 'std': s['std']} if s else None for s in sketches
+                ],
+                'comparisons': [
+                    compare_sketches(reference, s) if reference and s else None for s in sketches
+                ]
+            })
+        
+        return {
+            'baseline_id': base.id,
+            'simulations': header,
+            'metrics': rows,
+            'variables': variables
+        }
+    
     @staticmethod
     def get_simulations_by_workflow(db: Session, workflow_id: str, skip: int = 0, limit: int = 100) -> List[Simulation]:
         """
@@ -87,6 +428,275 @@ class SimulationService:
             
         return DatabaseService.update(db, simulation, data)
     
+    @staticmethod
+    def execute_simulation(db: Session, simulation: Simulation, workflow: Workflow) -> Optional[Simulation]:
+        """
+        Exécute une simulation selon le mode demandé dans ses paramètres
+        
+        Si 'deadline_ms' est fourni, le moteur retourne le meilleur résultat
+        disponible à l'échéance (marqué 'partial' dans les métriques). Avec
+        'refine_in_background', un résultat partiel est marqué 'refining' :
+        l'appelant soumet alors son affinage à la file des jobs (voir
+        refine_simulation), qui remplace le résultat une fois terminé.
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation: Simulation à exécuter
+            workflow: Workflow simulé
+        
+        Returns:
+            La simulation mise à jour (COMPLETED ou FAILED)
+        """
+        parameters = simulation.parameters or {}
+        started = time.time()
+        job = SimulationService.build_job(simulation, workflow)
+        simulation = DatabaseService.update(db, simulation, {'workflow_revision': workflow.revision})
+        job['deadline'] = job_deadline(parameters, started)
+        
+        # Un Monte Carlo différé peut être interrompu par un redémarrage : il reprend à son dernier point de reprise
+        checkpointed = simulation.batch_id is not None and parameters.get('mode') == 'monte_carlo'
+        if checkpointed:
+            job['checkpoint'] = EngineService.checkpoint_spec('simulation', simulation.id)
+        
+        outcome = EngineService.run_job(db, job)
+        if checkpointed:
+            EngineService.discard_checkpoint('simulation', simulation.id)
+        if outcome['status'] == 'failed':
+            return SimulationService.update_simulation_status(
+                db, simulation.id, SimulationStatus.FAILED,
+                metrics={'resources': outcome['resources']} if outcome.get('resources') else None,
+                error_message=outcome['error_message']
+            )
+        
+        metrics = outcome['metrics']
+        metrics['duration_ms'] = int((time.time() - started) * 1000)
+        metrics['workflow_revision'] = workflow.revision
+        if parameters.get('deadline_ms') is not None:
+            metrics['deadline_ms'] = parameters['deadline_ms']
+        
+        refine = outcome['partial'] and bool(parameters.get('refine_in_background'))
+        metrics['refining'] = refine
+        if refine:
+            # Marquée avant le résultat : l'affinage est repris par la file même après un arrêt.
+            # Sans bail, il n'est réclamé qu'une fois soumis (ou au redémarrage)
+            simulation = DatabaseService.update(db, simulation, {
+                'refining': True, 'lease_owner': None, 'lease_expires_at': None
+            })
+        return SimulationService._store_outcome(db, simulation.id, outcome, metrics)
+    
+    @staticmethod
+    def _store_outcome(db: Session, simulation_id: str, outcome: Dict[str, Any],
+                       metrics: Dict[str, Any]) -> Optional[Simulation]:
+        """
+        Enregistre le résultat d'un job terminé
+        
+        Les tableaux volumineux (et le détail s'il dépasse INLINE_DETAILS_LIMIT
+        lignes) sont écrits dans le stockage en colonnes ; la ligne de la
+        simulation ne garde que les métriques, le début du détail et la
+        description des colonnes ('metrics.arrays').
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation_id: ID de la simulation
+            outcome: Résultat du job (mémoire partagée libérée ici)
+            metrics: Métriques à enregistrer
+        
+        Returns:
+            La simulation mise à jour
+        """
+        details = outcome['details']
+        if outcome.get('resources'):
+            metrics['resources'] = outcome['resources']
+        
+        try:
+            columns = list((outcome.get('arrays') or {}).items())
+            descriptions = {}
+            if len(details) > INLINE_DETAILS_LIMIT:
+                detail_columns, descriptions, residual = SimulationService._detail_columns(details)
+                columns.extend(detail_columns.items())
+                metrics['details_total'] = len(details)
+                # La ligne garde le début du détail, puis les seuls champs non stockés en colonnes
+                if any(residual[INLINE_DETAILS_LIMIT:]):
+                    metrics['details_residual'] = True
+                    details = details[:INLINE_DETAILS_LIMIT] + residual[INLINE_DETAILS_LIMIT:]
+                else:
+                    details = details[:INLINE_DETAILS_LIMIT]
+            
+            metrics['arrays'] = {}
+            if columns:
+                manifest = ResultStoreService.save(simulation_id, columns, descriptions)
+                metrics['arrays'] = {
+                    name: {'shape': column['shape'], 'dtype': column['dtype']}
+                    for name, column in manifest['columns'].items()
+                }
+            else:
+                ResultStoreService.delete(simulation_id)
+        finally:
+            EngineService.release(outcome)
+        
+        return SimulationService.update_simulation_status(
+            db, simulation_id, SimulationStatus.COMPLETED, metrics=metrics, details=details
+        )
+    
+    @staticmethod
+    def _detail_columns(details: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Convertit un détail (liste d'enregistrements) en colonnes 'details.<champ>'
+        
+        Les dictionnaires imbriqués (ex. 'variables') sont aplatis en
+        'details.<champ>.<clé>'. Un champ devient une colonne s'il est présent
+        dans tous les enregistrements avec un seul type de valeur : booléens,
+        chaînes courtes, entiers ou réels (None admis pour ces deux derniers,
+        stocké en NaN). Le type d'origine et le chemin du champ sont décrits
+        dans le manifeste. Les autres champs (listes, types mêlés, champs
+        absents de certains enregistrements) restent en JSON.
+        
+        Returns:
+            Triplet (colonnes {nom: tableau}, descriptions {nom: {'kind', 'path'}},
+            champs restés en JSON pour chaque enregistrement)
+        """
+        count = len(details)
+        fields: Dict[Tuple[str, ...], list] = {}
+        for k, record in enumerate(details):
+            for key, value in record.items():
+                if isinstance(value, dict) and value:
+                    for sub_key, sub_value in value.items():
+                        fields.setdefault((key, sub_key), [])
+                        fields[(key, sub_key)].append((k, sub_value))
+                else:
+                    fields.setdefault((key,), []).append((k, value))
+        
+        columns = {}
+        descriptions = {}
+        residual: List[Dict[str, Any]] = [{} for _ in range(count)]
+        for path, entries in fields.items():
+            values = [value for _, value in entries]
+            kind = SimulationService._detail_kind(values) if len(entries) == count else None
+            if kind is None:
+                for k, value in entries:
+                    if len(path) == 1:
+                        residual[k][path[0]] = value
+                    else:
+                        residual[k].setdefault(path[0], {})[path[1]] = value
+                continue
+            
+            name = "details." + ".".join(path)
+            if kind == 'float' or (kind == 'int' and any(v is None for v in values)):
+                array = np.array([np.nan if v is None else v for v in values], dtype=float)
+            elif kind == 'int':
+                array = np.array(values, dtype=np.int64)
+            else:
+                array = np.array(values, dtype=bool if kind == 'bool' else str)
+            columns[name] = array
+            descriptions[name] = {'kind': kind, 'path': list(path)}
+        return columns, descriptions, residual
+    
+    @staticmethod
+    def _detail_kind(values: List[Any]) -> Optional[str]:
+        """Type de colonne d'un champ de détail ('bool', 'str', 'int', 'float'), None s'il doit rester en JSON"""
+        types = {type(v) for v in values if v is not None}
+        nullable = len(types) == 0 or any(v is None for v in values)
+        if types == {bool}:
+            return None if nullable else 'bool'
+        if types == {str}:
+            if nullable or max(len(v) for v in values) > DETAIL_COLUMN_MAX_STRING:
+                return None
+            return 'str'
+        if types == {int}:
+            limit = _MAX_EXACT_FLOAT_INT if nullable else 2 ** 63
+            return 'int' if all(v is None or -limit < v < limit for v in values) else None
+        if types == {float}:
+            return 'float'
+        return None
+    
+    @staticmethod
+    def build_job(simulation: Simulation, workflow: Workflow) -> Dict[str, Any]:
+        """
+        Construit la description autonome d'une simulation pour le moteur
+        
+        Args:
+            simulation: Simulation à exécuter
+            workflow: Workflow simulé
+        
+        Returns:
+            Job {'kind', 'simulation_id', 'workflow', 'owner_id', 'parameters'}
+        """
+        return {
+            'kind': 'simulation',
+            'simulation_id': simulation.id,
+            'workflow': {
+                'id': workflow.id,
+                'nodes': workflow.nodes or [],
+                'edges': workflow.edges or [],
+                'revision': workflow.revision
+            },
+            'owner_id': workflow.owner_id,
+            'parameters': simulation.parameters or {}
+        }
+    
+    @staticmethod
+    def refine_simulation(db: Session, simulation: Simulation, workflow: Workflow) -> Optional[Simulation]:
+        """
+        Recalcule sans échéance une simulation partielle et remplace son résultat
+        
+        Exécuté par la file des jobs (voir JobQueueService). Le marqueur
+        'refining' est levé dans tous les cas : en cas d'échec, ou si le
+        workflow a été modifié depuis la simulation, le résultat partiel est
+        conservé et 'metrics.refine_error' en donne la raison.
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation: Simulation partielle (COMPLETED, 'refining')
+            workflow: Workflow simulé
+        
+        Returns:
+            La simulation mise à jour
+        """
+        if workflow.revision != simulation.workflow_revision:
+            return SimulationService.abandon_refinement(
+                db, simulation.id, "Workflow modifié depuis la simulation"
+            )
+        
+        started = time.time()
+        job = SimulationService.build_job(simulation, workflow)
+        checkpointed = (simulation.parameters or {}).get('mode') == 'monte_carlo'
+        if checkpointed:
+            job['checkpoint'] = EngineService.checkpoint_spec('refine', simulation.id)
+        
+        outcome = EngineService.run_job(db, job)
+        if checkpointed:
+            EngineService.discard_checkpoint('refine', simulation.id)
+        if outcome['status'] != 'completed':
+            logger.warning(f"Affinage de la simulation {simulation.id} échoué: {outcome.get('error_message')}")
+            return SimulationService.abandon_refinement(db, simulation.id, outcome.get('error_message'))
+        
+        metrics = outcome['metrics']
+        metrics['duration_ms'] = int((time.time() - started) * 1000)
+        metrics['refining'] = False
+        metrics['refined'] = True
+        metrics['workflow_revision'] = workflow.revision
+        simulation = SimulationService._store_outcome(db, simulation.id, outcome, metrics)
+        return DatabaseService.update(db, simulation, {'refining': False})
+    
+    @staticmethod
+    def abandon_refinement(db: Session, simulation_id: str, reason: Optional[str]) -> Optional[Simulation]:
+        """
+        Lève le marqueur 'refining' d'une simulation en conservant son résultat partiel
+        
+        Args:
+            db: Session SQLAlchemy
+            simulation_id: ID de la simulation
+            reason: Raison de l'abandon (enregistrée dans 'metrics.refine_error')
+        
+        Returns:
+            La simulation mise à jour, None si elle n'existe plus
+        """
+        simulation = SimulationService.get_simulation(db, simulation_id)
+        if not simulation:
+            return None
+        metrics = dict(simulation.metrics or {}, refining=False, refine_error=reason)
+        return DatabaseService.update(db, simulation, {'refining': False, 'metrics': metrics})
+    
     @staticmethod
     def delete_simulation(db: Session, simulation_id: str) -> bool:
         """
@@ -101,6 +711,8 @@ class SimulationService:
         """
         simulation = SimulationService.get_simulation(db, simulation_id)
         if simulation:
+            ResultStoreService.delete(simulation_id)
+            EngineService.discard_checkpoint('simulation', simulation_id)
             return DatabaseService.delete(db, simulation)
         return False
     
@@ -120,5 +732,9 @@ class SimulationService:
         # Convertir l'enum en string
         if 'status' in result and isinstance(result['status'], SimulationStatus):
             result['status'] = result['status'].value
+        
+        # Détail stocké en colonnes : au-delà du début, la ligne ne garde que des champs partiels
+        if (result.get('metrics') or {}).get('details_residual') and result.get('details'):
+            result['details'] = result['details'][:INLINE_DETAILS_LIMIT]
             
         return result
\ No newline at end of file
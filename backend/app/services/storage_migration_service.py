@@ -0,0 +1,125 @@
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, type_coerce, LargeBinary
+import threading
+import logging
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.services.workflow_service import WorkflowService
+
+logger = logging.getLogger(__name__)
+
+# Pause entre deux lots, pour ne pas monopoliser la base pendant la migration
+MIGRATION_PAUSE_SECONDS = 0.2
+
+
+class StorageMigrationService:
+    """
+    Migration en ligne des workflows vers le stockage compressé
+
+    Après le passage des colonnes `nodes` et `edges` en binaire, les lignes
+    existantes contiennent encore le JSON brut : elles restent lisibles et
+    sont recompressées par lots, en arrière-plan, sans bloquer les
+    écritures. Chaque ligne est réécrite par une requête conditionnée par sa
+    révision : un workflow enregistré entre-temps est déjà compressé.
+    """
+
+    _stop_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start() -> None:
+        """Démarre la migration en arrière-plan (le thread s'arrête une fois toutes les lignes migrées)"""
+        with StorageMigrationService._lock:
+            if StorageMigrationService._thread is not None:
+                return
+            StorageMigrationService._stop_event.clear()
+            StorageMigrationService._thread = threading.Thread(
+                target=StorageMigrationService._loop, name="workflow-storage-migration", daemon=True
+            )
+            StorageMigrationService._thread.start()
+
+    @staticmethod
+    def stop() -> None:
+        """Interrompt la migration (reprise au prochain démarrage)"""
+        with StorageMigrationService._lock:
+            StorageMigrationService._stop_event.set()
+            StorageMigrationService._thread = None
+
+    @staticmethod
+    def _loop() -> None:
+        migrated = 0
+        after_id = ''
+        while not StorageMigrationService._stop_event.is_set():
+            db = SessionLocal()
+            try:
+                count, after_id = StorageMigrationService.migrate_batch(
+                    db, after_id, settings.WORKFLOW_STORAGE_MIGRATION_BATCH
+                )
+            except Exception as e:
+                logger.error(f"Erreur de migration du stockage des workflows: {str(e)}")
+                db.rollback()
+                break
+            finally:
+                db.close()
+            if after_id is None:
+                break
+            migrated += count
+            StorageMigrationService._stop_event.wait(MIGRATION_PAUSE_SECONDS)
+        if migrated:
+            logger.info(f"{migrated} workflow(s) migré(s) vers le stockage compressé")
+
+    @staticmethod
+    def migrate_batch(db: Session, after_id: str = '', limit: int = 100) -> Tuple[int, Optional[str]]:
+        """
+        Recompresse un lot de workflows encore stockés en JSON brut
+
+        Les lignes sont parcourues par identifiant croissant ; seul le premier
+        octet des colonnes est lu pour les sélectionner.
+
+        Args:
+            db: Session SQLAlchemy
+            after_id: Reprendre après ce workflow
+            limit: Taille du lot
+
+        Returns:
+            Couple (nombre de workflows migrés, dernier ID parcouru ou None s'il n'en reste plus)
+        """
+        rows = db.query(
+            Workflow.id, Workflow.nodes, Workflow.edges, Workflow.revision, Workflow.storage_size, Workflow.owner_id
+        ).filter(
+            Workflow.id > after_id,
+            or_(StorageMigrationService._is_raw(Workflow.nodes), StorageMigrationService._is_raw(Workflow.edges))
+        ).order_by(Workflow.id).limit(limit).all()
+        if not rows:
+            return 0, None
+
+        migrated = 0
+        for row in rows:
+            storage_bytes = WorkflowService.stored_size(row.nodes, row.edges)
+            new_size = storage_bytes // 1024 + 1
+            updated = db.query(Workflow).filter(
+                Workflow.id == row.id, Workflow.revision == row.revision
+            ).update({
+                'nodes': row.nodes or [],
+                'edges': row.edges or [],
+                'storage_size': new_size,
+                'storage_bytes': storage_bytes
+            }, synchronize_session=False)
+            if not updated:
+                continue
+            migrated += 1
+            if new_size != row.storage_size:
+                db.query(User).filter(User.id == row.owner_id).update(
+                    {'storage_used': User.storage_used + (new_size - row.storage_size)}, synchronize_session=False
+                )
+        db.commit()
+        return migrated, rows[-1].id
+
+    @staticmethod
+    def _is_raw(column):
+        """Condition SQL : valeur sans octet de format (JSON brut de l'ancienne colonne)"""
+        return func.hex(func.substr(type_coerce(column, LargeBinary), 1, 1)).notin_(['00', '01', '02'])
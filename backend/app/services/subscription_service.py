@@ -1,5 +1,6 @@
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Optional, Union, Iterable
 from sqlalchemy.orm import Session
+from sqlalchemy import or_
 from app.models.subscription import Subscription, SubscriptionType, SubscriptionTier, SubscriptionStatus
 from app.models.user import User
 from app.models.company import Company
@@ -122,6 +123,37 @@ class SubscriptionService:
         """
         return db.query(Subscription).filter(Subscription.company_id == company_id).first()
     
+    @staticmethod
+    def get_tenant_tiers(db: Session, tenant_ids: Iterable[str]) -> Dict[str, SubscriptionTier]:
+        """
+        Récupère en une requête le niveau d'abonnement actif de plusieurs entreprises ou utilisateurs
+        
+        Args:
+            db: Session SQLAlchemy
+            tenant_ids: IDs d'entreprises et/ou d'utilisateurs
+        
+        Returns:
+            Dictionnaire {tenant_id: niveau} (les IDs sans abonnement actif sont absents)
+        """
+        tenant_ids = {t for t in tenant_ids if t}
+        if not tenant_ids:
+            return {}
+        
+        rows = db.query(Subscription.user_id, Subscription.company_id, Subscription.tier).filter(
+            Subscription.status == SubscriptionStatus.ACTIVE,
+            Subscription.end_date > datetime.now(timezone.utc),
+            or_(Subscription.company_id.in_(list(tenant_ids)), Subscription.user_id.in_(list(tenant_ids)))
+        ).all()
+        
+        # En cas d'abonnements multiples, le niveau le plus élevé l'emporte
+        order = list(SubscriptionTier)
+        tiers = {}
+        for row in rows:
+            for tenant_id in (row.company_id, row.user_id):
+                if tenant_id in tenant_ids and (tenant_id not in tiers or order.index(row.tier) > order.index(tiers[tenant_id])):
+                    tiers[tenant_id] = row.tier
+        return tiers
+    
     @staticmethod
     def cancel_subscription(db: Session, subscription_id: str) -> Optional[Subscription]:
         """
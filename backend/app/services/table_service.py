@@ -0,0 +1,281 @@
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+import io
+import os
+import numpy as np
+import pandas as pd
+from app.config import settings
+from app.models.data_table import DataTable
+from app.models.user import User
+from app.services.database import DatabaseService
+from app.engine import LookupTable, table_references
+
+
+class TableService:
+    """
+    Service pour gérer les tables de correspondance téléversées
+
+    Une table est importée depuis un fichier CSV (deux colonnes numériques :
+    clés et valeurs), triée par clé et stockée en tableaux numpy sous
+    `LOOKUP_TABLES_DIR/<table_id>.npz`. Elle n'est jamais modifiée ensuite :
+    le moteur peut la mettre en cache par son ID. Les variables de type
+    'table' la référencent par 'tableId'.
+    """
+
+    @staticmethod
+    def _path(table_id: str) -> str:
+        # Les IDs sont générés par le serveur, mais on ne laisse passer aucun séparateur de chemin
+        if not table_id or os.sep in table_id or table_id in ('.', '..'):
+            raise ValueError(f"ID de table invalide: {table_id}")
+        return os.path.join(settings.LOOKUP_TABLES_DIR, f"{table_id}.npz")
+
+    @staticmethod
+    def read_csv(content: bytes) -> pd.DataFrame:
+        """
+        Lit un fichier CSV avec ligne d'en-tête
+
+        Le séparateur (',', ';' ou tabulation) est déduit de la ligne d'en-tête ;
+        avec ';' ou une tabulation, la virgule est le séparateur décimal. Le
+        fichier est ensuite lu par le lecteur C de pandas (plusieurs millions de
+        lignes par seconde).
+
+        Raises:
+            ValueError: Si le fichier est illisible
+        """
+        header = content[:4096].decode('utf-8', errors='ignore').splitlines()
+        header = header[0] if header else ''
+        separator = max((',', ';', '\t'), key=header.count)
+        if not header.count(separator):
+            separator = ','
+        try:
+            return pd.read_csv(io.BytesIO(content), sep=separator, decimal=',' if separator != ',' else '.',
+                               skipinitialspace=True)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            raise ValueError(f"Fichier CSV illisible: {e}")
+
+    @staticmethod
+    def numeric_column(frame: pd.DataFrame, column: str, skip_empty: bool = False) -> np.ndarray:
+        """
+        Convertit une colonne en nombres
+
+        Les nombres écrits avec séparateur de milliers ou virgule décimale
+        ('1 234,5') sont acceptés.
+
+        Args:
+            frame: Données lues par `read_csv`
+            column: Nom de la colonne
+            skip_empty: Ignorer les cellules vides (sinon elles sont refusées)
+
+        Raises:
+            ValueError: Si la colonne est absente ou contient une valeur non numérique
+        """
+        if column not in frame.columns:
+            columns = ', '.join(str(c) for c in frame.columns)
+            raise ValueError(f"Colonne introuvable: {column} (colonnes disponibles: {columns})")
+        series = frame[column]
+        if skip_empty:
+            series = series.dropna()
+        if pd.api.types.is_numeric_dtype(series):
+            numbers = series.to_numpy(dtype=float)
+        else:
+            text = series.astype(str).str.replace(r'[\s\u00a0]', '', regex=True).str.replace(',', '.')
+            numbers = pd.to_numeric(text, errors='coerce').to_numpy(dtype=float)
+        invalid = np.flatnonzero(~np.isfinite(numbers))
+        if invalid.size:
+            # +2 : ligne d'en-tête et numérotation à partir de 1
+            line = series.index[invalid[0]] + 2
+            raise ValueError(f"Valeur non numérique dans la colonne {column} (ligne {line})")
+        return numbers
+
+    @staticmethod
+    def parse_csv(content: bytes, key_column: Optional[str] = None,
+                  value_column: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, str, str]:
+        """
+        Lit les colonnes clés et valeurs d'un fichier CSV
+
+        Args:
+            content: Contenu du fichier
+            key_column: Colonne des clés (par défaut la première)
+            value_column: Colonne des valeurs (par défaut la deuxième)
+
+        Returns:
+            (clés, valeurs, nom de la colonne des clés, nom de la colonne des valeurs)
+
+        Raises:
+            ValueError: Si le fichier est illisible, les colonnes absentes ou non numériques
+        """
+        frame = TableService.read_csv(content)
+        frame.columns = [str(c) for c in frame.columns]
+        if len(frame.columns) < 2:
+            raise ValueError("Le fichier doit contenir au moins deux colonnes (clés et valeurs)")
+        key_column = key_column or frame.columns[0]
+        value_column = value_column or frame.columns[1]
+
+        if len(frame) == 0:
+            raise ValueError("Le fichier ne contient aucune ligne")
+        if len(frame) > settings.LOOKUP_TABLE_MAX_ROWS:
+            raise ValueError(f"Une table est limitée à {settings.LOOKUP_TABLE_MAX_ROWS} lignes")
+
+        keys = TableService.numeric_column(frame, key_column)
+        values = TableService.numeric_column(frame, value_column)
+        return keys, values, key_column, value_column
+
+    @staticmethod
+    def create_table(db: Session, name: str, content: bytes, user: User,
+                     key_column: Optional[str] = None, value_column: Optional[str] = None) -> DataTable:
+        """
+        Importe une table depuis un fichier CSV
+
+        Args:
+            db: Session SQLAlchemy
+            name: Nom de la table
+            content: Contenu du fichier CSV
+            user: Utilisateur qui importe la table (partagée avec son entreprise)
+            key_column: Colonne des clés
+            value_column: Colonne des valeurs
+
+        Returns:
+            La table créée
+
+        Raises:
+            ValueError: Si le fichier est invalide
+        """
+        keys, values, key_column, value_column = TableService.parse_csv(content, key_column, value_column)
+        table = LookupTable(keys, values)
+
+        table_id = DatabaseService.generate_id('tbl-')
+        path = TableService._path(table_id)
+        os.makedirs(settings.LOOKUP_TABLES_DIR, exist_ok=True)
+        staging = f"{path}.tmp"
+        with open(staging, 'wb') as f:
+            np.savez(f, keys=table.keys, values=table.values)
+        os.replace(staging, path)
+
+        table_data = {
+            'id': table_id,
+            'name': name,
+            'owner_id': user.id,
+            'company_id': user.company_id,
+            'key_column': key_column,
+            'value_column': value_column,
+            'rows': len(table),
+            'storage_size': max(1, os.path.getsize(path) // 1024)
+        }
+        try:
+            return DatabaseService.create(db, DataTable, table_data)
+        except Exception:
+            os.remove(path)
+            raise
+
+    @staticmethod
+    def get_table(db: Session, table_id: str) -> Optional[DataTable]:
+        """Récupère une table par son ID"""
+        return DatabaseService.get_by_id(db, DataTable, table_id)
+
+    @staticmethod
+    def get_user_tables(db: Session, user: User) -> List[DataTable]:
+        """Récupère les tables accessibles à un utilisateur (les siennes et celles de son entreprise)"""
+        condition = DataTable.owner_id == user.id
+        if user.company_id:
+            condition = or_(condition, DataTable.company_id == user.company_id)
+        return db.query(DataTable).filter(condition).order_by(DataTable.name).all()
+
+    @staticmethod
+    def check_user_access(table: DataTable, user: User) -> bool:
+        """Vérifie si un utilisateur a accès à une table"""
+        return table.owner_id == user.id or bool(table.company_id and table.company_id == user.company_id)
+
+    @staticmethod
+    def accessible_table_ids(db: Session, table_ids: List[str], owner_id: Optional[str]) -> set:
+        """
+        Filtre en une requête les tables utilisables par les workflows d'un utilisateur
+
+        Mêmes règles que check_user_access : tables de l'utilisateur et de son entreprise.
+
+        Args:
+            db: Session SQLAlchemy
+            table_ids: IDs des tables référencées
+            owner_id: ID du propriétaire du workflow (aucune table sans propriétaire)
+
+        Returns:
+            Ensemble des IDs accessibles
+        """
+        if not table_ids or not owner_id:
+            return set()
+        owner = db.query(User.company_id).filter(User.id == owner_id).first()
+        if owner is None:
+            return set()
+        condition = DataTable.owner_id == owner_id
+        if owner.company_id:
+            condition = or_(condition, DataTable.company_id == owner.company_id)
+        rows = db.query(DataTable.id).filter(DataTable.id.in_(list(table_ids)), condition).all()
+        return {row.id for row in rows}
+
+    @staticmethod
+    def load(table_id: str) -> Optional[LookupTable]:
+        """
+        Charge les données d'une table
+
+        Returns:
+            La table, ou None si elle n'existe pas
+        """
+        path = TableService._path(table_id)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as archive:
+            return LookupTable(archive['keys'], archive['values'])
+
+    @staticmethod
+    def load_referenced(db: Session, definitions: Dict[str, Dict[str, Any]],
+                        owner_id: Optional[str]) -> Dict[str, LookupTable]:
+        """
+        Charge les tables référencées par des définitions de workflows (pour un job isolé)
+
+        Args:
+            db: Session SQLAlchemy
+            definitions: Définitions {id: {'nodes', ...}}
+            owner_id: ID du propriétaire du workflow exécuté
+
+        Returns:
+            Dictionnaire {table_id: table} (les tables introuvables ou inaccessibles au
+            propriétaire sont absentes)
+        """
+        referenced = {
+            table_id for definition in definitions.values() for table_id in table_references(definition.get('nodes'))
+        }
+        tables = {}
+        for table_id in TableService.accessible_table_ids(db, list(referenced), owner_id):
+            table = TableService.load(table_id)
+            if table is not None:
+                tables[table_id] = table
+        return tables
+
+    @staticmethod
+    def preview(table_id: str, limit: int = 20) -> List[Dict[str, float]]:
+        """Premières lignes d'une table (clés croissantes)"""
+        table = TableService.load(table_id)
+        if table is None:
+            return []
+        return [{'key': float(k), 'value': float(v)} for k, v in zip(table.keys[:limit], table.values[:limit])]
+
+    @staticmethod
+    def delete_table(db: Session, table_id: str) -> bool:
+        """
+        Supprime une table et ses données
+
+        Les workflows qui la référencent échoueront à l'évaluation (table introuvable).
+        """
+        table = TableService.get_table(db, table_id)
+        if not table:
+            return False
+        try:
+            os.remove(TableService._path(table_id))
+        except FileNotFoundError:
+            pass
+        return DatabaseService.delete(db, table)
+
+    @staticmethod
+    def table_to_dict(table: DataTable) -> Dict[str, Any]:
+        """Convertit une table en dictionnaire"""
+        return DatabaseService.to_dict(table)
@@ -0,0 +1,165 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
+import copy
+import logging
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.models.workflow_variable import WorkflowVariableRef
+from app.services.workflow_service import WorkflowService, DatabaseWorkflowResolver
+from app.engine import WorkflowEvaluator, WorkflowModel, FormulaError
+from app.engine.analysis import variable_references
+from app.engine.formula import sanitize_name
+from app.engine.model import VARIABLE_NODE_TYPES
+from app.engine.tables import TABLE_VARIABLE_TYPE
+
+logger = logging.getLogger(__name__)
+
+
+class VariableIndexService:
+    """
+    Index des variables définies, calculées et lues par les workflows
+
+    Les références sont extraites du modèle compilé à l'enregistrement (repris
+    du cache où la validation l'a déposé) : retrouver les workflows qui
+    utilisent une variable, ou la modifier partout, ne lit que l'index puis
+    les seuls workflows concernés.
+    """
+
+    @staticmethod
+    def index_workflow(db: Session, workflow: Workflow) -> int:
+        """
+        Reconstruit les références de variables d'un workflow pour sa révision courante
+
+        Args:
+            db: Session SQLAlchemy
+            workflow: Workflow enregistré
+
+        Returns:
+            Nombre de références indexées
+        """
+        indexed = db.query(WorkflowVariableRef.revision).filter(
+            WorkflowVariableRef.workflow_id == workflow.id
+        ).first()
+        if indexed and indexed.revision == workflow.revision:
+            return 0
+
+        evaluator = WorkflowEvaluator(DatabaseWorkflowResolver(db, workflow.owner_id))
+        try:
+            model = evaluator.load_definition({
+                'id': workflow.id, 'nodes': workflow.nodes or [], 'edges': workflow.edges or [],
+                'revision': workflow.revision
+            })
+        except FormulaError as e:
+            # Workflow antérieur à la validation : seules les déclarations sont indexées
+            logger.warning(f"Formules du workflow {workflow.id} non compilables: {str(e)}")
+            model = WorkflowModel(workflow.nodes or [], workflow.edges or [], errors=[])
+
+        references = variable_references(model)
+        db.query(WorkflowVariableRef).filter(WorkflowVariableRef.workflow_id == workflow.id).delete(
+            synchronize_session=False
+        )
+        db.add_all([
+            WorkflowVariableRef(workflow_id=workflow.id, revision=workflow.revision,
+                                variable=variable[:255], node_id=node_id[:100], role=role)
+            for variable, node_id, role in references
+        ])
+        db.commit()
+        return len(references)
+
+    @staticmethod
+    def usages(db: Session, user: User, variable: str) -> List[Dict[str, Any]]:
+        """
+        Workflows accessibles qui définissent, calculent ou lisent une variable
+
+        Args:
+            db: Session SQLAlchemy
+            user: Utilisateur effectuant la recherche
+            variable: Nom de la variable (espaces remplacés comme dans les formules)
+
+        Returns:
+            Liste de {'workflow_id', 'name', 'is_shared', 'owner_id', 'roles', 'nodes': [{'node_id', 'roles'}]}
+        """
+        rows = db.query(WorkflowVariableRef.workflow_id, WorkflowVariableRef.node_id, WorkflowVariableRef.role).filter(
+            WorkflowVariableRef.variable == sanitize_name(variable)
+        ).all()
+        accessible = WorkflowService.get_accessible_workflow_ids(db, [row.workflow_id for row in rows], user.id)
+        if not accessible:
+            return []
+
+        workflows = {
+            w.id: w for w in db.query(Workflow.id, Workflow.name, Workflow.is_shared, Workflow.owner_id).filter(
+                Workflow.id.in_(accessible)
+            ).all()
+        }
+        nodes: Dict[str, Dict[str, List[str]]] = {}
+        for row in rows:
+            if row.workflow_id in workflows:
+                nodes.setdefault(row.workflow_id, {}).setdefault(row.node_id, []).append(row.role)
+
+        return [
+            {
+                'workflow_id': workflow_id,
+                'name': workflows[workflow_id].name,
+                'is_shared': workflows[workflow_id].is_shared,
+                'owner_id': workflows[workflow_id].owner_id,
+                'roles': sorted({role for roles in node_roles.values() for role in roles}),
+                'nodes': [{'node_id': node_id, 'roles': sorted(roles)} for node_id, roles in node_roles.items()]
+            }
+            for workflow_id, node_roles in sorted(nodes.items(), key=lambda item: workflows[item[0]].name)
+        ]
+
+    @staticmethod
+    def bulk_update(db: Session, user: User, variable: str, value: Any,
+                    workflow_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Modifie la valeur d'une variable dans tous les workflows accessibles qui la définissent
+
+        Seuls les workflows désignés par l'index sont chargés ; chacun est
+        enregistré comme par une mise à jour (validation, nouvelle révision).
+
+        Args:
+            db: Session SQLAlchemy
+            user: Utilisateur effectuant la modification
+            variable: Nom de la variable
+            value: Nouvelle valeur (nombre ou série de nombres)
+            workflow_ids: Limiter la modification à ces workflows
+
+        Returns:
+            {'updated': [Workflow], 'skipped': [{'workflow_id', 'reason'}]}
+
+        Raises:
+            ValueError: Si la valeur n'est pas numérique
+        """
+        if WorkflowModel.parse_value(value) is None:
+            raise ValueError("La valeur doit être un nombre ou une série de nombres")
+        name = sanitize_name(variable)
+
+        rows = db.query(WorkflowVariableRef.workflow_id, WorkflowVariableRef.node_id).filter(
+            WorkflowVariableRef.variable == name, WorkflowVariableRef.role == 'defines'
+        ).all()
+        targets: Dict[str, set] = {}
+        for row in rows:
+            if workflow_ids is None or row.workflow_id in workflow_ids:
+                targets.setdefault(row.workflow_id, set()).add(row.node_id)
+        accessible = WorkflowService.get_accessible_workflow_ids(db, list(targets), user.id)
+
+        updated, skipped = [], []
+        for workflow_id in sorted(accessible):
+            workflow = WorkflowService.get_workflow(db, workflow_id)
+            nodes = copy.deepcopy(workflow.nodes or [])
+            changed = False
+            for node in nodes:
+                if node.get('type') not in VARIABLE_NODE_TYPES or node.get('id') not in targets[workflow_id]:
+                    continue
+                for item in (node.get('data') or {}).get('variables') or []:
+                    if (item.get('name') and sanitize_name(item['name']) == name
+                            and item.get('type') != TABLE_VARIABLE_TYPE and item.get('value') != value):
+                        item['value'] = value
+                        changed = True
+            if not changed:
+                continue
+            try:
+                updated.append(WorkflowService.update_workflow(db, workflow_id, {'nodes': nodes}, base_revision=workflow.revision))
+            except ValueError as e:
+                skipped.append({'workflow_id': workflow_id, 'reason': str(e)})
+        return {'updated': updated, 'skipped': skipped}
@@ -1,11 +1,76 @@
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import select, or_, and_
 from app.models.workflow import Workflow
 from app.models.user import User
 from app.models.subscription import Subscription
+from app.models.workflow_analytics import WorkflowAnalytics
+from app.models.workflow_similarity import WorkflowSignature
+from app.models.workflow_variable import WorkflowVariableRef
 from app.services.database import DatabaseService
+from app.services.table_service import TableService
+from app.services.revision_service import RevisionService
+from app.engine import WorkflowResolver, WorkflowEvaluator, LookupTable, workflow_references
+from app.engine.cache import default_cache
+from app.engine.validation import validate_workflow, ValidationResult, WorkflowValidationError
+from app.engine.patch import apply_patch, WorkflowConflictError
+from app.models.compressed_json import encode_json
 from datetime import datetime, timezone
 import json
+import hashlib
+
+
+class DatabaseWorkflowResolver(WorkflowResolver):
+    """
+    Résout les sous-workflows (workflowRef) depuis la base de données
+
+    Seuls les workflows accessibles au propriétaire du workflow évalué
+    (les siens et les workflows partagés de son entreprise) sont résolus ;
+    les autres sont introuvables. De même, les tables de correspondance ne
+    sont accessibles que si elles appartiennent au propriétaire ou à son
+    entreprise.
+    """
+    
+    def __init__(self, db: Session, owner_id: Optional[str] = None):
+        self.db = db
+        self.owner_id = owner_id
+        self._allowed_workflows: Dict[str, bool] = {}
+        self._allowed_tables: Dict[str, bool] = {}
+    
+    def allows_workflow(self, workflow_id: str) -> bool:
+        if workflow_id not in self._allowed_workflows:
+            self._allowed_workflows[workflow_id] = bool(self.owner_id) and \
+                workflow_id in WorkflowService.get_accessible_workflow_ids(self.db, [workflow_id], self.owner_id)
+        return self._allowed_workflows[workflow_id]
+    
+    def get_revision(self, workflow_id: str) -> Optional[int]:
+        if not self.allows_workflow(workflow_id):
+            return None
+        row = self.db.query(Workflow.revision).filter(Workflow.id == workflow_id).first()
+        return row.revision if row else None
+    
+    def get_definition(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        if not self.allows_workflow(workflow_id):
+            return None
+        row = self.db.query(Workflow.nodes, Workflow.edges, Workflow.revision).filter(
+            Workflow.id == workflow_id
+        ).first()
+        if not row:
+            return None
+        return {'nodes': row.nodes or [], 'edges': row.edges or [], 'revision': row.revision}
+    
+    def get_table(self, table_id: str) -> Optional[LookupTable]:
+        if not self.allows_table(table_id):
+            return None
+        return TableService.load(table_id)
+    
+    def allows_table(self, table_id: str) -> bool:
+        if table_id not in self._allowed_tables:
+            self._allowed_tables[table_id] = table_id in TableService.accessible_table_ids(
+                self.db, [table_id], self.owner_id
+            )
+        return self._allowed_tables[table_id]
+
 
 class WorkflowService:
     """Service pour gérer les opérations liées aux workflows"""
@@ -22,6 +87,9 @@ class WorkflowService:
         
         Returns:
             Le workflow créé ou None si quota dépassé
+        
+        Raises:
+            WorkflowValidationError: Si le graphe ou ses formules sont invalides
         """
         # Vérifier si l'utilisateur a un abonnement actif
         subscription = db.query(Subscription).filter(
@@ -44,8 +112,13 @@ class WorkflowService:
         nodes = data.get('nodes', [])
         edges = data.get('edges', [])
         
+        validation = WorkflowService.validate_workflow(db, nodes, edges, revision=1, owner_id=user.id)
+        if not validation.valid:
+            raise WorkflowValidationError(validation.diagnostics)
+        
         # Calculer la taille approximative du stockage (en KB)
-        storage_size = len(json.dumps(nodes) + json.dumps(edges)) // 1024 + 1  # +1 pour éviter 0 sur petits workflows
+        storage_bytes = WorkflowService.stored_size(nodes, edges)
+        storage_size = storage_bytes // 1024 + 1  # +1 pour éviter 0 sur petits workflows
         
         # Extraire le client_created_at s'il est fourni
         client_created_at = data.get('createdAt') or data.get('client_created_at')
@@ -66,7 +139,9 @@ class WorkflowService:
             'client_created_at': client_created_at,
             'is_shared': data.get('is_shared', False),
             'is_template': data.get('is_template', False),
-            'storage_size': storage_size
+            'storage_size': storage_size,
+            'storage_bytes': storage_bytes,
+            'content_hash': WorkflowService.content_hash(nodes, edges)
         }
         
         # Créer le workflow
@@ -76,6 +151,8 @@ class WorkflowService:
         if workflow:
             user.storage_used += storage_size
             db.commit()
+            WorkflowService.cache_model(workflow, validation)
+            RevisionService.record(db, workflow)
         
         return workflow
     
@@ -126,42 +203,269 @@ class WorkflowService:
         return db.query(Workflow).filter(Workflow.company_id == company_id).offset(skip).limit(limit).all()
     
     @staticmethod
-    def update_workflow(db: Session, workflow_id: str, data: Dict[str, Any]) -> Optional[Workflow]:
+    def update_workflow(db: Session, workflow_id: str, data: Dict[str, Any],
+                        base_revision: Optional[int] = None) -> Optional[Workflow]:
         """
         Met à jour un workflow existant
         
+        Un nouveau contenu (nœuds ou arêtes) crée une révision : la requête
+        UPDATE ne s'applique que si la révision lue est toujours la révision
+        courante (verrouillage optimiste, comme pour `patch_workflow`).
+        
         Args:
             db: Session SQLAlchemy
             workflow_id: ID du workflow à mettre à jour
             data: Données à mettre à jour
+            base_revision: Révision sur laquelle les données ont été préparées (vérifiée si fournie)
         
         Returns:
             Le workflow mis à jour ou None
+        
+        Raises:
+            WorkflowConflictError: Si le workflow a changé de révision entre-temps
+            ValueError: En cas de référence circulaire entre workflows
+            WorkflowValidationError: Si le graphe ou ses formules sont invalides
         """
         workflow = WorkflowService.get_workflow(db, workflow_id)
         if not workflow:
             return None
-            
-        # Si on met à jour les nœuds ou les arêtes, recalculer la taille de stockage
-        if 'nodes' in data or 'edges' in data:
-            nodes = data.get('nodes', workflow.nodes)
-            edges = data.get('edges', workflow.edges)
-            
-            # Calculer la nouvelle taille
-            new_size = len(json.dumps(nodes) + json.dumps(edges)) // 1024 + 1
-            
-            # Mettre à jour le stockage utilisé par l'utilisateur
-            user = db.query(User).filter(User.id == workflow.owner_id).first()
-            if user:
-                # Ajuster la différence
-                size_diff = new_size - workflow.storage_size
-                user.storage_used += size_diff
-                db.commit()
-                
-            # Ajouter la taille aux données à mettre à jour
-            data['storage_size'] = new_size
-            
-        return DatabaseService.update(db, workflow, data)
+        
+        current_revision = workflow.revision or 1
+        if base_revision is not None and base_revision != current_revision:
+            raise WorkflowConflictError(base_revision, current_revision)
+        
+        if 'nodes' not in data and 'edges' not in data:
+            return DatabaseService.update(db, workflow, data)
+        
+        # Refuser les références circulaires entre sous-workflows
+        if 'nodes' in data:
+            cycle = WorkflowService.find_reference_cycle(db, workflow_id, data['nodes'], workflow.owner_id)
+            if cycle:
+                raise ValueError(f"Référence circulaire entre workflows: {' -> '.join(cycle)}")
+        
+        previous_nodes, previous_edges = workflow.nodes, workflow.edges
+        nodes = data.get('nodes', workflow.nodes)
+        edges = data.get('edges', workflow.edges)
+        
+        validation = WorkflowService.validate_workflow(
+            db, nodes, edges, workflow_id, current_revision + 1, owner_id=workflow.owner_id
+        )
+        if not validation.valid:
+            raise WorkflowValidationError(validation.diagnostics)
+        
+        # Calculer la nouvelle taille
+        storage_bytes = WorkflowService.stored_size(nodes, edges)
+        new_size = storage_bytes // 1024 + 1
+        data['storage_size'] = new_size
+        data['storage_bytes'] = storage_bytes
+        
+        # Nouvelle révision : invalide les modèles compilés en cache
+        data['revision'] = current_revision + 1
+        data['content_hash'] = WorkflowService.content_hash(nodes, edges)
+        
+        columns = Workflow.__table__.columns
+        updated = db.query(Workflow).filter(
+            Workflow.id == workflow_id, Workflow.revision == workflow.revision
+        ).update({key: value for key, value in data.items() if key in columns}, synchronize_session=False)
+        if not updated:
+            # Enregistrement concurrent depuis la lecture du workflow
+            db.rollback()
+            row = db.query(Workflow.revision).filter(Workflow.id == workflow_id).first()
+            raise WorkflowConflictError(
+                current_revision if base_revision is None else base_revision,
+                row.revision if row else current_revision
+            )
+        
+        # Mettre à jour le stockage utilisé par l'utilisateur (dans la même transaction)
+        user = db.query(User).filter(User.id == workflow.owner_id).first()
+        if user:
+            user.storage_used += new_size - workflow.storage_size
+        db.commit()
+        db.refresh(workflow)
+        
+        WorkflowService.cache_model(workflow, validation)
+        RevisionService.record(db, workflow, previous_nodes or [], previous_edges or [])
+        return workflow
+    
+    @staticmethod
+    def patch_workflow(db: Session, workflow_id: str, base_revision: int,
+                       operations: List[Dict[str, Any]]) -> Optional[Workflow]:
+        """
+        Applique des opérations de type JSON Patch aux nœuds et arêtes d'un workflow
+        
+        Le client n'envoie que les éléments modifiés. La modification est
+        refusée si le workflow a changé depuis la révision sur laquelle elle
+        se fonde (verrouillage optimiste, vérifié par la requête UPDATE
+        elle-même). La taille de stockage est celle du contenu compressé,
+        encodé une seule fois pour la mesure et l'écriture ; l'empreinte du
+        contenu est recalculée à la demande.
+        
+        Args:
+            db: Session SQLAlchemy
+            workflow_id: ID du workflow à modifier
+            base_revision: Révision sur laquelle le client a fondé ses opérations
+            operations: Opérations [{'op', 'path', 'value'}] (voir app.engine.patch)
+        
+        Returns:
+            Le workflow modifié ou None s'il n'existe pas
+        
+        Raises:
+            WorkflowConflictError: Si la révision courante n'est pas base_revision
+            WorkflowPatchError: Si une opération est invalide
+            ValueError: En cas de référence circulaire entre workflows
+            WorkflowValidationError: Si le graphe ou ses formules sont invalides
+        """
+        workflow = WorkflowService.get_workflow(db, workflow_id)
+        if not workflow:
+            return None
+        
+        current_revision = workflow.revision or 1
+        if current_revision != base_revision:
+            raise WorkflowConflictError(base_revision, current_revision)
+        
+        previous_nodes, previous_edges = workflow.nodes or [], workflow.edges or []
+        result = apply_patch(previous_nodes, previous_edges, operations)
+        if not result.changed:
+            return workflow
+        
+        # Refuser les références circulaires si un sous-workflow référencé a changé
+        if any(workflow_references([old] if old else []) != workflow_references([new] if new else [])
+               for old, new in result.touched_nodes()):
+            cycle = WorkflowService.find_reference_cycle(db, workflow_id, result.nodes, workflow.owner_id)
+            if cycle:
+                raise ValueError(f"Référence circulaire entre workflows: {' -> '.join(cycle)}")
+        
+        validation = WorkflowService.validate_workflow(
+            db, result.nodes, result.edges, workflow_id, current_revision + 1, owner_id=workflow.owner_id
+        )
+        if not validation.valid:
+            raise WorkflowValidationError(validation.diagnostics)
+        
+        storage_bytes = WorkflowService.stored_size(result.nodes, result.edges)
+        new_size = storage_bytes // 1024 + 1
+        
+        updated = db.query(Workflow).filter(
+            Workflow.id == workflow_id, Workflow.revision == current_revision
+        ).update({
+            'nodes': result.nodes,
+            'edges': result.edges,
+            'storage_size': new_size,
+            'storage_bytes': storage_bytes,
+            'revision': current_revision + 1,
+            'content_hash': None
+        }, synchronize_session=False)
+        if not updated:
+            # Enregistrement concurrent depuis la lecture du workflow
+            db.rollback()
+            row = db.query(Workflow.revision).filter(Workflow.id == workflow_id).first()
+            raise WorkflowConflictError(base_revision, row.revision if row else current_revision)
+        
+        if result.layout_only:
+            WorkflowService._carry_indexes(db, workflow_id, current_revision, current_revision + 1)
+        
+        user = db.query(User).filter(User.id == workflow.owner_id).first()
+        if user:
+            user.storage_used += new_size - workflow.storage_size
+        db.commit()
+        db.refresh(workflow)
+        
+        WorkflowService.cache_model(workflow, validation)
+        RevisionService.record(db, workflow, previous_nodes, previous_edges)
+        return workflow
+    
+    @staticmethod
+    def _carry_indexes(db: Session, workflow_id: str, revision: int, new_revision: int) -> None:
+        """
+        Reporte les index dérivés d'une révision sur la suivante, quand seule la disposition a changé
+        
+        Indicateurs (calcul terminé), signature de similarité et références de
+        variables restent valables : leur révision est avancée dans la même
+        transaction, et leur mise à jour se réduit à constater qu'ils sont à jour.
+        """
+        db.query(WorkflowAnalytics).filter(
+            WorkflowAnalytics.workflow_id == workflow_id,
+            WorkflowAnalytics.revision == revision,
+            WorkflowAnalytics.status == 'ready'
+        ).update({'revision': new_revision}, synchronize_session=False)
+        for model in (WorkflowSignature, WorkflowVariableRef):
+            db.query(model).filter(
+                model.workflow_id == workflow_id, model.revision == revision
+            ).update({'revision': new_revision}, synchronize_session=False)
+    
+    @staticmethod
+    def validate_workflow(db: Session, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                          workflow_id: Optional[str] = None, revision: Optional[int] = None,
+                          owner_id: Optional[str] = None) -> ValidationResult:
+        """
+        Valide le graphe et la couche de calcul d'un workflow avant enregistrement
+        
+        Les sous-workflows référencés sont résolus depuis la base (et le cache
+        des modèles compilés).
+        
+        Args:
+            db: Session SQLAlchemy
+            nodes: Nœuds du workflow
+            edges: Arêtes du workflow
+            workflow_id: ID du workflow (None pour un nouveau workflow)
+            revision: Révision qui sera enregistrée
+            owner_id: ID du propriétaire du workflow (tables de correspondance accessibles)
+        
+        Returns:
+            Le résultat de la validation (diagnostics et modèle compilé)
+        """
+        evaluator = WorkflowEvaluator(DatabaseWorkflowResolver(db, owner_id))
+        return validate_workflow(nodes or [], edges or [], evaluator, workflow_id, revision)
+    
+    @staticmethod
+    def cache_model(workflow: Workflow, validation: ValidationResult) -> None:
+        """
+        Met en cache le modèle compilé pendant la validation
+        
+        Les simulations lancées dans ce processus sur cette révision n'ont
+        ainsi pas à recompiler le workflow.
+        
+        Args:
+            workflow: Workflow enregistré
+            validation: Résultat de la validation de son contenu
+        """
+        model = validation.model
+        model.workflow_id = workflow.id
+        model.revision = workflow.revision
+        default_cache.models.put((workflow.id, workflow.revision), model)
+    
+    @staticmethod
+    def stored_size(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> int:
+        """
+        Taille des nœuds et arêtes tels qu'ils sont écrits en base (compressés)
+        
+        L'encodage est mémorisé : l'écriture qui suit ne recompresse pas.
+        
+        Args:
+            nodes: Nœuds du workflow
+            edges: Arêtes du workflow
+        
+        Returns:
+            Nombre d'octets stockés
+        """
+        return len(encode_json(nodes or [])) + len(encode_json(edges or []))
+    
+    @staticmethod
+    def content_hash(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> str:
+        """
+        Calcule l'empreinte du contenu d'un workflow
+        
+        La sérialisation est canonique (clés triées) : deux contenus identiques
+        ont la même empreinte quel que soit l'ordre des clés envoyé par le client.
+        
+        Args:
+            nodes: Nœuds du workflow
+            edges: Arêtes du workflow
+        
+        Returns:
+            Empreinte SHA-256 hexadécimale
+        """
+        payload = json.dumps({'nodes': nodes or [], 'edges': edges or []}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
     @staticmethod
     def delete_workflow(db: Session, workflow_id: str) -> bool:
@@ -189,6 +493,89 @@ class WorkflowService:
             
         return DatabaseService.delete(db, workflow)
     
+    @staticmethod
+    def find_reference_cycle(db: Session, workflow_id: str, nodes: List[Dict[str, Any]],
+                             owner_id: Optional[str]) -> Optional[List[str]]:
+        """
+        Recherche un cycle de références (workflowRef) passant par un workflow
+        
+        Seuls les workflows accessibles au propriétaire sont parcourus : une
+        référence inaccessible est refusée ensuite par la validation
+        (sous-workflow introuvable).
+        
+        Args:
+            db: Session SQLAlchemy
+            workflow_id: ID du workflow en cours d'enregistrement
+            nodes: Nouveaux nœuds du workflow
+            owner_id: ID du propriétaire du workflow
+        
+        Returns:
+            Le chemin du cycle (liste d'IDs) ou None s'il n'y en a pas
+        """
+        references = {workflow_id: workflow_references(nodes)}
+        
+        def refs_of(current: str) -> List[str]:
+            if current not in references:
+                row = None
+                if current in WorkflowService.get_accessible_workflow_ids(db, [current], owner_id):
+                    row = db.query(Workflow.nodes).filter(Workflow.id == current).first()
+                references[current] = workflow_references(row.nodes) if row else []
+            return references[current]
+        
+        # Parcours en profondeur itératif depuis le workflow enregistré
+        path = [workflow_id]
+        iterators = [iter(refs_of(workflow_id))]
+        done = set()
+        while iterators:
+            child = next(iterators[-1], None)
+            if child is None:
+                done.add(path.pop())
+                iterators.pop()
+                continue
+            if child == workflow_id or child in path:
+                return path + [child]
+            if child in done:
+                continue
+            path.append(child)
+            iterators.append(iter(refs_of(child)))
+        return None
+    
+    @staticmethod
+    def load_referenced_definitions(db: Session, definitions: Dict[str, Dict[str, Any]],
+                                    owner_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Complète des définitions de workflows avec leurs sous-workflows référencés (transitivement)
+        
+        Une requête par niveau d'imbrication, en ne chargeant que les colonnes utiles.
+        Seuls les sous-workflows accessibles au propriétaire sont chargés : les
+        autres restent absents et leur évaluation échoue (workflow introuvable).
+        
+        Args:
+            db: Session SQLAlchemy
+            definitions: Définitions {id: {'id', 'nodes', 'edges', 'revision'}} déjà chargées (complétées sur place)
+            owner_id: ID du propriétaire des workflows évalués
+        
+        Returns:
+            Les définitions complétées
+        """
+        pending = {ref for d in definitions.values() for ref in workflow_references(d['nodes'])} - set(definitions)
+        while pending:
+            accessible = WorkflowService.get_accessible_workflow_ids(db, list(pending), owner_id) if owner_id else set()
+            if not accessible:
+                break
+            rows = db.query(Workflow.id, Workflow.nodes, Workflow.edges, Workflow.revision).filter(
+                Workflow.id.in_(accessible)
+            ).all()
+            for row in rows:
+                definitions[row.id] = {
+                    'id': row.id, 'nodes': row.nodes or [], 'edges': row.edges or [], 'revision': row.revision
+                }
+            found = {row.id for row in rows}
+            pending = {
+                ref for workflow_id in found for ref in workflow_references(definitions[workflow_id]['nodes'])
+            } - set(definitions)
+        return definitions
+    
     @staticmethod
     def check_user_access(db: Session, workflow_id: str, user_id: str) -> bool:
         """
@@ -217,6 +604,34 @@ class WorkflowService:
             
         return False
     
+    @staticmethod
+    def get_accessible_workflow_ids(db: Session, workflow_ids: List[str], user_id: str) -> set:
+        """
+        Filtre en une requête les workflows accessibles à un utilisateur
+        
+        Mêmes règles que check_user_access : propriétaire, ou membre de
+        l'entreprise pour un workflow partagé.
+        
+        Args:
+            db: Session SQLAlchemy
+            workflow_ids: IDs des workflows à vérifier
+            user_id: ID de l'utilisateur
+        
+        Returns:
+            Ensemble des IDs accessibles
+        """
+        if not workflow_ids:
+            return set()
+        company_id = select(User.company_id).where(User.id == user_id).scalar_subquery()
+        rows = db.query(Workflow.id).filter(
+            Workflow.id.in_(set(workflow_ids)),
+            or_(
+                Workflow.owner_id == user_id,
+                and_(Workflow.is_shared == True, Workflow.company_id.isnot(None), Workflow.company_id == company_id)
+            )
+        ).all()
+        return {row.id for row in rows}
+    
     @staticmethod
     def workflow_to_dict(workflow: Workflow) -> Dict[str, Any]:
         """
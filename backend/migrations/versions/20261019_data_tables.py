@@ -0,0 +1,39 @@
+"""data tables
+
+Revision ID: 2026101905
+Revises: 2026101904
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101905'
+down_revision = '2026101904'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables de correspondance téléversées (les données sont stockées dans LOOKUP_TABLES_DIR)
+    op.create_table(
+        'data_tables',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('owner_id', sa.String(length=50), nullable=False),
+        sa.Column('company_id', sa.String(length=50), nullable=True),
+        sa.Column('key_column', sa.String(length=255), nullable=False),
+        sa.Column('value_column', sa.String(length=255), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('storage_size', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('data_tables')
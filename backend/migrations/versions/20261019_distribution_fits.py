@@ -0,0 +1,36 @@
+"""distribution fits
+
+Revision ID: 2026101906
+Revises: 2026101905
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101906'
+down_revision = '2026101905'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cache des ajustements de lois par empreinte de série historique
+    op.create_table(
+        'distribution_fits',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('dataset_hash', sa.String(length=64), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('result', mysql.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_distribution_fits_dataset_hash', 'distribution_fits', ['dataset_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_distribution_fits_dataset_hash', table_name='distribution_fits')
+    op.drop_table('distribution_fits')
@@ -0,0 +1,29 @@
+"""job leases
+
+Revision ID: 2026101914
+Revises: 2026101913
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101914'
+down_revision = '2026101913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bail d'exécution des jobs de la file : un seul processus exécute un job, et seuls les
+    # jobs dont le bail a expiré sont repris par les autres
+    for table in ('simulations', 'optimizations'):
+        op.add_column(table, sa.Column('lease_owner', sa.String(100), nullable=True))
+        op.add_column(table, sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in ('optimizations', 'simulations'):
+        op.drop_column(table, 'lease_expires_at')
+        op.drop_column(table, 'lease_owner')
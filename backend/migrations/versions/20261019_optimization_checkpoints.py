@@ -0,0 +1,26 @@
+"""optimization checkpoints
+
+Revision ID: 2026101904
+Revises: 2026101903
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101904'
+down_revision = '2026101903'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Avancement et date du dernier point de reprise des optimisations exécutées par le moteur
+    op.add_column('optimizations', sa.Column('progress', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('optimizations', sa.Column('checkpoint_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('optimizations', 'checkpoint_at')
+    op.drop_column('optimizations', 'progress')
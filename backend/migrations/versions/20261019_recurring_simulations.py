@@ -0,0 +1,49 @@
+"""recurring simulations
+
+Revision ID: 2026101903
+Revises: 2026101902
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101903'
+down_revision = '2026101902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Empreinte du contenu des workflows (calculée à l'enregistrement, nulle pour les workflows existants)
+    op.add_column('workflows', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    op.create_table(
+        'recurring_simulations',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('owner_id', sa.String(length=50), nullable=False),
+        sa.Column('company_id', sa.String(length=50), nullable=True),
+        sa.Column('workflow_id', sa.String(length=50), nullable=True),
+        sa.Column('parameters', mysql.JSON(), nullable=True),
+        sa.Column('interval_hours', sa.Integer(), nullable=False, server_default='168'),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('last_hashes', mysql.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_recurring_simulations_next_run_at', 'recurring_simulations', ['next_run_at'])
+
+
+def downgrade():
+    op.drop_index('ix_recurring_simulations_next_run_at', table_name='recurring_simulations')
+    op.drop_table('recurring_simulations')
+    op.drop_column('workflows', 'content_hash')
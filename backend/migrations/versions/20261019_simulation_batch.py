@@ -0,0 +1,26 @@
+"""simulation batch
+
+Revision ID: 2026101902
+Revises: 2026101901
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101902'
+down_revision = '2026101901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lot de soumission (POST /simulations/batch), pour le suivi agrégé
+    op.add_column('simulations', sa.Column('batch_id', sa.String(length=50), nullable=True))
+    op.create_index('ix_simulations_batch_id', 'simulations', ['batch_id'])
+
+
+def downgrade():
+    op.drop_index('ix_simulations_batch_id', table_name='simulations')
+    op.drop_column('simulations', 'batch_id')
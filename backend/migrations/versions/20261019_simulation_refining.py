@@ -0,0 +1,26 @@
+"""simulation refining
+
+Revision ID: 2026101915
+Revises: 2026101914
+Create Date: 2026-10-20 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101915'
+down_revision = '2026101914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Affinage des résultats partiels exécuté par la file des jobs (repris après un arrêt)
+    op.add_column('simulations', sa.Column('refining', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index('ix_simulations_refining', 'simulations', ['refining'])
+
+
+def downgrade():
+    op.drop_index('ix_simulations_refining', table_name='simulations')
+    op.drop_column('simulations', 'refining')
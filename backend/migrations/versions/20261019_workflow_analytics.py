@@ -0,0 +1,40 @@
+"""workflow analytics
+
+Revision ID: 2026101907
+Revises: 2026101906
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101907'
+down_revision = '2026101906'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indicateurs structurels précalculés par révision de workflow
+    op.create_table(
+        'workflow_analytics',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('node_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('edge_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('metrics', mysql.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workflow_id', name='uq_workflow_analytics_workflow_id')
+    )
+
+
+def downgrade():
+    op.drop_table('workflow_analytics')
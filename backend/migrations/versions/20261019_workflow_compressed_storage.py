@@ -0,0 +1,71 @@
+"""workflow compressed storage
+
+Revision ID: 2026101913
+Revises: 2026101912
+Create Date: 2026-10-20 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# revision identifiers, used by Alembic.
+revision = '2026101913'
+down_revision = '2026101912'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+
+def upgrade():
+    # Nœuds et arêtes en binaire : le JSON existant est conservé tel quel (lisible sans
+    # octet de format) puis recompressé en ligne par StorageMigrationService
+    for column in ('nodes', 'edges'):
+        op.alter_column('workflows', column, type_=mysql.LONGBLOB(), existing_type=mysql.JSON(),
+                        existing_nullable=False)
+
+
+def _to_json_text(value):
+    """Texte JSON d'une valeur stockée, quel que soit son format"""
+    value = bytes(value)
+    if value and value[0] == 0x00:
+        return value[1:]
+    if value and value[0] == 0x01:
+        return zlib.decompress(value[1:])
+    if value and value[0] == 0x02:
+        if zstandard is None:
+            raise RuntimeError("Le paquet zstandard est requis pour décompresser les workflows stockés en zstd")
+        return zstandard.ZstdDecompressor().decompress(value[1:])
+    return value
+
+
+def downgrade():
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, nodes, edges FROM workflows WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                sa.text("UPDATE workflows SET nodes = :nodes, edges = :edges WHERE id = :id"),
+                {'id': row.id, 'nodes': _to_json_text(row.nodes), 'edges': _to_json_text(row.edges)}
+            )
+        last_id = rows[-1].id
+
+    # Un binaire ne se convertit pas directement en JSON : passage par du texte
+    for column in ('nodes', 'edges'):
+        op.alter_column('workflows', column, type_=mysql.LONGTEXT(charset='utf8mb4'),
+                        existing_type=mysql.LONGBLOB(), existing_nullable=False)
+        op.alter_column('workflows', column, type_=mysql.JSON(), existing_type=mysql.LONGTEXT(),
+                        existing_nullable=False)
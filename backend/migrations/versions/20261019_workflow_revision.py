@@ -0,0 +1,25 @@
+"""workflow revision
+
+Revision ID: 2026101901
+Revises: 12173c6f037a
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101901'
+down_revision = '12173c6f037a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Révision du contenu, utilisée comme clé de cache des sous-workflows
+    op.add_column('workflows', sa.Column('revision', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('workflows', 'revision')
@@ -0,0 +1,44 @@
+"""workflow revision history
+
+Revision ID: 2026101912
+Revises: 2026101911
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101912'
+down_revision = '2026101911'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Historique des révisions : instantanés périodiques et deltas compressés
+    op.create_table(
+        'workflow_revisions',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('payload', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_workflow_revisions_workflow_revision', 'workflow_revisions', ['workflow_id', 'revision'],
+                    unique=True)
+    
+    # Révision du workflow sur laquelle chaque simulation a été exécutée
+    op.add_column('simulations', sa.Column('workflow_revision', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('simulations', 'workflow_revision')
+    op.drop_index('ix_workflow_revisions_workflow_revision', table_name='workflow_revisions')
+    op.drop_table('workflow_revisions')
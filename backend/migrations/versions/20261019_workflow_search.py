@@ -0,0 +1,48 @@
+"""workflow full-text search
+
+Revision ID: 2026101909
+Revises: 2026101908
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '2026101909'
+down_revision = '2026101908'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Documents de recherche plein texte (un par workflow, mis à jour à l'enregistrement)
+    op.create_table(
+        'workflow_search_documents',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('owner_id', sa.String(length=50), nullable=False),
+        sa.Column('company_id', sa.String(length=50), nullable=True),
+        sa.Column('is_shared', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('is_template', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('body', mysql.MEDIUMTEXT(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workflow_id', name='uq_workflow_search_documents_workflow_id')
+    )
+    op.create_index('ix_workflow_search_documents_owner_id', 'workflow_search_documents', ['owner_id'])
+    op.create_index('ix_workflow_search_documents_company_id', 'workflow_search_documents', ['company_id'])
+    op.create_index('ix_workflow_search_documents_fulltext', 'workflow_search_documents',
+                    ['name', 'description', 'body'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    op.drop_index('ix_workflow_search_documents_fulltext', table_name='workflow_search_documents')
+    op.drop_index('ix_workflow_search_documents_company_id', table_name='workflow_search_documents')
+    op.drop_index('ix_workflow_search_documents_owner_id', table_name='workflow_search_documents')
+    op.drop_table('workflow_search_documents')
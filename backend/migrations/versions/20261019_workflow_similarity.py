@@ -0,0 +1,49 @@
+"""workflow similarity index
+
+Revision ID: 2026101908
+Revises: 2026101907
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101908'
+down_revision = '2026101907'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Signatures MinHash des workflows (calculées à l'enregistrement)
+    op.create_table(
+        'workflow_signatures',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('shingle_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workflow_id', name='uq_workflow_signatures_workflow_id')
+    )
+
+    # Index LSH : une clé par bande de signature
+    op.create_table(
+        'workflow_lsh_buckets',
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('band', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('workflow_id', 'band')
+    )
+    op.create_index('ix_workflow_lsh_buckets_band_bucket', 'workflow_lsh_buckets', ['band', 'bucket'])
+
+
+def downgrade():
+    op.drop_index('ix_workflow_lsh_buckets_band_bucket', table_name='workflow_lsh_buckets')
+    op.drop_table('workflow_lsh_buckets')
+    op.drop_table('workflow_signatures')
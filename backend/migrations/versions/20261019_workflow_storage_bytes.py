@@ -0,0 +1,24 @@
+"""workflow storage bytes
+
+Revision ID: 2026101911
+Revises: 2026101910
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101911'
+down_revision = '2026101910'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Taille exacte du contenu sérialisé : calculée au prochain enregistrement des workflows existants
+    op.add_column('workflows', sa.Column('storage_bytes', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('workflows', 'storage_bytes')
@@ -0,0 +1,38 @@
+"""workflow variable cross-references
+
+Revision ID: 2026101910
+Revises: 2026101909
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026101910'
+down_revision = '2026101909'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Index des variables définies, calculées ou lues par les nœuds des workflows
+    op.create_table(
+        'workflow_variable_refs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('workflow_id', sa.String(length=50), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('variable', sa.String(length=255), nullable=False),
+        sa.Column('node_id', sa.String(length=100), nullable=False),
+        sa.Column('role', sa.String(length=10), nullable=False),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_workflow_variable_refs_workflow_id', 'workflow_variable_refs', ['workflow_id'])
+    op.create_index('ix_workflow_variable_refs_variable', 'workflow_variable_refs', ['variable', 'role'])
+
+
+def downgrade():
+    op.drop_index('ix_workflow_variable_refs_variable', table_name='workflow_variable_refs')
+    op.drop_index('ix_workflow_variable_refs_workflow_id', table_name='workflow_variable_refs')
+    op.drop_table('workflow_variable_refs')
@@ -0,0 +1,92 @@
+from datetime import datetime
+import json
+import zlib
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.models import compressed_json
+from app.models.base import Base
+from app.models.compressed_json import (
+    decode_json, encode_json, is_encoded, FORMAT_RAW, FORMAT_ZLIB, FORMAT_ZSTD
+)
+from app.models.workflow import Workflow
+
+NODES = [{'id': f"n{k}", 'type': 'task', 'data': {'label': f"Tâche {k}", 'duration': k}} for k in range(200)]
+
+
+def test_legacy_json_without_format_byte():
+    # Valeurs de l'ancienne colonne JSON : texte brut, éventuellement précédé d'espaces
+    for value in (NODES, [], {'a': 1}, 'texte', 3.5, True):
+        raw = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        assert not is_encoded(raw)
+        assert decode_json(raw) == value
+        assert decode_json(b' \n' + raw) == value
+        assert decode_json(bytearray(raw)) == value
+        assert decode_json(raw.decode('utf-8')) == value
+
+
+def test_empty_values():
+    assert decode_json(None) is None
+    assert decode_json(b'') is None
+
+
+@pytest.mark.parametrize('codec', ['none', 'zlib', 'zstd'])
+def test_round_trip(monkeypatch, codec):
+    if codec == 'zstd' and compressed_json.zstandard is None:
+        pytest.skip("zstandard non installé")
+    monkeypatch.setattr(settings, 'WORKFLOW_STORAGE_COMPRESSION', codec)
+    encoded = encode_json(NODES)
+    assert is_encoded(encoded)
+    assert encoded[0] == {'none': FORMAT_RAW, 'zlib': FORMAT_ZLIB, 'zstd': FORMAT_ZSTD}[codec]
+    assert decode_json(encoded) == NODES
+
+
+def test_small_values_are_not_compressed(monkeypatch):
+    monkeypatch.setattr(settings, 'WORKFLOW_STORAGE_COMPRESSION', 'zlib')
+    encoded = encode_json([])
+    assert encoded == bytes([FORMAT_RAW]) + b'[]'
+    assert decode_json(encoded) == []
+
+
+def test_unknown_format_byte_is_rejected():
+    with pytest.raises(ValueError):
+        decode_json(bytes([0x05]) + b'[]')
+
+
+def test_zstd_value_without_zstandard(monkeypatch):
+    monkeypatch.setattr(compressed_json, 'zstandard', None)
+    with pytest.raises(ValueError):
+        decode_json(bytes([FORMAT_ZSTD]) + b'\x00')
+    # Écriture : repli sur zlib
+    monkeypatch.setattr(settings, 'WORKFLOW_STORAGE_COMPRESSION', 'zstd')
+    assert encode_json(NODES)[0] == FORMAT_ZLIB
+
+
+def test_legacy_row_read_through_the_column(monkeypatch):
+    monkeypatch.setattr(settings, 'WORKFLOW_STORAGE_COMPRESSION', 'zlib')
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    # Ligne écrite avant la compression : JSON brut dans la colonne binaire
+    db.execute(text(
+        "INSERT INTO workflows (id, name, owner_id, nodes, edges, is_shared, is_template, storage_size, revision, "
+        "created_at, updated_at) VALUES ('wf-1', 'Ancien', 'u1', :nodes, :edges, 0, 0, 1, 1, :now, :now)"
+    ), {'nodes': json.dumps(NODES).encode('utf-8'), 'edges': b'[]', 'now': datetime.now()})
+    db.commit()
+
+    workflow = db.get(Workflow, 'wf-1')
+    assert workflow.nodes == NODES
+    assert workflow.edges == []
+
+    # Réécrite compressée à la première modification, et toujours lisible
+    workflow.name = 'Modifié'
+    workflow.nodes = NODES[:10]
+    db.commit()
+    stored = db.execute(text("SELECT nodes FROM workflows WHERE id = 'wf-1'")).scalar()
+    assert is_encoded(stored)
+    assert json.loads(zlib.decompress(stored[1:])) == NODES[:10]
+    db.expire_all()
+    assert db.get(Workflow, 'wf-1').nodes == NODES[:10]
+    db.close()
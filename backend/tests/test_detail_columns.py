@@ -0,0 +1,68 @@
+import json
+import numpy as np
+import pytest
+from app.config import settings
+from app.services.result_store_service import ResultStoreService
+from app.services.simulation_service import SimulationService
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'SIMULATION_RESULTS_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _round_trip(details, start=0, end=None):
+    """Stocke un détail en colonnes puis relit une plage en la complétant des champs restés en JSON"""
+    end = len(details) if end is None else end
+    columns, descriptions, residual = SimulationService._detail_columns(details)
+    ResultStoreService.save('sim', columns.items(), descriptions)
+    rows = SimulationService._read_detail_columns('sim', start, end)
+    # Les champs restés en JSON passent par la base : on reproduit la sérialisation
+    for row, rest in zip(rows, json.loads(json.dumps(residual[start:end]))):
+        SimulationService._merge_detail_row(row, rest)
+    return rows, descriptions
+
+
+def test_detail_round_trip_preserves_types(results_dir):
+    details = [
+        {
+            'iteration': k,
+            'duration': 1.5 * k,
+            'label': f"n{k}",
+            'ok': k % 2 == 0,
+            'cost': None if k % 3 == 0 else k,
+            'variables': {'x': float(k), 'y': k},
+            'path': ['a', 'b'][:k % 3],
+            'mixed': k if k % 2 else str(k),
+        }
+        for k in range(300)
+    ]
+    details[7]['extra'] = {'nested': {'deep': True}}
+
+    rows, descriptions = _round_trip(details)
+
+    assert rows == details
+    assert json.loads(json.dumps(rows)) == details
+    assert descriptions['details.iteration']['kind'] == 'int'
+    assert descriptions['details.cost']['kind'] == 'int'
+    assert descriptions['details.variables.y']['path'] == ['variables', 'y']
+    assert 'details.path' not in descriptions
+    assert 'details.mixed' not in descriptions
+
+
+def test_detail_range_matches_source(results_dir):
+    details = [{'period': k, 'value': None if k == 250 else k / 4, 'tags': [k]} for k in range(400)]
+
+    rows, _ = _round_trip(details, 240, 260)
+
+    assert rows == details[240:260]
+    assert rows[10]['value'] is None
+
+
+def test_to_json_maps_missing_values_to_none():
+    values = np.array([[1.0, np.nan], [np.inf, 2.5]])
+
+    assert ResultStoreService.to_json(values) == [[1.0, None], [None, 2.5]]
+    assert ResultStoreService.to_json(np.array([3.0, np.nan]), 'int') == [3, None]
+    assert json.dumps(ResultStoreService.to_json(values)) == "[[1.0, null], [null, 2.5]]"
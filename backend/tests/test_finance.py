@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from app.engine.finance import npv, irr
+
+
+def test_npv_discounts_from_period_zero():
+    result = npv(0.1, [-100, 60, 60])
+    assert result.shape == (1, 1)
+    assert result[0, 0] == pytest.approx(-100 + 60 / 1.1 + 60 / 1.1 ** 2)
+
+
+def test_npv_zero_rate_is_the_sum():
+    assert npv(0.0, [[-100, 30, 40, 50]])[0, 0] == pytest.approx(20)
+
+
+def test_npv_one_rate_per_scenario():
+    cashflows = np.array([[-100, 60, 60], [-100, 60, 60]])
+    rates = np.array([[0.0], [0.1]])
+    result = npv(rates, cashflows)
+    assert result.shape == (2, 1)
+    assert result[0, 0] == pytest.approx(20)
+    assert result[1, 0] == pytest.approx(npv(0.1, cashflows[1])[0, 0])
+
+
+def test_irr_known_values():
+    assert irr([-100, 110])[0, 0] == pytest.approx(0.1)
+    # -100 + 60 x + 60 x^2 = 0 avec x = 1 / (1 + r)
+    x = (-60 + np.sqrt(60 ** 2 + 4 * 60 * 100)) / (2 * 60)
+    expected = 1 / x - 1
+    assert irr([-100, 60, 60])[0, 0] == pytest.approx(expected)
+
+
+def test_irr_zeroes_npv_for_every_scenario():
+    rng = np.random.default_rng(7)
+    cashflows = np.hstack([-rng.uniform(50, 150, (200, 1)), rng.uniform(5, 60, (200, 5))])
+    rates = irr(cashflows)
+    assert rates.shape == (200, 1)
+    assert np.all(np.isfinite(rates))
+    assert np.allclose(npv(rates, cashflows), 0.0, atol=1e-6)
+
+
+def test_irr_is_nan_without_sign_change():
+    rates = irr([[-100, 110], [100, 10], [-100, -10]])
+    assert rates[0, 0] == pytest.approx(0.1)
+    assert np.isnan(rates[1, 0])
+    assert np.isnan(rates[2, 0])
+
+
+def test_irr_of_a_loss_stays_above_minus_one():
+    # Perte de 90 % : taux de -90 %, atteint sans franchir -100 %
+    assert irr([-100, 10])[0, 0] == pytest.approx(-0.9)
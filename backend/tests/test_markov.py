@@ -0,0 +1,45 @@
+import pytest
+from app.engine.graph import WorkflowGraph
+from app.engine.markov import MarkovChainAnalyzer
+from app.engine.validation import validate_workflow
+
+NODES = [
+    {'id': 'start', 'type': 'event', 'data': {'eventType': 'start'}},
+    {'id': 'choice', 'type': 'gateway', 'data': {}},
+    {'id': 'a', 'type': 'event', 'data': {'eventType': 'end'}},
+    {'id': 'b', 'type': 'event', 'data': {'eventType': 'end'}},
+]
+
+
+def _edges(pa, pb):
+    return [
+        {'id': 'e0', 'source': 'start', 'target': 'choice'},
+        {'id': 'e1', 'source': 'choice', 'target': 'a', 'data': {'probability': pa}},
+        {'id': 'e2', 'source': 'choice', 'target': 'b', 'data': {'probability': pb}},
+    ]
+
+
+def test_branch_probabilities():
+    graph = WorkflowGraph(NODES, _edges(0.3, None))
+    assert graph.branch_probabilities(1) == [(2, 0.3), (3, pytest.approx(0.7))]
+    # Pourcentages ; au-delà de 1, renormalisation
+    assert WorkflowGraph(NODES, _edges(30, 70)).branch_probabilities(1) == [(2, 0.3), (3, 0.7)]
+    assert WorkflowGraph(NODES, _edges(0.6, 0.6)).branch_probabilities(1) == [(2, 0.5), (3, 0.5)]
+
+
+@pytest.mark.parametrize('pa, pb', [(0.3, 0.3), (0, 0)])
+def test_missing_mass_is_an_error(pa, pb):
+    graph = WorkflowGraph(NODES, _edges(pa, pb))
+    with pytest.raises(ValueError, match='Probabilités de branche incomplètes au nœud choice'):
+        graph.branch_probabilities(1)
+    with pytest.raises(ValueError):
+        MarkovChainAnalyzer.analyze(graph)
+
+    validation = validate_workflow(NODES, _edges(pa, pb))
+    assert validation.valid
+    assert [(d['code'], d['node_id']) for d in validation.warnings] == [('incomplete_branch_probabilities', 'choice')]
+
+
+def test_end_probabilities():
+    result = MarkovChainAnalyzer.analyze(WorkflowGraph(NODES, _edges(0.25, 0.75)))
+    assert result['end_probabilities'] == {'a': pytest.approx(0.25), 'b': pytest.approx(0.75)}
@@ -0,0 +1,88 @@
+import copy
+import pytest
+from app.engine.patch import apply_patch, diff_workflow, WorkflowPatchError
+
+
+def _workflow():
+    nodes = [
+        {'id': 'start', 'type': 'start', 'position': {'x': 0, 'y': 0}, 'data': {'label': 'Début'}},
+        {'id': 'task/1', 'type': 'task', 'position': {'x': 100, 'y': 0},
+         'data': {'label': 'Tâche', 'variables': [{'name': 'cost', 'value': 10}]}},
+        {'id': 'end', 'type': 'end', 'position': {'x': 200, 'y': 0}, 'data': {'label': 'Fin'}},
+    ]
+    edges = [
+        {'id': 'e1', 'source': 'start', 'target': 'task/1'},
+        {'id': 'e2', 'source': 'task/1', 'target': 'end'},
+    ]
+    return nodes, edges
+
+
+def test_diff_then_patch_round_trip():
+    nodes, edges = _workflow()
+    new_nodes = copy.deepcopy(nodes)
+    new_nodes[1]['data']['variables'][0]['value'] = 12
+    del new_nodes[2]
+    new_nodes.append({'id': 'review', 'type': 'task', 'position': {'x': 300, 'y': 0}, 'data': {}})
+    new_edges = [edges[0], {'id': 'e3', 'source': 'task/1', 'target': 'review'}]
+
+    operations = diff_workflow(nodes, edges, new_nodes, new_edges)
+    result = apply_patch(nodes, edges, operations)
+
+    assert result.nodes == new_nodes
+    assert result.edges == new_edges
+    # Les listes d'origine ne sont pas modifiées
+    assert (nodes, edges) == _workflow()
+
+
+def test_diff_of_identical_content_is_empty():
+    nodes, edges = _workflow()
+
+    assert diff_workflow(nodes, edges, copy.deepcopy(nodes), copy.deepcopy(edges)) == []
+
+
+def test_diff_rejects_reordering_and_duplicates():
+    nodes, edges = _workflow()
+
+    assert diff_workflow(nodes, edges, list(reversed(nodes)), edges) is None
+    assert diff_workflow(nodes, edges, nodes + [nodes[0]], edges) is None
+
+
+def test_patch_by_id_with_escaped_path():
+    nodes, edges = _workflow()
+
+    result = apply_patch(nodes, edges, [
+        {'op': 'test', 'path': '/nodes/task~11/data/variables/0/value', 'value': 10},
+        {'op': 'replace', 'path': '/nodes/task~11/data/variables/0/value', 'value': 15},
+    ])
+
+    assert result.nodes[1]['data']['variables'][0]['value'] == 15
+    assert result.changed
+    assert not result.layout_only
+
+
+def test_invalid_operation_applies_nothing():
+    nodes, edges = _workflow()
+
+    with pytest.raises(WorkflowPatchError) as error:
+        apply_patch(nodes, edges, [
+            {'op': 'replace', 'path': '/nodes/start/data/label', 'value': 'Départ'},
+            {'op': 'remove', 'path': '/nodes/missing'},
+        ])
+
+    assert error.value.index == 1
+    assert nodes[0]['data']['label'] == 'Début'
+
+
+def test_layout_only_detection():
+    nodes, edges = _workflow()
+
+    moved = apply_patch(nodes, edges, [
+        {'op': 'replace', 'path': '/nodes/end/position', 'value': {'x': 250, 'y': 40}},
+        {'op': 'add', 'path': '/nodes/end/selected', 'value': True},
+    ])
+    added = apply_patch(nodes, edges, [
+        {'op': 'add', 'path': '/edges/-', 'value': {'id': 'e3', 'source': 'start', 'target': 'end'}},
+    ])
+
+    assert moved.changed and moved.layout_only
+    assert not added.layout_only
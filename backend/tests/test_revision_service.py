@@ -0,0 +1,119 @@
+import copy
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.models.base import Base
+from app.models.workflow import Workflow
+from app.models.workflow_revision import WorkflowRevision
+from app.services.revision_service import RevisionService
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, 'WORKFLOW_REVISION_SNAPSHOT_INTERVAL', 4)
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _node(node_id, label, x=0):
+    return {'id': node_id, 'type': 'task', 'position': {'x': x, 'y': 0}, 'data': {'label': label}}
+
+
+def _edge(source, target):
+    return {'id': f"{source}-{target}", 'source': source, 'target': target}
+
+
+def _create(db, nodes, edges, revision=1, record=True):
+    workflow = Workflow(id='wf-1', name='Workflow', owner_id='u1', nodes=nodes, edges=edges, revision=revision)
+    db.add(workflow)
+    db.commit()
+    if record:
+        RevisionService.record(db, workflow)
+    return workflow
+
+
+def _save(db, workflow, nodes, edges):
+    """Enregistre un nouveau contenu comme le fait WorkflowService (révision suivante puis historique)"""
+    previous_nodes, previous_edges = workflow.nodes, workflow.edges
+    workflow.nodes, workflow.edges = nodes, edges
+    workflow.revision += 1
+    db.commit()
+    RevisionService.record(db, workflow, previous_nodes, previous_edges)
+
+
+def _history(db):
+    """Suite de contenus couvrant plusieurs intervalles d'instantanés (ajouts, modifications, suppressions)"""
+    nodes = [_node(f"n{k}", f"Tâche {k}") for k in range(6)]
+    edges = [_edge(f"n{k}", f"n{k + 1}") for k in range(5)]
+    workflow = _create(db, nodes, edges)
+    contents = {1: (copy.deepcopy(nodes), copy.deepcopy(edges))}
+    for revision in range(2, 12):
+        nodes = copy.deepcopy(nodes)
+        edges = copy.deepcopy(edges)
+        nodes[revision % 6]['position'] = {'x': revision * 10, 'y': 0}
+        if revision % 3 == 0:
+            nodes.append(_node(f"m{revision}", f"Ajout {revision}"))
+            edges.append(_edge(nodes[0]['id'], f"m{revision}"))
+        if revision % 4 == 0:
+            edges.pop(0)
+        _save(db, workflow, nodes, edges)
+        contents[revision] = (copy.deepcopy(nodes), copy.deepcopy(edges))
+    return workflow, contents
+
+
+def test_every_revision_is_rebuilt_exactly(db):
+    workflow, contents = _history(db)
+
+    kinds = dict(db.query(WorkflowRevision.revision, WorkflowRevision.kind).all())
+    assert sorted(kinds) == list(range(1, 12))
+    assert 'delta' in kinds.values()
+    # Au plus WORKFLOW_REVISION_SNAPSHOT_INTERVAL révisions entre deux instantanés
+    snapshots = sorted(r for r, kind in kinds.items() if kind == 'snapshot')
+    assert snapshots[0] == 1
+    assert all(b - a <= 4 for a, b in zip(snapshots, snapshots[1:] + [12]))
+
+    for revision, (nodes, edges) in contents.items():
+        rebuilt = RevisionService.get_revision(db, workflow, revision)
+        assert rebuilt['revision'] == revision
+        assert rebuilt['nodes'] == nodes
+        assert rebuilt['edges'] == edges
+
+
+def test_unknown_revision_returns_none(db):
+    workflow, _ = _history(db)
+    assert RevisionService.get_revision(db, workflow, 0) is None
+    assert RevisionService.get_revision(db, workflow, 12) is None
+
+
+def test_interrupted_delta_chain_returns_none(db):
+    workflow, contents = _history(db)
+    delta = db.query(WorkflowRevision).filter(WorkflowRevision.kind == 'delta').order_by(
+        WorkflowRevision.revision
+    ).first()
+    db.delete(delta)
+    db.commit()
+
+    assert RevisionService.get_revision(db, workflow, delta.revision) is None
+    # Les révisions antérieures au trou restent lisibles
+    previous = RevisionService.get_revision(db, workflow, delta.revision - 1)
+    assert previous['nodes'] == contents[delta.revision - 1][0]
+
+
+def test_workflow_saved_before_history_existed(db):
+    nodes = [_node('a', 'A'), _node('b', 'B')]
+    edges = [_edge('a', 'b')]
+    workflow = _create(db, nodes, edges, revision=5, record=False)
+
+    # Révision courante lue directement, sans historique
+    current = RevisionService.get_revision(db, workflow, 5)
+    assert current['nodes'] == nodes
+    assert RevisionService.get_revision(db, workflow, 4) is None
+
+    # Premier enregistrement : la révision précédente sert de point de départ
+    _save(db, workflow, nodes + [_node('c', 'C')], edges)
+    assert RevisionService.get_revision(db, workflow, 5)['nodes'] == nodes
+    assert [row['revision'] for row in RevisionService.list_revisions(db, workflow.id)] == [6, 5]
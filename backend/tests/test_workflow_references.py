@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.services.workflow_service import WorkflowService, DatabaseWorkflowResolver
+from app.engine.validation import WorkflowValidationError
+
+PARENT_NODES = [{'id': 'p', 'type': 'task', 'data': {'label': 'Parent', 'workflowRef': 'wf-child'}}]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for user_id, company_id in (('u-other', 'c-a'), ('u-owner', 'c-b'), ('u-colleague', 'c-b')):
+        session.add(User(id=user_id, email=f"{user_id}@example.com", password_hash='x',
+                         first_name='Prénom', last_name='Nom', company_id=company_id))
+    # Sous-workflow partagé dans l'entreprise c-b
+    session.add(Workflow(id='wf-child', name='Enfant', owner_id='u-owner', company_id='c-b', is_shared=True,
+                         nodes=[{'id': 'c', 'type': 'task', 'data': {'label': 'Enfant', 'formulas': 'marge = prix * 2'}}],
+                         edges=[]))
+    session.add(Workflow(id='wf-parent', name='Parent', owner_id='u-other', company_id='c-a', nodes=[], edges=[]))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _errors(validation):
+    return [d['message'] for d in validation.diagnostics if d['severity'] == 'error']
+
+
+def test_cross_tenant_reference_is_refused_at_validation(db):
+    # Le modèle compilé pour un membre de l'entreprise ne doit pas servir à un autre tenant
+    assert WorkflowService.validate_workflow(db, PARENT_NODES, [], owner_id='u-colleague').valid
+    validation = WorkflowService.validate_workflow(db, PARENT_NODES, [], owner_id='u-other')
+    assert not validation.valid
+    assert _errors(validation) == ['Workflow référencé introuvable: wf-child']
+
+
+def test_cross_tenant_reference_is_refused_at_save(db):
+    with pytest.raises(WorkflowValidationError):
+        WorkflowService.update_workflow(db, 'wf-parent', {'nodes': PARENT_NODES})
+    assert db.get(Workflow, 'wf-parent').nodes == []
+
+
+def test_resolver_and_job_definitions_are_scoped_to_the_owner(db):
+    assert DatabaseWorkflowResolver(db, 'u-other').get_definition('wf-child') is None
+    assert DatabaseWorkflowResolver(db, 'u-other').get_revision('wf-child') is None
+    assert DatabaseWorkflowResolver(db, 'u-colleague').get_definition('wf-child') is not None
+
+    root = {'wf-parent': {'id': 'wf-parent', 'nodes': PARENT_NODES, 'edges': [], 'revision': 1}}
+    assert set(WorkflowService.load_referenced_definitions(db, dict(root), 'u-other')) == {'wf-parent'}
+    assert set(WorkflowService.load_referenced_definitions(db, dict(root), 'u-colleague')) == {'wf-parent', 'wf-child'}